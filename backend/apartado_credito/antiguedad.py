@@ -0,0 +1,91 @@
+"""
+Antigüedad de saldos (aging) de créditos y apartados con saldo pendiente.
+
+Una sola consulta agrupada (UNION ALL de ventas por cliente y compras por
+proveedor) suma `monto_pendiente` por rango de días de vencimiento contados
+desde `fecha_limite`:
+
+    por_vencer  fecha_limite >= hoy
+    0_30        1 a 30 días vencida
+    31_60, 61_90, 90_mas
+
+Se excluyen las deudas finalizadas y canceladas. Las caducadas siguen
+debiendo su saldo: quedan en su rango y además se suman en `caducado`.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import CharField, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ESTADO_CADUCADO, ESTADO_CANCELADO, ESTADO_FINALIZADO
+
+RANGOS = ('por_vencer', '0_30', '31_60', '61_90', '90_mas')
+COBRAR, PAGAR = 'por_cobrar', 'por_pagar'
+
+
+def _condiciones(hoy):
+    """Q sobre la fecha límite anotada (`limite`) para cada rango."""
+    def dias(n):
+        return hoy - timedelta(days=n)
+
+    return {
+        'por_vencer': Q(limite__gte=hoy),
+        '0_30': Q(limite__lt=hoy, limite__gte=dias(30)),
+        '31_60': Q(limite__lt=dias(30), limite__gte=dias(60)),
+        '61_90': Q(limite__lt=dias(60), limite__gte=dias(90)),
+        '90_mas': Q(limite__lt=dias(90)),
+    }
+
+
+def _por_tercero(queryset, lado, tercero, relaciones, hoy):
+    """Sumas por rango agrupadas por tercero para un lado (ventas o compras)."""
+    def primero(campo):
+        campos = [F(f'{r}__{campo}') for r in relaciones]
+        return Coalesce(*campos) if len(campos) > 1 else campos[0]
+
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+    sumas = {
+        f'r_{rango}': Coalesce(Sum('pendiente', filter=condicion), Value(Decimal('0')), output_field=decimal)
+        for rango, condicion in _condiciones(hoy).items()
+    }
+    sumas['caducado'] = Coalesce(
+        Sum('pendiente', filter=Q(estado=ESTADO_CADUCADO)), Value(Decimal('0')), output_field=decimal,
+    )
+    return (
+        queryset
+        .filter(Q(*[Q(**{f'{r}__isnull': False}) for r in relaciones], _connector=Q.OR))
+        .annotate(
+            limite=primero('fecha_limite'),
+            pendiente=primero('monto_pendiente'),
+            estado=primero('estado_id'),
+        )
+        .filter(pendiente__gt=0)
+        .exclude(estado__in=[ESTADO_FINALIZADO, ESTADO_CANCELADO])
+        .values(f'{tercero}_id', f'{tercero}__nombre')
+        .annotate(lado=Value(lado, output_field=CharField()), **sumas)
+        .values_list(f'{tercero}_id', f'{tercero}__nombre', 'lado', *sumas)
+        .order_by()
+    )
+
+
+def antiguedad_saldos(hoy=None):
+    from compra_venta.models import Compra, Venta
+
+    hoy = hoy or timezone.localdate()
+    ventas = _por_tercero(Venta.objects.all(), COBRAR, 'cliente', ('credito', 'apartado'), hoy)
+    compras = _por_tercero(Compra.objects.all(), PAGAR, 'proveedor', ('credito',), hoy)
+
+    lados = {lado: {'total': dict.fromkeys([*RANGOS, 'caducado', 'total'], Decimal('0')), 'terceros': []}
+             for lado in (COBRAR, PAGAR)}
+    for pk, nombre, lado, *montos in ventas.union(compras, all=True):
+        fila = dict(zip([*RANGOS, 'caducado'], montos))
+        fila['total'] = sum(montos[:len(RANGOS)], Decimal('0'))
+        lados[lado]['terceros'].append({'id': pk, 'nombre': nombre, **fila})
+        for clave, monto in fila.items():
+            lados[lado]['total'][clave] += monto
+
+    for datos in lados.values():
+        datos['terceros'].sort(key=lambda t: (-t['total'], t['nombre'] or ''))
+    return {'fecha': hoy, 'rangos': RANGOS, **lados}
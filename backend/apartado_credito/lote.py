@@ -0,0 +1,293 @@
+"""
+Registro de cuotas en lote (cierre del día, archivos de pagos de Nequi o
+Daviplata).
+
+registrar_lote(pagos) hace en una sola transacción lo que POST /cuotas/ hace
+por cada pago, con un número de consultas que no depende de cuántos pagos
+lleguen:
+- bloquea una vez (SELECT ... FOR UPDATE) los créditos y apartados afectados,
+- valida cada pago contra el saldo que dejaron los pagos anteriores del lote
+  (mismas reglas que CuotaSerializer.validate),
+- guarda los saldos y estados con bulk_update, crea las cuotas y sus
+  movimientos de caja con bulk_create y suma a cada cuenta el neto del lote
+  con UPDATE ... SET saldo_actual = saldo_actual + n.
+
+Cada pago es un dict {credito | apartado, fecha, monto, metodo_pago}. Los
+pagos inválidos se reportan con sus errores y no se aplican; con
+todo_o_nada=True un solo error revierte el lote completo.
+"""
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date
+
+from siged.eventos import publicar
+from siged.versiones import invalidar
+
+from .models import ESTADO_FINALIZADO, Apartado, Credito, Cuota
+
+CERO = Decimal('0.00')
+MAXIMO_LOTE = 5000
+
+
+class LoteRechazado(Exception):
+    """Con todo_o_nada, algún pago no pasó la validación (no se guardó nada)."""
+
+    def __init__(self, resultados):
+        super().__init__('El lote tiene pagos inválidos')
+        self.resultados = resultados
+
+
+# ============ LECTURA ============
+
+def _entero(valor):
+    try:
+        return int(valor) if valor not in (None, '') else None
+    except (TypeError, ValueError):
+        return False
+
+
+def _leer_pago(pago):
+    """Normaliza un pago; retorna (datos, errores)."""
+    if not isinstance(pago, dict):
+        return None, {'non_field_errors': 'Cada pago debe ser un objeto.'}
+    errores = {}
+    datos = {campo: _entero(pago.get(campo)) for campo in ('credito', 'apartado', 'metodo_pago')}
+    for campo, valor in datos.items():
+        if valor is False:
+            errores[campo] = 'Id inválido.'
+
+    if datos['credito'] and datos['apartado']:
+        errores['non_field_errors'] = 'La cuota no puede pertenecer tanto a un crédito como a un apartado.'
+    elif not datos['credito'] and not datos['apartado'] and not errores:
+        errores['non_field_errors'] = 'La cuota debe pertenecer a un crédito o a un apartado.'
+    if not datos['metodo_pago'] and 'metodo_pago' not in errores:
+        errores['metodo_pago'] = 'Este campo es requerido.'
+
+    try:
+        datos['monto'] = Decimal(str(pago.get('monto'))).quantize(Decimal('0.01'))
+        if datos['monto'] <= 0:
+            errores['monto'] = 'El monto de la cuota debe ser mayor que cero.'
+    except (InvalidOperation, ValueError):
+        errores['monto'] = 'Monto inválido.'
+
+    fecha = pago.get('fecha')
+    try:
+        datos['fecha'] = parse_date(str(fecha)) if fecha else None
+    except ValueError:
+        datos['fecha'] = None
+    if datos['fecha'] is None:
+        errores['fecha'] = 'Fecha inválida (use AAAA-MM-DD).'
+    return datos, errores
+
+
+# ============ REGLAS ============
+
+def _aplicar(deuda, nombre, pago):
+    """
+    Valida el pago contra el saldo en memoria de la deuda y, si pasa, lo
+    descuenta igual que CuotaViewSet.perform_create. Retorna los errores.
+    """
+    errores = {}
+    if deuda.fecha_limite and pago['fecha'] > deuda.fecha_limite:
+        errores['fecha'] = f'La fecha de la cuota no puede ser posterior a la fecha límite del {nombre}.'
+    if deuda.cuotas_pendientes is not None and deuda.cuotas_pendientes <= 0:
+        errores[nombre] = f'No hay cuotas pendientes en este {nombre}.'
+    pendiente = deuda.monto_pendiente if deuda.monto_pendiente is not None else deuda.monto_total
+    if pendiente is not None and pago['monto'] > pendiente:
+        errores['monto'] = f'El monto de la cuota no puede exceder el monto pendiente del {nombre}.'
+    if errores:
+        return errores
+
+    deuda.cuotas_pendientes = max(0, deuda.cuotas_pendientes - 1)
+    deuda.monto_pendiente = max(CERO, pendiente - pago['monto'])
+    if deuda.monto_pendiente == CERO:
+        deuda.estado_id = ESTADO_FINALIZADO
+    return {}
+
+
+# ============ CAJA ============
+
+def _contexto_caja(creditos, apartados, metodos):
+    """
+    Lo que registrar_cuota_en_caja busca por cada cuota, leído una vez:
+    venta/compra de cada deuda, cuenta por método de pago y tipos de movimiento.
+    """
+    from caja.models import TipoMovimiento
+    from caja.signals import obtener_cuenta_por_metodo_pago
+    from compra_venta.models import Compra, Venta
+
+    origen = {}
+    ventas = (
+        Venta.objects
+        .filter(Q(credito_id__in=creditos) | Q(apartado_id__in=apartados))
+        .order_by('id')
+        .values_list('id', 'credito_id', 'apartado_id', 'cliente__nombre', 'cliente__cedula')
+    )
+    for venta_id, credito_id, apartado_id, nombre, cedula in ventas:
+        clave = ('credito', credito_id) if credito_id else ('apartado', apartado_id)
+        # Mismo texto que str(Cliente)
+        origen.setdefault(clave, ('venta', venta_id, f'{nombre} - {cedula}'))
+    if creditos:
+        compras = (
+            Compra.objects.filter(credito_id__in=creditos).order_by('id')
+            .values_list('id', 'credito_id', 'proveedor__nombre')
+        )
+        for compra_id, credito_id, proveedor in compras:
+            origen.setdefault(('credito', credito_id), ('compra', compra_id, proveedor))
+
+    tipos = {
+        nombre: TipoMovimiento.objects.get_or_create(
+            nombre=nombre, defaults={'tipo': tipo, 'descripcion': descripcion},
+        )[0]
+        for nombre, tipo, descripcion in (
+            ('Abono Cliente Crédito', TipoMovimiento.ENTRADA, 'Ingreso por abono/cuota de cliente con crédito'),
+            ('Abono Proveedor Crédito', TipoMovimiento.SALIDA, 'Egreso por abono/cuota a proveedor con crédito'),
+            ('Abono Cliente Apartado', TipoMovimiento.ENTRADA, 'Ingreso por abono/cuota de cliente con apartado'),
+        )
+    }
+    cuentas = {pk: obtener_cuenta_por_metodo_pago(metodo) for pk, metodo in metodos.items()}
+    return origen, tipos, cuentas
+
+
+def _movimiento(cuota, origen, tipos, cuentas, metodos):
+    """MovimientoCaja (sin guardar) equivalente al de registrar_cuota_en_caja."""
+    from caja.models import MovimientoCaja
+
+    if cuota.credito_id:
+        fuente = origen.get(('credito', cuota.credito_id))
+        if fuente is None:
+            return None  # crédito sin venta/compra asociada
+        tipo_origen, origen_id, tercero = fuente
+        if tipo_origen == 'venta':
+            tipo = tipos['Abono Cliente Crédito']
+            descripcion = f'Abono de cliente {tercero} - Crédito #{cuota.credito_id} - Venta #{origen_id}'
+        else:
+            tipo = tipos['Abono Proveedor Crédito']
+            descripcion = f'Abono a proveedor {tercero} - Crédito #{cuota.credito_id} - Compra #{origen_id}'
+    else:
+        fuente = origen.get(('apartado', cuota.apartado_id))
+        if fuente is None:
+            return None
+        _, venta_id, cliente = fuente
+        tipo = tipos['Abono Cliente Apartado']
+        descripcion = f'Abono de apartado {cliente} - Apartado #{cuota.apartado_id} - Venta #{venta_id}'
+
+    return MovimientoCaja(
+        cuenta=cuentas[cuota.metodo_pago_id],
+        tipo_movimiento=tipo,
+        monto=cuota.monto,
+        descripcion=descripcion,
+        cuota=cuota,
+        observaciones=f'Método: {metodos[cuota.metodo_pago_id].nombre}',
+    )
+
+
+def _publicar_caja(movimientos, cuentas_afectadas):
+    """Mismos eventos que las señales de caja, con una consulta por tipo al confirmar."""
+    from caja.models import CuentaBancaria, MovimientoCaja
+    from caja.serializers import CuentaBancariaSerializer, movimientos_detallados_rapido
+
+    filas = {}
+
+    def fila(pk):
+        if not filas:
+            ids = [m.pk for m in movimientos]
+            filas.update((f['id'], f) for f in movimientos_detallados_rapido(MovimientoCaja.objects.filter(pk__in=ids)))
+        return filas.get(pk, {'id': pk})
+
+    for movimiento in movimientos:
+        publicar('movimiento_caja', lambda pk=movimiento.pk: fila(pk), clave=movimiento.pk)
+
+    saldos = {}
+
+    def saldo(pk):
+        if not saldos:
+            cuentas = CuentaBancaria.objects.filter(pk__in=cuentas_afectadas)
+            saldos.update((c['id'], c) for c in CuentaBancariaSerializer(cuentas, many=True).data)
+        return saldos.get(pk, {'id': pk})
+
+    for pk in cuentas_afectadas:
+        publicar('saldo_cuenta', lambda pk=pk: saldo(pk), clave=pk)
+
+
+# ============ LOTE ============
+
+def registrar_lote(pagos, todo_o_nada=False):
+    """
+    Registra los `pagos` en una transacción. Retorna
+    {'recibidos', 'creadas', 'rechazadas', 'resultados': [...]} con un
+    resultado por pago en el mismo orden ({'indice', 'ok', 'cuota'} o
+    {'indice', 'ok', 'errores'}). Con `todo_o_nada` lanza LoteRechazado si
+    algún pago es inválido.
+    """
+    from caja.models import CuentaBancaria, MovimientoCaja, TipoMovimiento
+    from dominios_comunes.models import MetodoPago
+
+    leidos = [_leer_pago(pago) for pago in pagos]
+    ids = {campo: {d[campo] for d, e in leidos if d and d.get(campo) and campo not in e}
+           for campo in ('credito', 'apartado', 'metodo_pago')}
+
+    with transaction.atomic():
+        # Un solo bloqueo por tabla; el orden por id evita interbloqueos entre lotes
+        creditos = Credito.objects.select_for_update().order_by('id').in_bulk(ids['credito'])
+        apartados = Apartado.objects.select_for_update().order_by('id').in_bulk(ids['apartado'])
+        metodos = MetodoPago.objects.in_bulk(ids['metodo_pago'])
+
+        resultados, cuotas = [], []
+        for indice, (datos, errores) in enumerate(leidos):
+            if not errores:
+                if datos['metodo_pago'] not in metodos:
+                    errores['metodo_pago'] = 'Método de pago inexistente.'
+                nombre = 'credito' if datos['credito'] else 'apartado'
+                deuda = (creditos if datos['credito'] else apartados).get(datos[nombre])
+                if deuda is None:
+                    errores[nombre] = f'{"Crédito" if datos["credito"] else "Apartado"} inexistente.'
+                elif not errores:
+                    errores = _aplicar(deuda, nombre, datos)
+            if errores:
+                resultados.append({'indice': indice, 'ok': False, 'errores': errores})
+                continue
+            cuotas.append(Cuota(
+                credito_id=datos['credito'], apartado_id=datos['apartado'], fecha=datos['fecha'],
+                monto=datos['monto'], metodo_pago_id=datos['metodo_pago'],
+            ))
+            resultados.append({'indice': indice, 'ok': True})
+
+        rechazadas = len(resultados) - len(cuotas)
+        if rechazadas and todo_o_nada:
+            raise LoteRechazado(resultados)
+
+        if cuotas:
+            campos = ['cuotas_pendientes', 'monto_pendiente', 'estado']
+            pagados_credito = {c.credito_id for c in cuotas if c.credito_id}
+            pagados_apartado = {c.apartado_id for c in cuotas if c.apartado_id}
+            Credito.objects.bulk_update([creditos[pk] for pk in pagados_credito], campos)
+            Apartado.objects.bulk_update([apartados[pk] for pk in pagados_apartado], campos)
+            Cuota.objects.bulk_create(cuotas)
+
+            usados = {c.metodo_pago_id: metodos[c.metodo_pago_id] for c in cuotas}
+            origen, tipos, cuentas = _contexto_caja(pagados_credito, pagados_apartado, usados)
+            movimientos = [m for m in (_movimiento(c, origen, tipos, cuentas, metodos) for c in cuotas) if m]
+            MovimientoCaja.objects.bulk_create(movimientos)
+
+            netos = defaultdict(Decimal)
+            for m in movimientos:
+                signo = 1 if m.tipo_movimiento.tipo == TipoMovimiento.ENTRADA else -1
+                netos[m.cuenta_id] += signo * m.monto
+            for cuenta_id, neto in netos.items():
+                CuentaBancaria.objects.filter(pk=cuenta_id).update(saldo_actual=F('saldo_actual') + neto)
+
+            # bulk_create / bulk_update / update() no disparan post_save
+            invalidar(Credito, Apartado, Cuota, MovimientoCaja, CuentaBancaria)
+            _publicar_caja(movimientos, list(netos))
+            publicar('dashboard', clave='resumen')
+
+        creadas = iter(cuotas)
+        for resultado in resultados:
+            if resultado['ok']:
+                resultado['cuota'] = next(creadas).pk
+
+    return {'recibidos': len(pagos), 'creadas': len(cuotas), 'rechazadas': rechazadas, 'resultados': resultados}
@@ -0,0 +1,102 @@
+# apartado_credito/management/commands/benchmark_cuotas_lote.py
+import contextlib
+import io
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apartado_credito.lote import registrar_lote
+from apartado_credito.models import ESTADO_EN_PROCESO, Apartado, Credito
+from compra_venta.models import Venta
+from dominios_comunes.models import Estado, MetodoPago
+from terceros.models import Cliente
+
+
+class _Revertir(Exception):
+    pass
+
+
+class _Contador:
+    """Cuenta las consultas ejecutadas (sin el tope de connection.queries)."""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara registrar pagos uno a uno con POST /cuotas/ contra POST /cuotas/lote/ '
+        '(registrar_lote). Todo se revierte al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pagos', type=int, default=500)
+        parser.add_argument('--cuotas-por-deuda', type=int, default=5)
+
+    def _deudas(self, pagos, por_deuda, etiqueta):
+        """Créditos y apartados de venta con `por_deuda` cuotas; retorna la lista de pagos."""
+        limite = timezone.localdate() + timedelta(days=90)
+        metodo, _ = MetodoPago.objects.get_or_create(nombre='Nequi')
+        cliente = Cliente.objects.create(nombre=f'Benchmark {etiqueta}', cedula=f'BENCH-{etiqueta}', telefono='300')
+        monto = Decimal('10000.00')
+        resultado = []
+        for i in range(-(-pagos // por_deuda)):
+            extra = {}
+            if i % 2:
+                extra['apartado'] = Apartado.objects.create(
+                    cantidad_cuotas=por_deuda, cuotas_pendientes=por_deuda,
+                    estado_id=ESTADO_EN_PROCESO, fecha_limite=limite,
+                )
+            else:
+                extra['credito'] = Credito.objects.create(
+                    cantidad_cuotas=por_deuda, cuotas_pendientes=por_deuda, interes=Decimal('0'),
+                    estado_id=ESTADO_EN_PROCESO, fecha_limite=limite,
+                )
+            Venta.objects.create(cliente=cliente, metodo_pago=metodo, total=monto * por_deuda, **extra)
+            clave, deuda = next(iter(extra.items()))
+            resultado += [
+                {clave: deuda.pk, 'fecha': str(timezone.localdate()), 'monto': str(monto), 'metodo_pago': metodo.pk}
+                for _ in range(por_deuda)
+            ]
+        return resultado[:pagos]
+
+    def handle(self, *args, **options):
+        pagos, por_deuda = options['pagos'], options['cuotas_por_deuda']
+        cliente = APIClient()
+        try:
+            with transaction.atomic(), contextlib.redirect_stdout(io.StringIO()):
+                for estado_id, nombre in [(1, 'Finalizado'), (ESTADO_EN_PROCESO, 'En Proceso')]:
+                    Estado.objects.get_or_create(id=estado_id, defaults={'nombre': nombre})
+
+                uno_a_uno = self._deudas(pagos, por_deuda, 'uno')
+                consultas_uno = _Contador()
+                with connection.execute_wrapper(consultas_uno):
+                    inicio = time.perf_counter()
+                    for pago in uno_a_uno:
+                        cliente.post('/api/apartado_credito/cuotas/', pago, format='json')
+                    segundos_uno = time.perf_counter() - inicio
+
+                en_lote = self._deudas(pagos, por_deuda, 'lote')
+                consultas_lote = _Contador()
+                with connection.execute_wrapper(consultas_lote):
+                    inicio = time.perf_counter()
+                    resultado = registrar_lote(en_lote)
+                    segundos_lote = time.perf_counter() - inicio
+                raise _Revertir
+        except _Revertir:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'📊 Registro de {pagos:,} pagos ({resultado["creadas"]:,} creados en lote)'))
+        self.stdout.write(f'  {"uno a uno":<10} {segundos_uno:>8.2f} s {consultas_uno.total:>8,} consultas'
+                          f' {pagos / segundos_uno:>10,.0f} pagos/s')
+        self.stdout.write(f'  {"lote":<10} {segundos_lote:>8.2f} s {consultas_lote.total:>8,} consultas'
+                          f' {pagos / segundos_lote:>10,.0f} pagos/s   (x{segundos_uno / segundos_lote:.1f})')
@@ -7,6 +7,8 @@ from decimal import Decimal
 from dominios_comunes.models import Estado
 from django.utils import timezone
 from django.db import transaction
+from prendas import inventario
+from prendas.models import MovimientoInventario
 
 ESTADO_CANCELADO = 3  # ID del estado "Cancelado"
 ESTADO_FINALIZADO = 1
@@ -72,9 +74,7 @@ class Apartado(models.Model):
 
         # Revertir stock
         for p in venta.prendas.all():
-            prenda = p.prenda
-            prenda.existencia += p.cantidad
-            prenda.save(update_fields=['existencia'])
+            inventario.mover(p.prenda, p.cantidad, MovimientoInventario.CANCELACION, f'apartado:{self.pk}')
 
         # Actualizar estado
         self.estado_id = ESTADO_CANCELADO
@@ -107,9 +107,8 @@ class Apartado(models.Model):
                 try:
                     venta = Venta.objects.get(apartado=self)
                     for prenda_venta in venta.prendas.all():
-                        prenda = prenda_venta.prenda
-                        prenda.existencia += prenda_venta.cantidad
-                        prenda.save(update_fields=['existencia'])
+                        inventario.mover(prenda_venta.prenda, prenda_venta.cantidad,
+                                         MovimientoInventario.CADUCIDAD, f'apartado:{self.pk}')
                 except Venta.DoesNotExist:
                     pass
                 
@@ -194,9 +193,8 @@ class Credito(models.Model):
             try:
                 venta = Venta.objects.get(credito=self)
                 for prenda_venta in venta.prendas.all():
-                    prenda = prenda_venta.prenda
-                    prenda.existencia += prenda_venta.cantidad
-                    prenda.save(update_fields=['existencia'])
+                    inventario.mover(prenda_venta.prenda, prenda_venta.cantidad,
+                                     MovimientoInventario.CANCELACION, f'credito:{self.pk}')
             except Venta.DoesNotExist:
                 pass
             
@@ -204,9 +202,8 @@ class Credito(models.Model):
             try:
                 compra = Compra.objects.get(credito=self)
                 for prenda_compra in compra.prendas.all():
-                    prenda = prenda_compra.prenda
-                    prenda.existencia -= prenda_compra.cantidad
-                    prenda.save(update_fields=['existencia'])
+                    inventario.mover(prenda_compra.prenda, -prenda_compra.cantidad,
+                                     MovimientoInventario.CANCELACION, f'credito:{self.pk}')
             except Compra.DoesNotExist:
                 pass
             
@@ -234,9 +231,8 @@ class Credito(models.Model):
                 try:
                     venta = Venta.objects.get(credito=self)
                     for prenda_venta in venta.prendas.all():
-                        prenda = prenda_venta.prenda
-                        prenda.existencia += prenda_venta.cantidad
-                        prenda.save(update_fields=['existencia'])
+                        inventario.mover(prenda_venta.prenda, prenda_venta.cantidad,
+                                         MovimientoInventario.CADUCIDAD, f'credito:{self.pk}')
                 except Venta.DoesNotExist:
                     pass
                 
@@ -244,9 +240,8 @@ class Credito(models.Model):
                 try:
                     compra = Compra.objects.get(credito=self)
                     for prenda_compra in compra.prendas.all():
-                        prenda = prenda_compra.prenda
-                        prenda.existencia -= prenda_compra.cantidad
-                        prenda.save(update_fields=['existencia'])
+                        inventario.mover(prenda_compra.prenda, -prenda_compra.cantidad,
+                                         MovimientoInventario.CADUCIDAD, f'credito:{self.pk}')
                 except Compra.DoesNotExist:
                     pass
             return True
@@ -0,0 +1,181 @@
+"""
+Plan de cuotas y proyección de flujo de caja de créditos y apartados abiertos.
+
+No hay un calendario de cuotas guardado: el plan se deduce de cada deuda.
+- Las `cantidad_cuotas` fechas se reparten uniformemente entre la fecha de la
+  venta/compra y `fecha_limite` (la última cae en la fecha límite).
+- Quedan por cobrar/pagar las últimas `cuotas_pendientes` de ese calendario;
+  el `monto_pendiente` (que ya incluye el interés) se reparte en partes iguales
+  y la última cuota absorbe el redondeo.
+
+Todas las deudas abiertas se leen en tres consultas a un arreglo NumPy y el
+plan completo se genera a la vez (np.repeat + aritmética de fechas), sin
+recorrer crédito por crédito. Los montos viajan en centavos enteros
+(siged/dinero.py): la base los entrega ya convertidos y las sumas por período
+son int64 exactas.
+
+Entradas: créditos y apartados de ventas. Salidas: créditos de compras.
+"""
+from datetime import date
+
+import numpy as np
+from django.utils import timezone
+
+from siged.dinero import en_unidades, sumar_por
+
+from .models import ESTADO_CADUCADO, ESTADO_CANCELADO, ESTADO_FINALIZADO
+
+AGRUPACIONES = ('semana', 'mes')
+ENTRADA, SALIDA = 1, -1
+TIPOS = ('credito_venta', 'apartado', 'credito_compra')
+
+TIPO_DEUDA = np.dtype([
+    ('id', np.int64),
+    ('tipo', np.int8),
+    ('origen', 'datetime64[D]'),
+    ('limite', 'datetime64[D]'),
+    ('cantidad_cuotas', np.int64),
+    ('cuotas_pendientes', np.int64),
+    ('centavos', np.int64),
+])
+_SENTIDO = np.array([ENTRADA, ENTRADA, SALIDA])
+
+
+# ============ CARGA ============
+
+def _abiertas(queryset, relacion):
+    """Filas (origen, id, cuotas, pendientes, centavos pendientes, límite) de las deudas abiertas."""
+    return (
+        queryset
+        .filter(**{f'{relacion}__isnull': False, f'{relacion}__monto_pendiente__gt': 0})
+        .exclude(**{f'{relacion}__estado_id__in': [ESTADO_FINALIZADO, ESTADO_CANCELADO, ESTADO_CADUCADO]})
+        .order_by()
+        .annotate(centavos=en_unidades(f'{relacion}__monto_pendiente'))
+        .values_list(
+            'fecha', f'{relacion}_id', f'{relacion}__cantidad_cuotas', f'{relacion}__cuotas_pendientes',
+            'centavos', f'{relacion}__fecha_limite',
+        )
+    )
+
+
+def cargar_deudas():
+    """Arreglo estructurado (TIPO_DEUDA) con los créditos y apartados abiertos."""
+    from compra_venta.models import Compra, Venta
+
+    fuentes = [
+        (0, _abiertas(Venta.objects, 'credito')),
+        (1, _abiertas(Venta.objects, 'apartado')),
+        (2, _abiertas(Compra.objects, 'credito')),
+    ]
+    filas = [
+        (pk, tipo, origen, max(limite, origen), cantidad, min(max(pendientes, 1), cantidad), centavos)
+        for tipo, queryset in fuentes
+        for origen, pk, cantidad, pendientes, centavos, limite in queryset
+    ]
+    return np.array(filas, dtype=TIPO_DEUDA)
+
+
+# ============ PLAN DE CUOTAS ============
+
+def generar_plan(deudas):
+    """
+    Cuotas esperadas de todas las deudas a la vez. Retorna un dict de arreglos
+    alineados: deuda (índice en `deudas`), numero (1..cantidad_cuotas),
+    vence (datetime64[D]) y centavos.
+    """
+    pendientes = deudas['cuotas_pendientes']
+    total = int(pendientes.sum())
+    deuda = np.repeat(np.arange(len(deudas)), pendientes)
+    # Posición de cada cuota dentro de su deuda: 0..pendientes-1
+    inicio = np.repeat(np.cumsum(pendientes) - pendientes, pendientes)
+    posicion = np.arange(total) - inicio
+
+    cantidad = deudas['cantidad_cuotas'][deuda]
+    numero = cantidad - pendientes[deuda] + posicion + 1
+    plazo = (deudas['limite'] - deudas['origen']).astype(np.int64)[deuda]
+    vence = deudas['origen'][deuda] + np.rint(numero * plazo / cantidad).astype(np.int64)
+
+    base = deudas['centavos'] // pendientes
+    centavos = base[deuda]
+    ultima = posicion == pendientes[deuda] - 1
+    centavos[ultima] += (deudas['centavos'] - base * pendientes)[deuda[ultima]]
+    return {'deuda': deuda, 'numero': numero, 'vence': vence, 'centavos': centavos}
+
+
+def _inicio_periodo(fechas, agrupar):
+    if agrupar == 'mes':
+        return fechas.astype('datetime64[M]').astype('datetime64[D]')
+    # 1970-01-01 fue jueves: días desde el lunes = (dias + 3) % 7
+    dias = fechas.astype(np.int64)
+    return (dias - (dias + 3) % 7).astype('datetime64[D]')
+
+
+def proyectar(deudas, plan, hoy, agrupar='mes', hasta=None):
+    """
+    Entradas y salidas esperadas por período (semana que empieza lunes o mes).
+    Las cuotas con fecha anterior a `hoy` van a `vencido`.
+    """
+    hoy = np.datetime64(hoy, 'D')
+    sentido = _SENTIDO[deudas['tipo'][plan['deuda']]]
+    vence, centavos = plan['vence'], plan['centavos']
+    vencida = vence < hoy
+    futura = ~vencida if hasta is None else ~vencida & (vence <= np.datetime64(hasta, 'D'))
+
+    def montos(mascara):
+        entradas = int(centavos[mascara & (sentido == ENTRADA)].sum())
+        salidas = int(centavos[mascara & (sentido == SALIDA)].sum())
+        return {
+            'entradas': entradas / 100, 'salidas': salidas / 100, 'neto': (entradas - salidas) / 100,
+            'cuotas_entrada': int((mascara & (sentido == ENTRADA)).sum()),
+            'cuotas_salida': int((mascara & (sentido == SALIDA)).sum()),
+        }
+
+    periodos = _inicio_periodo(vence[futura], agrupar)
+    unicos, indice = np.unique(periodos, return_inverse=True)
+    futuros = centavos[futura]
+    signo = sentido[futura]
+    entradas = sumar_por(indice, np.where(signo == ENTRADA, futuros, 0), minlength=len(unicos))
+    salidas = sumar_por(indice, np.where(signo == SALIDA, futuros, 0), minlength=len(unicos))
+    cuotas_entrada = np.bincount(indice, weights=signo == ENTRADA, minlength=len(unicos))
+    cuotas_salida = np.bincount(indice, weights=signo == SALIDA, minlength=len(unicos))
+
+    return {
+        'vencido': montos(vencida),
+        'periodos': [
+            {
+                'periodo': str(periodo),
+                'entradas': int(entradas[i]) / 100,
+                'salidas': int(salidas[i]) / 100,
+                'neto': int(entradas[i] - salidas[i]) / 100,
+                'cuotas_entrada': int(cuotas_entrada[i]),
+                'cuotas_salida': int(cuotas_salida[i]),
+            }
+            for i, periodo in enumerate(unicos)
+        ],
+        'total': montos(futura),
+    }
+
+
+def proyeccion_flujo(agrupar='mes', hasta=None, incluir_cuotas=False):
+    """Proyección de flujo de caja de todas las deudas abiertas desde hoy."""
+    hoy = timezone.localdate()
+    deudas = cargar_deudas()
+    plan = generar_plan(deudas)
+    datos = {
+        'agrupar': agrupar,
+        'desde': hoy,
+        'hasta': hasta,
+        **proyectar(deudas, plan, hoy, agrupar, hasta),
+    }
+    if incluir_cuotas:
+        origen = deudas[plan['deuda']]
+        datos['cuotas'] = [
+            {
+                'tipo': TIPOS[tipo], 'id': int(pk), 'numero': int(numero),
+                'fecha': date.fromisoformat(str(vence)), 'monto': centavos / 100,
+            }
+            for tipo, pk, numero, vence, centavos in zip(
+                origen['tipo'], origen['id'], plan['numero'], plan['vence'], plan['centavos'].tolist(),
+            )
+        ]
+    return datos
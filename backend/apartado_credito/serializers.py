@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from decimal import Decimal
+from siged.dinero import Dinero
 from .models import Apartado, Credito, Cuota
 
 
@@ -174,7 +174,7 @@ class CuotaSerializer(serializers.ModelSerializer):
             # monto pendiente
             monto_pend = credito.monto_pendiente if credito.monto_pendiente is not None else credito.monto_total
             if monto is not None and monto_pend is not None:
-                if Decimal(str(monto)) > Decimal(str(monto_pend)):
+                if Dinero.de(monto) > Dinero.de(monto_pend):
                     errors['monto'] = 'El monto de la cuota no puede exceder el monto pendiente del crédito.'
 
         if apartado:
@@ -186,7 +186,7 @@ class CuotaSerializer(serializers.ModelSerializer):
 
             monto_pend = apartado.monto_pendiente if apartado.monto_pendiente is not None else apartado.monto_total
             if monto is not None and monto_pend is not None:
-                if Decimal(str(monto)) > Decimal(str(monto_pend)):
+                if Dinero.de(monto) > Dinero.de(monto_pend):
                     errors['monto'] = 'El monto de la cuota no puede exceder el monto pendiente del apartado.'
 
         if errors:
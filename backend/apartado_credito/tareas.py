@@ -0,0 +1,27 @@
+# apartado_credito/tareas.py
+from django.conf import settings
+from django.utils import timezone
+
+from tareas.cola import tarea
+
+from .models import Apartado, Credito, ESTADO_EN_PROCESO
+
+
+def vencidos(modelo):
+    """Deudas en proceso con fecha límite pasada y saldo pendiente."""
+    return modelo.objects.filter(
+        fecha_limite__lt=timezone.now().date(),
+        estado_id=ESTADO_EN_PROCESO,
+        monto_pendiente__gt=0
+    )
+
+
+@tarea(hora=settings.TAREAS_HORA_NOCTURNA)
+def caducar_deudas():
+    """
+    Pasa a CADUCADO los créditos y apartados vencidos (y devuelve al
+    inventario las prendas de los apartados). Retorna (créditos, apartados).
+    """
+    creditos = sum(credito.verificar_y_actualizar_estado() for credito in vencidos(Credito))
+    apartados = sum(apartado.verificar_y_actualizar_estado() for apartado in vencidos(Apartado))
+    return creditos, apartados
@@ -1,3 +1,141 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import connection
+from django.db.models import Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from siged.presupuesto_consultas import PresupuestoConsultasMixin, sembrar
+
+from .antiguedad import antiguedad_saldos
+from .lote import registrar_lote
+from .models import ESTADO_FINALIZADO, Apartado, Credito, Cuota
+from .proyeccion import TIPO_DEUDA, generar_plan, proyectar
+
+
+class PresupuestoConsultasApartadoCreditoTests(PresupuestoConsultasMixin, TestCase):
+    """Ningún endpoint GET de apartado_credito debe crecer en consultas con el número de filas."""
+    app_label = 'apartado_credito'
+
+
+class ProyeccionFlujoTests(TestCase):
+    """El plan de cuotas reparte el pendiente en las cuotas restantes y la proyección lo totaliza."""
+
+    def test_plan_de_cuotas(self):
+        deudas = np.array([
+            (1, 0, date(2026, 1, 1), date(2026, 4, 1), 3, 2, 10001),
+            (2, 2, date(2026, 1, 1), date(2026, 1, 31), 1, 1, 500),
+        ], dtype=TIPO_DEUDA)
+        plan = generar_plan(deudas)
+        self.assertEqual(plan['numero'].tolist(), [2, 3, 1])
+        self.assertEqual([str(f) for f in plan['vence']], ['2026-03-02', '2026-04-01', '2026-01-31'])
+        self.assertEqual(plan['centavos'].tolist(), [5000, 5001, 500])
+
+        flujo = proyectar(deudas, plan, date(2026, 2, 1), agrupar='mes')
+        self.assertEqual(flujo['vencido']['salidas'], 5.0)
+        self.assertEqual([(p['periodo'], p['entradas']) for p in flujo['periodos']],
+                         [('2026-03-01', 50.0), ('2026-04-01', 50.01)])
+
+    def test_endpoint_totaliza_el_pendiente(self):
+        sembrar(2)
+        datos = self.client.get('/api/apartado_credito/proyeccion-flujo/', {'agrupar': 'semana', 'cuotas': 1}).json()
+        pendiente_ventas = (
+            Credito.objects.filter(ventas__isnull=False).aggregate(t=Sum('monto_pendiente'))['t']
+            + Apartado.objects.aggregate(t=Sum('monto_pendiente'))['t']
+        )
+        self.assertAlmostEqual(datos['total']['entradas'] + datos['vencido']['entradas'], float(pendiente_ventas))
+        self.assertEqual(sum(c['monto'] for c in datos['cuotas'] if c['tipo'] == 'apartado'),
+                         float(Apartado.objects.aggregate(t=Sum('monto_pendiente'))['t']))
+        self.assertEqual(self.client.get('/api/apartado_credito/proyeccion-flujo/', {'agrupar': 'año'}).status_code, 400)
+
+    def test_hasta_invalido(self):
+        url = '/api/apartado_credito/proyeccion-flujo/'
+        for valor in ('mañana', '2024-02-30'):
+            with self.subTest(hasta=valor):
+                respuesta = self.client.get(url, {'hasta': valor})
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('hasta', respuesta.json())
+
+
+class AntiguedadSaldosTests(TestCase):
+    """El aging suma el pendiente por rango de vencimiento en una sola consulta."""
+
+    def test_rangos_por_lado(self):
+        sembrar(2)
+        hoy = timezone.localdate()
+        Credito.objects.filter(compras__isnull=False).update(fecha_limite=hoy - timedelta(days=45))
+        Apartado.objects.update(fecha_limite=hoy - timedelta(days=100))
+
+        with self.assertNumQueries(1):
+            datos = antiguedad_saldos()
+        pendiente_compras = Credito.objects.filter(compras__isnull=False).aggregate(t=Sum('monto_pendiente'))['t']
+        pendiente_apartados = Apartado.objects.aggregate(t=Sum('monto_pendiente'))['t']
+        self.assertEqual(datos['por_pagar']['total']['31_60'], pendiente_compras)
+        self.assertEqual(datos['por_pagar']['total']['total'], pendiente_compras)
+        self.assertEqual(datos['por_cobrar']['total']['90_mas'], pendiente_apartados)
+        self.assertEqual(len(datos['por_cobrar']['terceros']), 2)
+
+        respuesta = self.client.get('/api/apartado_credito/antiguedad-saldos/').json()
+        self.assertEqual(Decimal(respuesta['por_pagar']['total']['31_60']), pendiente_compras)
+
+
+class CuotasLoteTests(TestCase):
+    """El lote aplica los pagos en orden sobre el saldo acumulado y no crece en consultas."""
+
+    def _pagos(self, deuda, clave, montos):
+        from dominios_comunes.models import MetodoPago
+        metodo = MetodoPago.objects.order_by('pk').first()
+        return [{clave: deuda.pk, 'fecha': str(timezone.localdate()), 'monto': str(m), 'metodo_pago': metodo.pk}
+                for m in montos]
+
+    def test_aplica_saldos_estado_y_caja(self):
+        from caja.models import CuentaBancaria, MovimientoCaja
+        sembrar(1)
+        credito = Credito.objects.get(ventas__isnull=False)
+        apartado = Apartado.objects.get()
+        cuotas_antes = credito.cuotas_pendientes
+        saldo_caja = CuentaBancaria.objects.aggregate(t=Sum('saldo_actual'))['t']
+        pagos = (
+            self._pagos(credito, 'credito', [1000, credito.monto_pendiente - 1000])
+            + self._pagos(apartado, 'apartado', [apartado.monto_pendiente + 1])
+            + [{'credito': 999999, 'fecha': 'ayer', 'monto': 'x'}]
+        )
+        respuesta = self.client.post('/api/apartado_credito/cuotas/lote/', {'pagos': pagos}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+        datos = respuesta.json()
+        self.assertEqual((datos['creadas'], datos['rechazadas']), (2, 2))
+        self.assertEqual([r['ok'] for r in datos['resultados']], [True, True, False, False])
+        self.assertIn('monto', datos['resultados'][2]['errores'])
+
+        credito.refresh_from_db()
+        self.assertEqual((credito.monto_pendiente, credito.cuotas_pendientes), (Decimal('0.00'), cuotas_antes - 2))
+        self.assertEqual(credito.estado_id, ESTADO_FINALIZADO)
+        cuotas = [r['cuota'] for r in datos['resultados'][:2]]
+        self.assertEqual(MovimientoCaja.objects.filter(cuota__in=cuotas).count(), 2)
+        self.assertEqual(CuentaBancaria.objects.aggregate(t=Sum('saldo_actual'))['t'],
+                         saldo_caja + Cuota.objects.filter(pk__in=cuotas).aggregate(t=Sum('monto'))['t'])
+
+    def test_todo_o_nada_y_consultas_constantes(self):
+        sembrar(3)
+        apartado = Apartado.objects.order_by('pk').first()
+        pendiente = apartado.monto_pendiente
+        pagos = self._pagos(apartado, 'apartado', [1, -5])
+        respuesta = self.client.post('/api/apartado_credito/cuotas/lote/',
+                                     {'pagos': pagos, 'todo_o_nada': True}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+        apartado.refresh_from_db()
+        self.assertEqual(apartado.monto_pendiente, pendiente)
+
+        def consultas(creditos):
+            pagos = [p for c in creditos for p in self._pagos(c, 'credito', [10])]
+            with CaptureQueriesContext(connection) as contexto:
+                resultado = registrar_lote(pagos)
+            self.assertEqual(resultado['creadas'], len(pagos))
+            return len(contexto)
 
-# Create your tests here.
+        creditos = list(Credito.objects.filter(ventas__isnull=False).order_by('pk'))
+        consultas(creditos[:1])  # crea los tipos de movimiento de abono
+        self.assertEqual(consultas(creditos[:1]), consultas(creditos[1:]))
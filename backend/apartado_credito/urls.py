@@ -4,7 +4,9 @@ from rest_framework.routers import DefaultRouter
 from .views import ApartadoViewSet, CreditoViewSet, CuotaViewSet, DeudasPorClienteView
 from .views import (
     deudas_por_cobrar_optimizado,  
-    deudas_por_pagar_optimizado     
+    deudas_por_pagar_optimizado,
+    proyeccion_flujo_caja,
+    antiguedad_deudas,
 )
 
 router = routers.DefaultRouter()
@@ -17,4 +19,6 @@ urlpatterns = [
     path("deudas-por-cliente/<int:cliente_id>/", DeudasPorClienteView.as_view()),
     path('deudas-por-cobrar-optimizado/', deudas_por_cobrar_optimizado, name='deudas-cobrar-opt'),  # ← AGREGAR
     path('deudas-por-pagar-optimizado/', deudas_por_pagar_optimizado, name='deudas-pagar-opt'),    # ← AGREGAR
+    path('proyeccion-flujo/', proyeccion_flujo_caja, name='proyeccion-flujo'),
+    path('antiguedad-saldos/', antiguedad_deudas, name='antiguedad-saldos'),
 ]
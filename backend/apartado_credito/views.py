@@ -20,20 +20,33 @@ from rest_framework.decorators import action, api_view  # ← AGREGAR api_view
 from compra_venta.models import Venta, Compra  # ← AGREGAR Compra
 from compra_venta.serializers import VentaSerializer
 from django.db.models import Prefetch, Q  # ← AGREGAR estos
+from django.utils.dateparse import parse_date
+from siged.cache_respuestas import cachear_respuesta, por_dia
+from siged.dinero import Dinero
+from siged.presupuesto_consultas import presupuesto
+from siged.replicas import usar_replica
+from .antiguedad import antiguedad_saldos
+from .lote import MAXIMO_LOTE, LoteRechazado, registrar_lote
+from .proyeccion import AGRUPACIONES, proyeccion_flujo
+from .tareas import vencidos
 
 
 class ApartadoViewSet(viewsets.ModelViewSet):
-    queryset = Apartado.objects.all()
+    queryset = Apartado.objects.select_related('estado')
     serializer_class = ApartadoSerializer
+    presupuesto_consultas = {
+        'list': 2,
+        'retrieve': 2,
+    }
 
 
     def get_queryset(self):
         """Verificar estados vencidos antes de devolver resultados"""
         queryset = super().get_queryset()
         
-        # Verificar estados solo para apartados en proceso
-        from apartado_credito.models import ESTADO_EN_PROCESO
-        for apartado in queryset.filter(estado_id=ESTADO_EN_PROCESO):
+        # Solo los apartados ya vencidos (normalmente ninguno: la tarea nocturna
+        # apartado_credito.caducar_deudas los caduca)
+        for apartado in vencidos(Apartado):
             apartado.verificar_y_actualizar_estado()
         
         return queryset
@@ -104,16 +117,20 @@ class ApartadoViewSet(viewsets.ModelViewSet):
 
 
 class CreditoViewSet(viewsets.ModelViewSet):
-    queryset = Credito.objects.all()
+    queryset = Credito.objects.select_related('estado')
     serializer_class = CreditoSerializer
+    presupuesto_consultas = {
+        'list': 2,
+        'retrieve': 2,
+    }
 
     def get_queryset(self):
         """Verificar estados vencidos antes de devolver resultados"""
         queryset = super().get_queryset()
         
-        # Verificar estados solo para créditos en proceso
-        from apartado_credito.models import ESTADO_EN_PROCESO
-        for credito in queryset.filter(estado_id=ESTADO_EN_PROCESO):
+        # Solo los créditos ya vencidos (normalmente ninguno: la tarea nocturna
+        # apartado_credito.caducar_deudas los caduca)
+        for credito in vencidos(Credito):
             credito.verificar_y_actualizar_estado()
         
         return queryset
@@ -185,8 +202,12 @@ class CreditoViewSet(viewsets.ModelViewSet):
 
 
 class CuotaViewSet(viewsets.ModelViewSet):
-    queryset = Cuota.objects.all()
+    queryset = Cuota.objects.select_related('metodo_pago', 'credito', 'apartado')
     serializer_class = CuotaSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
 
     def get_queryset(self):
         """Permitir filtrar cuotas por crédito o apartado"""
@@ -218,11 +239,8 @@ class CuotaViewSet(viewsets.ModelViewSet):
                     # disminuir monto_pendiente (sin bajar de 0)
                     if credito.monto_pendiente is None:
                         credito.monto_pendiente = credito.monto_total
-                    try:
-                        credito.monto_pendiente = max(Decimal('0.00'), credito.monto_pendiente - cuota.monto)
-                    except Exception:
-                        # Fallback: cast to Decimal
-                        credito.monto_pendiente = max(Decimal('0.00'), Decimal(str(credito.monto_pendiente)) - Decimal(str(cuota.monto)))
+                    pendiente = Dinero.de(credito.monto_pendiente) - Dinero.de(cuota.monto)
+                    credito.monto_pendiente = max(Dinero(), pendiente).decimal()
                     
                     # ✅ CAMBIAR ESTADO A FINALIZADO SI MONTO PENDIENTE = 0
                     if credito.monto_pendiente == Decimal('0.00'):
@@ -238,10 +256,8 @@ class CuotaViewSet(viewsets.ModelViewSet):
                         apartado.cuotas_pendientes = max(0, apartado.cuotas_pendientes - 1)
                     if apartado.monto_pendiente is None:
                         apartado.monto_pendiente = apartado.monto_total
-                    try:
-                        apartado.monto_pendiente = max(Decimal('0.00'), apartado.monto_pendiente - cuota.monto)
-                    except Exception:
-                        apartado.monto_pendiente = max(Decimal('0.00'), Decimal(str(apartado.monto_pendiente)) - Decimal(str(cuota.monto)))
+                    pendiente = Dinero.de(apartado.monto_pendiente) - Dinero.de(cuota.monto)
+                    apartado.monto_pendiente = max(Dinero(), pendiente).decimal()
                     
                     # ✅ CAMBIAR ESTADO A FINALIZADO SI MONTO PENDIENTE = 0
                     if apartado.monto_pendiente == Decimal('0.00'):
@@ -250,9 +266,9 @@ class CuotaViewSet(viewsets.ModelViewSet):
                     apartado.full_clean()
                     apartado.save()
 
-                # ✅ DISPARAR SIGNAL MANUALMENTE DESPUÉS DE ACTUALIZAR TODO
-                from caja.signals import registrar_cuota_en_caja
-                registrar_cuota_en_caja(Cuota, cuota, created=True)
+                # El movimiento de caja lo registra el post_save de Cuota
+                # (registrar_cuota_en_caja); una segunda llamada solo chocaría
+                # con el índice único de MovimientoCaja.cuota
 
         except (DjangoValidationError, DRFValidationError) as e:
             # Errores de validación: devolver mensaje amigable
@@ -274,14 +290,50 @@ class CuotaViewSet(viewsets.ModelViewSet):
         except (DjangoValidationError, DRFValidationError) as e:
             return Response({"error": e.message if hasattr(e, 'message') else (e.detail if hasattr(e, 'detail') else str(e))}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        POST /api/apartado_credito/cuotas/lote/
+        Body: {"pagos": [{"credito" | "apartado", "fecha", "monto", "metodo_pago"}, ...],
+               "todo_o_nada": false}
+        (también acepta la lista de pagos directamente).
+        Registra todos los pagos en una transacción y responde un resultado por pago.
+        """
+        datos = request.data
+        pagos = datos if isinstance(datos, list) else datos.get('pagos')
+        if not isinstance(pagos, list) or not pagos:
+            return Response({"error": "Envíe una lista de pagos no vacía"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(pagos) > MAXIMO_LOTE:
+            return Response({"error": f"Máximo {MAXIMO_LOTE} pagos por lote"}, status=status.HTTP_400_BAD_REQUEST)
+        todo_o_nada = not isinstance(datos, list) and str(datos.get('todo_o_nada', '')).lower() in ('1', 'true', 'si', 'sí')
+
+        try:
+            resultado = registrar_lote(pagos, todo_o_nada=todo_o_nada)
+        except LoteRechazado as e:
+            rechazados = [r for r in e.resultados if not r['ok']]
+            return Response(
+                {"warning": "Ningún pago fue registrado", "rechazadas": len(rechazados), "resultados": e.resultados},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        codigo = status.HTTP_201_CREATED if resultado['creadas'] else status.HTTP_400_BAD_REQUEST
+        return Response(resultado, status=codigo)
+
 class DeudasPorClienteView(APIView):
     """
     Devuelve todas las deudas (créditos y apartados) del cliente indicado.
     GET /api/apartado_credito/deudas-por-cliente/<cliente_id>/
     """
+    presupuesto_consultas = {
+        'get': {'consultas': 1, 'kwargs': {'cliente_id': 'terceros.Cliente'}},
+    }
+
+    @usar_replica
+    @cachear_respuesta(Venta, Credito, Apartado, 'dominios_comunes.Estado')
     def get(self, request, cliente_id):
         # Ventas del cliente con crédito o apartado
-        ventas = Venta.objects.filter(cliente_id=cliente_id).select_related('credito', 'apartado')
+        ventas = Venta.objects.filter(cliente_id=cliente_id).select_related(
+            'credito__estado', 'apartado__estado'
+        )
 
         por_cobrar = []
         for v in ventas:
@@ -308,7 +360,13 @@ class DeudasPorClienteView(APIView):
             "cliente_id": cliente_id,
             "por_cobrar": por_cobrar
         }, status=status.HTTP_200_OK)
+@presupuesto(get=5)
 @api_view(['GET'])
+@usar_replica
+@cachear_respuesta(
+    Venta, 'compra_venta.VentaPrenda', 'prendas.Prenda', 'terceros.Cliente', Credito, Apartado, Cuota,
+    'dominios_comunes.Estado', 'dominios_comunes.MetodoPago',
+)
 def deudas_por_cobrar_optimizado(request):
     """
     Endpoint optimizado que trae TODOS los datos en una sola consulta.
@@ -414,7 +472,13 @@ def deudas_por_cobrar_optimizado(request):
     return Response(list(clientes_dict.values()))
 
 
+@presupuesto(get=4)
 @api_view(['GET'])
+@usar_replica
+@cachear_respuesta(
+    Compra, 'compra_venta.CompraPrenda', 'prendas.Prenda', 'terceros.Proveedor', Credito, Cuota,
+    'dominios_comunes.Estado', 'dominios_comunes.MetodoPago',
+)
 def deudas_por_pagar_optimizado(request):
     """
     Endpoint optimizado para deudas por pagar (proveedores).
@@ -476,4 +540,44 @@ def deudas_por_pagar_optimizado(request):
             }
             proveedores_dict[proveedor_id]['deudas'].append(deuda)
     
-    return Response(list(proveedores_dict.values()))
\ No newline at end of file
+    return Response(list(proveedores_dict.values()))
+
+
+@presupuesto(get=3)
+@api_view(['GET'])
+@usar_replica
+@cachear_respuesta(Venta, Compra, Credito, Apartado, Cuota, variar_por=por_dia)
+def proyeccion_flujo_caja(request):
+    """
+    Entradas (créditos y apartados de ventas) y salidas (créditos de compras)
+    esperadas según el plan de cuotas de cada deuda abierta.
+    GET /api/apartado_credito/proyeccion-flujo/?agrupar=semana|mes&hasta=AAAA-MM-DD&cuotas=1
+    """
+    agrupar = request.query_params.get('agrupar', 'mes')
+    if agrupar not in AGRUPACIONES:
+        raise DRFValidationError({'agrupar': f"Use {' o '.join(AGRUPACIONES)}."})
+    hasta = request.query_params.get('hasta')
+    if hasta:
+        try:
+            hasta = parse_date(hasta)
+        except ValueError:
+            hasta = None
+        if hasta is None:
+            raise DRFValidationError({'hasta': 'Use el formato AAAA-MM-DD.'})
+    incluir_cuotas = request.query_params.get('cuotas') in ('1', 'true')
+    return Response(proyeccion_flujo(agrupar, hasta, incluir_cuotas))
+
+
+@presupuesto(get=1)
+@api_view(['GET'])
+@usar_replica
+@cachear_respuesta(
+    Venta, Compra, Credito, Apartado, Cuota, 'terceros.Cliente', 'terceros.Proveedor', variar_por=por_dia,
+)
+def antiguedad_deudas(request):
+    """
+    Saldos pendientes por rango de días vencidos (por vencer, 0-30, 31-60,
+    61-90, 90+), por cliente (ventas) y por proveedor (compras).
+    GET /api/apartado_credito/antiguedad-saldos/
+    """
+    return Response(antiguedad_saldos())
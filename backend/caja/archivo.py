@@ -0,0 +1,176 @@
+"""
+Archivo de los movimientos de caja de meses cerrados.
+
+caja_movimiento solo debe crecer con los meses recientes: archivar_mes()
+saca de ella los movimientos de un mes en el que todos tienen cierre (nunca
+se vuelven a modificar) y los pasa a caja_movimiento_archivo, dejando sus
+totales por cuenta, tipo de movimiento y cierre en ResumenMovimientosMes.
+
+- caja_movimiento no se particiona: PostgreSQL exige que todo índice único de
+  una tabla particionada incluya la columna de partición, y los índices
+  únicos por documento de origen (caja/movimientos.py) deben valer para
+  toda la tabla. Con el archivo, la tabla viva queda con unos pocos meses sin
+  importar cuántos años de historia haya.
+- caja_movimiento_archivo en PostgreSQL sí está particionada por rango de
+  `fecha`, una partición por mes (caja_movimiento_archivo_AAAAMM), así que
+  las consultas por período solo leen los meses que tocan.
+- separar_mes() hace DETACH PARTITION: la tabla del mes queda suelta para
+  respaldarla con pg_dump y borrarla. Los saldos iniciales de los cierres y
+  verificar_cierres usan ResumenMovimientosMes, así que siguen cuadrando.
+- restaurar_mes() devuelve un mes (no separado) a caja_movimiento.
+
+Todo corre con el bloqueo asesor 'caja-cierre' tomado, igual que los cierres.
+`manage.py archivar_movimientos` es la entrada de uso normal.
+"""
+from datetime import date, datetime
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from siged.bloqueos import bloquear_transaccion
+from siged.versiones import invalidar
+
+from .models import MovimientoCaja, MovimientoCajaArchivado, ResumenMovimientosMes
+
+
+class ErrorArchivo(Exception):
+    pass
+
+
+def _sumar_meses(mes, meses):
+    total = mes.year * 12 + mes.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _limites(mes):
+    """[inicio, fin) del mes en la zona horaria del proyecto."""
+    return (
+        timezone.make_aware(datetime(mes.year, mes.month, 1)),
+        timezone.make_aware(datetime.combine(_sumar_meses(mes, 1), datetime.min.time())),
+    )
+
+
+def _particion(mes):
+    return f'{MovimientoCajaArchivado._meta.db_table}_{mes:%Y%m}'
+
+
+def primer_mes_en_linea(meses):
+    """Primer día del mes más antiguo que se deja en caja_movimiento."""
+    return _sumar_meses(timezone.localdate().replace(day=1), -meses)
+
+
+def meses_archivables(antes_de):
+    """Meses anteriores a `antes_de` con movimientos, todos ya cerrados. Una consulta."""
+    inicio, _ = _limites(antes_de)
+    filas = (
+        MovimientoCaja.objects.filter(fecha__lt=inicio).order_by()
+        .annotate(mes=TruncMonth('fecha')).values('mes')
+        .annotate(abiertos=Count('id', filter=Q(cierre_caja__isnull=True)))
+        .order_by('mes')
+    )
+    return [timezone.localdate(f['mes']).replace(day=1) for f in filas if not f['abiertos']]
+
+
+def _mover(origen, destino, inicio, fin):
+    """INSERT ... SELECT del mes de una tabla a la otra y DELETE del origen. Retorna las filas."""
+    nombre = connection.ops.quote_name
+    columnas = ', '.join(nombre(f.column) for f in MovimientoCaja._meta.concrete_fields)
+    rango = 'WHERE fecha >= %s AND fecha < %s'
+    params = [connection.ops.adapt_datetimefield_value(f) for f in (inicio, fin)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {nombre(destino)} ({columnas}) SELECT {columnas} FROM {nombre(origen)} {rango}', params
+        )
+        cursor.execute(f'DELETE FROM {nombre(origen)} {rango}', params)
+        return cursor.rowcount
+
+
+def archivar_mes(mes):
+    """
+    Pasa los movimientos del mes al archivo con su resumen. Retorna la
+    cantidad archivada (0 si el mes tiene movimientos sin cierre).
+    """
+    inicio, fin = _limites(mes)
+    with transaction.atomic():
+        bloquear_transaccion('caja-cierre')
+        del_mes = MovimientoCaja.objects.filter(fecha__gte=inicio, fecha__lt=fin)
+        if del_mes.filter(cierre_caja__isnull=True).exists():
+            return 0
+
+        ResumenMovimientosMes.objects.bulk_create([
+            ResumenMovimientosMes(mes=mes, cuenta_id=cuenta_id, tipo_movimiento_id=tipo_id,
+                                  cierre_caja_id=cierre_id, cantidad=cantidad, total=total)
+            for cuenta_id, tipo_id, cierre_id, cantidad, total in (
+                del_mes.order_by().values_list('cuenta_id', 'tipo_movimiento_id', 'cierre_caja_id')
+                .annotate(cantidad=Count('id'), total=Sum('monto'))
+            )
+        ])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE IF NOT EXISTS {_particion(mes)} PARTITION OF {MovimientoCajaArchivado._meta.db_table} '
+                    f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fin.isoformat()}')"
+                )
+        archivados = _mover(MovimientoCaja._meta.db_table, MovimientoCajaArchivado._meta.db_table, inicio, fin)
+        # SQL directo: sin señales
+        invalidar(MovimientoCaja, MovimientoCajaArchivado, ResumenMovimientosMes)
+    return archivados
+
+
+def restaurar_mes(mes):
+    """Devuelve a caja_movimiento los movimientos archivados del mes. Retorna la cantidad."""
+    inicio, fin = _limites(mes)
+    with transaction.atomic():
+        bloquear_transaccion('caja-cierre')
+        resumen = ResumenMovimientosMes.objects.filter(mes=mes)
+        esperados = resumen.aggregate(total=Sum('cantidad'))['total'] or 0
+        restaurados = _mover(MovimientoCajaArchivado._meta.db_table, MovimientoCaja._meta.db_table, inicio, fin)
+        if restaurados != esperados:
+            # Partición separada (o incompleta): sin el detalle, el resumen es lo único que queda
+            raise ErrorArchivo(f'{mes:%Y-%m}: el archivo tiene {restaurados} movimientos y el resumen {esperados}')
+        resumen.delete()
+        invalidar(MovimientoCaja, MovimientoCajaArchivado, ResumenMovimientosMes)
+    return restaurados
+
+
+def separar_mes(mes):
+    """
+    PostgreSQL: separa la partición del mes del archivo (DETACH PARTITION) y
+    retorna el nombre de la tabla suelta, o None si no existe.
+    """
+    if connection.vendor != 'postgresql':
+        raise ErrorArchivo('Las particiones del archivo solo existen en PostgreSQL')
+    particion = _particion(mes)
+    with transaction.atomic():
+        bloquear_transaccion('caja-cierre')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT 1 FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+                'WHERE c.relname = %s AND i.inhparent = %s::regclass',
+                [particion, MovimientoCajaArchivado._meta.db_table]
+            )
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute(f'ALTER TABLE {MovimientoCajaArchivado._meta.db_table} DETACH PARTITION {particion}')
+        invalidar(MovimientoCajaArchivado)
+    return particion
+
+
+def particiones_adjuntas():
+    """Meses con partición adjunta al archivo (PostgreSQL), del más antiguo al más reciente."""
+    if connection.vendor != 'postgresql':
+        return []
+    prefijo = f'{MovimientoCajaArchivado._meta.db_table}_'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass ORDER BY c.relname',
+            [MovimientoCajaArchivado._meta.db_table]
+        )
+        nombres = [fila[0] for fila in cursor.fetchall()]
+    return [
+        date(int(n[-6:-2]), int(n[-2:]), 1)
+        for n in nombres if n.startswith(prefijo) and n[len(prefijo):].isdigit()
+    ]
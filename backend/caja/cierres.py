@@ -0,0 +1,244 @@
+"""
+Cierres de caja jerárquicos.
+
+- Diario: suma los movimientos sin cierre del período y los asocia al cierre.
+- Mensual y anual: no vuelven a recorrer los movimientos ya cerrados. Suman
+  los cierres menores que caen completos dentro del período y aún no tienen
+  padre (los diarios para el mes; los mensuales y los diarios sueltos para el
+  año) y solo recorren los movimientos de los huecos que nadie cerró. Los
+  hijos quedan con cierre_padre = el nuevo cierre y los movimientos de los
+  huecos se asocian directamente a él.
+
+Los saldos por cuenta de todo cierre (diario, mensual o anual) son los de las
+cuentas al final del período: el saldo actual menos lo movido con fecha
+posterior a fecha_fin. verificar() compara cada cierre con la suma directa de
+los movimientos de su árbol (`manage.py verificar_cierres`).
+
+Los movimientos de meses archivados (caja/archivo.py) se cuentan por sus
+totales en ResumenMovimientosMes.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from siged.bloqueos import bloquear_transaccion
+from siged.versiones import invalidar
+
+from .models import (
+    CierreCaja, CuentaBancaria, MovimientoCaja, ResumenMovimientosMes, SaldoCuentaPorCierre, TipoMovimiento,
+)
+
+CERO = Decimal('0.00')
+NIVEL = {CierreCaja.DIARIO: 0, CierreCaja.MENSUAL: 1, CierreCaja.ANUAL: 2}
+
+
+class ErrorCierre(Exception):
+    pass
+
+
+# ============ SUMAS ============
+
+def _sumas(movimientos):
+    """(entradas, salidas, {cuenta_id: neto}) de los movimientos en una consulta."""
+    entradas = salidas = CERO
+    netos = defaultdict(Decimal)
+    filas = (
+        movimientos.order_by()
+        .values_list('cuenta_id', 'tipo_movimiento__tipo')
+        .annotate(total=Sum('monto'))
+    )
+    for cuenta_id, tipo, total in filas:
+        if tipo == TipoMovimiento.ENTRADA:
+            entradas += total
+            netos[cuenta_id] += total
+        else:
+            salidas += total
+            netos[cuenta_id] -= total
+    return entradas, salidas, netos
+
+
+def _saldo_antes(fecha):
+    """
+    Entradas menos salidas de las cuentas activas antes de `fecha` (saldo
+    inicial de un diario), con los meses archivados anteriores a `fecha`.
+    """
+    saldo = CERO
+    for modelo, columna, filtro in (
+        (MovimientoCaja, 'monto', Q(fecha__lt=fecha)),
+        (ResumenMovimientosMes, 'total', Q(mes__lt=timezone.localdate(fecha))),
+    ):
+        totales = modelo.objects.filter(filtro, cuenta__activa=True).aggregate(
+            entradas=Sum(columna, filter=Q(tipo_movimiento__tipo=TipoMovimiento.ENTRADA)),
+            salidas=Sum(columna, filter=Q(tipo_movimiento__tipo=TipoMovimiento.SALIDA)),
+        )
+        saldo += (totales['entradas'] or CERO) - (totales['salidas'] or CERO)
+    return saldo
+
+
+def _neto_posterior(modelo, columna, filtro):
+    """Subconsulta: entradas menos salidas de la cuenta (OuterRef) en las filas de `filtro`."""
+    monto = DecimalField(max_digits=15, decimal_places=2)
+    signo = Case(
+        When(tipo_movimiento__tipo=TipoMovimiento.ENTRADA, then=F(columna)),
+        default=-F(columna), output_field=monto,
+    )
+    netos = (
+        modelo.objects.filter(filtro, cuenta=OuterRef('pk')).order_by()
+        .values('cuenta').annotate(neto=Sum(signo)).values('neto')
+    )
+    return Coalesce(Subquery(netos, output_field=monto), Value(CERO), output_field=monto)
+
+
+def saldos_al(fecha):
+    """
+    {cuenta_id: saldo} de las cuentas activas al final de `fecha`: saldo actual
+    menos los movimientos con fecha posterior y los meses archivados que
+    empiezan después. Una consulta, así el saldo y lo posterior salen de la
+    misma foto de la base.
+    """
+    cuentas = CuentaBancaria.objects.filter(activa=True).annotate(
+        posterior=_neto_posterior(MovimientoCaja, 'monto', Q(fecha__gt=fecha)),
+        archivado=_neto_posterior(ResumenMovimientosMes, 'total', Q(mes__gt=timezone.localdate(fecha))),
+    )
+    return {
+        cuenta_id: actual - posterior - archivado
+        for cuenta_id, actual, posterior, archivado
+        in cuentas.values_list('id', 'saldo_actual', 'posterior', 'archivado')
+    }
+
+
+# ============ CIERRE ============
+
+def _hijos(tipo_cierre, fecha_inicio, fecha_fin):
+    """
+    Cierres sin padre que se cruzan con el período; deben ser de menor nivel
+    y caer completos dentro de él.
+    """
+    cruzados = list(
+        CierreCaja.objects.select_for_update()
+        .filter(cierre_padre__isnull=True, fecha_inicio__lte=fecha_fin, fecha_fin__gte=fecha_inicio)
+        .order_by('fecha_inicio', 'id')
+    )
+    for cierre in cruzados:
+        if NIVEL[cierre.tipo_cierre] >= NIVEL[tipo_cierre]:
+            raise ErrorCierre('Ya existe un cierre que incluye movimientos de este período')
+        if cierre.fecha_inicio < fecha_inicio or cierre.fecha_fin > fecha_fin:
+            raise ErrorCierre(f'El cierre #{cierre.pk} cruza el límite del período')
+    return cruzados
+
+
+def realizar(tipo_cierre, fecha_inicio, fecha_fin, observaciones='', cerrado_por='', progreso=None):
+    """
+    Crea el cierre con sus saldos por cuenta en una transacción, con el
+    bloqueo asesor 'caja-cierre' tomado (un cierre a la vez en todos los
+    procesos). Lanza ErrorCierre si el período no se puede cerrar.
+    `progreso(etapa, porcentaje)` se llama al empezar cada etapa.
+    """
+    def informar(etapa, porcentaje):
+        if progreso:
+            progreso(etapa, porcentaje)
+
+    fecha_inicio, fecha_fin = [timezone.make_aware(f) if timezone.is_naive(f) else f for f in (fecha_inicio, fecha_fin)]
+    if fecha_fin < fecha_inicio:
+        raise ErrorCierre('fecha_fin no puede ser anterior a fecha_inicio')
+    with transaction.atomic():
+        informar('esperando_bloqueo', 5)
+        bloquear_transaccion('caja-cierre')
+        informar('validando', 15)
+        sueltos = MovimientoCaja.objects.filter(
+            fecha__gte=fecha_inicio, fecha__lte=fecha_fin, cierre_caja__isnull=True,
+        )
+        if tipo_cierre == CierreCaja.DIARIO:
+            if MovimientoCaja.objects.filter(
+                fecha__gte=fecha_inicio, fecha__lte=fecha_fin, cierre_caja__isnull=False,
+            ).exists():
+                raise ErrorCierre('Ya existe un cierre que incluye movimientos de este período')
+            hijos = []
+        else:
+            hijos = _hijos(tipo_cierre, fecha_inicio, fecha_fin)
+
+        informar('sumando', 35)
+        entradas, salidas, netos = _sumas(sueltos)
+        if not hijos and not netos:
+            raise ErrorCierre('No hay movimientos para cerrar en este período')
+        entradas += sum((h.total_entradas for h in hijos), CERO)
+        salidas += sum((h.total_salidas for h in hijos), CERO)
+
+        if hijos:
+            # Saldo inicial del primer hijo, menos lo que entró antes de él en el hueco inicial
+            primero = hijos[0]
+            _, _, antes = _sumas(sueltos.filter(fecha__lt=primero.fecha_inicio, cuenta__activa=True))
+            saldo_inicial = primero.saldo_inicial - sum(antes.values(), CERO)
+        else:
+            saldo_inicial = _saldo_antes(fecha_inicio)
+
+        informar('guardando', 70)
+        cierre = CierreCaja.objects.create(
+            tipo_cierre=tipo_cierre,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            total_entradas=entradas,
+            total_salidas=salidas,
+            saldo_inicial=saldo_inicial,
+            saldo_final=saldo_inicial + entradas - salidas,
+            observaciones=observaciones,
+            cerrado_por=cerrado_por,
+        )
+        sueltos.update(cierre_caja=cierre)
+
+        if hijos:
+            CierreCaja.objects.filter(pk__in=[h.pk for h in hijos]).update(cierre_padre=cierre)
+        SaldoCuentaPorCierre.objects.bulk_create([
+            SaldoCuentaPorCierre(cierre_caja=cierre, cuenta_id=cuenta_id, saldo=saldo)
+            for cuenta_id, saldo in saldos_al(fecha_fin).items()
+        ])
+        # update() y bulk_create() no disparan post_save
+        invalidar(MovimientoCaja, CierreCaja, SaldoCuentaPorCierre)
+    return cierre
+
+
+# ============ VERIFICACIÓN ============
+
+def verificar(cierres=None):
+    """
+    Compara entradas y salidas de cada cierre contra la suma directa de los
+    movimientos de su árbol (los archivados, por su resumen). Retorna
+    [(cierre, entradas_reales, salidas_reales)] de los que no coinciden.
+    Tres consultas para todos los cierres.
+    """
+    todos = {c.pk: c for c in CierreCaja.objects.order_by('id')}
+    directos = defaultdict(lambda: [CERO, CERO])
+    for modelo, columna in ((MovimientoCaja, 'monto'), (ResumenMovimientosMes, 'total')):
+        filas = (
+            modelo.objects.filter(cierre_caja__isnull=False).order_by()
+            .values_list('cierre_caja_id', 'tipo_movimiento__tipo').annotate(suma=Sum(columna))
+        )
+        for cierre_id, tipo, total in filas:
+            directos[cierre_id][0 if tipo == TipoMovimiento.ENTRADA else 1] += total
+
+    hijos = defaultdict(list)
+    for cierre in todos.values():
+        if cierre.cierre_padre_id:
+            hijos[cierre.cierre_padre_id].append(cierre.pk)
+
+    reales = {}
+
+    def real(pk):
+        if pk not in reales:
+            entradas, salidas = directos[pk]
+            for hijo in hijos[pk]:
+                e, s = real(hijo)
+                entradas, salidas = entradas + e, salidas + s
+            reales[pk] = (entradas, salidas)
+        return reales[pk]
+
+    revisar = todos.values() if cierres is None else [todos[c.pk] for c in cierres]
+    return [
+        (cierre, *real(cierre.pk))
+        for cierre in revisar
+        if real(cierre.pk) != (cierre.total_entradas, cierre.total_salidas)
+    ]
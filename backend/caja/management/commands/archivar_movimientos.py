@@ -0,0 +1,62 @@
+# caja/management/commands/archivar_movimientos.py
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from caja import archivo
+
+
+def _mes(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f'Mes inválido: {valor!r} (use AAAA-MM)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Pasa los movimientos de caja de los meses ya cerrados a caja_movimiento_archivo '
+        '(particionada por mes en PostgreSQL) dejando sus totales en ResumenMovimientosMes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=settings.CAJA_MESES_EN_LINEA,
+                            help='Meses recientes que se dejan en caja_movimiento (default: CAJA_MESES_EN_LINEA)')
+        parser.add_argument('--restaurar', metavar='AAAA-MM',
+                            help='Devuelve a caja_movimiento los movimientos archivados de ese mes')
+        parser.add_argument('--separar', metavar='AAAA-MM',
+                            help='PostgreSQL: separa la partición del mes del archivo para respaldarla y borrarla')
+
+    def handle(self, *args, **options):
+        if options['restaurar']:
+            mes = _mes(options['restaurar'])
+            try:
+                cantidad = archivo.restaurar_mes(mes)
+            except archivo.ErrorArchivo as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f'✅ {mes:%Y-%m}: {cantidad} movimientos restaurados'))
+            return
+
+        if options['separar']:
+            mes = _mes(options['separar'])
+            try:
+                tabla = archivo.separar_mes(mes)
+            except archivo.ErrorArchivo as e:
+                raise CommandError(str(e))
+            if tabla is None:
+                raise CommandError(f'No hay partición adjunta para {mes:%Y-%m}')
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {mes:%Y-%m} separado en la tabla {tabla} (respaldar con pg_dump -t {tabla} y borrarla)'
+            ))
+            return
+
+        antes_de = archivo.primer_mes_en_linea(options['meses'])
+        meses = archivo.meses_archivables(antes_de)
+        if not meses:
+            self.stdout.write(self.style.SUCCESS(f'✅ No hay meses cerrados anteriores a {antes_de:%Y-%m} por archivar'))
+            return
+
+        for mes in meses:
+            cantidad = archivo.archivar_mes(mes)
+            self.stdout.write(self.style.SUCCESS(f'✅ {mes:%Y-%m}: {cantidad} movimientos archivados'))
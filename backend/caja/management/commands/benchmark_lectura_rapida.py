@@ -0,0 +1,83 @@
+# caja/management/commands/benchmark_lectura_rapida.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from caja.models import MovimientoCaja
+from caja.serializers import MovimientoCajaDetalladoSerializer, movimientos_detallados_rapido
+from compra_venta.models import Venta
+from compra_venta.serializers import VentaSerializer, ventas_rapido
+from prendas.models import Prenda
+from prendas.serializers import PrendaSerializer, prendas_rapido
+
+
+class _Revertir(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara filas/segundo de los listados con serializers vs las rutas rápidas con values_list() '
+        '(ventas, movimientos de caja y prendas), incluyendo el tiempo de las consultas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument(
+            '--sembrar', type=int, default=0,
+            help='Crea N filas de prueba de cada entidad dentro de una transacción que se revierte al final',
+        )
+
+    def handle(self, *args, **options):
+        self.repeticiones = options['repeticiones']
+        try:
+            with transaction.atomic():
+                if options['sembrar']:
+                    from siged.presupuesto_consultas import sembrar
+                    self.stdout.write(self.style.WARNING(f"🌱 Sembrando {options['sembrar']} filas (se revierten al final)..."))
+                    sembrar(options['sembrar'])
+                self.medir_listados()
+                raise _Revertir
+        except _Revertir:
+            pass
+
+    def medir_listados(self):
+        casos = [
+            ('Ventas',
+             lambda: Venta.objects.select_related('cliente', 'metodo_pago', 'credito', 'apartado')
+                                  .prefetch_related('prendas__prenda'),
+             lambda qs: VentaSerializer(qs, many=True).data,
+             ventas_rapido),
+            ('Movimientos de caja',
+             lambda: MovimientoCaja.objects.select_related(
+                 'cuenta', 'tipo_movimiento', 'venta', 'compra', 'cuota', 'egreso', 'ingreso'
+             ).order_by('-fecha'),
+             lambda qs: MovimientoCajaDetalladoSerializer(qs, many=True).data,
+             movimientos_detallados_rapido),
+            ('Prendas',
+             lambda: Prenda.objects.select_related('tipo_prenda', 'tipo_oro').order_by('id'),
+             lambda qs: PrendaSerializer(qs, many=True).data,
+             prendas_rapido),
+        ]
+
+        for nombre, queryset, serializer, rapido in casos:
+            filas = queryset().count()
+            self.stdout.write(self.style.SUCCESS(f'📊 {nombre} ({filas} filas)'))
+            if not filas:
+                self.stdout.write('  (sin datos; use --sembrar N)')
+                continue
+            lento = self.medir(lambda: serializer(queryset()))
+            veloz = self.medir(lambda: rapido(queryset()))
+            self.stdout.write(f'  {"serializer":<12} {filas / lento:>12,.0f} filas/s {lento * 1000:>9.1f} ms')
+            self.stdout.write(f'  {"values()":<12} {filas / veloz:>12,.0f} filas/s {veloz * 1000:>9.1f} ms'
+                              f'   (x{lento / veloz:.1f})')
+
+    def medir(self, funcion):
+        mejor = None
+        for _ in range(self.repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor
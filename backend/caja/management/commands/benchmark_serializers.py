@@ -0,0 +1,99 @@
+# caja/management/commands/benchmark_serializers.py
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from caja.models import CierreCaja, CuentaBancaria, MovimientoCaja, TipoMovimiento
+from caja.serializers import CierreCajaSerializer, MovimientoCajaDetalladoSerializer
+from compra_venta.models import Venta
+from siged.renderers import JSONRapidoRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide filas/segundo de los serializers de caja (normal vs ?formato=compacto) '
+        'y del renderer JSON de DRF vs JSONRapidoRenderer. No toca la base de datos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=5000)
+        parser.add_argument('--repeticiones', type=int, default=3)
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+        self.repeticiones = options['repeticiones']
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Benchmark de serializers ({filas} filas, mejor de {self.repeticiones}, '
+            f'orjson {"sí" if orjson else "no"})\n'
+        ))
+
+        movimientos, cierres = self.construir_objetos(filas)
+        factory = APIRequestFactory()
+        peticiones = {
+            'normal': Request(factory.get('/')),
+            'compacto': Request(factory.get('/', {'formato': 'compacto'})),
+        }
+
+        for nombre, serializer_class, objetos in (
+            ('MovimientoCajaDetallado', MovimientoCajaDetalladoSerializer, movimientos),
+            ('CierreCaja', CierreCajaSerializer, cierres),
+        ):
+            self.stdout.write(self.style.WARNING(f'📊 {nombre}'))
+            for modo, request in peticiones.items():
+                contexto = {'request': request}
+                segundos, datos = self.medir(lambda: serializer_class(objetos, many=True, context=contexto).data)
+                self.reportar(f'serializar ({modo})', filas, segundos)
+
+                for renderer in (JSONRenderer(), JSONRapidoRenderer()):
+                    render_context = {'request': request}
+                    segundos, contenido = self.medir(lambda: renderer.render(datos, 'application/json', render_context))
+                    self.reportar(f'{type(renderer).__name__} ({modo})', filas, segundos, len(contenido))
+            self.stdout.write('')
+
+    def medir(self, funcion):
+        mejor, resultado = None, None
+        for _ in range(self.repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor, resultado
+
+    def reportar(self, etiqueta, filas, segundos, bytes_salida=None):
+        linea = f'  {etiqueta:<32} {filas / segundos:>12,.0f} filas/s {segundos * 1000:>9.1f} ms'
+        if bytes_salida is not None:
+            linea += f' {bytes_salida / 1024:>10,.1f} KiB'
+        self.stdout.write(linea)
+
+    def construir_objetos(self, filas):
+        """Instancias en memoria con las relaciones ya resueltas (sin consultas)."""
+        ahora = timezone.now()
+        cuenta = CuentaBancaria(id=1, nombre='Efectivo', descripcion='Caja física',
+                                saldo_actual=Decimal('12345678.90'), activa=True, fecha_creacion=ahora)
+        entrada = TipoMovimiento(id=1, nombre='Venta Contado', tipo=TipoMovimiento.ENTRADA, activo=True)
+
+        movimientos = []
+        for i in range(1, filas + 1):
+            monto = Decimal(i * 1000 + 50) / 100
+            venta = Venta(id=i, fecha=date.today(), total=monto)
+            movimientos.append(MovimientoCaja(
+                id=i, cuenta=cuenta, tipo_movimiento=entrada, monto=monto, venta=venta,
+                descripcion=f'Venta #{i}', fecha=ahora, observaciones='',
+            ))
+
+        cierres = [
+            CierreCaja(
+                id=i, tipo_cierre=CierreCaja.DIARIO, fecha_inicio=ahora, fecha_fin=ahora, fecha_cierre=ahora,
+                total_entradas=Decimal('1500000.00'), total_salidas=Decimal('350000.50'),
+                saldo_inicial=Decimal('1000000.00'), saldo_final=Decimal('2149999.50'),
+                observaciones='', cerrado_por='benchmark',
+            )
+            for i in range(1, filas + 1)
+        ]
+        return movimientos, cierres
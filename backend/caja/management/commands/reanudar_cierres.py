@@ -0,0 +1,27 @@
+# caja/management/commands/reanudar_cierres.py
+from django.core.management.base import BaseCommand
+
+from caja.models import TrabajoCierre
+from caja.trabajos import ejecutar, pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta los cierres de caja en segundo plano que quedaron pendientes o '
+        'abandonados a mitad de ejecución (p. ej. tras reiniciar el servidor).'
+    )
+
+    def handle(self, *args, **options):
+        ids = list(pendientes().order_by('fecha_creacion').values_list('pk', flat=True))
+        if not ids:
+            self.stdout.write(self.style.SUCCESS('✅ No hay cierres pendientes'))
+            return
+
+        for pk in ids:
+            trabajo = ejecutar(pk)
+            if trabajo.estado == TrabajoCierre.COMPLETADO:
+                self.stdout.write(self.style.SUCCESS(f'✅ Trabajo #{pk}: {trabajo.cierre}'))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠️ Trabajo #{pk} ({trabajo.get_estado_display()}): {trabajo.error}'
+                ))
@@ -0,0 +1,32 @@
+# caja/management/commands/verificar_cierres.py
+from django.core.management.base import BaseCommand, CommandError
+
+from caja.cierres import verificar
+from caja.models import CierreCaja
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara las entradas y salidas guardadas en cada cierre (los mensuales y anuales '
+        'se arman con sus cierres menores) contra la suma directa de sus movimientos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tipo', choices=[t for t, _ in CierreCaja.TIPO_CIERRE_CHOICES],
+                            help='Solo cierres de este tipo (D, M o A)')
+
+    def handle(self, *args, **options):
+        cierres = CierreCaja.objects.filter(tipo_cierre=options['tipo']) if options['tipo'] else None
+        diferencias = verificar(cierres)
+        total = len(cierres) if cierres is not None else CierreCaja.objects.count()
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} cierres coinciden con sus movimientos'))
+            return
+
+        for cierre, entradas, salidas in diferencias:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {cierre} (#{cierre.pk}): entradas {cierre.total_entradas} vs {entradas}, '
+                f'salidas {cierre.total_salidas} vs {salidas}'
+            ))
+        raise CommandError(f'{len(diferencias)} de {total} cierres no coinciden con sus movimientos')
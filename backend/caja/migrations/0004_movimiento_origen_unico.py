@@ -0,0 +1,88 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:03
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicadosCerrados(Exception):
+    pass
+
+
+def eliminar_duplicados(apps, schema_editor):
+    """
+    Deja un movimiento por documento de origen. Solo se borran repetidos que
+    aún no tienen cierre (se conserva uno con cierre si lo hay, si no el de
+    menor id), descontando de la cuenta el saldo que habían sumado/restado.
+    Si quedan dos o más movimientos con cierre para el mismo documento, la
+    migración se detiene y los lista: borrarlos descuadraría cierres ya
+    guardados y se deben corregir a mano.
+    """
+    MovimientoCaja = apps.get_model('caja', 'MovimientoCaja')
+    CuentaBancaria = apps.get_model('caja', 'CuentaBancaria')
+    cerrados = []
+    for campo in ('venta', 'compra', 'cuota', 'egreso', 'ingreso'):
+        grupos = (
+            MovimientoCaja.objects.filter(**{f'{campo}__isnull': False}).order_by()
+            .values(campo).annotate(n=Count('id')).filter(n__gt=1)
+        )
+        for origen in (g[campo] for g in grupos):
+            movimientos = list(
+                MovimientoCaja.objects.filter(**{campo: origen})
+                .order_by(F('cierre_caja_id').asc(nulls_last=True), 'id')
+                .values_list('id', 'cierre_caja_id', 'cuenta_id', 'tipo_movimiento__tipo', 'monto')
+            )
+            con_cierre = [m for m in movimientos if m[1] is not None]
+            if len(con_cierre) > 1:
+                cerrados.append(f"{campo}={origen}: movimientos {', '.join(str(m[0]) for m in con_cierre)}")
+                continue
+            for pk, _, cuenta_id, tipo, monto in movimientos[1:]:
+                signo = -1 if tipo == 'E' else 1
+                CuentaBancaria.objects.filter(id=cuenta_id).update(saldo_actual=F('saldo_actual') + signo * monto)
+                MovimientoCaja.objects.filter(id=pk).delete()
+                logger.warning(
+                    'Movimiento de caja %s borrado: repetido de %s=%s (se conserva %s); cuenta %s %s %s',
+                    pk, campo, origen, movimientos[0][0], cuenta_id, 'menos' if signo < 0 else 'más', monto,
+                )
+    if cerrados:
+        raise DuplicadosCerrados(
+            'Documentos con más de un movimiento de caja ya cerrado; corríjalos a mano antes de migrar:\n'
+            + '\n'.join(cerrados)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartado_credito', '0002_apartado_descripcion_apartado_monto_pendiente_and_more'),
+        ('caja', '0003_movimientocaja_egreso_movimientocaja_ingreso'),
+        ('compra_venta', '0002_remove_compra_precio_por_gramo_and_more'),
+        ('egreso_ingreso', '0002_ingreso'),
+    ]
+
+    operations = [
+        migrations.RunPython(eliminar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='movimientocaja',
+            constraint=models.UniqueConstraint(condition=models.Q(('venta__isnull', False)), fields=('venta',), name='movimiento_caja_venta_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='movimientocaja',
+            constraint=models.UniqueConstraint(condition=models.Q(('compra__isnull', False)), fields=('compra',), name='movimiento_caja_compra_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='movimientocaja',
+            constraint=models.UniqueConstraint(condition=models.Q(('cuota__isnull', False)), fields=('cuota',), name='movimiento_caja_cuota_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='movimientocaja',
+            constraint=models.UniqueConstraint(condition=models.Q(('egreso__isnull', False)), fields=('egreso',), name='movimiento_caja_egreso_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='movimientocaja',
+            constraint=models.UniqueConstraint(condition=models.Q(('ingreso__isnull', False)), fields=('ingreso',), name='movimiento_caja_ingreso_unico'),
+        ),
+    ]
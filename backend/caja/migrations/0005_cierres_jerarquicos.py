@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caja', '0004_movimiento_origen_unico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cierrecaja',
+            name='cierre_padre',
+            field=models.ForeignKey(blank=True, help_text='Cierre mensual o anual que incluye a este', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cierres_hijos', to='caja.cierrecaja'),
+        ),
+        migrations.AlterField(
+            model_name='cierrecaja',
+            name='tipo_cierre',
+            field=models.CharField(choices=[('D', 'Diario'), ('M', 'Mensual'), ('A', 'Anual')], max_length=1),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caja', '0005_cierres_jerarquicos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoCierre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_cierre', models.CharField(choices=[('D', 'Diario'), ('M', 'Mensual'), ('A', 'Anual')], max_length=1)),
+                ('fecha_inicio', models.DateTimeField()),
+                ('fecha_fin', models.DateTimeField()),
+                ('observaciones', models.TextField(blank=True, null=True)),
+                ('cerrado_por', models.CharField(blank=True, max_length=100, null=True)),
+                ('estado', models.CharField(choices=[('P', 'Pendiente'), ('E', 'Ejecutando'), ('C', 'Completado'), ('F', 'Fallido')], default='P', max_length=1)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio_ejecucion', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin_ejecucion', models.DateTimeField(blank=True, null=True)),
+                ('cierre', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajo', to='caja.cierrecaja')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Cierre',
+                'verbose_name_plural': 'Trabajos de Cierre',
+                'db_table': 'caja_trabajo_cierre',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='trabajo_cierre_estado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COLUMNAS_ARCHIVO = (
+    'id bigint NOT NULL, cuenta_id bigint NOT NULL, tipo_movimiento_id bigint NOT NULL, '
+    'monto numeric(15, 2) NOT NULL, descripcion text NOT NULL, fecha timestamp with time zone NOT NULL, '
+    'venta_id bigint NULL, compra_id bigint NULL, cuota_id bigint NULL, egreso_id bigint NULL, '
+    'ingreso_id bigint NULL, cierre_caja_id bigint NULL, observaciones text NULL'
+)
+INDICES_ARCHIVO = ('fecha', 'cuenta_id', 'tipo_movimiento_id', 'cierre_caja_id', 'venta_id', 'compra_id',
+                   'cuota_id', 'egreso_id', 'ingreso_id')
+
+
+def crear_archivo(apps, schema_editor):
+    """
+    PostgreSQL: tabla particionada por rango de `fecha` (la clave primaria
+    debe incluirla); caja/archivo.py crea una partición por mes al archivar.
+    La partición por defecto solo recibe filas si falta la del mes.
+    Otras bases: tabla normal.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(apps.get_model('caja', 'MovimientoCajaArchivado'))
+        return
+    schema_editor.execute(
+        f'CREATE TABLE caja_movimiento_archivo ({COLUMNAS_ARCHIVO}, PRIMARY KEY (id, fecha)) '
+        'PARTITION BY RANGE (fecha)'
+    )
+    schema_editor.execute('CREATE TABLE caja_movimiento_archivo_otros PARTITION OF caja_movimiento_archivo DEFAULT')
+    for columna in INDICES_ARCHIVO:
+        schema_editor.execute(f'CREATE INDEX caja_movimiento_archivo_{columna}_idx ON caja_movimiento_archivo ({columna})')
+
+
+def borrar_archivo(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.delete_model(apps.get_model('caja', 'MovimientoCajaArchivado'))
+        return
+    # Borra también las particiones que sigan adjuntas
+    schema_editor.execute('DROP TABLE caja_movimiento_archivo')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartado_credito', '0002_apartado_descripcion_apartado_monto_pendiente_and_more'),
+        ('caja', '0006_trabajo_cierre'),
+        ('compra_venta', '0002_remove_compra_precio_por_gramo_and_more'),
+        ('egreso_ingreso', '0002_ingreso'),
+    ]
+
+    operations = [
+        # En PostgreSQL la tabla se crea particionada por mes (crear_archivo)
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='MovimientoCajaArchivado',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('monto', models.DecimalField(decimal_places=2, max_digits=15)),
+                        ('descripcion', models.TextField()),
+                        ('fecha', models.DateTimeField()),
+                        ('observaciones', models.TextField(blank=True, null=True)),
+                        ('cierre_caja', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movimientos_archivados', to='caja.cierrecaja')),
+                        ('compra', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='compra_venta.compra')),
+                        ('cuenta', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='caja.cuentabancaria')),
+                        ('cuota', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='apartado_credito.cuota')),
+                        ('egreso', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='egreso_ingreso.egreso')),
+                        ('ingreso', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='egreso_ingreso.ingreso')),
+                        ('tipo_movimiento', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='caja.tipomovimiento')),
+                        ('venta', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='compra_venta.venta')),
+                    ],
+                    options={
+                        'verbose_name': 'Movimiento de Caja Archivado',
+                        'verbose_name_plural': 'Movimientos de Caja Archivados',
+                        'db_table': 'caja_movimiento_archivo',
+                        'ordering': ['-fecha'],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(crear_archivo, borrar_archivo),
+        migrations.CreateModel(
+            name='ResumenMovimientosMes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes')),
+                ('cantidad', models.PositiveIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('cierre_caja', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resumenes_archivados', to='caja.cierrecaja')),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='caja.cuentabancaria')),
+                ('tipo_movimiento', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='caja.tipomovimiento')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Movimientos por Mes',
+                'verbose_name_plural': 'Resúmenes de Movimientos por Mes',
+                'db_table': 'caja_resumen_movimientos_mes',
+                'ordering': ['mes'],
+                'unique_together': {('mes', 'cuenta', 'tipo_movimiento', 'cierre_caja')},
+            },
+        ),
+    ]
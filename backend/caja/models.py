@@ -3,6 +3,8 @@ from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from siged.dinero import Dinero
+
 
 class CuentaBancaria(models.Model):
     """
@@ -58,20 +60,34 @@ class TipoMovimiento(models.Model):
 
 class CierreCaja(models.Model):
     """
-    Representa un cierre de caja (diario o mensual).
+    Representa un cierre de caja (diario, mensual o anual).
     Congela los movimientos de un período específico.
+
+    Los cierres mensuales y anuales se arman con los cierres menores que
+    cubren el período (que quedan con cierre_padre apuntando al mayor) más
+    los movimientos sueltos de los huecos sin cierre. Ver caja/cierres.py.
     """
     DIARIO = 'D'
     MENSUAL = 'M'
+    ANUAL = 'A'
     TIPO_CIERRE_CHOICES = [
         (DIARIO, 'Diario'),
         (MENSUAL, 'Mensual'),
+        (ANUAL, 'Anual'),
     ]
     
     tipo_cierre = models.CharField(max_length=1, choices=TIPO_CIERRE_CHOICES)
     fecha_inicio = models.DateTimeField()
     fecha_fin = models.DateTimeField()
     fecha_cierre = models.DateTimeField(auto_now_add=True)
+    cierre_padre = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='cierres_hijos',
+        help_text='Cierre mensual o anual que incluye a este'
+    )
     
     total_entradas = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     total_salidas = models.DecimalField(max_digits=15, decimal_places=2, default=0)
@@ -91,6 +107,60 @@ class CierreCaja(models.Model):
         return f"Cierre {self.get_tipo_cierre_display()} - {self.fecha_fin.strftime('%Y-%m-%d')}"
 
 
+class TrabajoCierre(models.Model):
+    """
+    Solicitud de cierre de caja que se ejecuta en segundo plano
+    (ver caja/trabajos.py). El cierre y el paso a COMPLETADO se guardan en la
+    misma transacción, así que un trabajo interrumpido se puede reanudar.
+    """
+    PENDIENTE = 'P'
+    EJECUTANDO = 'E'
+    COMPLETADO = 'C'
+    FALLIDO = 'F'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EJECUTANDO, 'Ejecutando'),
+        (COMPLETADO, 'Completado'),
+        (FALLIDO, 'Fallido'),
+    ]
+
+    tipo_cierre = models.CharField(max_length=1, choices=CierreCaja.TIPO_CIERRE_CHOICES)
+    fecha_inicio = models.DateTimeField()
+    fecha_fin = models.DateTimeField()
+    observaciones = models.TextField(blank=True, null=True)
+    cerrado_por = models.CharField(max_length=100, blank=True, null=True)
+
+    estado = models.CharField(max_length=1, choices=ESTADO_CHOICES, default=PENDIENTE)
+    intentos = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    cierre = models.OneToOneField(
+        CierreCaja,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='trabajo'
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio_ejecucion = models.DateTimeField(null=True, blank=True)
+    fecha_fin_ejecucion = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'caja_trabajo_cierre'
+        verbose_name = 'Trabajo de Cierre'
+        verbose_name_plural = 'Trabajos de Cierre'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion'], name='trabajo_cierre_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"Trabajo de cierre #{self.pk} ({self.get_estado_display()})"
+
+
+# Documentos que generan movimientos automáticos (uno por documento)
+ORIGENES = ('venta', 'compra', 'cuota', 'egreso', 'ingreso')
+
+
 class MovimientoCaja(models.Model):
     """
     Registro de cada movimiento de dinero que ocurre en el negocio.
@@ -170,7 +240,16 @@ class MovimientoCaja(models.Model):
             models.Index(fields=['-fecha']),
             models.Index(fields=['cuenta', '-fecha']),
         ]
-    
+        # Un solo movimiento por documento de origen: la base de datos impide
+        # los duplicados (ver caja/movimientos.py, INSERT ... ON CONFLICT DO NOTHING)
+        constraints = [
+            models.UniqueConstraint(
+                fields=[campo], condition=models.Q(**{f'{campo}__isnull': False}),
+                name=f'movimiento_caja_{campo}_unico',
+            )
+            for campo in ORIGENES
+        ]
+
     def __str__(self):
         return f"{self.tipo_movimiento.nombre} - ${self.monto:,.2f} - {self.fecha.strftime('%Y-%m-%d %H:%M')}"
     
@@ -188,15 +267,16 @@ class MovimientoCaja(models.Model):
         print(f"   - Saldo actual cuenta ANTES: {self.cuenta.saldo_actual}")
         
         # ✅ SOLO actualizar saldo si el monto es mayor a 0
-        if es_nuevo and self.monto > Decimal('0.00'):
-            monto_decimal = Decimal(str(self.monto))
+        monto = Dinero.de(self.monto)
+        if es_nuevo and monto > 0:
+            saldo = Dinero.de(self.cuenta.saldo_actual)
             
             if self.tipo_movimiento.tipo == TipoMovimiento.ENTRADA:
-                self.cuenta.saldo_actual += monto_decimal
-                print(f"   ✅ ENTRADA: Sumando {monto_decimal}")
+                self.cuenta.saldo_actual = (saldo + monto).decimal()
+                print(f"   ✅ ENTRADA: Sumando {monto}")
             else:  # SALIDA
-                self.cuenta.saldo_actual -= monto_decimal
-                print(f"   ✅ SALIDA: Restando {monto_decimal}")
+                self.cuenta.saldo_actual = (saldo - monto).decimal()
+                print(f"   ✅ SALIDA: Restando {monto}")
             
             self.cuenta.save()
             print(f"   - Saldo actual cuenta DESPUÉS: {self.cuenta.saldo_actual}")
@@ -207,6 +287,80 @@ class MovimientoCaja(models.Model):
         print(f"   ✅ Movimiento guardado exitosamente")
 
 
+def _referencia_archivada(modelo, **opciones):
+    # Sin llave foránea en la base: el archivo puede sobrevivir al documento
+    return models.ForeignKey(
+        modelo, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+', **opciones
+    )
+
+
+class MovimientoCajaArchivado(models.Model):
+    """
+    Movimiento de un mes ya cerrado que salió de caja_movimiento (ver
+    caja/archivo.py). Conserva el id y las columnas que tenía en MovimientoCaja.
+    En PostgreSQL la tabla está particionada por mes sobre `fecha`.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    cuenta = _referencia_archivada(CuentaBancaria)
+    tipo_movimiento = _referencia_archivada(TipoMovimiento)
+    monto = models.DecimalField(max_digits=15, decimal_places=2)
+    descripcion = models.TextField()
+    fecha = models.DateTimeField()
+    venta = _referencia_archivada('compra_venta.Venta', null=True, blank=True)
+    compra = _referencia_archivada('compra_venta.Compra', null=True, blank=True)
+    cuota = _referencia_archivada('apartado_credito.Cuota', null=True, blank=True)
+    egreso = _referencia_archivada('egreso_ingreso.Egreso', null=True, blank=True)
+    ingreso = _referencia_archivada('egreso_ingreso.Ingreso', null=True, blank=True)
+    cierre_caja = models.ForeignKey(
+        CierreCaja,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='movimientos_archivados'
+    )
+    observaciones = models.TextField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'caja_movimiento_archivo'
+        verbose_name = 'Movimiento de Caja Archivado'
+        verbose_name_plural = 'Movimientos de Caja Archivados'
+        ordering = ['-fecha']
+
+    def __str__(self):
+        return f"Archivado #{self.pk} - ${self.monto:,.2f} - {self.fecha.strftime('%Y-%m-%d %H:%M')}"
+
+
+class ResumenMovimientosMes(models.Model):
+    """
+    Totales de los movimientos archivados de un mes por cuenta, tipo de
+    movimiento y cierre. Reemplazan al detalle en los saldos y en la
+    verificación de cierres, aunque la partición del mes se haya separado.
+    """
+    mes = models.DateField(help_text='Primer día del mes')
+    cuenta = models.ForeignKey(CuentaBancaria, on_delete=models.PROTECT, related_name='+')
+    tipo_movimiento = models.ForeignKey(TipoMovimiento, on_delete=models.PROTECT, related_name='+')
+    cierre_caja = models.ForeignKey(
+        CierreCaja,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='resumenes_archivados'
+    )
+    cantidad = models.PositiveIntegerField()
+    total = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        db_table = 'caja_resumen_movimientos_mes'
+        verbose_name = 'Resumen de Movimientos por Mes'
+        verbose_name_plural = 'Resúmenes de Movimientos por Mes'
+        ordering = ['mes']
+        unique_together = ['mes', 'cuenta', 'tipo_movimiento', 'cierre_caja']
+
+    def __str__(self):
+        return f"{self.mes.strftime('%Y-%m')} {self.cuenta.nombre}: ${self.total:,.2f} ({self.cantidad})"
+
+
 class SaldoCuentaPorCierre(models.Model):
     """
     Guarda el saldo de cada cuenta en cada cierre de caja.
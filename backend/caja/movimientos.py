@@ -0,0 +1,74 @@
+"""
+Registro idempotente de los movimientos de caja automáticos.
+
+Cada venta, compra, cuota, egreso e ingreso tiene a lo sumo un movimiento: lo
+garantizan los índices únicos parciales de MovimientoCaja (uno por columna de
+origen, solo sobre filas no nulas). registrar() inserta con
+
+    INSERT ... ON CONFLICT DO NOTHING RETURNING id
+
+así que un documento ya registrado se descarta en la misma consulta, sin un
+exists() previo y sin carrera entre dos procesos que registran el mismo
+documento. Solo si la fila se insertó se suma el monto al saldo de la cuenta
+(UPDATE ... SET saldo_actual = saldo_actual ± monto) y se envían las mismas
+señales post_save que MovimientoCaja.save() (eventos en vivo y sellos de versión).
+"""
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+
+from siged.dinero import Dinero
+
+from .models import CuentaBancaria, MovimientoCaja, TipoMovimiento
+
+
+def _insertar_o_ignorar(movimiento, alias):
+    """Inserta la fila; retorna el id nuevo o None si chocó con un índice único."""
+    conexion = connections[alias]
+    campos = [f for f in MovimientoCaja._meta.concrete_fields if not f.primary_key]
+    valores = [f.get_db_prep_save(f.pre_save(movimiento, True), conexion) for f in campos]
+    nombre = conexion.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({}) ON CONFLICT DO NOTHING RETURNING {}'.format(
+        nombre(MovimientoCaja._meta.db_table),
+        ', '.join(nombre(f.column) for f in campos),
+        ', '.join(['%s'] * len(campos)),
+        nombre(MovimientoCaja._meta.pk.column),
+    )
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, valores)
+        fila = cursor.fetchone()
+    return fila[0] if fila else None
+
+
+def registrar(**campos):
+    """
+    Crea el MovimientoCaja y actualiza el saldo de su cuenta. Retorna el
+    movimiento, o None si su documento de origen ya tenía uno.
+    """
+    movimiento = MovimientoCaja(**campos)
+    alias = router.db_for_write(MovimientoCaja)
+    # Sin savepoint: el INSERT y el UPDATE del saldo van en la transacción del
+    # llamador (o en una propia si no hay), sin dos consultas extra por movimiento
+    with transaction.atomic(using=alias, savepoint=False):
+        pk = _insertar_o_ignorar(movimiento, alias)
+        if pk is None:
+            return None
+        movimiento.pk = pk
+        movimiento._state.adding = False
+        movimiento._state.db = alias
+
+        if movimiento.monto > Decimal('0.00'):
+            cuenta = movimiento.cuenta
+            signo = 1 if movimiento.tipo_movimiento.tipo == TipoMovimiento.ENTRADA else -1
+            CuentaBancaria.objects.using(alias).filter(pk=cuenta.pk).update(
+                saldo_actual=F('saldo_actual') + (signo * Dinero.de(movimiento.monto)).decimal()
+            )
+            cuenta.refresh_from_db(fields=['saldo_actual'])
+            post_save.send(CuentaBancaria, instance=cuenta, created=False, update_fields=['saldo_actual'],
+                           raw=False, using=alias)
+
+        post_save.send(MovimientoCaja, instance=movimiento, created=True, update_fields=None,
+                       raw=False, using=alias)
+    return movimiento
@@ -5,12 +5,18 @@ from .models import (
     TipoMovimiento, 
     MovimientoCaja, 
     CierreCaja, 
-    SaldoCuentaPorCierre
+    SaldoCuentaPorCierre,
+    TrabajoCierre
 )
 from decimal import Decimal
 
+from siged import exportacion, proyecciones
+from siged.renderers import CompactoSerializerMixin
 
-class CuentaBancariaSerializer(serializers.ModelSerializer):
+from .trabajos import progreso as progreso_trabajo
+
+
+class CuentaBancariaSerializer(CompactoSerializerMixin, serializers.ModelSerializer):
     """
     Serializer para CuentaBancaria
     """
@@ -51,7 +57,7 @@ class TipoMovimientoSerializer(serializers.ModelSerializer):
         ]
 
 
-class MovimientoCajaSerializer(serializers.ModelSerializer):
+class MovimientoCajaSerializer(CompactoSerializerMixin, serializers.ModelSerializer):
     """
     Serializer básico para MovimientoCaja
     """
@@ -109,7 +115,7 @@ class MovimientoCajaSerializer(serializers.ModelSerializer):
         return data
 
 
-class MovimientoCajaDetalladoSerializer(serializers.ModelSerializer):
+class MovimientoCajaDetalladoSerializer(CompactoSerializerMixin, serializers.ModelSerializer):
     """
     Serializer detallado para MovimientoCaja con información relacionada
     """
@@ -194,7 +200,7 @@ class MovimientoCajaDetalladoSerializer(serializers.ModelSerializer):
         return None
 
 
-class SaldoCuentaPorCierreSerializer(serializers.ModelSerializer):
+class SaldoCuentaPorCierreSerializer(CompactoSerializerMixin, serializers.ModelSerializer):
     """
     Serializer para SaldoCuentaPorCierre
     """
@@ -215,7 +221,7 @@ class SaldoCuentaPorCierreSerializer(serializers.ModelSerializer):
         return f"${obj.saldo:,.2f}"
 
 
-class CierreCajaSerializer(serializers.ModelSerializer):
+class CierreCajaSerializer(CompactoSerializerMixin, serializers.ModelSerializer):
     """
     Serializer básico para CierreCaja
     """
@@ -245,9 +251,10 @@ class CierreCajaSerializer(serializers.ModelSerializer):
             'saldo_final_formateado',
             'diferencia',
             'observaciones',
-            'cerrado_por'
+            'cerrado_por',
+            'cierre_padre'
         ]
-        read_only_fields = ['fecha_cierre']
+        read_only_fields = ['fecha_cierre', 'cierre_padre']
     
     def get_total_entradas_formateado(self, obj):
         return f"${obj.total_entradas:,.2f}"
@@ -270,13 +277,13 @@ class CierreCajaSerializer(serializers.ModelSerializer):
         }
 
 
-class CierreCajaDetalladoSerializer(serializers.ModelSerializer):
+class CierreCajaDetalladoSerializer(CompactoSerializerMixin, serializers.ModelSerializer):
     """
     Serializer detallado para CierreCaja con saldos por cuenta y movimientos
     """
     tipo_cierre_display = serializers.CharField(source='get_tipo_cierre_display', read_only=True)
     saldos_cuentas = SaldoCuentaPorCierreSerializer(many=True, read_only=True)
-    movimientos = MovimientoCajaSerializer(many=True, read_only=True)
+    movimientos = serializers.SerializerMethodField()
     total_entradas_formateado = serializers.SerializerMethodField()
     total_salidas_formateado = serializers.SerializerMethodField()
     saldo_inicial_formateado = serializers.SerializerMethodField()
@@ -304,7 +311,8 @@ class CierreCajaDetalladoSerializer(serializers.ModelSerializer):
             'movimientos',
             'cantidad_movimientos',
             'observaciones',
-            'cerrado_por'
+            'cerrado_por',
+            'cierre_padre'
         ]
     
     def get_total_entradas_formateado(self, obj):
@@ -319,8 +327,53 @@ class CierreCajaDetalladoSerializer(serializers.ModelSerializer):
     def get_saldo_final_formateado(self, obj):
         return f"${obj.saldo_final:,.2f}"
     
+    def get_movimientos(self, obj):
+        # Los de meses archivados (caja/archivo.py) tienen las mismas columnas
+        movimientos = [*obj.movimientos.all(), *obj.movimientos_archivados.all()]
+        return MovimientoCajaSerializer(movimientos, many=True, context=self.context).data
+    
     def get_cantidad_movimientos(self, obj):
-        return obj.movimientos.count()
+        return obj.movimientos.count() + obj.movimientos_archivados.count()
+
+
+class TrabajoCierreSerializer(serializers.ModelSerializer):
+    """
+    Estado de un cierre en segundo plano, con la etapa y el porcentaje actuales
+    """
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    etapa = serializers.SerializerMethodField()
+    progreso = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = TrabajoCierre
+        fields = [
+            'id',
+            'tipo_cierre',
+            'fecha_inicio',
+            'fecha_fin',
+            'estado',
+            'estado_display',
+            'etapa',
+            'progreso',
+            'intentos',
+            'error',
+            'cierre',
+            'fecha_creacion',
+            'fecha_inicio_ejecucion',
+            'fecha_fin_ejecucion'
+        ]
+        read_only_fields = fields
+    
+    def _progreso(self, obj):
+        if not hasattr(obj, '_progreso_actual'):
+            obj._progreso_actual = progreso_trabajo(obj)
+        return obj._progreso_actual
+    
+    def get_etapa(self, obj):
+        return self._progreso(obj)['etapa']
+    
+    def get_progreso(self, obj):
+        return self._progreso(obj)['progreso']
 
 
 class CrearMovimientoCajaSerializer(serializers.Serializer):
@@ -369,4 +422,128 @@ class CrearMovimientoCajaSerializer(serializers.Serializer):
                              f'Saldo disponible: ${cuenta.saldo_actual:,.2f}'
                 })
         
-        return data
\ No newline at end of file
+        return data
+
+
+
+# ============ LECTURA RÁPIDA (values()) ============
+
+
+_saldo_cuenta = proyecciones.decimal_de(CuentaBancaria, 'saldo_actual')
+_monto_movimiento = proyecciones.decimal_de(MovimientoCaja, 'monto')
+_TIPOS_DISPLAY = dict(TipoMovimiento.TIPO_CHOICES)
+
+_COLUMNAS_MOVIMIENTO = (
+    'id', 'monto', 'descripcion', 'fecha', 'cierre_caja_id', 'observaciones',
+    'cuenta_id', 'cuenta__nombre', 'cuenta__descripcion', 'cuenta__saldo_actual',
+    'cuenta__activa', 'cuenta__fecha_creacion',
+    'tipo_movimiento_id', 'tipo_movimiento__nombre', 'tipo_movimiento__tipo',
+    'tipo_movimiento__descripcion', 'tipo_movimiento__activo',
+    'venta_id', 'venta__fecha', 'venta__total',
+    'compra_id', 'compra__fecha', 'compra__total',
+    'cuota_id', 'cuota__monto', 'cuota__fecha',
+    'egreso_id', 'egreso__descripcion', 'egreso__monto', 'egreso__fecha_registro',
+    'ingreso_id', 'ingreso__descripcion', 'ingreso__monto', 'ingreso__fecha_registro',
+)
+
+
+def _con_archivados(queryset, archivados, columnas, orden):
+    """values_list() de `queryset`, o UNION ALL con los mismos campos de `archivados` (una consulta)."""
+    filas = proyecciones.quitar_consultas_relacionadas(queryset)
+    if archivados is None:
+        return filas.values_list(*columnas)
+    return (
+        filas.order_by().values_list(*columnas)
+        .union(archivados.order_by().values_list(*columnas), all=True)
+        .order_by(*orden)
+    )
+
+
+def movimientos_detallados_rapido(queryset, compacto=False, archivados=None):
+    """
+    Mismo resultado que MovimientoCajaDetalladoSerializer(queryset, many=True).data
+    (sin los *_formateado si `compacto`), en una sola consulta values_list().
+    Las cuentas y tipos de movimiento anidados se arman una vez por id.
+    Con `archivados` (queryset de MovimientoCajaArchivado) se suman sus filas,
+    ordenadas por -fecha, -id.
+    """
+    cuentas = {}
+    tipos = {}
+    resultado = []
+    for (mov_id, monto, descripcion, fecha, cierre_caja_id, observaciones,
+         cuenta_id, cuenta_nombre, cuenta_descripcion, saldo_actual, cuenta_activa, cuenta_creacion,
+         tipo_id, tipo_nombre, tipo, tipo_descripcion, tipo_activo,
+         venta_id, venta_fecha, venta_total,
+         compra_id, compra_fecha, compra_total,
+         cuota_id, cuota_monto, cuota_fecha,
+         egreso_id, egreso_descripcion, egreso_monto, egreso_fecha,
+         ingreso_id, ingreso_descripcion, ingreso_monto, ingreso_fecha,
+         ) in _con_archivados(queryset, archivados, _COLUMNAS_MOVIMIENTO, ('-fecha', '-id')):
+
+        cuenta = cuentas.get(cuenta_id)
+        if cuenta is None:
+            cuenta = {'id': cuenta_id, 'nombre': cuenta_nombre, 'descripcion': cuenta_descripcion,
+                      'saldo_actual': _saldo_cuenta(saldo_actual)}
+            if not compacto:
+                cuenta['saldo_actual_formateado'] = f"${saldo_actual:,.2f}"
+            cuenta['activa'] = cuenta_activa
+            cuenta['fecha_creacion'] = proyecciones.fecha_hora(cuenta_creacion)
+            cuentas[cuenta_id] = cuenta
+
+        tipo_movimiento = tipos.get(tipo_id)
+        if tipo_movimiento is None:
+            tipo_movimiento = tipos[tipo_id] = {
+                'id': tipo_id, 'nombre': tipo_nombre, 'tipo': tipo,
+                'tipo_display': _TIPOS_DISPLAY.get(tipo, tipo),
+                'descripcion': tipo_descripcion, 'activo': tipo_activo,
+            }
+
+        movimiento = {
+            'id': mov_id,
+            'cuenta': cuenta,
+            'tipo_movimiento': tipo_movimiento,
+            'monto': _monto_movimiento(monto),
+        }
+        if not compacto:
+            movimiento['monto_formateado'] = f"${monto:,.2f}"
+        movimiento.update({
+            'descripcion': descripcion,
+            'fecha': proyecciones.fecha_hora(fecha),
+            'venta_info': {'id': venta_id, 'fecha': venta_fecha, 'total': str(venta_total)} if venta_id else None,
+            'compra_info': {'id': compra_id, 'fecha': compra_fecha, 'total': str(compra_total)} if compra_id else None,
+            'cuota_info': {'id': cuota_id, 'monto': str(cuota_monto), 'fecha': cuota_fecha} if cuota_id else None,
+            'egreso_info': {
+                'id': egreso_id, 'descripcion': egreso_descripcion,
+                'monto': str(egreso_monto), 'fecha': egreso_fecha,
+            } if egreso_id else None,
+            'ingreso_info': {
+                'id': ingreso_id, 'descripcion': ingreso_descripcion,
+                'monto': str(ingreso_monto), 'fecha': ingreso_fecha,
+            } if ingreso_id else None,
+            'cierre_caja': cierre_caja_id,
+            'observaciones': observaciones,
+        })
+        resultado.append(movimiento)
+    return resultado
+
+
+
+# ============ EXPORTACIÓN (CSV / XLSX) ============
+
+
+def movimientos_exportacion(queryset, archivados=None):
+    """
+    (encabezados, filas) del libro de caja para siged.exportacion, una fila por
+    movimiento, con los de `archivados` (MovimientoCajaArchivado) si se pasa.
+    """
+    encabezados = [
+        'ID', 'Fecha', 'Cuenta', 'Tipo de movimiento', 'Entrada/Salida', 'Monto', 'Descripción',
+        'Venta', 'Compra', 'Cuota', 'Egreso', 'Ingreso', 'Cierre de caja', 'Observaciones',
+    ]
+    columnas = (
+        'id', 'fecha', 'cuenta__nombre', 'tipo_movimiento__nombre', 'tipo_movimiento__tipo', 'monto',
+        'descripcion', 'venta_id', 'compra_id', 'cuota_id', 'egreso_id', 'ingreso_id', 'cierre_caja_id',
+        'observaciones',
+    )
+    filas = _con_archivados(queryset.order_by('fecha', 'id'), archivados, columnas, ('fecha', 'id'))
+    return encabezados, filas.iterator(chunk_size=exportacion.TAMANO_BLOQUE)
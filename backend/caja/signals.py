@@ -1,16 +1,22 @@
 # caja/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from decimal import Decimal
 
-from compra_venta.models import Venta, Compra
+from compra_venta.models import Venta, Compra, VentaPrenda
 from apartado_credito.models import Cuota
 from .models import (
     MovimientoCaja, 
     TipoMovimiento, 
     CuentaBancaria
 )
+from .movimientos import registrar as registrar_movimiento
+from .serializers import CuentaBancariaSerializer, movimientos_detallados_rapido
 from egreso_ingreso.models import Egreso, Ingreso
+from apartado_credito.models import Apartado
+from prendas.models import Prenda
+from siged.eventos import publicar
+from siged.metricas import medir_receptor
 
 
 def obtener_cuenta_por_metodo_pago(metodo_pago):
@@ -44,6 +50,7 @@ def obtener_cuenta_por_metodo_pago(metodo_pago):
 
 
 @receiver(post_save, sender=Venta)
+@medir_receptor
 def registrar_venta_en_caja(sender, instance, created, **kwargs):
     """
     Registra ventas en caja automáticamente.
@@ -58,11 +65,6 @@ def registrar_venta_en_caja(sender, instance, created, **kwargs):
         print(f"⚠️ [SIGNAL VENTA] Venta #{instance.id} tiene total 0, esperando...")
         return
     
-    # Evitar duplicados
-    if MovimientoCaja.objects.filter(venta=instance).exists():
-        print(f"⚠️ [SIGNAL VENTA] Venta #{instance.id} ya tiene movimiento registrado")
-        return
-    
     try:
         cuenta = obtener_cuenta_por_metodo_pago(instance.metodo_pago)
         
@@ -112,7 +114,7 @@ def registrar_venta_en_caja(sender, instance, created, **kwargs):
         print(f"   - Tipo: {tipo_movimiento.nombre}")
         print(f"   - Cuenta: {cuenta.nombre}")
         
-        movimiento = MovimientoCaja.objects.create(
+        movimiento = registrar_movimiento(
             cuenta=cuenta,
             tipo_movimiento=tipo_movimiento,
             monto=monto,
@@ -120,6 +122,9 @@ def registrar_venta_en_caja(sender, instance, created, **kwargs):
             venta=instance,
             observaciones=observaciones
         )
+        if movimiento is None:
+            print(f"⚠️ [SIGNAL VENTA] Venta #{instance.id} ya tiene movimiento registrado")
+            return
         
         print(f"✅ [SIGNAL VENTA] Movimiento #{movimiento.id} creado")
         
@@ -130,6 +135,7 @@ def registrar_venta_en_caja(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=Compra)
+@medir_receptor
 def registrar_compra_en_caja(sender, instance, created, **kwargs):
     """
     Registra compras en caja automáticamente.
@@ -144,11 +150,6 @@ def registrar_compra_en_caja(sender, instance, created, **kwargs):
         print(f"⚠️ [SIGNAL COMPRA] Compra #{instance.id} tiene total 0, esperando...")
         return
     
-    # Evitar duplicados
-    if MovimientoCaja.objects.filter(compra=instance).exists():
-        print(f"⚠️ [SIGNAL COMPRA] Compra #{instance.id} ya tiene movimiento registrado")
-        return
-    
     try:
         cuenta = obtener_cuenta_por_metodo_pago(instance.metodo_pago)
         
@@ -183,7 +184,7 @@ def registrar_compra_en_caja(sender, instance, created, **kwargs):
         print(f"   - Tipo: {tipo_movimiento.nombre}")
         print(f"   - Cuenta: {cuenta.nombre}")
         
-        movimiento = MovimientoCaja.objects.create(
+        movimiento = registrar_movimiento(
             cuenta=cuenta,
             tipo_movimiento=tipo_movimiento,
             monto=monto,
@@ -191,6 +192,9 @@ def registrar_compra_en_caja(sender, instance, created, **kwargs):
             compra=instance,
             observaciones=observaciones
         )
+        if movimiento is None:
+            print(f"⚠️ [SIGNAL COMPRA] Compra #{instance.id} ya tiene movimiento registrado")
+            return
         
         print(f"✅ [SIGNAL COMPRA] Movimiento #{movimiento.id} creado")
         
@@ -201,6 +205,7 @@ def registrar_compra_en_caja(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=Cuota)
+@medir_receptor
 def registrar_cuota_en_caja(sender, instance, created, **kwargs):
     """
     Registra cuotas/abonos en caja automáticamente.
@@ -208,11 +213,6 @@ def registrar_cuota_en_caja(sender, instance, created, **kwargs):
     if not created:
         return
     
-    # ✅ EVITAR DUPLICADOS
-    if MovimientoCaja.objects.filter(cuota=instance).exists():
-        print(f"⚠️ [SIGNAL CUOTA] Cuota #{instance.id} ya tiene movimiento registrado")
-        return
-    
     try:
         cuenta = obtener_cuenta_por_metodo_pago(instance.metodo_pago)
         monto_cuota = Decimal(str(instance.monto))
@@ -280,7 +280,7 @@ def registrar_cuota_en_caja(sender, instance, created, **kwargs):
         print(f"   - Cuenta: {cuenta.nombre}")
         
         # Crear movimiento
-        movimiento = MovimientoCaja.objects.create(
+        movimiento = registrar_movimiento(
             cuenta=cuenta,
             tipo_movimiento=tipo_movimiento,
             monto=monto_cuota,
@@ -288,6 +288,9 @@ def registrar_cuota_en_caja(sender, instance, created, **kwargs):
             cuota=instance,
             observaciones=f'Método: {instance.metodo_pago.nombre if instance.metodo_pago else "Efectivo"}'
         )
+        if movimiento is None:
+            print(f"⚠️ [SIGNAL CUOTA] Cuota #{instance.id} ya tiene movimiento registrado")
+            return
         
         print(f"✅ [SIGNAL CUOTA] Movimiento #{movimiento.id} creado exitosamente")
         
@@ -297,6 +300,7 @@ def registrar_cuota_en_caja(sender, instance, created, **kwargs):
         traceback.print_exc()
 
 @receiver(post_save, sender=Egreso)
+@medir_receptor
 def registrar_egreso_en_caja(sender, instance, created, **kwargs):
     """
     Registra egresos operativos en caja automáticamente.
@@ -309,13 +313,6 @@ def registrar_egreso_en_caja(sender, instance, created, **kwargs):
         print(f"⚠️ [SIGNAL EGRESO] Egreso #{instance.id} tiene monto 0")
         return
     
-    # Evitar duplicados
-    if MovimientoCaja.objects.filter(
-        descripcion__contains=f'Egreso #{instance.id}'
-    ).exists():
-        print(f"⚠️ [SIGNAL EGRESO] Egreso #{instance.id} ya registrado")
-        return
-    
     try:
         cuenta = obtener_cuenta_por_metodo_pago(instance.metodo_pago)
         
@@ -334,7 +331,7 @@ def registrar_egreso_en_caja(sender, instance, created, **kwargs):
         print(f"   - Monto: {monto}")
         print(f"   - Cuenta: {cuenta.nombre}")
         
-        movimiento = MovimientoCaja.objects.create(
+        movimiento = registrar_movimiento(
             cuenta=cuenta,
             tipo_movimiento=tipo_movimiento,
             monto=monto,
@@ -342,6 +339,9 @@ def registrar_egreso_en_caja(sender, instance, created, **kwargs):
             egreso=instance,
             observaciones=f'Método: {instance.metodo_pago.nombre if instance.metodo_pago else "Efectivo"}'
         )
+        if movimiento is None:
+            print(f"⚠️ [SIGNAL EGRESO] Egreso #{instance.id} ya tiene movimiento registrado")
+            return
         
         print(f"✅ [SIGNAL EGRESO] Movimiento #{movimiento.id} creado")
         
@@ -352,6 +352,7 @@ def registrar_egreso_en_caja(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=Ingreso)
+@medir_receptor
 def registrar_ingreso_en_caja(sender, instance, created, **kwargs):
     """
     Registra ingresos operativos en caja automáticamente.
@@ -364,13 +365,6 @@ def registrar_ingreso_en_caja(sender, instance, created, **kwargs):
         print(f"⚠️ [SIGNAL INGRESO] Ingreso #{instance.id} tiene monto 0")
         return
     
-    # Evitar duplicados
-    if MovimientoCaja.objects.filter(
-        descripcion__contains=f'Ingreso #{instance.id}'
-    ).exists():
-        print(f"⚠️ [SIGNAL INGRESO] Ingreso #{instance.id} ya registrado")
-        return
-    
     try:
         cuenta = obtener_cuenta_por_metodo_pago(instance.metodo_pago)
         
@@ -389,7 +383,7 @@ def registrar_ingreso_en_caja(sender, instance, created, **kwargs):
         print(f"   - Monto: {monto}")
         print(f"   - Cuenta: {cuenta.nombre}")
         
-        movimiento = MovimientoCaja.objects.create(
+        movimiento = registrar_movimiento(
             cuenta=cuenta,
             tipo_movimiento=tipo_movimiento,
             monto=monto,
@@ -397,10 +391,49 @@ def registrar_ingreso_en_caja(sender, instance, created, **kwargs):
             ingreso=instance,
             observaciones=f'Método: {instance.metodo_pago.nombre if instance.metodo_pago else "Efectivo"}'
         )
+        if movimiento is None:
+            print(f"⚠️ [SIGNAL INGRESO] Ingreso #{instance.id} ya tiene movimiento registrado")
+            return
         
         print(f"✅ [SIGNAL INGRESO] Movimiento #{movimiento.id} creado")
         
     except Exception as e:
         print(f"❌ [SIGNAL INGRESO] Error: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+
+
+# ============ EVENTOS EN VIVO (siged/eventos.py) ============
+
+
+@receiver(post_save, sender=MovimientoCaja)
+@medir_receptor
+def publicar_movimiento(sender, instance, created, **kwargs):
+    """Nuevo movimiento de caja, con el mismo formato que /api/caja/movimientos/"""
+    if not created:
+        return
+    def datos():
+        filas = movimientos_detallados_rapido(MovimientoCaja.objects.filter(pk=instance.pk))
+        return filas[0] if filas else {'id': instance.pk}
+    publicar('movimiento_caja', datos, clave=instance.pk)
+
+
+@receiver(post_save, sender=CuentaBancaria)
+@medir_receptor
+def publicar_saldo_cuenta(sender, instance, **kwargs):
+    """Saldo actualizado de la cuenta (se envía solo el último de la transacción)"""
+    publicar('saldo_cuenta', CuentaBancariaSerializer(instance).data, clave=instance.pk)
+
+
+@receiver(post_save, sender=Venta)
+@receiver(post_save, sender=Compra)
+@receiver(post_save, sender=VentaPrenda)
+@receiver(post_save, sender=Prenda)
+@receiver(post_save, sender=Apartado)
+@receiver(post_delete, sender=Venta)
+@receiver(post_delete, sender=Compra)
+@receiver(post_delete, sender=Prenda)
+@medir_receptor
+def publicar_dashboard(sender, **kwargs):
+    """Aviso de que cambió el resumen del dashboard (el cliente lo vuelve a pedir)"""
+    publicar('dashboard', clave='resumen')
@@ -0,0 +1,21 @@
+# caja/tareas.py
+from datetime import timedelta
+
+from django.conf import settings
+
+from tareas.cola import tarea
+
+from . import archivo, trabajos
+
+
+@tarea(cada=timedelta(minutes=5), reintentos=0)
+def reanudar_cierres():
+    """Retoma los cierres de caja que quedaron pendientes o abandonados (ver caja/trabajos.py)."""
+    return [trabajos.ejecutar(pk).estado for pk in trabajos.pendientes().values_list('pk', flat=True)]
+
+
+@tarea(hora=settings.TAREAS_HORA_NOCTURNA)
+def archivar_movimientos():
+    """Archiva los meses cerrados anteriores a CAJA_MESES_EN_LINEA (ver caja/archivo.py)."""
+    meses = archivo.meses_archivables(archivo.primer_mes_en_linea(settings.CAJA_MESES_EN_LINEA))
+    return {f'{mes:%Y-%m}': archivo.archivar_mes(mes) for mes in meses}
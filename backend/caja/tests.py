@@ -1,3 +1,368 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from siged import eventos
+from siged.presupuesto_consultas import PresupuestoConsultasMixin, sembrar
+
+from .models import CuentaBancaria, MovimientoCaja, TipoMovimiento
+from .serializers import MovimientoCajaDetalladoSerializer, movimientos_detallados_rapido
+
+
+class PresupuestoConsultasCajaTests(PresupuestoConsultasMixin, TestCase):
+    """Ningún endpoint GET de caja debe crecer en consultas con el número de filas."""
+    app_label = 'caja'
+
+
+class CacheRespuestasCajaTests(TestCase):
+    """resumen_general se sirve de la caché hasta que cambia una cuenta."""
+
+    def test_acierto_sin_consultas_e_invalidacion_por_escritura(self):
+        cuenta = CuentaBancaria.objects.create(nombre='Efectivo')
+        url = '/api/caja/cuentas/resumen_general/'
+        primera = self.client.get(url).json()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json(), primera)
+
+        cuenta.saldo_actual = Decimal('1000.00')
+        cuenta.save()
+        self.assertEqual(Decimal(self.client.get(url).json()['total_general']), Decimal('1000'))
+
+
+class LecturaRapidaMovimientosTests(TestCase):
+    """movimientos_detallados_rapido() debe producir exactamente el JSON del serializer detallado."""
+
+    def test_mismo_json_que_el_serializer(self):
+        sembrar(3)
+        queryset = MovimientoCaja.objects.select_related(
+            'cuenta', 'tipo_movimiento', 'venta', 'compra', 'cuota', 'egreso', 'ingreso'
+        ).order_by('-fecha', '-id')
+        render = JSONRenderer().render
+        for compacto in (False, True):
+            with self.subTest(compacto=compacto):
+                esperado = MovimientoCajaDetalladoSerializer(queryset, many=True, context={'compacto': compacto}).data
+                self.assertEqual(render(movimientos_detallados_rapido(queryset, compacto=compacto)), render(esperado))
+
+
+class EventosEnVivoTests(TestCase):
+    """Un movimiento publica su evento y el saldo final de la cuenta al confirmar."""
+
+    def test_movimiento_y_saldo_fusionado(self):
+        entrada = TipoMovimiento.objects.create(nombre='Ingreso Operativo', tipo=TipoMovimiento.ENTRADA)
+        suscripcion = eventos.suscribir(['movimiento_caja', 'saldo_cuenta'])
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                cuenta = CuentaBancaria.objects.create(nombre='Efectivo')
+                for monto in ('100.00', '50.00'):
+                    MovimientoCaja.objects.create(cuenta=cuenta, tipo_movimiento=entrada, monto=Decimal(monto))
+            recibidos = [suscripcion.cola.get_nowait() for _ in range(suscripcion.cola.qsize())]
+        finally:
+            eventos.desuscribir(suscripcion)
+
+        self.assertEqual([e['tipo'] for e in recibidos], ['saldo_cuenta', 'movimiento_caja', 'movimiento_caja'])
+        self.assertEqual(Decimal(recibidos[0]['datos']['saldo_actual']), Decimal('150.00'))
+        self.assertEqual(recibidos[1]['datos']['monto'], '100.00')
+
+    @override_settings(EVENTOS_DURACION_MAXIMA=0)
+    def test_reconexion_con_id_perdido(self):
+        respuesta = self.client.get('/api/eventos/', HTTP_LAST_EVENT_ID='0-0')
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        contenido = b''.join(respuesta.streaming_content).decode()
+        self.assertIn('event: resincronizar', contenido)
+
+    @override_settings(EVENTOS_MAXIMO_CONEXIONES=1, EVENTOS_REINTENTO_OCUPADO_MS=1234)
+    def test_cupo_de_conexiones_por_proceso(self):
+        abierta = self.client.get('/api/eventos/')
+        self.assertEqual(eventos.conexiones_abiertas(), 1)
+        rechazada = self.client.get('/api/eventos/')
+        self.assertEqual(b''.join(rechazada.streaming_content), b'retry: 1234\n\n')
+
+        # Cerrar la respuesta libera el cupo aunque el flujo no haya empezado
+        abierta.close()
+        self.assertEqual(eventos.conexiones_abiertas(), 0)
+        self.client.get('/api/eventos/').close()
+        self.assertEqual(eventos.conexiones_abiertas(), 0)
+
+    def test_error_despues_del_commit_no_rompe_la_escritura(self):
+        def datos():
+            raise RuntimeError('sin datos')
+
+        with self.assertLogs('siged.eventos', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                eventos.publicar('dashboard', datos)
+
+
+class MovimientoIdempotenteTests(TestCase):
+    """Un documento se registra una sola vez en caja, sin exists() previo."""
+
+    def test_segundo_registro_se_descarta(self):
+        from django.db import IntegrityError, transaction
+        from dominios_comunes.models import MetodoPago
+        from egreso_ingreso.models import Ingreso
+        from .signals import registrar_ingreso_en_caja
+
+        metodo = MetodoPago.objects.create(nombre='Efectivo')
+        with self.captureOnCommitCallbacks(execute=True):
+            ingreso = Ingreso.objects.create(descripcion='Arriendo local', monto=Decimal('700.00'), metodo_pago=metodo)
+        movimiento = MovimientoCaja.objects.get(ingreso=ingreso)
+        saldo = movimiento.cuenta.saldo_actual
+        self.assertEqual(saldo, Decimal('700.00'))
+
+        # Solo el INSERT ... ON CONFLICT (más los get_or_create de cuenta y tipo)
+        with self.assertNumQueries(3):
+            registrar_ingreso_en_caja(Ingreso, ingreso, created=True)
+        self.assertEqual(MovimientoCaja.objects.filter(ingreso=ingreso).count(), 1)
+        movimiento.cuenta.refresh_from_db()
+        self.assertEqual(movimiento.cuenta.saldo_actual, saldo)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            MovimientoCaja.objects.create(cuenta=movimiento.cuenta, tipo_movimiento=movimiento.tipo_movimiento,
+                                          monto=Decimal('1.00'), ingreso=ingreso)
+
+    def test_migracion_solo_borra_repetidos_abiertos(self):
+        from importlib import import_module
+        from django.apps import apps
+        from django.db import connection
+        from django.utils import timezone
+        from dominios_comunes.models import MetodoPago
+        from egreso_ingreso.models import Ingreso
+        from .models import CierreCaja
+
+        migracion = import_module('caja.migrations.0004_movimiento_origen_unico')
+        # Sin el índice único (se revierte con la transacción de la prueba) para sembrar repetidos
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX movimiento_caja_ingreso_unico')
+
+        metodo = MetodoPago.objects.create(nombre='Efectivo')
+        abierto, cerrado = Ingreso.objects.bulk_create([
+            Ingreso(descripcion=d, monto=Decimal('10.00'), metodo_pago=metodo) for d in ('abierto', 'cerrado')
+        ])
+        cuenta = CuentaBancaria.objects.create(nombre='Efectivo', saldo_actual=Decimal('50.00'))
+        entrada = TipoMovimiento.objects.create(nombre='Ingreso', tipo=TipoMovimiento.ENTRADA)
+        ahora = timezone.now()
+        cierre = CierreCaja.objects.create(tipo_cierre=CierreCaja.DIARIO, fecha_inicio=ahora, fecha_fin=ahora)
+        MovimientoCaja.objects.bulk_create([
+            MovimientoCaja(cuenta=cuenta, tipo_movimiento=entrada, monto=Decimal('10.00'), descripcion='',
+                           ingreso=ingreso, cierre_caja=c)
+            for ingreso, c in [(abierto, None), (abierto, None), (abierto, cierre), (cerrado, cierre), (cerrado, cierre)]
+        ])
+
+        with self.assertLogs('caja.migrations.0004_movimiento_origen_unico', 'WARNING') as registro:
+            with self.assertRaisesRegex(migracion.DuplicadosCerrados, f'ingreso={cerrado.pk}'):
+                migracion.eliminar_duplicados(apps, None)
+        self.assertEqual(len(registro.records), 2)
+
+        # Del abierto queda el que tiene cierre; los cerrados no se tocan
+        self.assertEqual(list(MovimientoCaja.objects.filter(ingreso=abierto).values_list('cierre_caja', flat=True)),
+                         [cierre.pk])
+        self.assertEqual(MovimientoCaja.objects.filter(ingreso=cerrado).count(), 2)
+        cuenta.refresh_from_db()
+        self.assertEqual(cuenta.saldo_actual, Decimal('30.00'))
+
+
+class CierresJerarquicosTests(TestCase):
+    """El cierre mensual suma los diarios del mes y solo recorre los huecos sin cierre."""
+
+    def test_mensual_y_anual_desde_diarios(self):
+        from datetime import datetime
+        from django.utils import timezone
+        from .cierres import ErrorCierre, realizar, verificar
+        from .models import CierreCaja
+
+        def dia(d, hora=0):
+            return timezone.make_aware(datetime(2026, 3, d, hora))
+
+        cuenta = CuentaBancaria.objects.create(nombre='Efectivo')
+        entrada = TipoMovimiento.objects.create(nombre='Venta Contado', tipo=TipoMovimiento.ENTRADA)
+        salida = TipoMovimiento.objects.create(nombre='Egreso Operativo', tipo=TipoMovimiento.SALIDA)
+        for d, tipo, monto in [(2, entrada, '100.00'), (3, entrada, '50.00'), (3, salida, '30.00'), (20, entrada, '7.00')]:
+            movimiento = MovimientoCaja.objects.create(cuenta=cuenta, tipo_movimiento=tipo, monto=Decimal(monto))
+            MovimientoCaja.objects.filter(pk=movimiento.pk).update(fecha=dia(d, 12))
+        # Posterior a todos los períodos: está en saldo_actual pero no en los saldos de los cierres
+        posterior = MovimientoCaja.objects.create(cuenta=cuenta, tipo_movimiento=entrada, monto=Decimal('5.00'))
+        MovimientoCaja.objects.filter(pk=posterior.pk).update(fecha=timezone.make_aware(datetime(2027, 1, 2)))
+
+        diarios = [realizar(CierreCaja.DIARIO, dia(d), dia(d, 23)) for d in (2, 3)]
+        with self.assertRaises(ErrorCierre):
+            realizar(CierreCaja.DIARIO, dia(3), dia(3, 23))
+
+        mensual = realizar(CierreCaja.MENSUAL, dia(1), dia(31, 23))
+        self.assertEqual((mensual.total_entradas, mensual.total_salidas), (Decimal('157.00'), Decimal('30.00')))
+        self.assertEqual(mensual.saldo_inicial, Decimal('0.00'))
+        self.assertEqual(mensual.saldo_final, Decimal('127.00'))
+        self.assertEqual(mensual.saldos_cuentas.get().saldo, Decimal('127.00'))
+        self.assertEqual(set(mensual.cierres_hijos.all()), set(diarios))
+        self.assertEqual(list(mensual.movimientos.values_list('monto', flat=True)), [Decimal('7.00')])
+
+        anual = realizar(CierreCaja.ANUAL, timezone.make_aware(datetime(2026, 1, 1)),
+                         timezone.make_aware(datetime(2026, 12, 31, 23)))
+        self.assertEqual((anual.total_entradas, anual.saldo_final), (Decimal('157.00'), Decimal('127.00')))
+        self.assertEqual(verificar(), [])
+
+        # Todos los cierres guardan el saldo de cada cuenta al final de su período
+        cuenta.refresh_from_db()
+        self.assertEqual(cuenta.saldo_actual, Decimal('132.00'))
+        for cierre, saldo in [(diarios[0], '100.00'), (diarios[1], '120.00'), (mensual, '127.00'), (anual, '127.00')]:
+            with self.subTest(cierre=cierre.get_tipo_cierre_display(), fin=cierre.fecha_fin):
+                self.assertEqual(cierre.saldos_cuentas.get().saldo, Decimal(saldo))
+                self.assertEqual(cierre.saldo_final, Decimal(saldo))
+
+        CierreCaja.objects.filter(pk=diarios[0].pk).update(total_entradas=Decimal('1.00'))
+        self.assertEqual([c.pk for c, *_ in verificar()], [diarios[0].pk])
+
+
+@override_settings(CIERRES_EN_SEGUNDO_PLANO=False)
+class TrabajosCierreTests(TestCase):
+    """realizar_cierre responde 202 y el cierre queda en un TrabajoCierre consultable."""
+
+    def test_encolar_completar_y_fallar(self):
+        from .models import CierreCaja, TrabajoCierre
+
+        cuenta = CuentaBancaria.objects.create(nombre='Efectivo')
+        entrada = TipoMovimiento.objects.create(nombre='Venta Contado', tipo=TipoMovimiento.ENTRADA)
+        MovimientoCaja.objects.create(cuenta=cuenta, tipo_movimiento=entrada, monto=Decimal('80.00'))
+        datos = {'tipo_cierre': 'D', 'fecha_inicio': '2000-01-01T00:00:00', 'fecha_fin': '2999-12-31T23:59:59'}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post('/api/caja/cierres/realizar_cierre/', datos, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 202)
+        pk = respuesta.json()['trabajo']['id']
+
+        trabajo = self.client.get(f'/api/caja/cierres-trabajos/{pk}/').json()
+        self.assertEqual((trabajo['estado'], trabajo['progreso']), (TrabajoCierre.COMPLETADO, 100))
+        self.assertEqual(CierreCaja.objects.get(pk=trabajo['cierre']).total_entradas, Decimal('80.00'))
+
+        # Mismo período: el trabajo falla y guarda el motivo
+        with self.captureOnCommitCallbacks(execute=True):
+            pk = self.client.post('/api/caja/cierres/realizar_cierre/', datos,
+                                  content_type='application/json').json()['trabajo']['id']
+        trabajo = TrabajoCierre.objects.get(pk=pk)
+        self.assertEqual(trabajo.estado, TrabajoCierre.FALLIDO)
+        self.assertIn('Ya existe un cierre', trabajo.error)
+        self.assertEqual(CierreCaja.objects.count(), 1)
+
+        # Un trabajo terminado no se vuelve a ejecutar
+        from .trabajos import ejecutar
+        self.assertEqual(ejecutar(pk).intentos, 1)
+
+
+class ArchivoMovimientosTests(TestCase):
+    """Los meses cerrados pasan al archivo sin cambiar totales, saldos ni cierres."""
+
+    def test_archivar_y_restaurar_mes(self):
+        from datetime import date, datetime
+        from django.utils import timezone
+        from . import archivo
+        from .cierres import _saldo_antes, realizar, verificar
+        from .models import CierreCaja, MovimientoCajaArchivado, ResumenMovimientosMes
+
+        def dia(mes, d, hora=0):
+            return timezone.make_aware(datetime(2025, mes, d, hora))
+
+        cuenta = CuentaBancaria.objects.create(nombre='Efectivo')
+        entrada = TipoMovimiento.objects.create(nombre='Venta Contado', tipo=TipoMovimiento.ENTRADA)
+        salida = TipoMovimiento.objects.create(nombre='Egreso Operativo', tipo=TipoMovimiento.SALIDA)
+        for mes, d, tipo, monto in [(1, 5, entrada, '100.00'), (1, 6, salida, '40.00'), (2, 3, entrada, '9.00')]:
+            movimiento = MovimientoCaja.objects.create(cuenta=cuenta, tipo_movimiento=tipo, monto=Decimal(monto))
+            MovimientoCaja.objects.filter(pk=movimiento.pk).update(fecha=dia(mes, d, 12))
+        cierres = [realizar(CierreCaja.DIARIO, dia(1, d), dia(1, d, 23)) for d in (5, 6)]
+
+        url = '/api/caja/movimientos/resumen_periodo/'
+        periodo = {'fecha_desde': '2025-01-01', 'fecha_hasta': '2025-02-28'}
+        resumen = self.client.get(url, periodo).json()
+        saldo_febrero = _saldo_antes(dia(2, 1))
+        listado = self.client.get('/api/caja/movimientos/', periodo).json()
+        exportar = lambda: b''.join(self.client.get('/api/caja/movimientos/exportar/', periodo).streaming_content)
+        libro = exportar()
+        self.assertEqual((len(listado), libro.count(b'\n')), (3, 4))
+
+        # Febrero tiene un movimiento sin cierre: solo enero se puede archivar
+        self.assertEqual(archivo.meses_archivables(date(2025, 3, 1)), [date(2025, 1, 1)])
+        self.assertEqual(archivo.archivar_mes(date(2025, 1, 1)), 2)
+        self.assertEqual(archivo.archivar_mes(date(2025, 2, 1)), 0)
+        self.assertEqual(MovimientoCaja.objects.count(), 1)
+        self.assertEqual(MovimientoCajaArchivado.objects.count(), 2)
+        self.assertEqual(ResumenMovimientosMes.objects.count(), 2)
+
+        self.assertEqual(self.client.get(url, periodo).json(), resumen)
+        # Listado y libro de caja siguen completos con enero archivado
+        self.assertEqual(self.client.get('/api/caja/movimientos/', periodo).json(), listado)
+        self.assertEqual(exportar(), libro)
+        self.assertEqual(len(self.client.get('/api/caja/movimientos/', {**periodo, 'sin_cierre': '1'}).json()), 1)
+        self.assertEqual(_saldo_antes(dia(2, 1)), saldo_febrero)
+        self.assertEqual(verificar(), [])
+        detalle = self.client.get(f'/api/caja/cierres/{cierres[0].pk}/').json()
+        self.assertEqual((detalle['cantidad_movimientos'], detalle['movimientos'][0]['monto']), (1, '100.00'))
+
+        # Sin el detalle (partición separada) los cierres siguen cuadrando con el resumen
+        MovimientoCajaArchivado.objects.all().delete()
+        self.assertEqual(verificar(), [])
+        with self.assertRaises(archivo.ErrorArchivo):
+            archivo.restaurar_mes(date(2025, 1, 1))
+        self.assertEqual(ResumenMovimientosMes.objects.count(), 2)
+
+    def test_separar_sin_particiones(self):
+        from django.core.management import CommandError, call_command
+        from django.db import connection
+
+        if connection.vendor == 'postgresql':
+            self.skipTest('Las particiones existen en PostgreSQL')
+        with self.assertRaisesMessage(CommandError, 'solo existen en PostgreSQL'):
+            call_command('archivar_movimientos', separar='2025-01')
+
+
+@override_settings(REPLICA_ALIAS='default', REPLICA_RETRASO_MAXIMO_SEGUNDOS=5, REPLICA_PEGAJOSA_SEGUNDOS=60)
+class ReplicaLecturasTests(TestCase):
+    """Los reportes leen de la réplica salvo tras una escritura del mismo cliente o con la réplica atrasada."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from siged import replicas
+
+        self.cliente = {'REMOTE_ADDR': '10.0.0.49'}
+        cache.delete(f'{replicas.PREFIJO}ip:10.0.0.49')
+
+    def test_enrutado_lectura_de_lo_propio_y_retraso(self):
+        from unittest import mock
+
+        from django.test import RequestFactory
+        from siged import replicas, versiones
+
+        @replicas.usar_replica
+        def vista(request):
+            return replicas.EnrutadorReplica().db_for_read(MovimientoCaja)
+
+        fabrica = RequestFactory()
+        url = '/api/caja/movimientos/resumen_periodo/'
+        periodo = {'fecha_desde': '2025-01-01', 'fecha_hasta': '2025-01-31'}
+        motivos = lambda: {m: replicas.lecturas.valor(base='default', motivo=m)
+                           for m in ('replica', 'escritura_reciente', 'retraso')}
+
+        with mock.patch.object(replicas, 'retraso', return_value=0.0):
+            self.assertEqual(vista(fabrica.get('/', **self.cliente)), 'default')
+            self.assertIsNone(replicas.EnrutadorReplica().db_for_read(MovimientoCaja))
+            self.assertFalse(replicas.EnrutadorReplica().allow_migrate('default', 'caja'))
+
+            antes = motivos()
+            self.assertEqual(self.client.get(url, periodo, **self.cliente).status_code, 200)
+            self.client.post('/api/caja/cuentas/', {'nombre': 'Banco'}, **self.cliente)
+            self.client.get(url, periodo, **self.cliente)
+            self.assertIsNone(vista(fabrica.get('/', **self.cliente)))
+            despues = motivos()
+            self.assertEqual(despues['replica'] - antes['replica'], 1)
+            self.assertEqual(despues['escritura_reciente'] - antes['escritura_reciente'], 2)
+
+            # Un sello más nuevo que el retraso de la réplica no se guarda en caché
+            sello, = versiones.versiones(MovimientoCaja)
+            with mock.patch.object(replicas, '_alias_lectura', mock.Mock(get=lambda: 'default')):
+                self.assertFalse(replicas.respuesta_confiable([sello]))
+                self.assertTrue(replicas.respuesta_confiable([sello - 60 * 10 ** 9]))
+
+        with mock.patch.object(replicas, 'retraso', return_value=30.0):
+            self.assertIsNone(vista(fabrica.get('/', REMOTE_ADDR='10.0.0.50')))
+            self.assertEqual(replicas.elegir(fabrica.get('/', REMOTE_ADDR='10.0.0.50'))[1], 'retraso')
+
+        with override_settings(REPLICA_ALIAS='replica'):
+            self.assertEqual(replicas.elegir(fabrica.get('/'))[1], 'sin_replica')
@@ -0,0 +1,124 @@
+"""
+Cierres de caja en segundo plano.
+
+POST /api/caja/cierres/realizar_cierre/ solo registra un TrabajoCierre y
+responde 202; el cierre corre al confirmar la transacción en un hilo del
+mismo proceso (con CIERRES_EN_SEGUNDO_PLANO=False corre en línea, p. ej. en
+pruebas), fuera del tiempo límite de la petición de gunicorn.
+
+- Exclusión: cierres.realizar() toma el bloqueo asesor 'caja-cierre'
+  (pg_advisory_xact_lock), así que dos cierres no se cruzan aunque corran en
+  workers distintos.
+- Progreso: la etapa y el porcentaje van a la caché, porque el cierre corre
+  dentro de una transacción y sus escrituras no se ven hasta el COMMIT.
+  GET /api/caja/cierres-trabajos/<id>/ los combina con el registro.
+- Atomicidad y reanudación: el cierre, sus saldos por cuenta y el paso del
+  trabajo a COMPLETADO se confirman juntos. Un trabajo que quedó PENDIENTE o
+  EJECUTANDO por más de CIERRES_TRABAJO_VENCIDO_MINUTOS (proceso reiniciado)
+  se retoma con `manage.py reanudar_cierres`.
+"""
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from siged.versiones import invalidar
+
+from . import cierres
+from .models import TrabajoCierre
+
+DURACION_PROGRESO = 60 * 60 * 24
+
+
+def _clave(pk):
+    return f'siged:cierre:trabajo:{pk}'
+
+
+def informar(pk, etapa, porcentaje):
+    cache.set(_clave(pk), {'etapa': etapa, 'progreso': porcentaje}, DURACION_PROGRESO)
+
+
+def progreso(trabajo):
+    """{'etapa', 'progreso'} actuales del trabajo."""
+    if trabajo.estado == TrabajoCierre.COMPLETADO:
+        return {'etapa': 'completado', 'progreso': 100}
+    actual = cache.get(_clave(trabajo.pk)) or {'etapa': 'pendiente', 'progreso': 0}
+    if trabajo.estado == TrabajoCierre.FALLIDO:
+        return {**actual, 'etapa': 'fallido'}
+    return actual
+
+
+# ============ COLA ============
+
+def encolar(**datos):
+    """Registra el trabajo y lo lanza al confirmar la transacción actual."""
+    trabajo = TrabajoCierre.objects.create(**datos)
+    transaction.on_commit(lambda: iniciar(trabajo.pk))
+    return trabajo
+
+
+def iniciar(pk):
+    if settings.CIERRES_EN_SEGUNDO_PLANO:
+        threading.Thread(target=_en_hilo, args=(pk,), name=f'siged-cierre-{pk}', daemon=True).start()
+    else:
+        ejecutar(pk)
+
+
+def _en_hilo(pk):
+    try:
+        ejecutar(pk)
+    finally:
+        # El hilo no pasa por request_finished: cerrar su conexión a mano
+        connection.close()
+
+
+def pendientes():
+    """Ids de los trabajos por ejecutar o abandonados a mitad de ejecución."""
+    vencido = timezone.now() - timedelta(minutes=settings.CIERRES_TRABAJO_VENCIDO_MINUTOS)
+    return TrabajoCierre.objects.filter(
+        Q(estado=TrabajoCierre.PENDIENTE)
+        | Q(estado=TrabajoCierre.EJECUTANDO, fecha_inicio_ejecucion__lt=vencido)
+    )
+
+
+# ============ EJECUCIÓN ============
+
+def _terminar(pk, **campos):
+    # Solo si nadie lo completó (un trabajo retomado puede chocar con el original)
+    TrabajoCierre.objects.filter(pk=pk, cierre__isnull=True).update(fecha_fin_ejecucion=timezone.now(), **campos)
+    invalidar(TrabajoCierre)
+
+
+def ejecutar(pk):
+    """Ejecuta (o retoma) el trabajo si nadie más lo tiene tomado. Retorna el trabajo."""
+    tomado = pendientes().filter(pk=pk).update(
+        estado=TrabajoCierre.EJECUTANDO, intentos=F('intentos') + 1,
+        fecha_inicio_ejecucion=timezone.now(), error='',
+    )
+    trabajo = TrabajoCierre.objects.get(pk=pk)
+    if not tomado:
+        return trabajo
+
+    try:
+        with transaction.atomic():
+            cierre = cierres.realizar(
+                trabajo.tipo_cierre, trabajo.fecha_inicio, trabajo.fecha_fin,
+                observaciones=trabajo.observaciones, cerrado_por=trabajo.cerrado_por,
+                progreso=lambda etapa, porcentaje: informar(pk, etapa, porcentaje),
+            )
+            _terminar(pk, estado=TrabajoCierre.COMPLETADO, cierre=cierre)
+        informar(pk, 'completado', 100)
+    except cierres.ErrorCierre as e:
+        _terminar(pk, estado=TrabajoCierre.FALLIDO, error=str(e))
+    except Exception as e:
+        print(f"❌ [CIERRE] Trabajo #{pk}: {e}")
+        traceback.print_exc()
+        _terminar(pk, estado=TrabajoCierre.FALLIDO, error=f'Error inesperado: {e}')
+
+    trabajo.refresh_from_db()
+    return trabajo
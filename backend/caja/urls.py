@@ -5,7 +5,8 @@ from .views import (
     CuentaBancariaViewSet,
     TipoMovimientoViewSet,
     MovimientoCajaViewSet,
-    CierreCajaViewSet
+    CierreCajaViewSet,
+    TrabajoCierreViewSet
 )
 
 # Crear el router
@@ -16,6 +17,7 @@ router.register(r'cuentas', CuentaBancariaViewSet, basename='cuenta')
 router.register(r'tipos-movimiento', TipoMovimientoViewSet, basename='tipo-movimiento')
 router.register(r'movimientos', MovimientoCajaViewSet, basename='movimiento')
 router.register(r'cierres', CierreCajaViewSet, basename='cierre')
+router.register(r'cierres-trabajos', TrabajoCierreViewSet, basename='cierre-trabajo')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -2,17 +2,27 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Q
+from django.db.models import Sum, Q, Count, Prefetch
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+from siged.cache_respuestas import cachear_respuesta
+from siged.exportacion import rango_fechas, respuesta_exportacion
+from siged.renderers import es_compacto
+from siged.replicas import usar_replica
+from siged.versiones import GetCondicionalMixin, invalidar
+
+from . import trabajos
+from .cierres import NIVEL
 from .models import (
     CuentaBancaria,
     TipoMovimiento,
     MovimientoCaja,
+    MovimientoCajaArchivado,
     CierreCaja,
-    SaldoCuentaPorCierre
+    SaldoCuentaPorCierre,
+    TrabajoCierre
 )
 from .serializers import (
     CuentaBancariaSerializer,
@@ -21,16 +31,25 @@ from .serializers import (
     MovimientoCajaDetalladoSerializer,
     CierreCajaSerializer,
     CierreCajaDetalladoSerializer,
-    CrearMovimientoCajaSerializer
+    CrearMovimientoCajaSerializer,
+    TrabajoCierreSerializer,
+    movimientos_detallados_rapido,
+    movimientos_exportacion
 )
 
 
-class CuentaBancariaViewSet(viewsets.ModelViewSet):
+class CuentaBancariaViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Cuentas Bancarias
     """
     queryset = CuentaBancaria.objects.all()
     serializer_class = CuentaBancariaSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+        'resumen_general': 2,
+        'movimientos_recientes': {'consultas': 2, 'params': {'limite': 1000}},
+    }
     
     def get_queryset(self):
         """Filtrar solo cuentas activas por defecto"""
@@ -45,6 +64,7 @@ class CuentaBancariaViewSet(viewsets.ModelViewSet):
         return queryset.order_by('nombre')
     
     @action(detail=False, methods=['get'])
+    @cachear_respuesta(CuentaBancaria)
     def resumen_general(self, request):
         """
         Endpoint: GET /api/caja/cuentas/resumen_general/
@@ -87,10 +107,10 @@ class CuentaBancariaViewSet(viewsets.ModelViewSet):
         movimientos = MovimientoCaja.objects.filter(
             cuenta=cuenta
         ).select_related(
-            'tipo_movimiento', 'venta', 'compra', 'cuota'
+            'cuenta', 'tipo_movimiento', 'venta', 'compra', 'cuota', 'egreso', 'ingreso'
         ).order_by('-fecha')[:limite]
         
-        serializer = MovimientoCajaDetalladoSerializer(movimientos, many=True)
+        serializer = MovimientoCajaDetalladoSerializer(movimientos, many=True, context=self.get_serializer_context())
         
         return Response({
             'cuenta': {
@@ -103,12 +123,16 @@ class CuentaBancariaViewSet(viewsets.ModelViewSet):
         })
 
 
-class TipoMovimientoViewSet(viewsets.ModelViewSet):
+class TipoMovimientoViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Tipos de Movimiento
     """
     queryset = TipoMovimiento.objects.all()
     serializer_class = TipoMovimientoSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
     
     def get_queryset(self):
         """Filtrar por tipo (ENTRADA/SALIDA) si se especifica"""
@@ -126,6 +150,15 @@ class MovimientoCajaViewSet(viewsets.ModelViewSet):
     ViewSet para gestionar Movimientos de Caja
     """
     queryset = MovimientoCaja.objects.all()
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+        'resumen_periodo': {
+            'consultas': 3,
+            'params': {'fecha_desde': '2000-01-01', 'fecha_hasta': '2100-12-31'},
+        },
+        'exportar': 1,
+    }
     
     def get_serializer_class(self):
         """Usar serializer detallado para retrieve y list"""
@@ -133,12 +166,39 @@ class MovimientoCajaViewSet(viewsets.ModelViewSet):
             return MovimientoCajaDetalladoSerializer
         return MovimientoCajaSerializer
     
+    def list(self, request, *args, **kwargs):
+        """
+        Listado de solo lectura armado con values_list() (mismo JSON que el
+        serializer detallado), con los meses archivados del rango pedido
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(movimientos_detallados_rapido(
+            queryset, compacto=es_compacto(request), archivados=self.get_queryset_archivados()
+        ))
+    
     def get_queryset(self):
         """Filtros avanzados para movimientos"""
         queryset = MovimientoCaja.objects.select_related(
-            'cuenta', 'tipo_movimiento', 'cierre_caja'
+            'cuenta', 'tipo_movimiento', 'cierre_caja',
+            'venta', 'compra', 'cuota', 'egreso', 'ingreso'
         ).order_by('-fecha')
-        
+        return self._filtrar(queryset)
+
+    def get_queryset_archivados(self):
+        """
+        Los mismos filtros sobre MovimientoCajaArchivado (caja/archivo.py), o
+        None si se piden solo movimientos sin cierre: los archivados siempre
+        tienen cierre. En PostgreSQL el rango de fechas solo lee sus particiones.
+        """
+        if self._solo_sin_cierre():
+            return None
+        return self._filtrar(MovimientoCajaArchivado.objects.all())
+
+    def _solo_sin_cierre(self):
+        sin_cierre = self.request.query_params.get('sin_cierre', None)
+        return bool(sin_cierre) and sin_cierre.lower() in ['true', '1', 'yes']
+
+    def _filtrar(self, queryset):
         # Filtrar por cuenta
         cuenta_id = self.request.query_params.get('cuenta', None)
         if cuenta_id:
@@ -161,8 +221,7 @@ class MovimientoCajaViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(fecha__lt=fecha_hasta_dt)
         
         # Filtrar solo movimientos sin cierre (movimientos actuales)
-        sin_cierre = self.request.query_params.get('sin_cierre', None)
-        if sin_cierre and sin_cierre.lower() in ['true', '1', 'yes']:
+        if self._solo_sin_cierre():
             queryset = queryset.filter(cierre_caja__isnull=True)
         
         return queryset
@@ -190,13 +249,29 @@ class MovimientoCajaViewSet(viewsets.ModelViewSet):
             )
             
             return Response(
-                MovimientoCajaDetalladoSerializer(movimiento).data,
+                MovimientoCajaDetalladoSerializer(movimiento, context=self.get_serializer_context()).data,
                 status=status.HTTP_201_CREATED
             )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=False, methods=['get'])
+    @usar_replica
+    def exportar(self, request):
+        """
+        Endpoint: GET /api/caja/movimientos/exportar/?archivo=csv|xlsx
+        Libro de caja completo en streaming, con los meses archivados. Acepta los
+        mismos filtros que el listado: fecha_desde, fecha_hasta (AAAA-MM-DD),
+        cuenta, tipo_movimiento, sin_cierre.
+        """
+        rango_fechas(request.query_params)
+        return respuesta_exportacion(request, 'movimientos_caja', *movimientos_exportacion(
+            self.get_queryset(), self.get_queryset_archivados()
+        ))
+
+    @action(detail=False, methods=['get'])
+    @usar_replica
+    @cachear_respuesta(MovimientoCaja, MovimientoCajaArchivado, CuentaBancaria, TipoMovimiento)
     def resumen_periodo(self, request):
         """
         Endpoint: GET /api/caja/movimientos/resumen_periodo/
@@ -215,35 +290,47 @@ class MovimientoCajaViewSet(viewsets.ModelViewSet):
         # Convertir fechas
         fecha_hasta_dt = datetime.fromisoformat(fecha_hasta) + timedelta(days=1)
         
-        # Filtrar movimientos del período
-        movimientos = MovimientoCaja.objects.filter(
-            fecha__gte=fecha_desde,
-            fecha__lt=fecha_hasta_dt
-        )
+        # Totales del período agrupados por cuenta y tipo de movimiento en una
+        # sola consulta, con los meses archivados (caja/archivo.py; en
+        # PostgreSQL solo se leen las particiones del período)
+        def agrupados(modelo):
+            return (
+                modelo.objects.filter(fecha__gte=fecha_desde, fecha__lt=fecha_hasta_dt).order_by()
+                .values_list('cuenta_id', 'tipo_movimiento_id', 'tipo_movimiento__tipo')
+                .annotate(total=Sum('monto'), cantidad=Count('id'))
+            )
         
-        # Calcular totales por tipo
-        entradas = movimientos.filter(
-            tipo_movimiento__tipo=TipoMovimiento.ENTRADA
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+        totales_por_cuenta = {}
+        totales_por_tipo = {}
+        for cuenta_id, tipo_id, tipo, total, cantidad in agrupados(MovimientoCaja).union(
+            agrupados(MovimientoCajaArchivado), all=True
+        ):
+            clave = (cuenta_id, tipo)
+            totales_por_cuenta[clave] = totales_por_cuenta.get(clave, Decimal('0.00')) + total
+            fila = totales_por_tipo.setdefault(
+                tipo_id, {'tipo_movimiento__tipo': tipo, 'total': Decimal('0.00'), 'cantidad': 0}
+            )
+            fila['total'] += total
+            fila['cantidad'] += cantidad
         
-        salidas = movimientos.filter(
-            tipo_movimiento__tipo=TipoMovimiento.SALIDA
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+        # Calcular totales por tipo
+        entradas = sum(
+            (f['total'] for f in totales_por_tipo.values() if f['tipo_movimiento__tipo'] == TipoMovimiento.ENTRADA),
+            Decimal('0.00')
+        )
+        salidas = sum(
+            (f['total'] for f in totales_por_tipo.values() if f['tipo_movimiento__tipo'] == TipoMovimiento.SALIDA),
+            Decimal('0.00')
+        )
+        cantidad_movimientos = sum(f['cantidad'] for f in totales_por_tipo.values())
         
         diferencia = entradas - salidas
         
         # Resumen por cuenta
         cuentas_resumen = []
         for cuenta in CuentaBancaria.objects.filter(activa=True):
-            movs_cuenta = movimientos.filter(cuenta=cuenta)
-            
-            entradas_cuenta = movs_cuenta.filter(
-                tipo_movimiento__tipo=TipoMovimiento.ENTRADA
-            ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-            
-            salidas_cuenta = movs_cuenta.filter(
-                tipo_movimiento__tipo=TipoMovimiento.SALIDA
-            ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+            entradas_cuenta = totales_por_cuenta.get((cuenta.id, TipoMovimiento.ENTRADA)) or Decimal('0.00')
+            salidas_cuenta = totales_por_cuenta.get((cuenta.id, TipoMovimiento.SALIDA)) or Decimal('0.00')
             
             cuentas_resumen.append({
                 'cuenta': cuenta.nombre,
@@ -258,9 +345,8 @@ class MovimientoCajaViewSet(viewsets.ModelViewSet):
         # Resumen por tipo de movimiento
         tipos_resumen = []
         for tipo in TipoMovimiento.objects.filter(activo=True):
-            total_tipo = movimientos.filter(
-                tipo_movimiento=tipo
-            ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+            fila = totales_por_tipo.get(tipo.id)
+            total_tipo = (fila['total'] if fila else None) or Decimal('0.00')
             
             if total_tipo > 0:
                 tipos_resumen.append({
@@ -268,7 +354,7 @@ class MovimientoCajaViewSet(viewsets.ModelViewSet):
                     'clasificacion': tipo.get_tipo_display(),
                     'total': str(total_tipo),
                     'total_formateado': f"${total_tipo:,.2f}",
-                    'cantidad_movimientos': movimientos.filter(tipo_movimiento=tipo).count()
+                    'cantidad_movimientos': fila['cantidad']
                 })
         
         return Response({
@@ -283,7 +369,7 @@ class MovimientoCajaViewSet(viewsets.ModelViewSet):
                 'total_salidas_formateado': f"${salidas:,.2f}",
                 'diferencia': str(diferencia),
                 'diferencia_formateado': f"${diferencia:,.2f}",
-                'cantidad_movimientos': movimientos.count()
+                'cantidad_movimientos': cantidad_movimientos
             },
             'por_cuenta': cuentas_resumen,
             'por_tipo_movimiento': tipos_resumen
@@ -296,16 +382,35 @@ class CierreCajaViewSet(viewsets.ModelViewSet):
     """
     queryset = CierreCaja.objects.all()
     
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 4,
+        'ultimo_cierre': 4,
+    }
+    
     def get_serializer_class(self):
         """Usar serializer detallado para retrieve"""
         if self.action == 'retrieve':
             return CierreCajaDetalladoSerializer
         return CierreCajaSerializer
     
+    @staticmethod
+    def con_detalle(queryset):
+        """Precargar saldos y movimientos usados por CierreCajaDetalladoSerializer"""
+        return queryset.prefetch_related(
+            Prefetch('saldos_cuentas', queryset=SaldoCuentaPorCierre.objects.select_related('cuenta')),
+            Prefetch('movimientos', queryset=MovimientoCaja.objects.select_related('cuenta', 'tipo_movimiento')),
+            Prefetch('movimientos_archivados',
+                     queryset=MovimientoCajaArchivado.objects.select_related('cuenta', 'tipo_movimiento')),
+        )
+    
     def get_queryset(self):
         """Filtrar por tipo de cierre si se especifica"""
         queryset = CierreCaja.objects.all().order_by('-fecha_cierre')
         
+        if self.action == 'retrieve':
+            queryset = self.con_detalle(queryset)
+        
         tipo_cierre = self.request.query_params.get('tipo_cierre', None)
         if tipo_cierre:
             queryset = queryset.filter(tipo_cierre=tipo_cierre.upper())
@@ -320,7 +425,7 @@ class CierreCajaViewSet(viewsets.ModelViewSet):
         
         Body:
         {
-            "tipo_cierre": "D" o "M",
+            "tipo_cierre": "D", "M" o "A",
             "fecha_inicio": "2024-01-01T00:00:00",
             "fecha_fin": "2024-01-31T23:59:59",
             "observaciones": "...",
@@ -334,9 +439,9 @@ class CierreCajaViewSet(viewsets.ModelViewSet):
         cerrado_por = request.data.get('cerrado_por', '')
         
         # Validaciones
-        if not tipo_cierre or tipo_cierre not in ['D', 'M']:
+        if not tipo_cierre or tipo_cierre not in NIVEL:
             return Response(
-                {'error': 'Tipo de cierre inválido. Debe ser D (Diario) o M (Mensual)'},
+                {'error': 'Tipo de cierre inválido. Debe ser D (Diario), M (Mensual) o A (Anual)'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
@@ -355,93 +460,34 @@ class CierreCajaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Verificar que no haya movimientos ya cerrados en este período
-        movimientos_ya_cerrados = MovimientoCaja.objects.filter(
-            fecha__gte=fecha_inicio_dt,
-            fecha__lte=fecha_fin_dt,
-            cierre_caja__isnull=False
-        ).exists()
-        
-        if movimientos_ya_cerrados:
+        fecha_inicio_dt, fecha_fin_dt = [
+            timezone.make_aware(f) if timezone.is_naive(f) else f for f in (fecha_inicio_dt, fecha_fin_dt)
+        ]
+        if fecha_fin_dt < fecha_inicio_dt:
             return Response(
-                {'error': 'Ya existe un cierre que incluye movimientos de este período'},
+                {'error': 'fecha_fin no puede ser anterior a fecha_inicio'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Obtener movimientos del período sin cierre
-        movimientos = MovimientoCaja.objects.filter(
-            fecha__gte=fecha_inicio_dt,
-            fecha__lte=fecha_fin_dt,
-            cierre_caja__isnull=True
-        )
-        
-        if not movimientos.exists():
-            return Response(
-                {'error': 'No hay movimientos para cerrar en este período'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Calcular totales
-        total_entradas = movimientos.filter(
-            tipo_movimiento__tipo=TipoMovimiento.ENTRADA
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        total_salidas = movimientos.filter(
-            tipo_movimiento__tipo=TipoMovimiento.SALIDA
-        ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-        
-        # Calcular saldo inicial (suma de saldos antes del período)
-        saldo_inicial = Decimal('0.00')
-        for cuenta in CuentaBancaria.objects.filter(activa=True):
-            movs_anteriores_entrada = MovimientoCaja.objects.filter(
-                cuenta=cuenta,
-                fecha__lt=fecha_inicio_dt,
-                tipo_movimiento__tipo=TipoMovimiento.ENTRADA
-            ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-            
-            movs_anteriores_salida = MovimientoCaja.objects.filter(
-                cuenta=cuenta,
-                fecha__lt=fecha_inicio_dt,
-                tipo_movimiento__tipo=TipoMovimiento.SALIDA
-            ).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
-            
-            saldo_inicial += (movs_anteriores_entrada - movs_anteriores_salida)
-        
-        # Saldo final = saldo inicial + entradas - salidas
-        saldo_final = saldo_inicial + total_entradas - total_salidas
-        
-        # Crear el cierre
-        cierre = CierreCaja.objects.create(
+        # El cierre corre en segundo plano (caja/trabajos.py); el cliente
+        # consulta GET /api/caja/cierres-trabajos/<id>/ hasta que termine
+        trabajo = trabajos.encolar(
             tipo_cierre=tipo_cierre,
             fecha_inicio=fecha_inicio_dt,
             fecha_fin=fecha_fin_dt,
-            total_entradas=total_entradas,
-            total_salidas=total_salidas,
-            saldo_inicial=saldo_inicial,
-            saldo_final=saldo_final,
             observaciones=observaciones,
             cerrado_por=cerrado_por
         )
         
-        # Asociar movimientos al cierre
-        movimientos.update(cierre_caja=cierre)
-        
-        # Guardar saldos de cada cuenta en el momento del cierre
-        for cuenta in CuentaBancaria.objects.filter(activa=True):
-            SaldoCuentaPorCierre.objects.create(
-                cierre_caja=cierre,
-                cuenta=cuenta,
-                saldo=cuenta.saldo_actual
-            )
-        
-        serializer = CierreCajaDetalladoSerializer(cierre)
-        
         return Response({
-            'message': 'Cierre de caja realizado exitosamente',
-            'cierre': serializer.data
-        }, status=status.HTTP_201_CREATED)
+            'message': 'Cierre de caja en proceso',
+            'trabajo': TrabajoCierreSerializer(trabajo).data
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=False, methods=['get'])
+    @usar_replica
+    @cachear_respuesta(CierreCaja, SaldoCuentaPorCierre, MovimientoCaja, MovimientoCajaArchivado,
+                       CuentaBancaria, TipoMovimiento)
     def ultimo_cierre(self, request):
         """
         Endpoint: GET /api/caja/cierres/ultimo_cierre/
@@ -453,7 +499,7 @@ class CierreCajaViewSet(viewsets.ModelViewSet):
         if tipo_cierre:
             queryset = queryset.filter(tipo_cierre=tipo_cierre.upper())
         
-        ultimo = queryset.order_by('-fecha_cierre').first()
+        ultimo = self.con_detalle(queryset).order_by('-fecha_cierre').first()
         
         if not ultimo:
             return Response(
@@ -461,5 +507,18 @@ class CierreCajaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = CierreCajaDetalladoSerializer(ultimo)
-        return Response(serializer.data)
\ No newline at end of file
+        serializer = CierreCajaDetalladoSerializer(ultimo, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+
+class TrabajoCierreViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Estado de los cierres en segundo plano
+    GET /api/caja/cierres-trabajos/<id>/ para consultar el progreso
+    """
+    queryset = TrabajoCierre.objects.all()
+    serializer_class = TrabajoCierreSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
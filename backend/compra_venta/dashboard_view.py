@@ -5,8 +5,10 @@ from django.db.models import Sum, F, Q, DecimalField, Count
 from django.db.models.functions import TruncDate, Coalesce
 from decimal import Decimal
 from datetime import datetime, timedelta
+from siged.cache_respuestas import cachear_respuesta, por_dia
+from siged.replicas import usar_replica
 from .models import Compra, Venta, VentaPrenda
-from prendas.models import Prenda
+from prendas.models import Prenda, TipoOro
 from apartado_credito.models import Apartado
 
 
@@ -22,7 +24,12 @@ class DashboardResumenView(APIView):
     - promedio_oro_italiano: Precio promedio por gramo de oro italiano
     - ventas_vs_compras: Array con ventas y compras de los últimos 7 días
     """
+    presupuesto_consultas = {
+        'get': 7,
+    }
     
+    @usar_replica
+    @cachear_respuesta(Prenda, Apartado, Venta, VentaPrenda, Compra, TipoOro, variar_por=por_dia)
     def get(self, request):
         try:
             # 1. Calcular Stock Total (gramos * existencia, solo no archivados)
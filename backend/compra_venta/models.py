@@ -3,6 +3,10 @@ from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 
+from prendas import inventario
+from prendas.models import MovimientoInventario
+from siged.dinero import Dinero, Gramos
+
 
 
 class Compra(models.Model):
@@ -145,11 +149,8 @@ class Venta(models.Model):
         Calcula el total de gramos sin ajuste de ganancia.
         total_gramos = suma(gramos_prenda * cantidad)
         """
-        total = Decimal('0.00')
-        for prenda_item in self.prendas.all():
-            gramos = prenda_item.prenda.gramos * prenda_item.cantidad
-            total += Decimal(str(gramos))
-        return total
+        total = sum((Gramos.de(p.prenda.gramos) * p.cantidad for p in self.prendas.all()), Gramos())
+        return total.decimal()
 
 
     def save(self, *args, **kwargs):
@@ -224,9 +225,9 @@ class VentaPrenda(models.Model):
         Fórmula correcta:
         subtotal = ((gramos_prenda + gramo_ganancia) * precio_por_gramo) * cantidad
         """
-        peso_ajustado = self.prenda.gramos + self.gramo_ganancia
-        subtotal = (Decimal(str(peso_ajustado)) * self.precio_por_gramo) * self.cantidad
-        return subtotal
+        peso_ajustado = Gramos.de(self.prenda.gramos) + Gramos.de(self.gramo_ganancia)
+        # Un solo redondeo a centavos, sobre el peso total
+        return ((peso_ajustado * self.cantidad) * Dinero.de(self.precio_por_gramo)).decimal()
 
 
     def save(self, *args, **kwargs):
@@ -239,23 +240,22 @@ class VentaPrenda(models.Model):
             if not self.prenda.tiene_stock(self.cantidad):
                 raise ValidationError(f"No hay suficiente stock para {self.prenda}")
             super().save(*args, **kwargs)
-            self.prenda.existencia -= self.cantidad
+            diferencia = self.cantidad
         else:
             old_instance = VentaPrenda.objects.get(pk=self.pk)
             diferencia = self.cantidad - old_instance.cantidad
             if diferencia > 0 and not self.prenda.tiene_stock(diferencia):
                 raise ValidationError("No hay suficiente stock para aumentar la cantidad")
             super().save(*args, **kwargs)
-            self.prenda.existencia -= diferencia
         
-        self.prenda.save(update_fields=['existencia'])
+        motivo = MovimientoInventario.VENTA if diferencia > 0 else MovimientoInventario.ANULACION_VENTA
+        inventario.mover(self.prenda, -diferencia, motivo, f'venta:{self.venta_id}')
         # NO llamar a venta.save() aquí para evitar loop infinito
         # El total se actualizará en el serializer
 
 
     def delete(self, *args, **kwargs):
-        self.prenda.existencia += self.cantidad
-        self.prenda.save(update_fields=['existencia'])
+        inventario.mover(self.prenda, self.cantidad, MovimientoInventario.ANULACION_VENTA, f'venta:{self.venta_id}')
         super().delete(*args, **kwargs)
         # NO llamar a venta.save() aquí
 
@@ -293,9 +293,8 @@ class CompraPrenda(models.Model):
         Fórmula para compra:
         subtotal = (gramos_prenda * precio_por_gramo) * cantidad
         """
-        gramos_totales = self.prenda.gramos * self.cantidad
-        subtotal = Decimal(str(gramos_totales)) * self.precio_por_gramo
-        return subtotal
+        gramos_totales = Gramos.de(self.prenda.gramos) * self.cantidad
+        return (gramos_totales * Dinero.de(self.precio_por_gramo)).decimal()
 
 
     def save(self, *args, **kwargs):
@@ -304,23 +303,23 @@ class CompraPrenda(models.Model):
         # Recalcular subtotal
         self.subtotal = self.calcular_subtotal()
         
-        super().save(*args, **kwargs)
-        
         if is_new:
-            self.prenda.existencia += self.cantidad
+            diferencia = self.cantidad
         else:
+            # Leer la cantidad anterior antes de guardar la nueva
             old_instance = CompraPrenda.objects.get(pk=self.pk)
             diferencia = self.cantidad - old_instance.cantidad
-            self.prenda.existencia += diferencia
         
-        self.prenda.save(update_fields=['existencia'])
+        super().save(*args, **kwargs)
+        
+        motivo = MovimientoInventario.COMPRA if diferencia > 0 else MovimientoInventario.ANULACION_COMPRA
+        inventario.mover(self.prenda, diferencia, motivo, f'compra:{self.compra_id}')
         # NO llamar a compra.save() aquí para evitar loop infinito
         # El total se actualizará en el serializer
 
 
     def delete(self, *args, **kwargs):
-        self.prenda.existencia -= self.cantidad
-        self.prenda.save(update_fields=['existencia'])
+        inventario.mover(self.prenda, -self.cantidad, MovimientoInventario.ANULACION_COMPRA, f'compra:{self.compra_id}')
         super().delete(*args, **kwargs)
         # NO llamar a compra.save() aquí
 
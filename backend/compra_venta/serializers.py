@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from .models import Compra, CompraPrenda, Venta, VentaPrenda
 from django.db import transaction
+from decimal import Decimal
+
+from siged import exportacion, proyecciones
 
 
 
@@ -62,6 +65,11 @@ class CompraSerializer(serializers.ModelSerializer):
     total_gramos = serializers.SerializerMethodField()
     total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
+    # Columnas que leen los SerializerMethodField (para ?fields=, ver siged.campos)
+    dependencias_campos = {
+        'total_gramos': ('prendas__prenda__gramos', 'prendas__cantidad'),
+    }
+
 
     class Meta:
         model = Compra
@@ -165,6 +173,12 @@ class VentaSerializer(serializers.ModelSerializer):
     ganancia_total = serializers.SerializerMethodField()
     total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
+    # Columnas que leen los SerializerMethodField (para ?fields=, ver siged.campos)
+    dependencias_campos = {
+        'total_gramos': ('prendas__prenda__gramos', 'prendas__cantidad'),
+        'ganancia_total': ('prendas__gramo_ganancia', 'prendas__cantidad', 'prendas__precio_por_gramo'),
+    }
+
 
     class Meta:
         model = Venta
@@ -253,4 +267,119 @@ class VentaCreateUpdateSerializer(serializers.ModelSerializer):
             instance.total = instance.calcular_total()
             instance.save(update_fields=['total'])
         
-        return instance
\ No newline at end of file
+        return instance
+
+
+
+# ============ LECTURA RÁPIDA (values()) ============
+
+
+_total_venta = proyecciones.decimal(12, 2)
+_gramos_prenda = proyecciones.decimal(10, 2)
+_precio_por_gramo = proyecciones.decimal_de(VentaPrenda, 'precio_por_gramo')
+_gramo_ganancia = proyecciones.decimal_de(VentaPrenda, 'gramo_ganancia')
+_subtotal_venta_prenda = proyecciones.decimal_de(VentaPrenda, 'subtotal')
+
+
+# Campos de VentaSerializer que necesitan las líneas (VentaPrenda) de cada venta
+CAMPOS_CON_LINEAS = frozenset({'prendas', 'total_gramos', 'ganancia_total'})
+
+
+def ventas_rapido(queryset, con_lineas=True):
+    """
+    Mismo resultado que VentaSerializer(queryset, many=True).data, armado con
+    dos consultas values_list() (ventas y sus prendas) en vez de instanciar
+    serializers por fila. Con con_lineas=False no se consultan las prendas y
+    `prendas`, `total_gramos` y `ganancia_total` quedan vacíos (para ?fields=
+    que no los pide).
+    """
+    queryset = proyecciones.quitar_consultas_relacionadas(queryset)
+    ventas = list(queryset.values_list(
+        'id', 'cliente_id', 'cliente__nombre', 'credito_id', 'apartado_id',
+        'metodo_pago_id', 'metodo_pago__nombre', 'fecha', 'descripcion', 'total',
+    ))
+    lineas = {} if not con_lineas else proyecciones.agrupar(
+        VentaPrenda.objects.filter(venta__in=queryset.values('pk')).order_by('id').values_list(
+            'venta_id', 'id', 'prenda_id', 'prenda__nombre', 'prenda__gramos',
+            'cantidad', 'precio_por_gramo', 'gramo_ganancia', 'subtotal',
+        )
+    )
+
+    resultado = []
+    for (venta_id, cliente_id, cliente_nombre, credito_id, apartado_id,
+         metodo_pago_id, metodo_pago_nombre, fecha, descripcion, total) in ventas:
+        prendas = []
+        total_gramos = Decimal('0.00')
+        ganancia_total = Decimal('0.00')
+        for (_, linea_id, prenda_id, prenda_nombre, gramos,
+             cantidad, precio_por_gramo, gramo_ganancia, subtotal) in lineas.get(venta_id, ()):
+            # Mismas operaciones que Venta.total_gramos() y Venta.calcular_ganancia_total()
+            subtotal_gramos = gramos * cantidad
+            total_gramos += subtotal_gramos
+            ganancia_total += (gramo_ganancia * cantidad) * precio_por_gramo
+            prendas.append({
+                'id': linea_id,
+                'prenda': prenda_id,
+                'prenda_nombre': prenda_nombre,
+                'prenda_gramos': _gramos_prenda(gramos),
+                'cantidad': cantidad,
+                'precio_por_gramo': _precio_por_gramo(precio_por_gramo),
+                'gramo_ganancia': _gramo_ganancia(gramo_ganancia),
+                'subtotal_gramos': subtotal_gramos,
+                'subtotal': _subtotal_venta_prenda(subtotal),
+            })
+        resultado.append({
+            'id': venta_id,
+            'cliente': cliente_id,
+            'cliente_nombre': cliente_nombre,
+            'credito': credito_id,
+            'apartado': apartado_id,
+            'metodo_pago': metodo_pago_id,
+            'metodo_pago_nombre': metodo_pago_nombre,
+            'fecha': proyecciones.fecha(fecha),
+            'descripcion': descripcion,
+            'total_gramos': total_gramos,
+            'ganancia_total': ganancia_total,
+            'total': _total_venta(total),
+            'prendas': prendas,
+        })
+    return resultado
+
+
+
+# ============ EXPORTACIÓN (CSV / XLSX) ============
+
+
+def ventas_exportacion(queryset):
+    """
+    (encabezados, filas) para siged.exportacion: una fila por prenda vendida con
+    los datos de la venta repetidos (las ventas sin prendas salen con una fila).
+    """
+    encabezados = [
+        'Venta', 'Fecha', 'Cliente', 'Cédula', 'Método de pago', 'Crédito', 'Apartado',
+        'Total venta', 'Descripción', 'Línea', 'Prenda', 'Gramos', 'Cantidad',
+        'Precio por gramo', 'Gramo ganancia', 'Subtotal',
+    ]
+    filas = exportacion.leer_filas(
+        proyecciones.quitar_consultas_relacionadas(queryset).order_by('fecha', 'id', 'prendas__id'),
+        'id', 'fecha', 'cliente__nombre', 'cliente__cedula', 'metodo_pago__nombre', 'credito_id',
+        'apartado_id', 'total', 'descripcion', 'prendas__id', 'prendas__prenda__nombre',
+        'prendas__prenda__gramos', 'prendas__cantidad', 'prendas__precio_por_gramo',
+        'prendas__gramo_ganancia', 'prendas__subtotal',
+    )
+    return encabezados, filas
+
+
+def compras_exportacion(queryset):
+    """(encabezados, filas) para siged.exportacion: una fila por prenda comprada."""
+    encabezados = [
+        'Compra', 'Fecha', 'Proveedor', 'Método de pago', 'Crédito', 'Total compra', 'Descripción',
+        'Línea', 'Prenda', 'Gramos', 'Cantidad', 'Precio por gramo', 'Subtotal',
+    ]
+    filas = exportacion.leer_filas(
+        proyecciones.quitar_consultas_relacionadas(queryset).order_by('fecha', 'id', 'prendas__id'),
+        'id', 'fecha', 'proveedor__nombre', 'metodo_pago__nombre', 'credito_id', 'total', 'descripcion',
+        'prendas__id', 'prendas__prenda__nombre', 'prendas__prenda__gramos', 'prendas__cantidad',
+        'prendas__precio_por_gramo', 'prendas__subtotal',
+    )
+    return encabezados, filas
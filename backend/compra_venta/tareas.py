@@ -0,0 +1,20 @@
+# compra_venta/tareas.py
+from datetime import timedelta
+
+from django.test import RequestFactory
+
+from tareas.cola import tarea
+
+from .dashboard_view import DashboardResumenView
+
+
+@tarea(cada=timedelta(minutes=10), reintentos=0)
+def calentar_dashboard():
+    """
+    Arma GET /api/compra_venta/dashboard/resumen/ para dejarlo en la caché de
+    respuestas: si nada cambió es un acierto; si cambió, la primera visita
+    del día (o después de una venta) ya no paga las 7 consultas.
+    """
+    request = RequestFactory().get('/api/compra_venta/dashboard/resumen/')
+    respuesta = DashboardResumenView.as_view()(request)
+    return respuesta.status_code
@@ -1,3 +1,111 @@
+import csv
+import io
+
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from siged.presupuesto_consultas import PresupuestoConsultasMixin, sembrar
+
+from .models import Venta, VentaPrenda
+from .serializers import VentaSerializer, ventas_rapido
+from .views import VentaViewSet
+
+
+class PresupuestoConsultasCompraVentaTests(PresupuestoConsultasMixin, TestCase):
+    """Ningún endpoint GET de compra_venta debe crecer en consultas con el número de filas."""
+    app_label = 'compra_venta'
+
+
+class LecturaRapidaVentasTests(TestCase):
+    """ventas_rapido() debe producir exactamente el JSON de VentaSerializer."""
+
+    def test_mismo_json_que_el_serializer(self):
+        sembrar(3)
+        queryset = VentaViewSet.queryset.all()
+        render = JSONRenderer().render
+        self.assertEqual(render(ventas_rapido(queryset)), render(VentaSerializer(queryset, many=True).data))
+
+
+class CamposDispersosTests(TestCase):
+    """?fields= / ?expand= recortan la respuesta y las consultas."""
+
+    def setUp(self):
+        sembrar(3)
+
+    def test_fields_en_ruta_rapida_omite_las_lineas(self):
+        with self.assertNumQueries(1):
+            datos = self.client.get('/api/compra_venta/ventas/', {'fields': 'id,total'}).json()
+        self.assertEqual(set(datos[0]), {'id', 'total'})
+
+    def test_fields_en_serializer_poda_el_queryset(self):
+        with self.assertNumQueries(1):
+            datos = self.client.get('/api/compra_venta/compras/', {'fields': 'id,proveedor_nombre'}).json()
+        self.assertEqual(list(datos[0]), ['id', 'proveedor_nombre'])
+
+        completo = self.client.get('/api/compra_venta/compras/', {'expand': 'prendas'}).json()
+        self.assertIn('prendas', completo[0])
+        self.assertIn('total_gramos', completo[0])
+
+    def test_campo_desconocido(self):
+        respuesta = self.client.get('/api/compra_venta/compras/', {'fields': 'id,inexistente'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class ExportacionTests(TestCase):
+    """Las exportaciones salen en streaming con una fila por prenda vendida."""
+
+    def test_csv_de_ventas_con_filtros(self):
+        sembrar(3)
+        respuesta = self.client.get('/api/compra_venta/ventas/exportar/', {'fecha_desde': '2000-01-01'})
+        self.assertTrue(respuesta.streaming)
+        lineas = list(csv.reader(io.StringIO(b''.join(respuesta.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(lineas[0][:2], ['Venta', 'Fecha'])
+        self.assertEqual(len(lineas) - 1, VentaPrenda.objects.count() + Venta.objects.filter(prendas__isnull=True).count())
+
+        vacia = self.client.get('/api/compra_venta/ventas/exportar/', {'fecha_hasta': '2000-01-01'})
+        self.assertEqual(len(b''.join(vacia.streaming_content).decode('utf-8-sig').splitlines()), 1)
+
+    def test_parametros_invalidos(self):
+        url = '/api/compra_venta/compras/exportar/'
+        self.assertEqual(self.client.get(url, {'archivo': 'pdf'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'fecha_desde': 'ayer'}).status_code, 400)
+
+    def test_fecha_imposible(self):
+        for url, parametro in (('/api/compra_venta/ventas/exportar/', 'fecha_hasta'),
+                               ('/api/caja/movimientos/exportar/', 'fecha_desde')):
+            with self.subTest(url=url):
+                respuesta = self.client.get(url, {parametro: '2024-02-30'})
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.json(), {parametro: 'Use el formato AAAA-MM-DD.'})
+
+
+class DineroPuntoFijoTests(TestCase):
+    """Dinero/Gramos dan los mismos subtotales que Decimal con un solo redondeo a centavos."""
+
+    def test_aritmetica_y_redondeo(self):
+        from decimal import ROUND_HALF_EVEN, Decimal
+
+        from siged.dinero import Dinero, Gramos, columna, sumar, sumar_por
+
+        self.assertEqual(Dinero.de('10.05') - Dinero.de(Decimal('0.06')), Dinero(999))
+        self.assertEqual(sum([Dinero.de('0.10')] * 3), Dinero.de('0.30'))
+        self.assertEqual(str(Dinero()), '0.00')
+        self.assertEqual(max(Dinero(), Dinero.de('1') - Dinero.de('2')), 0)
+        with self.assertRaises(TypeError):
+            Dinero(1) + Gramos(1)
+
+        centavo = Decimal('0.01')
+        for gramos, precio, cantidad in [('2.35', '250000.00', 3), ('0.25', '0.02', 1), ('0.75', '0.02', 1),
+                                          ('1.13', '98765.43', 7)]:
+            esperado = (Decimal(gramos) * Decimal(precio) * cantidad).quantize(centavo, ROUND_HALF_EVEN)
+            obtenido = ((Gramos.de(gramos) * cantidad) * Dinero.de(precio)).decimal()
+            self.assertEqual((obtenido, str(obtenido)), (esperado, str(esperado)))
 
-# Create your tests here.
+        sembrar(3)
+        lineas = VentaPrenda.objects.all()
+        self.assertEqual(sumar(lineas, 'subtotal').decimal(), sum(l.subtotal for l in lineas))
+        unidades = columna(lineas, 'subtotal')
+        self.assertEqual(int(unidades.sum()), sumar(lineas, 'subtotal').unidades)
+        self.assertEqual(sumar_por(unidades * 0, unidades).tolist(), [int(unidades.sum())])
+        for linea in lineas.select_related('prenda'):
+            self.assertEqual(linea.calcular_subtotal(), linea.subtotal)
@@ -29,6 +29,9 @@ urlpatterns = [
 # GET    /api/compras/buscar/por-fecha/?q=2025-11  - Buscar por fecha
 # GET    /api/compras/buscar/por-proveedor/?q=Juan - Buscar por proveedor
 #
+# Exportación (CSV/XLSX en streaming):
+# GET    /api/compras/exportar/?archivo=csv&fecha_desde=2025-01-01&fecha_hasta=2025-12-31
+#
 # ============ VENTAS ============
 # GET    /api/ventas/                               - Listar todas las ventas
 # POST   /api/ventas/                               - Crear nueva venta
@@ -41,3 +44,6 @@ urlpatterns = [
 # GET    /api/ventas/buscar/por-id/?q=123          - Buscar por ID
 # GET    /api/ventas/buscar/por-fecha/?q=2025-11   - Buscar por fecha
 # GET    /api/ventas/buscar/por-cliente/?q=Juan    - Buscar por cliente
+#
+# Exportación (CSV/XLSX en streaming):
+# GET    /api/ventas/exportar/?archivo=xlsx&fecha_desde=2025-01-01&metodo_pago=1
@@ -2,10 +2,15 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from siged.campos import CamposDispersosMixin
+from siged.exportacion import rango_fechas, respuesta_exportacion
+from siged.replicas import usar_replica
 from .models import Compra, CompraPrenda, Venta, VentaPrenda
 from .serializers import (
     CompraSerializer, CompraCreateUpdateSerializer,
-    VentaSerializer, VentaCreateUpdateSerializer
+    VentaSerializer, VentaCreateUpdateSerializer,
+    ventas_rapido, CAMPOS_CON_LINEAS,
+    ventas_exportacion, compras_exportacion
 )
 from apartado_credito.models import Credito
 from apartado_credito.serializers import CreditoSerializer
@@ -13,7 +18,21 @@ from apartado_credito.models import Apartado
 from apartado_credito.serializers import ApartadoSerializer
 
 
-class CompraViewSet(viewsets.ModelViewSet):
+def filtrar_exportacion(queryset, parametros, campo_tercero):
+    """Filtros de las exportaciones: fecha_desde, fecha_hasta, metodo_pago y cliente/proveedor."""
+    desde, hasta = rango_fechas(parametros)
+    if desde:
+        queryset = queryset.filter(fecha__gte=desde)
+    if hasta:
+        queryset = queryset.filter(fecha__lte=hasta)
+    if parametros.get('metodo_pago'):
+        queryset = queryset.filter(metodo_pago_id=parametros['metodo_pago'])
+    if parametros.get(campo_tercero):
+        queryset = queryset.filter(**{f'{campo_tercero}_id': parametros[campo_tercero]})
+    return queryset
+
+
+class CompraViewSet(CamposDispersosMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Compras con CRUD completo
     
@@ -35,6 +54,15 @@ class CompraViewSet(viewsets.ModelViewSet):
     filter_backends = []
     ordering_fields = ['fecha', 'total', 'id']
     ordering = ['-fecha']
+    presupuesto_consultas = {
+        'list': 3,
+        'retrieve': 3,
+        'buscar_por_id': {'consultas': 3, 'params': {'q': '{pk}'}},
+        'buscar_por_fecha': {'consultas': 4, 'params': {'q': '-'}},
+        'buscar_por_proveedor': {'consultas': 4, 'params': {'q': 'Proveedor'}},
+        'listar_por_proveedor_id': {'consultas': 3, 'params': {'proveedor_id': 'terceros.Proveedor'}},
+        'exportar': 1,
+    }
 
     def get_serializer_class(self):
         """Usar diferentes serializers según la acción"""
@@ -46,7 +74,8 @@ class CompraViewSet(viewsets.ModelViewSet):
         """Optimizar queryset según la acción"""
         if self.action == 'retrieve':
             return self.queryset.prefetch_related('prendas__prenda')
-        return self.queryset
+        # .all() evita reutilizar el caché del queryset de clase entre peticiones
+        return self.queryset.all()
 
     @action(detail=False, methods=['get'], url_path='buscar/por-id')
     def buscar_por_id(self, request):
@@ -110,6 +139,16 @@ class CompraViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(compras, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'])
+    @usar_replica
+    def exportar(self, request):
+        """
+        Compras con sus prendas en CSV/XLSX (streaming)
+        Query params: ?archivo=csv|xlsx&fecha_desde=2025-01-01&fecha_hasta=2025-12-31&metodo_pago=1&proveedor=2
+        """
+        compras = filtrar_exportacion(Compra.objects.all(), request.query_params, 'proveedor')
+        return respuesta_exportacion(request, 'compras', *compras_exportacion(compras))
+
 
     @action(detail=False, methods=['get'], url_path='buscar/por-proveedor')
     def buscar_por_proveedor(self, request):
@@ -188,7 +227,7 @@ class CompraViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_201_CREATED)
 
 
-class VentaViewSet(viewsets.ModelViewSet):
+class VentaViewSet(CamposDispersosMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar Ventas con CRUD completo
     
@@ -210,6 +249,15 @@ class VentaViewSet(viewsets.ModelViewSet):
     filter_backends = []
     ordering_fields = ['fecha', 'total', 'id']
     ordering = ['-fecha']
+    presupuesto_consultas = {
+        'list': 2,
+        'retrieve': 3,
+        'buscar_por_id': {'consultas': 3, 'params': {'q': '{pk}'}},
+        'buscar_por_fecha': {'consultas': 4, 'params': {'q': '-'}},
+        'buscar_por_cliente': {'consultas': 4, 'params': {'q': 'Cliente'}},
+        'listar_por_cliente_id': {'consultas': 3, 'params': {'cliente_id': 'terceros.Cliente'}},
+        'exportar': 1,
+    }
 
     def get_serializer_class(self):
         """Usar diferentes serializers según la acción"""
@@ -221,7 +269,15 @@ class VentaViewSet(viewsets.ModelViewSet):
         """Optimizar queryset según la acción"""
         if self.action == 'retrieve':
             return self.queryset.prefetch_related('prendas__prenda')
-        return self.queryset
+        # .all() evita reutilizar el caché del queryset de clase entre peticiones
+        return self.queryset.all()
+
+    def list(self, request, *args, **kwargs):
+        """Listado de solo lectura armado con values_list() (mismo JSON que VentaSerializer)"""
+        campos = self.campos_solicitados()
+        con_lineas = campos is None or bool(CAMPOS_CON_LINEAS.intersection(campos))
+        ventas = ventas_rapido(self.filter_queryset(self.get_queryset()), con_lineas=con_lineas)
+        return Response(self.recortar(ventas))
 
     @action(detail=False, methods=['get'], url_path='buscar/por-id')
     def buscar_por_id(self, request):
@@ -314,6 +370,16 @@ class VentaViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(ventas, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'])
+    @usar_replica
+    def exportar(self, request):
+        """
+        Ventas con sus prendas en CSV/XLSX (streaming)
+        Query params: ?archivo=csv|xlsx&fecha_desde=2025-01-01&fecha_hasta=2025-12-31&metodo_pago=1&cliente=2
+        """
+        ventas = filtrar_exportacion(Venta.objects.all(), request.query_params, 'cliente')
+        return respuesta_exportacion(request, 'ventas', *ventas_exportacion(ventas))
+
     
         
     @action(detail=False, methods=['post'], url_path='crear-con-credito')
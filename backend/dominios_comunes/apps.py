@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class DominiosComunesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dominios_comunes'
+
+    def ready(self):
+        """Conectar los sellos de versión por tabla y las lápidas de sincronización"""
+        import siged.sincronizacion  # noqa: F401
+        from siged.versiones import seguir_vistas
+
+        seguir_vistas()
@@ -0,0 +1,17 @@
+# dominios_comunes/management/commands/purgar_lapidas.py
+from django.core.management.base import BaseCommand
+
+from dominios_comunes.models import RegistroEliminacion
+from siged.sincronizacion import horizonte_lapidas
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina las lápidas de sincronización más viejas que SINCRONIZACION_RETENCION_DIAS. '
+        'Los clientes con una marca anterior reciben el listado completo.'
+    )
+
+    def handle(self, *args, **options):
+        horizonte = horizonte_lapidas()
+        eliminadas, _ = RegistroEliminacion.objects.filter(fecha__lt=horizonte).delete()
+        self.stdout.write(self.style.SUCCESS(f'🧹 Lápidas eliminadas: {eliminadas} (anteriores a {horizonte:%Y-%m-%d})'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dominios_comunes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estado',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='metodopago',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='RegistroEliminacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=100)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Registro de Eliminación',
+                'verbose_name_plural': 'Registros de Eliminación',
+                'indexes': [models.Index(fields=['modelo', 'fecha'], name='dominios_co_modelo_056f9a_idx')],
+            },
+        ),
+    ]
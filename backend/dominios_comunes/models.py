@@ -5,7 +5,40 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 # Create your models here.
-class MetodoPago(models.Model):
+class ModeloSincronizable(models.Model):
+    """
+    Base para las tablas que se sincronizan por delta (`?since=`, ver
+    siged/sincronizacion.py): marca de actualización indexada que también se
+    guarda en save(update_fields=[...]).
+    """
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'fecha_actualizacion' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'fecha_actualizacion']
+        super().save(*args, **kwargs)
+
+
+class RegistroEliminacion(models.Model):
+    """Lápida de una fila eliminada de una tabla sincronizable."""
+    modelo = models.CharField(max_length=100)
+    objeto_id = models.PositiveBigIntegerField()
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} ({self.fecha})"
+
+    class Meta:
+        verbose_name = "Registro de Eliminación"
+        verbose_name_plural = "Registros de Eliminación"
+        indexes = [models.Index(fields=['modelo', 'fecha'])]
+
+
+class MetodoPago(ModeloSincronizable):
     nombre = models.CharField(max_length=50, unique=True)
 
     def __str__(self):
@@ -20,7 +53,7 @@ class MetodoPago(models.Model):
         verbose_name = "Método de Pago"
         verbose_name_plural = "Métodos de Pago"
 
-class Estado(models.Model):
+class Estado(ModeloSincronizable):
     nombre = models.CharField(max_length=50, unique=True)
 
     def __str__(self):
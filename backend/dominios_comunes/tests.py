@@ -1,3 +1,54 @@
 from django.test import TestCase
 
-# Create your tests here.
+from siged.presupuesto_consultas import PresupuestoConsultasMixin, sembrar
+from terceros.models import Cliente, Proveedor
+
+
+class PresupuestoConsultasDominiosComunesTests(PresupuestoConsultasMixin, TestCase):
+    """Ningún endpoint GET de dominios_comunes debe crecer en consultas con el número de filas."""
+    app_label = 'dominios_comunes'
+
+
+class BootstrapTests(TestCase):
+    """/api/bootstrap/ arma varias secciones en una petición y omite las que no cambiaron."""
+    url = '/api/bootstrap/'
+
+    def test_secciones_y_versiones(self):
+        sembrar(2)
+        datos = self.client.get(self.url, {'incluir': 'clientes,metodos_pago'}).json()
+        self.assertEqual(list(datos), ['clientes', 'metodos_pago'])
+        self.assertEqual(datos['clientes']['datos'], self.client.get('/api/terceros/clientes/').json())
+
+        versiones = f"clientes:{datos['clientes']['version']},metodos_pago:{datos['metodos_pago']['version']}"
+        with self.assertNumQueries(0):
+            repetido = self.client.get(self.url, {'incluir': 'clientes,metodos_pago', 'versiones': versiones}).json()
+        self.assertTrue(repetido['clientes']['sin_cambios'])
+        self.assertNotIn('datos', repetido['metodos_pago'])
+
+        Cliente.objects.create(nombre='Nuevo', cedula='999')
+        cambiado = self.client.get(self.url, {'incluir': 'clientes,metodos_pago', 'versiones': versiones}).json()
+        self.assertIn('datos', cambiado['clientes'])
+        self.assertTrue(cambiado['metodos_pago']['sin_cambios'])
+
+    def test_secciones_iguales_al_listado(self):
+        sembrar(2)
+        Cliente.objects.create(nombre='Archivado X', cedula='998', archivado=True)
+        Proveedor.objects.create(nombre='Archivado Y', archivado=True)
+        listados = {
+            'clientes': '/api/terceros/clientes/',
+            'proveedores': '/api/terceros/proveedores/',
+            'prendas': '/api/prendas/prendas/',
+            'tipos_prenda': '/api/prendas/tipos-prenda/',
+            'tipos_oro': '/api/prendas/tipos-oro/',
+            'metodos_pago': '/api/dominios_comunes/metodos-pago/',
+            'estados': '/api/dominios_comunes/estados/',
+        }
+        datos = self.client.get(self.url).json()
+        for nombre, url in listados.items():
+            with self.subTest(seccion=nombre):
+                self.assertEqual(datos[nombre]['datos'], self.client.get(url).json())
+        self.assertNotIn('Archivado X', [c['nombre'] for c in datos['clientes']['datos']])
+        self.assertNotIn('Archivado Y', [p['nombre'] for p in datos['proveedores']['datos']])
+
+    def test_seccion_desconocida(self):
+        self.assertEqual(self.client.get(self.url, {'incluir': 'clientes,otra'}).status_code, 400)
@@ -1,13 +1,28 @@
+import hashlib
+from contextlib import contextmanager
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
-from django.db import IntegrityError
+from rest_framework.views import APIView
+from django.db import IntegrityError, connection, transaction
+from siged.sincronizacion import SincronizacionMixin
+from siged.versiones import GetCondicionalMixin, seguir, versiones
+from prendas.models import Prenda, TipoOro, TipoPrenda
+from prendas.serializers import prendas_rapido
+from prendas.views import PrendaViewSet, TipoOroViewSet, TipoPrendaViewSet
+from terceros.models import Cliente, Proveedor
+from terceros.views import ClienteViewSet, ProveedorViewSet
 from .models import MetodoPago, Estado
 from .serializers import MetodoPagoSerializer, EstadoSerializer
 
-class MetodoPagoViewSet(viewsets.ModelViewSet):
+class MetodoPagoViewSet(GetCondicionalMixin, SincronizacionMixin, viewsets.ModelViewSet):
     queryset = MetodoPago.objects.all()
     serializer_class = MetodoPagoSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
 
     def create(self, request, *args, **kwargs):
         try:
@@ -30,9 +45,13 @@ class MetodoPagoViewSet(viewsets.ModelViewSet):
                             status=status.HTTP_400_BAD_REQUEST)
 
 
-class EstadoViewSet(viewsets.ModelViewSet):
+class EstadoViewSet(GetCondicionalMixin, SincronizacionMixin, viewsets.ModelViewSet):
     queryset = Estado.objects.all()
     serializer_class = EstadoSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
 
     def create(self, request, *args, **kwargs):
         try:
@@ -52,4 +71,116 @@ class EstadoViewSet(viewsets.ModelViewSet):
             return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": f"Error al actualizar estado: {str(e)}"},
-                            status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+                            status=status.HTTP_400_BAD_REQUEST)
+
+
+# ============ BOOTSTRAP (VARIOS RECURSOS EN UNA PETICIÓN) ============
+
+
+def _listado(viewset, contexto):
+    """
+    Instancia del ViewSet como en su acción `list` y el queryset que esa acción
+    usa (get_queryset() + filtros: sin archivados, mismo orden).
+    """
+    vista = viewset(request=contexto['request'], format_kwarg=contexto['format'], action='list', args=(), kwargs={})
+    return vista, vista.filter_queryset(vista.get_queryset())
+
+
+def _serializados(viewset):
+    """Sección armada con el queryset y el serializer del listado del ViewSet."""
+    def datos(contexto):
+        vista, queryset = _listado(viewset, contexto)
+        return vista.get_serializer(queryset, many=True).data
+    return datos
+
+
+def _prendas(contexto):
+    _, queryset = _listado(PrendaViewSet, contexto)
+    return prendas_rapido(queryset)
+
+
+def _secciones():
+    # nombre -> (modelos de los que depende, función que arma los datos)
+    return {
+        'clientes': ((Cliente,), _serializados(ClienteViewSet)),
+        'proveedores': ((Proveedor,), _serializados(ProveedorViewSet)),
+        'prendas': ((Prenda, TipoPrenda, TipoOro), _prendas),
+        'tipos_prenda': ((TipoPrenda,), _serializados(TipoPrendaViewSet)),
+        'tipos_oro': ((TipoOro,), _serializados(TipoOroViewSet)),
+        'metodos_pago': ((MetodoPago,), _serializados(MetodoPagoViewSet)),
+        'estados': ((Estado,), _serializados(EstadoViewSet)),
+    }
+
+
+# La versión de cada sección sale de los sellos de sus tablas
+seguir(*(modelo for modelos, _ in _secciones().values() for modelo in modelos))
+
+
+@contextmanager
+def _lectura_consistente():
+    """
+    Una transacción de solo lectura para todas las secciones. En PostgreSQL se
+    pide REPEATABLE READ para que todas lean la misma foto de la base; si ya hay
+    una transacción abierta (pruebas, peticiones atómicas) se usa esa.
+    """
+    externa = connection.in_atomic_block
+    with transaction.atomic():
+        if connection.vendor == 'postgresql' and not externa:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+        yield
+
+
+class BootstrapView(APIView):
+    """
+    Datos iniciales de los formularios en una sola petición.
+
+    GET /api/bootstrap/?incluir=clientes,prendas,metodos_pago
+        {"clientes": {"version": "...", "datos": [...]}, ...}
+
+    Cada sección trae una versión (hash de los sellos de sus tablas). El
+    cliente puede mandar las que ya tiene en ?versiones=clientes:abc,prendas:def
+    y esas secciones vuelven como {"version": "abc", "sin_cambios": true}, sin
+    consultar la base de datos. Sin ?incluir se devuelven todas.
+    """
+    presupuesto_consultas = {
+        'get': 9,
+    }
+
+    def get(self, request):
+        secciones = _secciones()
+        incluir = [s.strip() for s in request.query_params.get('incluir', '').split(',') if s.strip()]
+        incluir = incluir or list(secciones)
+        desconocidas = [s for s in incluir if s not in secciones]
+        if desconocidas:
+            raise ValidationError({
+                'incluir': f"Secciones desconocidas: {', '.join(desconocidas)}. "
+                           f"Disponibles: {', '.join(secciones)}"
+            })
+
+        conocidas = dict(
+            v.split(':', 1) for v in request.query_params.get('versiones', '').split(',') if ':' in v
+        )
+        contexto = {'request': request, 'view': self, 'format': self.format_kwarg}
+
+        respuesta = {}
+        pendientes = []
+        for nombre in incluir:
+            modelos, _ = secciones[nombre]
+            # Los sellos se leen antes que los datos: si alguien escribe en
+            # medio, la versión queda vieja y el cliente vuelve a pedir la sección
+            version = hashlib.md5(
+                '|'.join([nombre] + [str(s) for s in versiones(*modelos)]).encode()
+            ).hexdigest()
+            if conocidas.get(nombre) == version:
+                respuesta[nombre] = {'version': version, 'sin_cambios': True}
+            else:
+                respuesta[nombre] = {'version': version}
+                pendientes.append(nombre)
+
+        if pendientes:
+            with _lectura_consistente():
+                for nombre in pendientes:
+                    respuesta[nombre]['datos'] = secciones[nombre][1](contexto)
+
+        return Response(respuesta)
@@ -1,3 +1,8 @@
 from django.test import TestCase
 
-# Create your tests here.
+from siged.presupuesto_consultas import PresupuestoConsultasMixin
+
+
+class PresupuestoConsultasEgresoIngresoTests(PresupuestoConsultasMixin, TestCase):
+    """Ningún endpoint GET de egreso_ingreso debe crecer en consultas con el número de filas."""
+    app_label = 'egreso_ingreso'
@@ -6,8 +6,16 @@ from .serializers import EgresoSerializer, IngresoSerializer
 class EgresoViewSet(viewsets.ModelViewSet):
     queryset = Egreso.objects.all()
     serializer_class = EgresoSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
 
 
 class IngresoViewSet(viewsets.ModelViewSet):
     queryset = Ingreso.objects.all()
     serializer_class = IngresoSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
@@ -1,6 +1,9 @@
 from django.contrib import admin
-from .models import Prenda, TipoOro, TipoPrenda
+from .models import MovimientoInventario, Prenda, SaldoInventario, TipoOro, TipoPrenda, ValoracionInventario
 # Register your models here.
 admin.site.register(Prenda)
 admin.site.register(TipoPrenda)
-admin.site.register(TipoOro)
\ No newline at end of file
+admin.site.register(TipoOro)
+admin.site.register(MovimientoInventario)
+admin.site.register(SaldoInventario)
+admin.site.register(ValoracionInventario)
@@ -0,0 +1,323 @@
+"""
+Importación masiva de prendas desde CSV.
+
+Columnas (encabezado obligatorio, en cualquier orden):
+
+    nombre,tipo_prenda,tipo_oro,gramos,existencia,es_chatarra,es_recuperable
+
+`existencia`, `es_chatarra` y `es_recuperable` son opcionales (1, no, no).
+Los tipos se buscan por nombre sin distinguir mayúsculas, con los catálogos
+cargados una sola vez en memoria. Cada fila se valida con las mismas reglas de
+PrendaSerializer; las filas con errores se reportan y no se cargan.
+
+Las filas válidas se cargan por lotes con upsert sobre `nombre` (si la prenda
+ya existe se actualizan tipo, gramos, existencia y banderas):
+- PostgreSQL: COPY a una tabla temporal + INSERT ... ON CONFLICT DO UPDATE.
+- Otras bases: bulk_create(update_conflicts=True).
+
+El cambio de existencia de cada prenda queda en el kardex
+(MovimientoInventario, motivo `importacion`). Ninguna de las dos rutas
+dispara señales, así que al final se renuevan los sellos de versión y se
+avisa al dashboard.
+"""
+import csv
+import io
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+
+from siged.eventos import publicar
+from siged.versiones import invalidar
+
+from .models import MovimientoInventario, Prenda, TipoOro, TipoPrenda
+
+TAMANO_LOTE = 1000
+# Tope de PositiveIntegerField (integer de PostgreSQL)
+EXISTENCIA_MAXIMA = 2147483647
+COLUMNAS_OBLIGATORIAS = ('nombre', 'tipo_prenda', 'tipo_oro', 'gramos')
+CAMPOS_ACTUALIZADOS = (
+    'tipo_prenda', 'tipo_oro', 'gramos', 'existencia', 'es_chatarra', 'es_recuperable', 'fecha_actualizacion',
+)
+
+_VERDADEROS = {'1', 'si', 'sí', 'true', 'x', 's', 'yes'}
+_FALSOS = {'', '0', 'no', 'false', 'n'}
+
+
+class ErrorArchivo(Exception):
+    """El archivo completo no se puede procesar (encabezado, codificación)."""
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.filas = 0
+        self.creadas = 0
+        self.actualizadas = 0
+        self.errores = []
+        self.segundos = 0.0
+
+    @property
+    def validas(self):
+        return self.filas - len(self.errores)
+
+    @property
+    def filas_por_segundo(self):
+        return self.filas / self.segundos if self.segundos else 0.0
+
+    def como_dict(self):
+        return {
+            'filas': self.filas,
+            'validas': self.validas,
+            'creadas': self.creadas,
+            'actualizadas': self.actualizadas,
+            'con_errores': len(self.errores),
+            'errores': self.errores,
+            'segundos': round(self.segundos, 3),
+            'filas_por_segundo': round(self.filas_por_segundo),
+        }
+
+
+# ============ LECTURA Y VALIDACIÓN ============
+
+def _leer_texto(archivo):
+    """Acepta texto, bytes o un archivo subido; detecta UTF-8 (con o sin BOM) o Latin-1."""
+    if hasattr(archivo, 'read'):
+        archivo = archivo.read()
+    if isinstance(archivo, bytes):
+        try:
+            archivo = archivo.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            archivo = archivo.decode('latin-1')
+    return archivo.lstrip('\ufeff')
+
+
+def _booleano(valor):
+    valor = valor.strip().lower()
+    if valor in _VERDADEROS:
+        return True
+    if valor in _FALSOS:
+        return False
+    raise ValueError
+
+
+class _Validador:
+    """Convierte una fila del CSV en un Prenda sin guardar, o en un dict de errores."""
+
+    def __init__(self):
+        self.tipos_prenda = {t.nombre.strip().lower(): t.pk for t in TipoPrenda.objects.only('id', 'nombre')}
+        self.tipos_oro = {t.nombre.strip().lower(): t.pk for t in TipoOro.objects.only('id', 'nombre')}
+        self.nombres_vistos = {}
+        self.max_nombre = Prenda._meta.get_field('nombre').max_length
+        campo_gramos = Prenda._meta.get_field('gramos')
+        self.max_enteros_gramos = campo_gramos.max_digits - campo_gramos.decimal_places
+        self.decimales_gramos = campo_gramos.decimal_places
+
+    def validar(self, numero, fila):
+        errores = {}
+
+        nombre = (fila.get('nombre') or '').strip()
+        if not nombre:
+            errores['nombre'] = 'El nombre es obligatorio.'
+        elif len(nombre) > self.max_nombre:
+            errores['nombre'] = f'Máximo {self.max_nombre} caracteres.'
+        elif nombre in self.nombres_vistos:
+            errores['nombre'] = f'Repetido en el archivo (fila {self.nombres_vistos[nombre]}).'
+        else:
+            self.nombres_vistos[nombre] = numero
+
+        tipo_prenda = self.tipos_prenda.get((fila.get('tipo_prenda') or '').strip().lower())
+        if tipo_prenda is None:
+            errores['tipo_prenda'] = f"Tipo de prenda desconocido: '{fila.get('tipo_prenda') or ''}'."
+        tipo_oro = self.tipos_oro.get((fila.get('tipo_oro') or '').strip().lower())
+        if tipo_oro is None:
+            errores['tipo_oro'] = f"Tipo de oro desconocido: '{fila.get('tipo_oro') or ''}'."
+
+        gramos = None
+        try:
+            gramos = Decimal((fila.get('gramos') or '').strip().replace(',', '.'))
+            if not gramos.is_finite():
+                raise InvalidOperation
+            # Rango antes de quantize(): '1e30' excede la precisión del contexto
+            if gramos <= 0:
+                errores['gramos'] = 'El peso en gramos debe ser mayor que cero.'
+            elif gramos >= Decimal(10) ** self.max_enteros_gramos:
+                errores['gramos'] = 'Valor demasiado grande.'
+            elif gramos.quantize(Decimal(1).scaleb(-self.decimales_gramos)) != gramos:
+                errores['gramos'] = f'Máximo {self.decimales_gramos} decimales.'
+        except InvalidOperation:
+            errores['gramos'] = 'Número inválido.'
+
+        existencia = 1
+        if (fila.get('existencia') or '').strip():
+            try:
+                existencia = int(fila['existencia'].strip())
+                if existencia < 0:
+                    raise ValueError
+            except ValueError:
+                errores['existencia'] = 'Debe ser un entero mayor o igual a cero.'
+            else:
+                if existencia > EXISTENCIA_MAXIMA:
+                    errores['existencia'] = f'Máximo {EXISTENCIA_MAXIMA}.'
+
+        banderas = {}
+        for campo in ('es_chatarra', 'es_recuperable'):
+            try:
+                banderas[campo] = _booleano(fila.get(campo) or '')
+            except ValueError:
+                errores[campo] = 'Use sí/no o 1/0.'
+        if banderas.get('es_chatarra') and banderas.get('es_recuperable'):
+            errores['non_field_errors'] = 'Una prenda no puede ser chatarra y recuperable al mismo tiempo.'
+
+        if errores:
+            return None, errores
+        return Prenda(
+            nombre=nombre, tipo_prenda_id=tipo_prenda, tipo_oro_id=tipo_oro,
+            gramos=gramos, existencia=existencia, **banderas,
+        ), None
+
+
+# ============ CARGA ============
+
+class _CargaCopy:
+    """PostgreSQL: COPY de cada lote a una tabla temporal y un solo upsert al final."""
+    TEMPORAL = 'importacion_prendas_tmp'
+
+    def __init__(self):
+        self.columnas = [Prenda._meta.get_field(c).column for c in (
+            'nombre', 'tipo_prenda', 'tipo_oro', 'gramos', 'existencia', 'es_chatarra', 'es_recuperable',
+        )]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {self.TEMPORAL} ('
+                'nombre varchar(100), tipo_prenda_id bigint, tipo_oro_id bigint, gramos numeric(8, 2), '
+                'existencia integer, es_chatarra boolean, es_recuperable boolean'
+                ') ON COMMIT DROP'
+            )
+
+    def cargar(self, prendas):
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for p in prendas:
+            escritor.writerow([p.nombre, p.tipo_prenda_id, p.tipo_oro_id, p.gramos, p.existencia,
+                               p.es_chatarra, p.es_recuperable])
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {self.TEMPORAL} (nombre, tipo_prenda_id, tipo_oro_id, gramos, existencia, '
+                'es_chatarra, es_recuperable) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+    def terminar(self):
+        """Retorna (creadas, actualizadas)."""
+        tabla = Prenda._meta.db_table
+        columnas = ', '.join(self.columnas)
+        actualizacion = ', '.join(
+            f'{c} = EXCLUDED.{c}' for c in self.columnas[1:] + [Prenda._meta.get_field('fecha_actualizacion').column]
+        )
+        kardex = MovimientoInventario._meta.db_table
+        with connection.cursor() as cursor:
+            # Todas las partes del WITH ven la tabla antes del upsert: `previas`
+            # tiene la existencia anterior para registrar la diferencia en el kardex
+            cursor.execute(
+                f'WITH previas AS ('
+                f'  SELECT p.nombre, p.existencia FROM {tabla} p JOIN {self.TEMPORAL} t ON t.nombre = p.nombre'
+                f'), cargadas AS ('
+                f'  INSERT INTO {tabla} ({columnas}, archivado, fecha_actualizacion) '
+                f'  SELECT nombre, tipo_prenda_id, tipo_oro_id, gramos, existencia, es_chatarra, es_recuperable, '
+                f'  false, now() FROM {self.TEMPORAL} '
+                f'  ON CONFLICT (nombre) DO UPDATE SET {actualizacion} '
+                # xmax = 0 solo en filas recién insertadas
+                f'  RETURNING id, nombre, existencia, (xmax = 0) AS insertada'
+                f'), movimientos AS ('
+                f'  INSERT INTO {kardex} (prenda_id, cantidad, motivo, referencia, fecha) '
+                f'  SELECT c.id, c.existencia - COALESCE(v.existencia, 0), %s, %s, now() '
+                f'  FROM cargadas c LEFT JOIN previas v ON v.nombre = c.nombre '
+                f'  WHERE c.existencia <> COALESCE(v.existencia, 0)'
+                f') SELECT insertada FROM cargadas',
+                [MovimientoInventario.IMPORTACION, ''],
+            )
+            insertadas = [fila[0] for fila in cursor.fetchall()]
+            cursor.execute(f'DROP TABLE {self.TEMPORAL}')
+        creadas = sum(insertadas)
+        return creadas, len(insertadas) - creadas
+
+
+class _CargaBulk:
+    """Otras bases: bulk_create con upsert por lote."""
+
+    def __init__(self):
+        self.creadas = 0
+        self.actualizadas = 0
+
+    def cargar(self, prendas):
+        existentes = dict(
+            Prenda.objects.filter(nombre__in=[p.nombre for p in prendas]).values_list('nombre', 'existencia')
+        )
+        Prenda.objects.bulk_create(
+            prendas, update_conflicts=True,
+            unique_fields=['nombre'], update_fields=list(CAMPOS_ACTUALIZADOS),
+        )
+        if any(p.pk is None for p in prendas):
+            # Sin RETURNING en el upsert: recuperar los ids por nombre
+            ids = dict(Prenda.objects.filter(nombre__in=[p.nombre for p in prendas]).values_list('nombre', 'id'))
+            for p in prendas:
+                p.pk = ids[p.nombre]
+        MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(prenda_id=p.pk, cantidad=p.existencia - existentes.get(p.nombre, 0),
+                                 motivo=MovimientoInventario.IMPORTACION)
+            for p in prendas if p.existencia != existentes.get(p.nombre, 0)
+        ])
+        self.actualizadas += len(existentes)
+        self.creadas += len(prendas) - len(existentes)
+
+    def terminar(self):
+        return self.creadas, self.actualizadas
+
+
+def importar_prendas(archivo, tamano_lote=TAMANO_LOTE, simular=False):
+    """
+    Importa prendas desde un CSV (texto, bytes o archivo). Retorna un
+    ResultadoImportacion con los conteos, el tiempo y los errores por fila
+    (`fila` es el número de línea del archivo, contando el encabezado).
+    Con `simular` solo valida.
+    """
+    resultado = ResultadoImportacion()
+    inicio = time.perf_counter()
+
+    lector = csv.DictReader(io.StringIO(_leer_texto(archivo)))
+    encabezado = [c.strip().lower() for c in (lector.fieldnames or [])]
+    faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in encabezado]
+    if faltantes:
+        raise ErrorArchivo(f"Faltan columnas: {', '.join(faltantes)}")
+    lector.fieldnames = encabezado
+
+    with transaction.atomic():
+        validador = _Validador()
+        carga = None
+        if not simular:
+            carga = _CargaCopy() if connection.vendor == 'postgresql' else _CargaBulk()
+
+        lote = []
+        for numero, fila in enumerate(lector, start=2):
+            resultado.filas += 1
+            prenda, errores = validador.validar(numero, fila)
+            if errores:
+                resultado.errores.append({'fila': numero, 'nombre': (fila.get('nombre') or '').strip(), 'errores': errores})
+                continue
+            lote.append(prenda)
+            if len(lote) >= tamano_lote:
+                if carga:
+                    carga.cargar(lote)
+                lote = []
+        if lote and carga:
+            carga.cargar(lote)
+
+        if carga:
+            resultado.creadas, resultado.actualizadas = carga.terminar()
+            if resultado.creadas or resultado.actualizadas:
+                invalidar(Prenda)
+                publicar('dashboard', clave='resumen')
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
@@ -0,0 +1,136 @@
+"""
+Kardex de inventario: movimientos (solo inserción) y saldos periódicos.
+
+El kardex es la fuente de verdad. Prenda.existencia es el saldo actual
+materializado que usan los listados y solo cambia por aquí:
+- mover(prenda, cantidad, motivo) inserta el MovimientoInventario y, en la
+  misma transacción, suma la cantidad con UPDATE ... SET existencia =
+  existencia + n, sin leer y reescribir la fila (sin actualizaciones perdidas
+  entre ventas concurrentes; el CHECK existencia >= 0 impide vender de más).
+- Prenda.save() no escribe la existencia de una prenda ya guardada; el
+  cambio respecto al valor leído pasa por mover() como ajuste.
+- La importación masiva inserta el movimiento en la misma sentencia del upsert.
+
+La existencia a cualquier fecha sale de existencias(fecha): el último
+SaldoInventario anterior a la fecha más los movimientos que ese saldo no
+incluye. Cada saldo guarda el id del último movimiento que suma
+(hasta_movimiento), no solo la hora del corte: un movimiento fechado antes del
+corte que confirma después queda fuera del saldo y se sigue sumando. Los
+saldos los genera `manage.py cerrar_inventario` (p. ej. cada noche), y con
+--verificar compara el kardex contra Prenda.existencia.
+"""
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from siged.eventos import publicar
+from siged.versiones import invalidar
+
+from .models import MovimientoInventario, Prenda, SaldoInventario
+
+
+def mover(prenda, cantidad, motivo, referencia=''):
+    """Registra `cantidad` unidades (negativa si salen) y ajusta la existencia actual."""
+    if not cantidad:
+        return
+    try:
+        with transaction.atomic():
+            MovimientoInventario.objects.create(prenda=prenda, cantidad=cantidad, motivo=motivo, referencia=referencia)
+            Prenda.objects.filter(pk=prenda.pk).update(
+                existencia=F('existencia') + cantidad,
+                fecha_actualizacion=timezone.now(),
+            )
+    except IntegrityError:
+        raise ValidationError(f"No hay suficiente stock para {prenda}")
+
+    prenda.existencia += cantidad
+    prenda._existencia_guardada = prenda.existencia
+    # update() no dispara post_save
+    invalidar(Prenda)
+    publicar('dashboard', clave='resumen')
+
+
+# ============ CONSULTAS ============
+
+def _calcular(prendas, saldos, movimientos):
+    """
+    {prenda_id: existencia} en una sola consulta: el último saldo de
+    `saldos` más los `movimientos` posteriores a su hasta_movimiento.
+    """
+    queryset = Prenda.objects.all() if prendas is None else Prenda.objects.filter(pk__in=prendas)
+    saldos = saldos.filter(prenda=OuterRef('pk')).order_by('-hasta_movimiento', '-corte')
+    movimientos = (
+        movimientos
+        .filter(prenda=OuterRef('pk'), id__gt=OuterRef('hasta_saldo'))
+        .order_by().values('prenda').annotate(total=Sum('cantidad')).values('total')
+    )
+    queryset = queryset.annotate(
+        hasta_saldo=Coalesce(Subquery(saldos.values('hasta_movimiento')[:1]), 0),
+        saldo_base=Coalesce(Subquery(saldos.values('existencia')[:1]), 0),
+    ).annotate(delta=Coalesce(Subquery(movimientos), 0))
+    return {pk: base + delta for pk, base, delta in queryset.values_list('pk', 'saldo_base', 'delta')}
+
+
+def existencias(fecha=None, prendas=None):
+    """
+    {prenda_id: existencia} a la fecha (por defecto, ahora): saldo del último
+    corte <= fecha + movimientos fuera de ese saldo con fecha <= fecha.
+    """
+    fecha = fecha or timezone.now()
+    return _calcular(
+        prendas,
+        SaldoInventario.objects.filter(corte__lte=fecha),
+        MovimientoInventario.objects.filter(fecha__lte=fecha),
+    )
+
+
+# ============ SALDOS PERIÓDICOS ============
+
+def _bloquear_kardex():
+    # SHARE choca con el ROW EXCLUSIVE de los INSERT: espera a que confirmen
+    # los movimientos en curso y frena los nuevos hasta el final del cierre,
+    # así ningún id <= hasta_movimiento puede aparecer después. (SQLite ya
+    # tiene un solo escritor.)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {MovimientoInventario._meta.db_table} IN SHARE MODE')
+
+
+def cerrar():
+    """
+    Guarda un SaldoInventario para cada prenda con movimientos desde el
+    saldo anterior, hasta el último movimiento confirmado. Retorna cuántos
+    saldos se crearon.
+    """
+    with transaction.atomic():
+        _bloquear_kardex()
+        corte = timezone.now()
+        hasta = MovimientoInventario.objects.aggregate(m=Max('id'))['m'] or 0
+        desde = SaldoInventario.objects.aggregate(m=Max('hasta_movimiento'))['m'] or 0
+        ids = set(
+            MovimientoInventario.objects
+            .filter(id__gt=desde, id__lte=hasta)
+            .values_list('prenda_id', flat=True).distinct()
+        )
+        if not ids:
+            return 0
+        saldos = [
+            SaldoInventario(prenda_id=pk, corte=corte, existencia=existencia, hasta_movimiento=hasta)
+            for pk, existencia in _calcular(
+                ids, SaldoInventario.objects.all(), MovimientoInventario.objects.filter(id__lte=hasta),
+            ).items()
+        ]
+        SaldoInventario.objects.bulk_create(saldos, ignore_conflicts=True)
+    return len(saldos)
+
+
+def diferencias():
+    """Prendas cuyo Prenda.existencia no coincide con el kardex: [(prenda, kardex)]."""
+    calculadas = existencias()
+    return [
+        (prenda, calculadas.get(prenda.pk, 0))
+        for prenda in Prenda.objects.only('id', 'nombre', 'existencia').order_by('id')
+        if prenda.existencia != calculadas.get(prenda.pk, 0)
+    ]
@@ -0,0 +1,60 @@
+# prendas/management/commands/benchmark_importacion.py
+import csv
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from prendas.importacion import importar_prendas
+from prendas.models import TipoOro, TipoPrenda
+from prendas.serializers import PrendaSerializer
+
+
+class _Revertir(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara filas/segundo de cargar prendas una a una con PrendaSerializer (como el POST) '
+        'contra la importación masiva (COPY / bulk_create). Todo se revierte al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+        try:
+            with transaction.atomic():
+                tipo_prenda, _ = TipoPrenda.objects.get_or_create(nombre='Benchmark')
+                tipo_oro, _ = TipoOro.objects.get_or_create(nombre='BENCHMARK')
+
+                inicio = time.perf_counter()
+                for i in range(filas):
+                    serializer = PrendaSerializer(data={
+                        'nombre': f'bench-uno-{i}', 'tipo_prenda': tipo_prenda.pk,
+                        'tipo_oro': tipo_oro.pk, 'gramos': '2.50', 'existencia': 1,
+                    })
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save()
+                uno_a_uno = time.perf_counter() - inicio
+
+                buffer = io.StringIO()
+                escritor = csv.writer(buffer)
+                escritor.writerow(['nombre', 'tipo_prenda', 'tipo_oro', 'gramos', 'existencia'])
+                for i in range(filas):
+                    escritor.writerow([f'bench-lote-{i}', tipo_prenda.nombre, tipo_oro.nombre, '2.50', 1])
+                masiva = importar_prendas(buffer.getvalue())
+                # Segunda pasada: mismas filas, todas actualizaciones
+                upsert = importar_prendas(buffer.getvalue())
+                raise _Revertir
+        except _Revertir:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'📊 Importación de {filas:,} prendas'))
+        self.stdout.write(f'  {"una a una":<14} {filas / uno_a_uno:>12,.0f} filas/s {uno_a_uno:>8.2f} s')
+        self.stdout.write(f'  {"masiva":<14} {masiva.filas_por_segundo:>12,.0f} filas/s {masiva.segundos:>8.2f} s'
+                          f'   (x{uno_a_uno / masiva.segundos:.1f})')
+        self.stdout.write(f'  {"upsert":<14} {upsert.filas_por_segundo:>12,.0f} filas/s {upsert.segundos:>8.2f} s')
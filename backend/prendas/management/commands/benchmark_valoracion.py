@@ -0,0 +1,65 @@
+# prendas/management/commands/benchmark_valoracion.py
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from prendas.models import Prenda
+from prendas.valoracion import TIPO_ARREGLO, valorar
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara filas/segundo de valorar el inventario con NumPy contra el recorrido por objeto '
+        'con Prenda.valor_estimado(), sobre un inventario sintético (no toca la base de datos).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--piezas', type=int, default=1_000_000, help='Prendas del inventario sintético')
+        parser.add_argument(
+            '--piezas-bucle', type=int, default=100_000,
+            help='Prendas para el recorrido por objeto (es mucho más lento; se compara por filas/segundo)',
+        )
+        parser.add_argument('--repeticiones', type=int, default=3)
+
+    def handle(self, *args, **options):
+        n = options['piezas']
+        aleatorio = np.random.default_rng(0)
+        arreglos = np.zeros(n, dtype=TIPO_ARREGLO)
+        arreglos['centigramos'] = aleatorio.integers(10, 5000, n)
+        arreglos['existencia'] = aleatorio.integers(1, 5, n)
+        arreglos['tipo_oro'] = aleatorio.integers(1, 4, n)
+        arreglos['tipo_prenda'] = aleatorio.integers(1, 40, n)
+        arreglos['es_chatarra'] = aleatorio.random(n) < 0.1
+        arreglos['es_recuperable'] = ~arreglos['es_chatarra'] & (aleatorio.random(n) < 0.1)
+        precios = {1: Decimal('250000'), 2: Decimal('280000'), 3: Decimal('190000')}
+
+        vectorizado = min(self.medir(lambda: valorar(arreglos, precios)) for _ in range(options['repeticiones']))
+
+        m = min(options['piezas_bucle'], n)
+        prendas = [
+            Prenda(gramos=Decimal(int(f['centigramos'])) / 100, existencia=int(f['existencia']),
+                   tipo_oro_id=int(f['tipo_oro']), tipo_prenda_id=int(f['tipo_prenda']),
+                   es_chatarra=bool(f['es_chatarra']), es_recuperable=bool(f['es_recuperable']))
+            for f in arreglos[:m]
+        ]
+
+        def por_objeto():
+            totales = {}
+            for prenda in prendas:
+                valor = prenda.valor_estimado(precios[prenda.tipo_oro_id]) * prenda.existencia
+                totales[prenda.tipo_oro_id] = totales.get(prenda.tipo_oro_id, 0) + valor
+            return totales
+
+        bucle = min(self.medir(por_objeto) for _ in range(options['repeticiones']))
+
+        self.stdout.write(self.style.SUCCESS(f'📊 Valoración de inventario ({n:,} prendas)'))
+        self.stdout.write(f'  {"NumPy":<12} {n / vectorizado:>14,.0f} filas/s {vectorizado * 1000:>9.1f} ms')
+        self.stdout.write(f'  {"por objeto":<12} {m / bucle:>14,.0f} filas/s {bucle * 1000:>9.1f} ms ({m:,} prendas)'
+                          f'   (x{(n / vectorizado) / (m / bucle):.0f})')
+
+    def medir(self, funcion):
+        inicio = time.perf_counter()
+        funcion()
+        return time.perf_counter() - inicio
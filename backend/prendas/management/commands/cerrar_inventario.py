@@ -0,0 +1,33 @@
+# prendas/management/commands/cerrar_inventario.py
+from django.core.management.base import BaseCommand
+
+from prendas import inventario
+
+
+class Command(BaseCommand):
+    help = (
+        'Guarda el saldo de inventario (kardex) de las prendas con movimientos desde el último corte. '
+        'Ejecutar periódicamente (p. ej. cada noche) para que las consultas de existencia a una fecha '
+        'solo sumen los movimientos posteriores al último saldo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Compara la existencia actual de cada prenda contra la calculada con el kardex',
+        )
+
+    def handle(self, *args, **options):
+        creados = inventario.cerrar()
+        self.stdout.write(self.style.SUCCESS(f'📦 Saldos de inventario guardados: {creados}'))
+
+        if not options['verificar']:
+            return
+        diferencias = inventario.diferencias()
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('✅ El kardex coincide con la existencia de todas las prendas'))
+            return
+        for prenda, calculada in diferencias:
+            self.stdout.write(self.style.ERROR(
+                f'❌ Prenda #{prenda.pk} ({prenda.nombre}): existencia {prenda.existencia}, kardex {calculada}'
+            ))
@@ -0,0 +1,49 @@
+# prendas/management/commands/importar_prendas.py
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from prendas.importacion import TAMANO_LOTE, ErrorArchivo, importar_prendas
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa prendas desde un CSV (nombre,tipo_prenda,tipo_oro,gramos[,existencia,es_chatarra,es_recuperable]) '
+        'con upsert por nombre. Las filas con errores se reportan y no se cargan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del CSV')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por lote de carga')
+        parser.add_argument('--simular', action='store_true', help='Solo valida, no guarda nada')
+        parser.add_argument('--errores', help='Escribe el reporte de errores por fila en este CSV')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar_prendas(archivo, tamano_lote=options['lote'], simular=options['simular'])
+        except (OSError, ErrorArchivo) as e:
+            raise CommandError(str(e))
+
+        modo = ' (simulación)' if options['simular'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resultado.filas:,} filas{modo}: {resultado.creadas:,} creadas, '
+            f'{resultado.actualizadas:,} actualizadas, {len(resultado.errores):,} con errores'
+        ))
+        self.stdout.write(f'⏱️  {resultado.segundos:.2f} s ({resultado.filas_por_segundo:,.0f} filas/s)')
+
+        if not resultado.errores:
+            return
+        for error in resultado.errores[:10]:
+            detalle = '; '.join(f'{campo}: {mensaje}' for campo, mensaje in error['errores'].items())
+            self.stdout.write(self.style.WARNING(f"  ⚠️ Fila {error['fila']} ({error['nombre']}): {detalle}"))
+        if len(resultado.errores) > 10:
+            self.stdout.write(f'  ... y {len(resultado.errores) - 10} más')
+        if options['errores']:
+            with open(options['errores'], 'w', encoding='utf-8-sig', newline='') as salida:
+                escritor = csv.writer(salida)
+                escritor.writerow(['fila', 'nombre', 'campo', 'error'])
+                for error in resultado.errores:
+                    for campo, mensaje in error['errores'].items():
+                        escritor.writerow([error['fila'], error['nombre'], campo, mensaje])
+            self.stdout.write(self.style.WARNING(f"📄 Reporte de errores: {options['errores']}"))
@@ -0,0 +1,29 @@
+# prendas/management/commands/valorar_inventario.py
+from django.core.management.base import BaseCommand, CommandError
+
+from prendas.valoracion import guardar_valoracion, leer_precios
+
+
+class Command(BaseCommand):
+    help = (
+        'Guarda la valoración diaria del inventario (por tipo de oro, tipo de prenda y clase). '
+        'Los tipos de oro sin --precios usan el promedio de venta por gramo reciente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--precios', help='Precio por gramo: NACIONAL:250000,ITALIANO:280000')
+
+    def handle(self, *args, **options):
+        try:
+            precios = leer_precios(options['precios'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        valoracion = guardar_valoracion(precios=precios)
+        self.stdout.write(self.style.SUCCESS(
+            f'💰 Valoración {valoracion.fecha}: {valoracion.piezas:,} piezas, '
+            f'{valoracion.total_gramos:,} g, ${valoracion.total_valor:,}'
+        ))
+        for precio in valoracion.detalle['precios']:
+            if precio['origen'] == 'sin_precio':
+                self.stdout.write(self.style.WARNING(f"⚠️ {precio['nombre']} sin precio (valorado en 0)"))
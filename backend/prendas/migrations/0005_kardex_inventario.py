@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def saldo_inicial(apps, schema_editor):
+    """La existencia actual de cada prenda es el primer saldo del kardex."""
+    Prenda = apps.get_model('prendas', 'Prenda')
+    SaldoInventario = apps.get_model('prendas', 'SaldoInventario')
+    corte = django.utils.timezone.now()
+    SaldoInventario.objects.bulk_create(
+        [SaldoInventario(prenda_id=pk, corte=corte, existencia=existencia)
+         for pk, existencia in Prenda.objects.values_list('id', 'existencia').iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prendas', '0004_prenda_fecha_actualizacion_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.IntegerField(help_text='Positiva si entra, negativa si sale')),
+                ('motivo', models.CharField(choices=[('inicial', 'Existencia inicial'), ('compra', 'Compra'), ('venta', 'Venta'), ('anulacion_compra', 'Compra eliminada o modificada'), ('anulacion_venta', 'Venta eliminada o modificada'), ('cancelacion', 'Cancelación de crédito/apartado'), ('caducidad', 'Crédito/apartado caducado'), ('importacion', 'Importación masiva'), ('ajuste', 'Ajuste manual')], max_length=20)),
+                ('referencia', models.CharField(blank=True, help_text='p. ej. venta:15 o compra:7', max_length=40)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('prenda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_inventario', to='prendas.prenda')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Inventario',
+                'verbose_name_plural': 'Movimientos de Inventario',
+                'indexes': [models.Index(fields=['prenda', 'fecha'], name='movinv_prenda_fecha_idx'), models.Index(fields=['fecha'], name='movinv_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corte', models.DateTimeField()),
+                ('existencia', models.IntegerField()),
+                ('prenda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_inventario', to='prendas.prenda')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Inventario',
+                'verbose_name_plural': 'Saldos de Inventario',
+                'constraints': [models.UniqueConstraint(fields=('prenda', 'corte'), name='saldo_inventario_prenda_corte_unico')],
+            },
+        ),
+        migrations.RunPython(saldo_inicial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:52
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prendas', '0005_kardex_inventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValoracionInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('precios', models.JSONField(help_text='Precio por gramo usado para cada tipo de oro {id: precio}')),
+                ('piezas', models.PositiveBigIntegerField(default=0)),
+                ('total_gramos', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_valor', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+                ('detalle', models.JSONField(help_text='Totales por tipo de oro, tipo de prenda y clase')),
+                ('fecha_registro', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Valoración de Inventario',
+                'verbose_name_plural': 'Valoraciones de Inventario',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
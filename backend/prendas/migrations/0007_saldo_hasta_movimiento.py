@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:46
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def marcar_saldos(apps, schema_editor):
+    """Los saldos existentes se tomaron por fecha: suman los movimientos con fecha <= corte."""
+    MovimientoInventario = apps.get_model('prendas', 'MovimientoInventario')
+    SaldoInventario = apps.get_model('prendas', 'SaldoInventario')
+    for corte in SaldoInventario.objects.values_list('corte', flat=True).distinct().order_by():
+        hasta = MovimientoInventario.objects.filter(fecha__lte=corte).aggregate(m=Max('id'))['m'] or 0
+        SaldoInventario.objects.filter(corte=corte).update(hasta_movimiento=hasta)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prendas', '0006_valoracion_inventario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saldoinventario',
+            name='hasta_movimiento',
+            field=models.BigIntegerField(default=0, help_text='Último MovimientoInventario incluido en el saldo'),
+        ),
+        migrations.RunPython(marcar_saldos, migrations.RunPython.noop),
+    ]
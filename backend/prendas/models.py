@@ -1,12 +1,14 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 
+from dominios_comunes.models import ModeloSincronizable
+
 # Create your models here.
-class TipoPrenda(models.Model):
+class TipoPrenda(ModeloSincronizable):
     nombre = models.CharField(max_length=100, unique=True)
 
     def __str__(self):
@@ -21,7 +23,7 @@ class TipoPrenda(models.Model):
         verbose_name = "Tipo de Prenda"
         verbose_name_plural = "Tipos de Prenda"
 
-class TipoOro(models.Model):
+class TipoOro(ModeloSincronizable):
     nombre = models.CharField(max_length=50, unique=True)
 
     def __str__(self):
@@ -36,7 +38,7 @@ class TipoOro(models.Model):
         verbose_name = "Tipo de Oro"
         verbose_name_plural = "Tipos de Oro"
 
-class Prenda(models.Model):
+class Prenda(ModeloSincronizable):
     nombre = models.CharField(max_length=100, unique=True, default="Sin nombre")
     tipo_prenda = models.ForeignKey(
         "TipoPrenda", 
@@ -65,6 +67,48 @@ class Prenda(models.Model):
         if self.es_chatarra and self.es_recuperable:
             raise ValidationError("Una prenda no puede ser chatarra y recuperable al mismo tiempo")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Para registrar en el kardex los cambios de existencia hechos con save()
+        instancia._existencia_guardada = instancia.__dict__.get('existencia')
+        return instancia
+
+    def save(self, *args, **kwargs):
+        """
+        Una prenda nueva se inserta con su existencia inicial en el kardex. En
+        una prenda ya guardada save() no escribe la existencia (el valor leído
+        puede ser viejo si otra venta la movió después): el cambio respecto a
+        lo leído se aplica como ajuste con inventario.mover().
+        """
+        if self._state.adding:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                if self.existencia:
+                    MovimientoInventario.objects.create(
+                        prenda=self, cantidad=self.existencia, motivo=MovimientoInventario.INICIAL,
+                    )
+            self._existencia_guardada = self.existencia
+            return
+
+        from . import inventario
+
+        update_fields = kwargs.get('update_fields')
+        anterior = getattr(self, '_existencia_guardada', None)
+        cambio = 0
+        if anterior is not None and (update_fields is None or 'existencia' in update_fields):
+            cambio = self.existencia - anterior
+            self.existencia = anterior
+        kwargs['update_fields'] = [
+            campo for campo in (update_fields if update_fields is not None else [
+                f.name for f in self._meta.concrete_fields if not f.primary_key
+            ])
+            if campo != 'existencia'
+        ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            inventario.mover(self, cambio, MovimientoInventario.AJUSTE)
+
     def valor_estimado(self, precio_gramo):
         """Calcula el valor estimado de la prenda"""
         return self.gramos * precio_gramo
@@ -86,3 +130,89 @@ class Prenda(models.Model):
                 name='prenda_existencia_no_negativa'
             ),
         ]
+
+
+class MovimientoInventario(models.Model):
+    """
+    Kardex: una fila por cada entrada o salida de unidades de una prenda.
+    Solo se insertan filas (nunca se editan); la existencia a una fecha es el
+    último SaldoInventario anterior más la suma de los movimientos que no
+    incluye (id > hasta_movimiento) con fecha hasta ese momento.
+    """
+    INICIAL = 'inicial'
+    COMPRA = 'compra'
+    VENTA = 'venta'
+    ANULACION_COMPRA = 'anulacion_compra'
+    ANULACION_VENTA = 'anulacion_venta'
+    CANCELACION = 'cancelacion'
+    CADUCIDAD = 'caducidad'
+    IMPORTACION = 'importacion'
+    AJUSTE = 'ajuste'
+    MOTIVOS = [
+        (INICIAL, 'Existencia inicial'),
+        (COMPRA, 'Compra'),
+        (VENTA, 'Venta'),
+        (ANULACION_COMPRA, 'Compra eliminada o modificada'),
+        (ANULACION_VENTA, 'Venta eliminada o modificada'),
+        (CANCELACION, 'Cancelación de crédito/apartado'),
+        (CADUCIDAD, 'Crédito/apartado caducado'),
+        (IMPORTACION, 'Importación masiva'),
+        (AJUSTE, 'Ajuste manual'),
+    ]
+
+    prenda = models.ForeignKey("Prenda", on_delete=models.CASCADE, related_name="movimientos_inventario")
+    cantidad = models.IntegerField(help_text="Positiva si entra, negativa si sale")
+    motivo = models.CharField(max_length=20, choices=MOTIVOS)
+    referencia = models.CharField(max_length=40, blank=True, help_text="p. ej. venta:15 o compra:7")
+    fecha = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.prenda_id}: {self.cantidad:+d} ({self.motivo})"
+
+    class Meta:
+        verbose_name = "Movimiento de Inventario"
+        verbose_name_plural = "Movimientos de Inventario"
+        indexes = [
+            models.Index(fields=['prenda', 'fecha'], name='movinv_prenda_fecha_idx'),
+            models.Index(fields=['fecha'], name='movinv_fecha_idx'),
+        ]
+
+
+class SaldoInventario(models.Model):
+    """
+    Foto periódica de la existencia de una prenda (ver cerrar_inventario): la
+    suma de sus movimientos hasta el id `hasta_movimiento`, tomada al `corte`.
+    """
+    prenda = models.ForeignKey("Prenda", on_delete=models.CASCADE, related_name="saldos_inventario")
+    corte = models.DateTimeField()
+    existencia = models.IntegerField()
+    hasta_movimiento = models.BigIntegerField(default=0, help_text="Último MovimientoInventario incluido en el saldo")
+
+    def __str__(self):
+        return f"{self.prenda_id} @ {self.corte}: {self.existencia}"
+
+    class Meta:
+        verbose_name = "Saldo de Inventario"
+        verbose_name_plural = "Saldos de Inventario"
+        constraints = [
+            models.UniqueConstraint(fields=['prenda', 'corte'], name='saldo_inventario_prenda_corte_unico'),
+        ]
+
+
+class ValoracionInventario(models.Model):
+    """Valoración diaria del inventario a los precios por gramo del día (ver prendas/valoracion.py)."""
+    fecha = models.DateField(unique=True)
+    precios = models.JSONField(help_text="Precio por gramo usado para cada tipo de oro {id: precio}")
+    piezas = models.PositiveBigIntegerField(default=0)
+    total_gramos = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_valor = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'))
+    detalle = models.JSONField(help_text="Totales por tipo de oro, tipo de prenda y clase")
+    fecha_registro = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Valoración {self.fecha}: {self.total_valor}"
+
+    class Meta:
+        verbose_name = "Valoración de Inventario"
+        verbose_name_plural = "Valoraciones de Inventario"
+        ordering = ['-fecha']
@@ -1,7 +1,9 @@
 from rest_framework import serializers
-from .models import TipoPrenda, TipoOro, Prenda
+from .models import TipoPrenda, TipoOro, Prenda, ValoracionInventario
 from django.core.exceptions import ValidationError
 
+from siged import proyecciones
+
 
 class TipoPrendaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -48,3 +50,42 @@ class PrendaSerializer(serializers.ModelSerializer):
         if es_chatarra and es_recuperable:
             raise serializers.ValidationError("Una prenda no puede ser chatarra y recuperable al mismo tiempo.")
         return data
+
+
+
+
+class ValoracionInventarioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ValoracionInventario
+        fields = ['id', 'fecha', 'precios', 'piezas', 'total_gramos', 'total_valor', 'detalle', 'fecha_registro']
+        read_only_fields = fields
+
+# ============ LECTURA RÁPIDA (values()) ============
+
+
+_gramos = proyecciones.decimal_de(Prenda, 'gramos')
+
+
+def prendas_rapido(queryset):
+    """Mismo resultado que PrendaSerializer(queryset, many=True).data con una consulta values_list()."""
+    return [
+        {
+            'id': prenda_id,
+            'nombre': nombre,
+            'tipo_prenda': tipo_prenda_id,
+            'tipo_prenda_nombre': tipo_prenda_nombre,
+            'tipo_oro': tipo_oro_id,
+            'tipo_oro_nombre': tipo_oro_nombre,
+            'es_chatarra': es_chatarra,
+            'es_recuperable': es_recuperable,
+            'gramos': _gramos(gramos),
+            'existencia': existencia,
+            'archivado': archivado,
+        }
+        for (prenda_id, nombre, tipo_prenda_id, tipo_prenda_nombre, tipo_oro_id, tipo_oro_nombre,
+             es_chatarra, es_recuperable, gramos, existencia, archivado)
+        in proyecciones.quitar_consultas_relacionadas(queryset).values_list(
+            'id', 'nombre', 'tipo_prenda_id', 'tipo_prenda__nombre', 'tipo_oro_id', 'tipo_oro__nombre',
+            'es_chatarra', 'es_recuperable', 'gramos', 'existencia', 'archivado',
+        )
+    ]
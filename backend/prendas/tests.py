@@ -1,3 +1,238 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from siged.presupuesto_consultas import PresupuestoConsultasMixin, sembrar
+
+from . import inventario
+from .importacion import importar_prendas
+from .models import MovimientoInventario, Prenda, TipoOro, TipoPrenda
+from .serializers import PrendaSerializer, prendas_rapido
+
+
+class PresupuestoConsultasPrendasTests(PresupuestoConsultasMixin, TestCase):
+    """Ningún endpoint GET de prendas debe crecer en consultas con el número de filas."""
+    app_label = 'prendas'
+
+
+class GetCondicionalTiposPrendaTests(TestCase):
+    """Los catálogos responden 304 sin consultas mientras la tabla no cambie."""
+
+    def test_304_sin_consultas_hasta_que_cambia_la_tabla(self):
+        TipoPrenda.objects.create(nombre='Anillo')
+        url = '/api/prendas/tipos-prenda/'
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+
+        TipoPrenda.objects.create(nombre='Cadena')
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_if_modified_since_no_valida(self):
+        # Una escritura en el mismo segundo no cambia Last-Modified: solo el ETag decide
+        TipoPrenda.objects.create(nombre='Anillo')
+        url = '/api/prendas/tipos-prenda/'
+        ultima_modificacion = self.client.get(url)['Last-Modified']
+        TipoPrenda.objects.create(nombre='Cadena')
+        respuesta = self.client.get(url, HTTP_IF_MODIFIED_SINCE=ultima_modificacion)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()), 2)
+
+    def test_solo_los_modelos_seguidos_renuevan_su_sello(self):
+        from django.core.cache import cache
+        from siged import versiones
+
+        prenda = Prenda.objects.create(nombre='Dije', tipo_prenda=TipoPrenda.objects.create(nombre='Dije'),
+                                       tipo_oro=TipoOro.objects.create(nombre='NACIONAL'), gramos='1.00')
+        claves = [versiones.PREFIJO + m._meta.label_lower for m in (Prenda, MovimientoInventario)]
+        cache.delete_many(claves)
+        inventario.mover(prenda, 1, MovimientoInventario.AJUSTE)
+        Prenda.objects.get(pk=prenda.pk).save()
+        self.assertEqual(list(cache.get_many(claves)), [claves[0]])
+
+
+class LecturaRapidaPrendasTests(TestCase):
+    """prendas_rapido() debe producir exactamente el JSON de PrendaSerializer."""
+
+    def test_mismo_json_que_el_serializer(self):
+        sembrar(3)
+        queryset = Prenda.objects.select_related('tipo_prenda', 'tipo_oro').order_by('id')
+        render = JSONRenderer().render
+        self.assertEqual(render(prendas_rapido(queryset)), render(PrendaSerializer(queryset, many=True).data))
+
+
+class ImportacionPrendasTests(TestCase):
+    """La importación masiva carga las filas válidas con upsert y reporta las demás."""
+
+    def setUp(self):
+        self.anillo = TipoPrenda.objects.create(nombre='Anillo')
+        TipoOro.objects.create(nombre='NACIONAL')
+        Prenda.objects.create(nombre='Existente', tipo_prenda=self.anillo,
+                              tipo_oro=TipoOro.objects.get(), gramos='1.00')
+
+    def test_upsert_y_errores_por_fila(self):
+        contenido = (
+            'nombre,tipo_prenda,tipo_oro,gramos,existencia,es_chatarra\n'
+            'Nueva,anillo,nacional,2.50,3,no\n'
+            'Existente,Anillo,NACIONAL,"4,75",2,\n'
+            'Mala,Pulsera,NACIONAL,0,1,no\n'
+            'Nueva,Anillo,NACIONAL,1,1,no\n'
+        ).encode('utf-8')
+        archivo = SimpleUploadedFile('prendas.csv', contenido, content_type='text/csv')
+        datos = self.client.post('/api/prendas/prendas/importar/', {'archivo': archivo}).json()
+
+        self.assertEqual((datos['creadas'], datos['actualizadas'], datos['con_errores']), (1, 1, 2))
+        self.assertEqual([e['fila'] for e in datos['errores']], [4, 5])
+        self.assertEqual(set(datos['errores'][0]['errores']), {'tipo_prenda', 'gramos'})
+        self.assertEqual(Prenda.objects.get(nombre='Existente').gramos, Decimal('4.75'))
+        self.assertEqual(Prenda.objects.get(nombre='Nueva').existencia, 3)
+        self.assertEqual(inventario.diferencias(), [])
+
+    def test_valores_fuera_de_rango_son_errores_de_fila(self):
+        resultado = importar_prendas(
+            'nombre,tipo_prenda,tipo_oro,gramos,existencia\n'
+            'Enorme,Anillo,NACIONAL,1e30,1\n'
+            'Decimales,Anillo,NACIONAL,1.234,1\n'
+            'Muchas,Anillo,NACIONAL,1,2147483648\n'
+            'Tope,Anillo,NACIONAL,1,2147483647\n',
+            simular=True,
+        )
+        self.assertEqual([(e['fila'], list(e['errores'])) for e in resultado.errores],
+                         [(2, ['gramos']), (3, ['gramos']), (4, ['existencia'])])
+        self.assertEqual(resultado.validas, 1)
+
+    def test_simular_y_encabezado_invalido(self):
+        resultado = importar_prendas('nombre,tipo_prenda,tipo_oro,gramos\nOtra,Anillo,NACIONAL,1\n', simular=True)
+        self.assertEqual((resultado.validas, resultado.creadas), (1, 0))
+        self.assertFalse(Prenda.objects.filter(nombre='Otra').exists())
+
+        archivo = SimpleUploadedFile('prendas.csv', b'nombre,gramos\nX,1\n', content_type='text/csv')
+        self.assertEqual(self.client.post('/api/prendas/prendas/importar/', {'archivo': archivo}).status_code, 400)
+
+
+class KardexInventarioTests(TestCase):
+    """La existencia sale del kardex (saldo + movimientos) y coincide con Prenda.existencia."""
+
+    def test_existencia_a_una_fecha_y_kardex(self):
+        prenda = Prenda.objects.create(nombre='Cadena', tipo_prenda=TipoPrenda.objects.create(nombre='Cadena'),
+                                       tipo_oro=TipoOro.objects.create(nombre='NACIONAL'), gramos='3.00',
+                                       existencia=5)
+        self.assertEqual(inventario.cerrar(), 1)
+        antes_de_vender = timezone.now()
+        inventario.mover(prenda, -2, MovimientoInventario.VENTA, 'venta:1')
+
+        with self.assertRaises(ValidationError):
+            inventario.mover(prenda, -10, MovimientoInventario.VENTA, 'venta:2')
+        prenda.refresh_from_db()
+        self.assertEqual(prenda.existencia, 3)
+        self.assertEqual(inventario.existencias(antes_de_vender), {prenda.pk: 5})
+        self.assertEqual(inventario.existencias(), {prenda.pk: 3})
+
+        datos = self.client.get(f'/api/prendas/prendas/{prenda.pk}/kardex/').json()
+        self.assertEqual([m['cantidad'] for m in datos['movimientos']], [5, -2])
+        self.assertEqual((datos['saldo_inicial'], datos['saldo_final']), (0, 3))
+
+        for fecha in ('ayer', '2024-02-30'):
+            respuesta = self.client.get('/api/prendas/prendas/existencias/', {'fecha': fecha})
+            self.assertEqual(respuesta.status_code, 400, fecha)
+
+    def test_save_no_pisa_la_existencia(self):
+        prenda = Prenda.objects.create(nombre='Anillo', tipo_prenda=TipoPrenda.objects.create(nombre='Anillo'),
+                                       tipo_oro=TipoOro.objects.create(nombre='NACIONAL'), gramos='2.00',
+                                       existencia=5)
+        leida = Prenda.objects.get(pk=prenda.pk)
+        inventario.mover(prenda, -2, MovimientoInventario.VENTA, 'venta:1')
+
+        # `leida` todavía tiene existencia 5: save() no la escribe
+        leida.gramos = Decimal('2.50')
+        leida.save()
+        prenda.refresh_from_db()
+        self.assertEqual((prenda.gramos, prenda.existencia), (Decimal('2.50'), 3))
+
+        # Un cambio de existencia se aplica como ajuste sobre lo que hay en la base
+        leida.existencia = 6
+        leida.save()
+        prenda.refresh_from_db()
+        self.assertEqual(prenda.existencia, 4)
+        self.assertEqual(prenda.movimientos_inventario.latest('id').motivo, MovimientoInventario.AJUSTE)
+        self.assertEqual(inventario.diferencias(), [])
+
+    def test_movimiento_confirmado_despues_del_corte(self):
+        prenda = Prenda.objects.create(nombre='Aretes', tipo_prenda=TipoPrenda.objects.create(nombre='Aretes'),
+                                       tipo_oro=TipoOro.objects.create(nombre='NACIONAL'), gramos='1.00',
+                                       existencia=4)
+        fecha_venta = timezone.now()
+        inventario.cerrar()
+        # Venta fechada antes del corte cuya transacción confirma después
+        MovimientoInventario.objects.create(prenda=prenda, cantidad=-1, motivo=MovimientoInventario.VENTA,
+                                            fecha=fecha_venta)
+        Prenda.objects.filter(pk=prenda.pk).update(existencia=3)
+
+        self.assertEqual(inventario.existencias(), {prenda.pk: 3})
+        self.assertEqual(inventario.existencias(fecha_venta), {prenda.pk: 3})
+        self.assertEqual(inventario.cerrar(), 1)
+        self.assertEqual(inventario.existencias(), {prenda.pk: 3})
+        self.assertEqual(inventario.diferencias(), [])
+
+    def test_ventas_y_compras_quedan_en_el_kardex(self):
+        sembrar(3)
+        self.assertTrue(MovimientoInventario.objects.filter(motivo=MovimientoInventario.VENTA).exists())
+        self.assertEqual(inventario.diferencias(), [])
+
+
+class ValoracionInventarioTests(TestCase):
+    """La valoración vectorizada coincide con valor_estimado() y se guarda por día."""
+
+    def setUp(self):
+        anillo = TipoPrenda.objects.create(nombre='Anillo')
+        nacional = TipoOro.objects.create(nombre='NACIONAL')
+        italiano = TipoOro.objects.create(nombre='ITALIANO')
+        Prenda.objects.create(nombre='A', tipo_prenda=anillo, tipo_oro=nacional, gramos='2.35', existencia=3)
+        Prenda.objects.create(nombre='B', tipo_prenda=anillo, tipo_oro=italiano, gramos='1.10', existencia=2,
+                              es_chatarra=True)
+        Prenda.objects.create(nombre='C', tipo_prenda=anillo, tipo_oro=italiano, gramos='9.00', existencia=4,
+                              archivado=True)
+        self.precios = {nacional.pk: Decimal('250000'), italiano.pk: Decimal('300000')}
+
+    def test_totales_por_grupo(self):
+        datos = self.client.get('/api/prendas/valoracion/', {'precios': 'NACIONAL:250000,ITALIANO:300000'}).json()
+        esperado = sum(
+            p.valor_estimado(self.precios[p.tipo_oro_id]) * p.existencia
+            for p in Prenda.objects.filter(archivado=False)
+        )
+        self.assertAlmostEqual(datos['valor'], float(esperado), places=2)
+        self.assertEqual((datos['piezas'], datos['gramos']), (5, 9.25))
+        self.assertEqual({c['clase']: c['piezas'] for c in datos['por_clase']}, {'normal': 3, 'chatarra': 2})
+        self.assertEqual(self.client.get('/api/prendas/valoracion/', {'precios': 'PLATA:1'}).status_code, 400)
+
+    def test_precios_fuera_de_rango(self):
+        from prendas import valoracion
+
+        url = '/api/prendas/valoracion/'
+        for precios in ('99999999999:1', f'{10 ** 8}:1', 'NACIONAL:100000000'):
+            with self.subTest(precios=precios):
+                self.assertEqual(self.client.get(url, {'precios': precios}).status_code, 400)
+
+        # El producto centigramos × centavos no debe desbordar int64
+        arreglos = valoracion.cargar_arreglos()
+        arreglos['existencia'] = 2 ** 31 - 1
+        with self.assertRaises(ValueError):
+            valoracion.valorar(arreglos, {pk: valoracion.PRECIO_MAXIMO for pk in self.precios})
+        self.assertEqual(valoracion.valorar(arreglos, {})['valor'], 0)
 
-# Create your tests here.
+    def test_foto_diaria(self):
+        respuesta = self.client.post('/api/prendas/valoracion/', {'precios': {'NACIONAL': 250000}},
+                                     content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.client.post('/api/prendas/valoracion/', {}, content_type='application/json')
+        historial = self.client.get('/api/prendas/valoracion/historial/').json()
+        self.assertEqual(len(historial), 1)
+        self.assertEqual(historial[0]['piezas'], 5)
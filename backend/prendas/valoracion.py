@@ -0,0 +1,212 @@
+"""
+Valoración del inventario completo con NumPy.
+
+Las columnas (gramos, existencia, tipo de oro, tipo de prenda, chatarra,
+recuperable) de las prendas en stock se leen en un solo recorrido a un arreglo
+estructurado; el valor se calcula para todas las filas a la vez y se totaliza
+por tipo de oro, tipo de prenda y clase (chatarra / recuperable / normal) con
+sumas int64. Todo viaja en enteros (siged/dinero.py): gramos en centigramos,
+precios en centavos y valores en centigramos × centavos, así que los totales
+son exactos y se redondean a centavos una sola vez, en la salida.
+
+    valorar(arreglos, precios)     -> totales (solo NumPy, sin base de datos)
+    valorar_inventario(precios)    -> totales del inventario actual con nombres
+    guardar_valoracion(fecha, ...) -> foto diaria en ValoracionInventario
+
+`precios` es {tipo_oro_id: precio por gramo}. Los tipos sin precio usan el
+promedio de venta por gramo de los últimos DIAS_PRECIO_REFERENCIA días.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Avg
+from django.utils import timezone
+
+from siged.dinero import Dinero, Gramos, dividir, en_unidades, sumar_por
+
+from .models import Prenda, TipoOro, TipoPrenda, ValoracionInventario
+
+DIAS_PRECIO_REFERENCIA = 30
+# Mismo tope que VentaPrenda.precio_por_gramo (max_digits=10, decimal_places=2)
+PRECIO_MAXIMO = Decimal('99999999.99')
+CLASES = ('normal', 'chatarra', 'recuperable')
+
+TIPO_ARREGLO = np.dtype([
+    ('centigramos', np.int64),
+    ('existencia', np.int64),
+    ('tipo_oro', np.int64),
+    ('tipo_prenda', np.int64),
+    ('es_chatarra', np.bool_),
+    ('es_recuperable', np.bool_),
+])
+
+
+# ============ CARGA ============
+
+def cargar_arreglos(queryset=None):
+    """Arreglo estructurado (TIPO_ARREGLO) con las prendas en stock no archivadas."""
+    if queryset is None:
+        queryset = Prenda.objects.filter(archivado=False, existencia__gt=0)
+    filas = (
+        queryset.order_by()
+        .annotate(centigramos=en_unidades('gramos', Gramos))
+        .values_list('centigramos', 'existencia', 'tipo_oro_id', 'tipo_prenda_id', 'es_chatarra', 'es_recuperable')
+    )
+    return np.fromiter(filas.iterator(chunk_size=5000), dtype=TIPO_ARREGLO)
+
+
+def precios_referencia():
+    """Promedio de venta por gramo de cada tipo de oro en los últimos días: {id: Decimal}."""
+    from compra_venta.models import VentaPrenda
+
+    desde = timezone.localdate() - timedelta(days=DIAS_PRECIO_REFERENCIA)
+    return dict(
+        VentaPrenda.objects
+        .filter(venta__fecha__gte=desde, precio_por_gramo__gt=0)
+        .values_list('prenda__tipo_oro_id')
+        .annotate(promedio=Avg('precio_por_gramo'))
+        .order_by()
+    )
+
+
+# ============ CÁLCULO ============
+
+def _totales(claves, piezas, centigramos, valor):
+    """Suma por clave (ids enteros pequeños); retorna [(clave, piezas, centigramos, centavos)]."""
+    if not len(claves):
+        return []
+    por_piezas = sumar_por(claves, piezas)
+    por_gramos = sumar_por(claves, centigramos)
+    por_valor = sumar_por(claves, valor)
+    return [
+        (int(k), int(por_piezas[k]), int(por_gramos[k]), dividir(int(por_valor[k]), Gramos.ESCALA))
+        for k in np.flatnonzero(por_piezas)
+    ]
+
+
+def valorar(arreglos, precios):
+    """
+    Totales del arreglo a los `precios` por gramo ({tipo_oro_id: precio}).
+    Los gramos se retornan en centigramos y los valores en centavos.
+    """
+    # Precio de cada fila buscando su tipo de oro entre los ids con precio
+    # (ordenados); las filas de tipos sin precio valen 0
+    ids = np.array(sorted(precios), dtype=np.int64)
+    centavos = np.array([Dinero.de(precios[k]).unidades for k in ids.tolist()], dtype=np.int64)
+    posicion = np.minimum(np.searchsorted(ids, arreglos['tipo_oro']), max(len(ids) - 1, 0))
+    if len(ids):
+        precio_fila = np.where(ids[posicion] == arreglos['tipo_oro'], centavos[posicion], 0)
+    else:
+        precio_fila = np.zeros(len(arreglos), dtype=np.int64)
+
+    piezas = arreglos['existencia']
+    centigramos = arreglos['centigramos'] * piezas
+    # Cota de toda suma parcial de centigramos × centavos: debe caber en int64
+    if len(ids) and int(centigramos.sum()) * int(np.abs(centavos).max()) >= 2 ** 63:
+        raise ValueError('Los precios son demasiado altos para valorar este inventario')
+    # centigramos × centavos por gramo: valor exacto en diezmilésimas de peso
+    valor = centigramos * precio_fila
+    clase = np.where(arreglos['es_chatarra'], 1, np.where(arreglos['es_recuperable'], 2, 0))
+
+    return {
+        'piezas': int(piezas.sum()),
+        'centigramos': int(centigramos.sum()),
+        'valor': dividir(int(valor.sum()), Gramos.ESCALA),
+        'por_tipo_oro': _totales(arreglos['tipo_oro'], piezas, centigramos, valor),
+        'por_tipo_prenda': _totales(arreglos['tipo_prenda'], piezas, centigramos, valor),
+        'por_clase': _totales(clase, piezas, centigramos, valor),
+    }
+
+
+# ============ INVENTARIO ACTUAL ============
+
+def _fila(clave, nombre, piezas, centigramos, centavos):
+    return {clave: nombre, 'piezas': piezas, 'gramos': centigramos / 100, 'valor': centavos / 100}
+
+
+def valorar_inventario(precios=None):
+    """
+    Valoración del inventario actual. `precios` ({tipo_oro_id: precio}) puede
+    ser parcial: los tipos que falten usan precios_referencia().
+    """
+    precios = dict(precios or {})
+    tipos_oro = dict(TipoOro.objects.values_list('id', 'nombre'))
+    faltantes = set(tipos_oro) - set(precios)
+    referencia = precios_referencia() if faltantes else {}
+
+    detalle_precios = []
+    for tipo_oro, nombre in sorted(tipos_oro.items(), key=lambda t: t[1]):
+        if tipo_oro in precios:
+            origen = 'solicitado'
+        elif tipo_oro in referencia:
+            precios[tipo_oro], origen = referencia[tipo_oro], 'promedio_ventas'
+        else:
+            precios[tipo_oro], origen = Decimal('0'), 'sin_precio'
+        detalle_precios.append({
+            'tipo_oro': tipo_oro, 'nombre': nombre,
+            'precio_gramo': round(float(precios[tipo_oro]), 2), 'origen': origen,
+        })
+
+    totales = valorar(cargar_arreglos(), precios)
+    tipos_prenda = dict(TipoPrenda.objects.values_list('id', 'nombre'))
+    return {
+        'precios': detalle_precios,
+        'piezas': totales['piezas'],
+        'gramos': totales['centigramos'] / 100,
+        'valor': totales['valor'] / 100,
+        'por_tipo_oro': [
+            {'tipo_oro': k, **_fila('nombre', tipos_oro.get(k), *resto)} for k, *resto in totales['por_tipo_oro']
+        ],
+        'por_tipo_prenda': [
+            {'tipo_prenda': k, **_fila('nombre', tipos_prenda.get(k), *resto)} for k, *resto in totales['por_tipo_prenda']
+        ],
+        'por_clase': [_fila('clase', CLASES[k], *resto) for k, *resto in totales['por_clase']],
+    }
+
+
+def leer_precios(valor):
+    """
+    Precios solicitados como dict ({"NACIONAL": 250000} o {1: 250000}) o texto
+    "NACIONAL:250000,2:280000". Retorna {tipo_oro_id: Decimal}.
+    """
+    if not valor:
+        return {}
+    if isinstance(valor, str):
+        try:
+            valor = dict(par.rsplit(':', 1) for par in valor.split(',') if par)
+        except ValueError:
+            raise ValueError("Use tipo:precio separados por coma, p. ej. NACIONAL:250000,ITALIANO:280000")
+    por_nombre = {nombre.upper(): pk for pk, nombre in TipoOro.objects.values_list('id', 'nombre')}
+    precios = {}
+    for tipo, precio in valor.items():
+        tipo = str(tipo).strip()
+        pk = int(tipo) if tipo.isdigit() else por_nombre.get(tipo.upper())
+        if pk not in por_nombre.values():
+            raise ValueError(f"Tipo de oro desconocido: {tipo}")
+        try:
+            precios[pk] = Decimal(str(precio))
+        except ArithmeticError:
+            raise ValueError(f"Precio inválido para {tipo}: {precio}")
+        if not precios[pk].is_finite() or precios[pk] < 0:
+            raise ValueError(f"Precio inválido para {tipo}: {precio}")
+        if precios[pk] > PRECIO_MAXIMO:
+            raise ValueError(f"El precio por gramo de {tipo} no puede superar {PRECIO_MAXIMO}")
+    return precios
+
+
+def guardar_valoracion(fecha=None, precios=None):
+    """Guarda (o reemplaza) la valoración del día."""
+    fecha = fecha or timezone.localdate()
+    datos = valorar_inventario(precios)
+    valoracion, _ = ValoracionInventario.objects.update_or_create(
+        fecha=fecha,
+        defaults={
+            'precios': {str(p['tipo_oro']): p['precio_gramo'] for p in datos['precios']},
+            'piezas': datos['piezas'],
+            'total_gramos': Decimal(f"{datos['gramos']:.2f}"),
+            'total_valor': Decimal(f"{datos['valor']:.2f}"),
+            'detalle': {k: datos[k] for k in ('precios', 'por_tipo_oro', 'por_tipo_prenda', 'por_clase')},
+        },
+    )
+    return valoracion
@@ -1,12 +1,28 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.parsers import FileUploadParser, MultiPartParser
 from rest_framework.response import Response
+from datetime import datetime, time, timedelta
+
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
-from .models import TipoPrenda, TipoOro, Prenda
-from .serializers import TipoPrendaSerializer, TipoOroSerializer, PrendaSerializer
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError as ErrorParametros
+from siged.cache_respuestas import cachear_respuesta, por_dia
+from siged.exportacion import rango_fechas
+from siged.campos import CamposDispersosMixin
+from siged.sincronizacion import SincronizacionMixin
+from siged.versiones import GetCondicionalMixin
+from . import inventario, valoracion
+from .importacion import ErrorArchivo, importar_prendas
+from .models import MovimientoInventario, TipoPrenda, TipoOro, Prenda, ValoracionInventario
+from .serializers import (
+    TipoPrendaSerializer, TipoOroSerializer, PrendaSerializer, ValoracionInventarioSerializer, prendas_rapido,
+)
 
 
-class SafeModelViewSet(viewsets.ModelViewSet):
+class SafeModelViewSet(CamposDispersosMixin, SincronizacionMixin, viewsets.ModelViewSet):
     """
     Clase base para manejar excepciones comunes y permitir actualizaciones parciales.
     """
@@ -36,16 +52,157 @@ class SafeModelViewSet(viewsets.ModelViewSet):
         return Response({"mensaje": f"'{nombre}' eliminado correctamente."}, status=status.HTTP_200_OK)
 
 
-class TipoPrendaViewSet(SafeModelViewSet):
+class TipoPrendaViewSet(GetCondicionalMixin, SafeModelViewSet):
     queryset = TipoPrenda.objects.all().order_by('nombre')
     serializer_class = TipoPrendaSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
 
 
-class TipoOroViewSet(SafeModelViewSet):
+class TipoOroViewSet(GetCondicionalMixin, SafeModelViewSet):
     queryset = TipoOro.objects.all().order_by('nombre')
     serializer_class = TipoOroSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+    }
 
 
 class PrendaViewSet(SafeModelViewSet):
     queryset = Prenda.objects.select_related('tipo_prenda', 'tipo_oro').all().order_by('id')
     serializer_class = PrendaSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+        'existencias': 1,
+        'kardex': 3,
+    }
+
+    @cachear_respuesta(Prenda, TipoPrenda, TipoOro)
+    def list(self, request, *args, **kwargs):
+        """Listado de solo lectura armado con values_list() (mismo JSON que PrendaSerializer)"""
+        queryset = self.filter_queryset(self.get_queryset())
+        desde = self.desde_solicitado()
+        if desde is not None:
+            return self.respuesta_cambios(queryset, desde, lambda qs: self.recortar(prendas_rapido(qs)))
+        return Response(self.recortar(prendas_rapido(queryset)))
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FileUploadParser])
+    def importar(self, request):
+        """
+        Importación masiva desde CSV (campo `archivo`, multipart o cuerpo crudo).
+        ?simular=true solo valida. Responde conteos, errores por fila y filas/segundo.
+        """
+        archivo = request.FILES.get('archivo') or request.FILES.get('file')
+        if archivo is None:
+            return Response({"error": "Adjunte el CSV en el campo 'archivo'."}, status=status.HTTP_400_BAD_REQUEST)
+        simular = request.query_params.get('simular', '').lower() in ('1', 'true', 'si', 'sí')
+        try:
+            resultado = importar_prendas(archivo, simular=simular)
+        except ErrorArchivo as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado.como_dict(), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def existencias(self, request):
+        """
+        Existencia de cada prenda al cierre de ?fecha=AAAA-MM-DD (por defecto,
+        ahora), calculada desde el kardex. ?prendas=1,2,3 limita las prendas.
+        """
+        valor = request.query_params.get('fecha')
+        fecha = None
+        if valor:
+            try:
+                dia = parse_date(valor)
+            except ValueError:
+                dia = None
+            if dia is None:
+                raise ErrorParametros({'fecha': 'Use el formato AAAA-MM-DD.'})
+            fecha = timezone.make_aware(datetime.combine(dia, time.max))
+        prendas = request.query_params.get('prendas')
+        try:
+            prendas = [int(pk) for pk in prendas.split(',') if pk] if prendas else None
+        except ValueError:
+            raise ErrorParametros({'prendas': 'Lista de ids separados por coma.'})
+
+        saldos = inventario.existencias(fecha, prendas)
+        return Response({
+            'fecha': (fecha or timezone.now()).isoformat(),
+            'existencias': [{'prenda': pk, 'existencia': saldos[pk]} for pk in sorted(saldos)],
+        })
+
+    @action(detail=True, methods=['get'])
+    def kardex(self, request, pk=None):
+        """
+        Movimientos de inventario de la prenda entre ?fecha_desde= y
+        ?fecha_hasta= (por defecto, el mes en curso) con el saldo tras cada uno.
+        """
+        prenda = self.get_object()
+        desde, hasta = rango_fechas(request.query_params)
+        desde = desde or timezone.localdate().replace(day=1)
+        inicio = timezone.make_aware(datetime.combine(desde, time.min))
+        movimientos = MovimientoInventario.objects.filter(prenda=prenda, fecha__gte=inicio)
+        if hasta:
+            movimientos = movimientos.filter(fecha__lte=timezone.make_aware(datetime.combine(hasta, time.max)))
+
+        saldo = saldo_inicial = inventario.existencias(inicio - timedelta(microseconds=1), [prenda.pk]).get(prenda.pk, 0)
+        filas = []
+        for movimiento in movimientos.order_by('fecha', 'id').values('id', 'fecha', 'cantidad', 'motivo', 'referencia'):
+            saldo += movimiento['cantidad']
+            filas.append({**movimiento, 'saldo': saldo})
+        return Response({
+            'prenda': prenda.pk,
+            'saldo_inicial': saldo_inicial,
+            'movimientos': filas,
+            'saldo_final': saldo,
+        })
+
+
+class ValoracionInventarioViewSet(viewsets.ViewSet):
+    """
+    Valoración del inventario completo por tipo de oro, tipo de prenda y clase.
+
+    GET  /api/prendas/valoracion/?precios=NACIONAL:250000,ITALIANO:280000
+         Valoración actual (los tipos sin precio usan el promedio de venta reciente)
+    POST /api/prendas/valoracion/  {"precios": {"NACIONAL": 250000}}
+         Guarda la valoración del día (reemplaza la anterior del mismo día)
+    GET  /api/prendas/valoracion/historial/?fecha_desde=&fecha_hasta=
+    """
+    presupuesto_consultas = {
+        'list': 4,
+        'historial': 1,
+    }
+
+    def _precios(self, valor):
+        try:
+            return valoracion.leer_precios(valor)
+        except ValueError as e:
+            raise ErrorParametros({'precios': str(e)})
+
+    def _valorar(self, funcion, precios):
+        try:
+            return funcion(precios=precios)
+        except ValueError as e:
+            raise ErrorParametros({'precios': str(e)})
+
+    @cachear_respuesta(Prenda, TipoOro, TipoPrenda, 'compra_venta.VentaPrenda', variar_por=por_dia)
+    def list(self, request):
+        precios = self._precios(request.query_params.get('precios'))
+        return Response(self._valorar(valoracion.valorar_inventario, precios))
+
+    def create(self, request):
+        precios = self._precios(request.data.get('precios'))
+        guardada = self._valorar(valoracion.guardar_valoracion, precios)
+        return Response(ValoracionInventarioSerializer(guardada).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def historial(self, request):
+        desde, hasta = rango_fechas(request.query_params)
+        queryset = ValoracionInventario.objects.all()
+        if desde:
+            queryset = queryset.filter(fecha__gte=desde)
+        if hasta:
+            queryset = queryset.filter(fecha__lte=hasta)
+        return Response(ValoracionInventarioSerializer(queryset, many=True).data)
@@ -0,0 +1,29 @@
+"""
+Bloqueos asesores (advisory locks) de PostgreSQL identificados por nombre.
+
+bloquear_transaccion('caja-cierre') ejecuta pg_advisory_xact_lock: espera a
+que ningún otro proceso tenga el mismo bloqueo y lo suelta solo al terminar
+la transacción actual (COMMIT o ROLLBACK), así que no puede quedar tomado si
+el proceso muere. Debe llamarse dentro de transaction.atomic().
+
+En otras bases (SQLite de desarrollo y pruebas) no hace nada: SQLite ya
+serializa las escrituras de toda la base.
+"""
+import zlib
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def clave(nombre):
+    """Entero estable (mismo valor en todos los procesos) para el nombre."""
+    return zlib.crc32(nombre.encode())
+
+
+def bloquear_transaccion(nombre, using=DEFAULT_DB_ALIAS):
+    conexion = connections[using]
+    if conexion.vendor != 'postgresql':
+        return
+    if not conexion.in_atomic_block:
+        raise RuntimeError('bloquear_transaccion() debe llamarse dentro de transaction.atomic()')
+    with conexion.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [clave(nombre)])
@@ -0,0 +1,104 @@
+"""
+Caché de respuestas del servidor etiquetada por modelo.
+
+    @action(detail=False, methods=['get'])
+    @cachear_respuesta(CuentaBancaria, MovimientoCaja)
+    def resumen_general(self, request): ...
+
+La clave combina la ruta, los parámetros de la consulta normalizados (ordenados)
+y los sellos de versión de los modelos etiquetados (siged/versiones.py). Un
+post_save / post_delete de cualquiera de esos modelos cambia su sello, así que
+las entradas viejas dejan de alcanzarse sin tener que buscarlas ni borrarlas;
+caducan solas con CACHE_RESPUESTAS_TIMEOUT.
+
+Las respuestas que además dependen de la fecha (p. ej. "últimos 7 días")
+usan variar_por=por_dia para que la clave cambie con el día.
+
+Solo se guardan respuestas 200 de GET. Una respuesta leída de la réplica
+(siged/replicas.py) no se guarda si los sellos son más nuevos que lo que la
+réplica alcanzó a aplicar. Los aciertos y fallos se cuentan en la
+métrica siged_cache_respuestas_total (ver siged/metricas.py).
+"""
+import functools
+import hashlib
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.response import Response
+
+from siged.metricas import Contador
+from siged.replicas import respuesta_confiable
+from siged.versiones import seguir, versiones
+
+ALIAS_CACHE = 'respuestas'
+
+resultados_cache = Contador(
+    'siged_cache_respuestas_total', 'Aciertos y fallos de la caché de respuestas', ('ruta', 'resultado')
+)
+
+
+def _modelo(modelo):
+    return apps.get_model(modelo) if isinstance(modelo, str) else modelo
+
+
+def por_dia(request):
+    """Para variar_por: la respuesta cambia con la fecha local."""
+    return timezone.localdate().isoformat()
+
+
+def clave_respuesta(request, modelos, extra='', sellos=None):
+    """Clave: ruta + parámetros normalizados + sellos de los modelos etiquetados."""
+    parametros = '&'.join(
+        f'{k}={v}' for k, valores in sorted(request.GET.lists()) for v in valores
+    )
+    sellos = ','.join(str(s) for s in (versiones(*modelos) if sellos is None else sellos))
+    resumen = hashlib.md5(f'{request.path}?{parametros}|{sellos}|{extra}'.encode()).hexdigest()
+    return f'siged:respuesta:{resumen}'
+
+
+def _datos_planos(datos):
+    # ReturnList / ReturnDict guardan una referencia al serializer; no se deben picklear
+    if isinstance(datos, list):
+        return list(datos)
+    if isinstance(datos, dict):
+        return dict(datos)
+    return datos
+
+
+def cachear_respuesta(*modelos, timeout=None, variar_por=None):
+    """
+    Decorador para vistas GET (acciones de ViewSet, métodos de APIView o
+    funciones con @api_view) cuya respuesta depende solo de `modelos`
+    (clases o etiquetas 'app.Modelo') y de los parámetros de la URL.
+    `variar_por(request)` agrega a la clave lo que no esté en la URL.
+    """
+    seguir(*modelos)
+
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            # args = (request, ...) en funciones; (self, request, ...) en métodos
+            request = args[0] if hasattr(args[0], 'query_params') else args[1]
+            if request.method != 'GET':
+                return vista(*args, **kwargs)
+
+            cache = caches[ALIAS_CACHE]
+            ruta = request.resolver_match.view_name if request.resolver_match else request.path
+            extra = variar_por(request) if variar_por else ''
+            sellos = versiones(*[_modelo(m) for m in modelos])
+            clave = clave_respuesta(request, modelos, extra, sellos)
+            datos = cache.get(clave)
+            if datos is not None:
+                resultados_cache.inc(ruta=ruta, resultado='hit')
+                return Response(datos)
+
+            resultados_cache.inc(ruta=ruta, resultado='miss')
+            response = vista(*args, **kwargs)
+            if response.status_code == 200 and respuesta_confiable(sellos):
+                duracion = timeout if timeout is not None else settings.CACHE_RESPUESTAS_TIMEOUT
+                cache.set(clave, _datos_planos(response.data), duracion)
+            return response
+        return envoltura
+    return decorador
@@ -0,0 +1,157 @@
+"""
+Campos dispersos (`?fields=` / `?expand=`) para los ViewSets de lectura.
+
+- Sin parámetros la respuesta no cambia.
+- `?fields=id,nombre` devuelve solo esos campos; las relaciones anidadas
+  (serializers anidados, listas como `prendas`) solo se incluyen si se piden
+  en `fields` o en `expand`.
+- `?expand=prendas` sin `fields` devuelve todos los campos planos y solo las
+  relaciones anidadas indicadas.
+
+La misma proyección se lleva al queryset: only() con las columnas necesarias,
+select_related() solo de las relaciones recorridas y prefetch_related() solo de
+las relaciones anidadas pedidas. Los SerializerMethodField (source='*') no
+dicen qué leen; el serializer puede declararlo en `dependencias_campos`
+({'campo': ('ruta__orm', ...)}); si no lo hace, el queryset no se poda.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+PARAMETRO_CAMPOS = 'fields'
+PARAMETRO_EXPANDIR = 'expand'
+
+
+def _lista(valor):
+    return [v.strip() for v in (valor or '').split(',') if v.strip()]
+
+
+def es_anidado(campo):
+    return isinstance(campo, (serializers.BaseSerializer, serializers.ManyRelatedField))
+
+
+class CamposDispersosMixin:
+    """Mixin para ViewSets: aplica `?fields=` / `?expand=` a la salida y al queryset."""
+
+    def campos_solicitados(self):
+        """Nombres de campos a devolver (en el orden del serializer) o None si no se pidió recorte."""
+        if not hasattr(self, '_campos_solicitados'):
+            self._campos_solicitados = self._calcular_campos_solicitados()
+        return self._campos_solicitados
+
+    def _calcular_campos_solicitados(self):
+        if self.request is None or self.request.method not in ('GET', 'HEAD'):
+            return None
+        campos = _lista(self.request.query_params.get(PARAMETRO_CAMPOS))
+        expandir = _lista(self.request.query_params.get(PARAMETRO_EXPANDIR))
+        if not campos and not expandir:
+            return None
+
+        disponibles = self.get_serializer_class()(context=self.get_serializer_context()).fields
+        desconocidos = [c for c in campos + expandir if c not in disponibles]
+        if desconocidos:
+            raise ValidationError({PARAMETRO_CAMPOS: f"Campos desconocidos: {', '.join(desconocidos)}"})
+
+        if campos:
+            pedidos = set(campos) | set(expandir)
+            return [n for n in disponibles if n in pedidos]
+        return [n for n, campo in disponibles.items() if not es_anidado(campo) or n in expandir]
+
+    def recortar(self, datos):
+        """Recorta dicts ya armados (rutas rápidas con values_list()) a los campos solicitados."""
+        campos = self.campos_solicitados()
+        if campos is None:
+            return datos
+        if isinstance(datos, dict):
+            return {c: datos[c] for c in campos if c in datos}
+        return [{c: fila[c] for c in campos if c in fila} for fila in datos]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_solicitados()
+        if campos is not None:
+            destino = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+            for nombre in [n for n in destino.fields if n not in campos]:
+                del destino.fields[nombre]
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        campos = self.campos_solicitados()
+        return queryset if campos is None else self.podar_queryset(queryset, campos)
+
+    # ============ PODA DEL QUERYSET ============
+
+    def rutas_orm(self, campos):
+        """Rutas ORM que leen los campos pedidos, o None si alguno no se puede determinar."""
+        serializer_class = self.get_serializer_class()
+        dependencias = getattr(serializer_class, 'dependencias_campos', {})
+        disponibles = serializer_class(context=self.get_serializer_context()).fields
+        rutas = []
+        for nombre in campos:
+            if nombre in dependencias:
+                rutas.extend(dependencias[nombre])
+            elif disponibles[nombre].source == '*':
+                return None
+            else:
+                rutas.append(disponibles[nombre].source.replace('.', '__'))
+        return rutas
+
+    def podar_queryset(self, queryset, campos):
+        rutas = self.rutas_orm(campos)
+        if rutas is None:
+            return queryset
+
+        columnas = {queryset.model._meta.pk.name}
+        seleccionadas = set()
+        anidadas = set()
+        for ruta in rutas:
+            clasificacion = _clasificar_ruta(queryset.model, ruta)
+            if clasificacion is None:
+                return queryset
+            columnas_ruta, seleccion, anidada = clasificacion
+            columnas.update(columnas_ruta)
+            seleccionadas.update(seleccion)
+            if anidada:
+                anidadas.add(anidada)
+
+        prefetch = []
+        for lookup in queryset._prefetch_related_lookups:
+            camino = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+            if any(camino == a or camino.startswith(a + '__') for a in anidadas):
+                prefetch.append(lookup)
+
+        queryset = queryset.select_related(None).prefetch_related(None).only(*columnas)
+        if seleccionadas:
+            queryset = queryset.select_related(*seleccionadas)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+def _clasificar_ruta(modelo, ruta):
+    """
+    Para una ruta ORM devuelve (columnas para only(), relaciones para
+    select_related(), relación inversa a precargar o None), o None si la ruta
+    pasa por algo que no es un campo del modelo (método o propiedad).
+    """
+    columnas = []
+    seleccion = []
+    recorrido = []
+    for segmento in ruta.split('__'):
+        try:
+            campo = modelo._meta.get_field(segmento)
+        except FieldDoesNotExist:
+            return None
+        if campo.is_relation and not campo.concrete:
+            # Relación inversa o many-to-many: se resuelve con prefetch_related
+            return columnas, seleccion, '__'.join(recorrido + [segmento])
+        recorrido.append(segmento)
+        columnas.append('__'.join(recorrido))
+        if len(recorrido) > 1:
+            seleccion.append('__'.join(recorrido[:-1]))
+        if not campo.is_relation:
+            break
+        modelo = campo.related_model
+    return columnas, seleccion, None
@@ -0,0 +1,186 @@
+"""
+Montos y pesos en punto fijo sobre enteros.
+
+    Dinero.de(venta.total)              # Decimal/str/int -> centavos
+    (Gramos.de('2.35') * 3) * Dinero.de(precio_por_gramo)  -> Dinero
+    (saldo - abono).decimal()           # de vuelta a Decimal para el modelo
+
+Dinero guarda centavos y Gramos centigramos en un int de Python: sumar,
+restar y comparar es aritmética entera exacta, sin contextos de Decimal ni
+conversiones Decimal(str(x)). Gramos * Dinero (precio por gramo) redondea una
+sola vez a centavos, mitad al par, igual que DecimalField al guardar.
+
+Las columnas siguen siendo numeric(…, 2) en la base (ya son punto fijo
+exacto); la conversión se hace en el borde:
+
+    en_unidades('monto')                 expresión BIGINT con la columna en centavos
+    sumar(queryset, 'monto')             SUM en la base -> Dinero
+    columna(queryset, 'gramos', Gramos)  arreglo int64 para NumPy
+    sumar_por(claves, unidades)          totales int64 exactos por clave
+
+Los cálculos masivos (valoración del inventario, proyección de flujo) corren
+sobre arreglos int64 en estas unidades.
+"""
+import functools
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+from django.db.models import BigIntegerField, F, Sum
+from django.db.models.functions import Cast, Round
+
+
+def dividir(numerador, divisor):
+    """numerador / divisor (divisor > 0) redondeado al entero, mitad al par."""
+    cociente, resto = divmod(numerador, divisor)
+    doble = 2 * resto
+    if doble > divisor or (doble == divisor and cociente % 2):
+        cociente += 1
+    return cociente
+
+
+@functools.total_ordering
+class _Fijo:
+    """Cantidad con ESCALA unidades por unidad entera. Inmutable."""
+    __slots__ = ('unidades',)
+    ESCALA = 100
+    DECIMALES = 2
+
+    def __init__(self, unidades=0):
+        object.__setattr__(self, 'unidades', int(unidades))
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError(f'{type(self).__name__} es inmutable')
+
+    @classmethod
+    def de(cls, valor):
+        """Desde Decimal, str, int o float, redondeando a la unidad mínima."""
+        if isinstance(valor, cls):
+            return valor
+        if isinstance(valor, _Fijo):
+            raise TypeError(f'No se puede convertir {type(valor).__name__} en {cls.__name__}')
+        if isinstance(valor, int):
+            return cls(valor * cls.ESCALA)
+        if not isinstance(valor, Decimal):
+            valor = Decimal(str(valor))
+        return cls(valor.scaleb(cls.DECIMALES).to_integral_value(ROUND_HALF_EVEN))
+
+    def decimal(self):
+        """Decimal con DECIMALES posiciones, listo para un DecimalField."""
+        return Decimal(self.unidades).scaleb(-self.DECIMALES)
+
+    def _misma(self, otro):
+        if type(otro) is not type(self):
+            if otro == 0 and isinstance(otro, int):
+                return type(self)()
+            return NotImplemented
+        return otro
+
+    def __add__(self, otro):
+        otro = self._misma(otro)
+        if otro is NotImplemented:
+            return otro
+        return type(self)(self.unidades + otro.unidades)
+
+    __radd__ = __add__  # sum() empieza en 0
+
+    def __sub__(self, otro):
+        otro = self._misma(otro)
+        if otro is NotImplemented:
+            return otro
+        return type(self)(self.unidades - otro.unidades)
+
+    def __mul__(self, otro):
+        if isinstance(otro, int) and not isinstance(otro, bool):
+            return type(self)(self.unidades * otro)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return type(self)(-self.unidades)
+
+    def __abs__(self):
+        return type(self)(abs(self.unidades))
+
+    def __bool__(self):
+        return self.unidades != 0
+
+    def __eq__(self, otro):
+        otro = self._misma(otro)
+        if otro is NotImplemented:
+            return otro
+        return self.unidades == otro.unidades
+
+    def __lt__(self, otro):
+        otro = self._misma(otro)
+        if otro is NotImplemented:
+            return otro
+        return self.unidades < otro.unidades
+
+    def __hash__(self):
+        return hash((type(self), self.unidades))
+
+    def __str__(self):
+        return str(self.decimal())
+
+    def __repr__(self):
+        return f"{type(self).__name__}('{self}')"
+
+
+class Dinero(_Fijo):
+    """Pesos en centavos."""
+    __slots__ = ()
+
+    def __mul__(self, otro):
+        if isinstance(otro, Gramos):
+            return otro * self
+        return super().__mul__(otro)
+
+    __rmul__ = __mul__
+
+
+class Gramos(_Fijo):
+    """Gramos en centigramos."""
+    __slots__ = ()
+
+    def __mul__(self, otro):
+        # Gramos * precio por gramo: centigramos * centavos / 100 -> centavos
+        if isinstance(otro, Dinero):
+            return Dinero(dividir(self.unidades * otro.unidades, self.ESCALA))
+        return super().__mul__(otro)
+
+    __rmul__ = __mul__
+
+
+# ============ BASE DE DATOS ============
+
+def en_unidades(campo, tipo=Dinero):
+    """Expresión BIGINT con la columna decimal (nombre o expresión) en unidades de `tipo`."""
+    expresion = campo if hasattr(campo, 'resolve_expression') else F(campo)
+    return Cast(Round(expresion * tipo.ESCALA), BigIntegerField())
+
+
+def sumar(queryset, campo, tipo=Dinero):
+    """SUM de la columna en la base como `tipo` (0 si no hay filas)."""
+    total = queryset.order_by().aggregate(suma=Sum(campo))['suma']
+    return tipo.de(total if total is not None else 0)
+
+
+def columna(queryset, campo, tipo=Dinero):
+    """Arreglo int64 con la columna en unidades de `tipo`, leído en bloques."""
+    valores = queryset.order_by().annotate(_unidades=en_unidades(campo, tipo)).values_list('_unidades', flat=True)
+    return np.fromiter(valores.iterator(chunk_size=5000), dtype=np.int64)
+
+
+def sumar_por(claves, unidades, minlength=0):
+    """
+    Totales int64 por clave (enteros pequeños no negativos). A diferencia de
+    np.bincount con weights, no pasa por float64: la suma es exacta.
+    """
+    largo = max(minlength, int(claves.max()) + 1 if len(claves) else 0)
+    if not len(unidades) or int(np.abs(unidades).max()) * len(unidades) < 2 ** 53:
+        # Ninguna suma parcial pasa de 2**53: float64 la representa exacta
+        return np.bincount(claves, weights=unidades, minlength=largo).astype(np.int64)
+    totales = np.zeros(largo, dtype=np.int64)
+    np.add.at(totales, claves, unidades)
+    return totales
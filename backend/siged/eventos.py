@@ -0,0 +1,298 @@
+"""
+Eventos en vivo (Server-Sent Events) para Caja e Inicio.
+
+    GET /api/eventos/?tipos=movimiento_caja,saldo_cuenta,dashboard
+
+Los receptores de señales llaman a publicar(tipo, datos). El evento sale al
+confirmar la transacción (si se revierte, no se publica). Dentro de una misma
+transacción, los eventos con la misma `clave` se fusionan y queda el último
+(p. ej. un solo `dashboard` por venta aunque se guarden varias prendas).
+
+Reparto:
+- Cada proceso guarda sus suscriptores (una cola por conexión abierta) y un
+  historial corto para reenviar lo perdido al reconectar (Last-Event-ID).
+- En PostgreSQL el evento se publica con NOTIFY y cada proceso lo recibe con
+  un hilo que hace LISTEN, así llega a los suscriptores de todos los workers.
+  Con otras bases se reparte solo dentro del proceso.
+
+Cada conexión dura a lo sumo EVENTOS_DURACION_MAXIMA segundos; EventSource
+reconecta solo y retoma desde el último id recibido. Si el id ya no está en el
+historial se envía `resincronizar` y el cliente debe recargar los datos.
+
+Con gunicorn gthread cada conexión abierta ocupa un hilo del worker. Por eso
+cada proceso acepta a lo sumo EVENTOS_MAXIMO_CONEXIONES a la vez; las que
+sobran reciben solo `retry: EVENTOS_REINTENTO_OCUPADO_MS` y el navegador
+vuelve a intentar más tarde (conexiones rechazadas en
+siged_eventos_conexiones_rechazadas_total).
+
+Un error al armar o enviar un evento ya confirmado se registra en el log; la
+escritura que lo originó no falla por eso.
+"""
+import itertools
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from siged.metricas import Contador
+
+logger = logging.getLogger(__name__)
+
+CANAL_POSTGRES = 'siged_eventos'
+RESINCRONIZAR = 'resincronizar'
+
+eventos_publicados = Contador('siged_eventos_publicados_total', 'Eventos en vivo publicados', ('tipo',))
+conexiones_rechazadas = Contador(
+    'siged_eventos_conexiones_rechazadas_total', 'Conexiones SSE rechazadas por EVENTOS_MAXIMO_CONEXIONES'
+)
+
+_lock = threading.Lock()
+_suscriptores = set()
+_historial = deque(maxlen=200)
+_secuencia = itertools.count()
+_escucha_iniciada = False
+_conexiones_abiertas = 0
+
+
+def _usa_notify():
+    return connections[DEFAULT_DB_ALIAS].vendor == 'postgresql'
+
+
+# ============ PUBLICACIÓN ============
+
+class _EnvioPendiente:
+    """Callback on_commit de un evento; guarda los datos para poder fusionarlos."""
+
+    def __init__(self, tipo, clave, datos):
+        self.tipo = tipo
+        self.clave = clave
+        self.datos = datos
+
+    def __call__(self):
+        # Corre después del COMMIT: un fallo aquí no debe volver un 500 una escritura ya guardada
+        try:
+            self.enviar()
+        except Exception:
+            logger.exception('No se pudo publicar el evento %s (clave %s)', self.tipo, self.clave)
+
+    def enviar(self):
+        datos = self.datos() if callable(self.datos) else self.datos
+        evento = {
+            # time_ns + secuencia: ids crecientes y únicos entre procesos
+            'id': f'{time.time_ns()}-{next(_secuencia)}',
+            'tipo': self.tipo,
+            'datos': datos,
+        }
+        eventos_publicados.inc(tipo=self.tipo)
+        mensaje = json.dumps(evento, cls=JSONEncoder)
+        if _usa_notify():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [CANAL_POSTGRES, mensaje])
+        else:
+            _entregar(evento)
+
+
+def publicar(tipo, datos=None, clave=None):
+    """
+    Publica un evento al confirmar la transacción actual. `datos` puede ser un
+    dict o una función sin argumentos que se evalúa al confirmar. Con `clave`,
+    un evento pendiente del mismo tipo y clave se reemplaza en vez de duplicarse.
+    """
+    if clave is not None and connection.in_atomic_block:
+        for _, pendiente, _ in connection.run_on_commit:
+            if isinstance(pendiente, _EnvioPendiente) and (pendiente.tipo, pendiente.clave) == (tipo, clave):
+                pendiente.datos = datos
+                return
+    transaction.on_commit(_EnvioPendiente(tipo, clave, datos))
+
+
+# ============ REPARTO EN EL PROCESO ============
+
+class Suscripcion:
+    def __init__(self, tipos=None):
+        self.tipos = set(tipos) if tipos else None
+        self.cola = queue.Queue(maxsize=settings.EVENTOS_COLA_MAXIMA)
+
+    def quiere(self, evento):
+        return self.tipos is None or evento['tipo'] in self.tipos or evento['tipo'] == RESINCRONIZAR
+
+
+def _entregar(evento):
+    with _lock:
+        _historial.append(evento)
+        suscriptores = list(_suscriptores)
+    for suscripcion in suscriptores:
+        if not suscripcion.quiere(evento):
+            continue
+        try:
+            suscripcion.cola.put_nowait(evento)
+        except queue.Full:
+            # Cliente lento: se le pide recargar en vez de acumular memoria
+            with suscripcion.cola.mutex:
+                suscripcion.cola.queue.clear()
+            suscripcion.cola.put_nowait({'id': evento['id'], 'tipo': RESINCRONIZAR, 'datos': None})
+
+
+def suscribir(tipos=None, ultimo_id=None):
+    """
+    Registra una suscripción. Si viene `ultimo_id` (reconexión), encola los
+    eventos posteriores del historial o `resincronizar` si ya no están.
+    """
+    if _usa_notify():
+        _iniciar_escucha()
+    suscripcion = Suscripcion(tipos)
+    with _lock:
+        if ultimo_id:
+            ids = [e['id'] for e in _historial]
+            if ultimo_id in ids:
+                for evento in list(_historial)[ids.index(ultimo_id) + 1:]:
+                    if suscripcion.quiere(evento):
+                        suscripcion.cola.put_nowait(evento)
+            else:
+                suscripcion.cola.put_nowait({'id': ultimo_id, 'tipo': RESINCRONIZAR, 'datos': None})
+        _suscriptores.add(suscripcion)
+    return suscripcion
+
+
+def desuscribir(suscripcion):
+    with _lock:
+        _suscriptores.discard(suscripcion)
+
+
+# ============ LISTEN / NOTIFY (POSTGRESQL) ============
+
+def _iniciar_escucha():
+    global _escucha_iniciada
+    with _lock:
+        if _escucha_iniciada:
+            return
+        _escucha_iniciada = True
+    threading.Thread(target=_escuchar, name='siged-eventos-listen', daemon=True).start()
+
+
+def _escuchar():
+    """Hilo por proceso: recibe los NOTIFY de todos los workers y los reparte."""
+    while True:
+        conexion = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            conexion.connect()
+            conexion.set_autocommit(True)
+            with conexion.cursor() as cursor:
+                cursor.execute(f'LISTEN {CANAL_POSTGRES}')
+            crudo = conexion.connection
+            while True:
+                if select.select([crudo], [], [], 60) == ([], [], []):
+                    continue
+                crudo.poll()
+                while crudo.notifies:
+                    _entregar(json.loads(crudo.notifies.pop(0).payload))
+        except Exception:
+            logger.exception('Escucha de eventos interrumpida; reintentando')
+            time.sleep(5)
+        finally:
+            conexion.close()
+
+
+# ============ VISTA SSE ============
+
+def _reservar_conexion():
+    global _conexiones_abiertas
+    with _lock:
+        if _conexiones_abiertas >= settings.EVENTOS_MAXIMO_CONEXIONES:
+            return False
+        _conexiones_abiertas += 1
+        return True
+
+
+def _liberar_conexion():
+    global _conexiones_abiertas
+    with _lock:
+        _conexiones_abiertas -= 1
+
+
+def conexiones_abiertas():
+    return _conexiones_abiertas
+
+
+class _Conexion:
+    """
+    Contenido de la respuesta SSE. Django llama close() al terminar la
+    respuesta, haya empezado o no el flujo: ahí se libera el cupo.
+    """
+
+    def __init__(self, suscripcion):
+        self.suscripcion = suscripcion
+        self.flujo = _flujo(suscripcion)
+        self.cerrada = False
+
+    def __iter__(self):
+        return self.flujo
+
+    def close(self):
+        if self.cerrada:
+            return
+        self.cerrada = True
+        self.flujo.close()
+        desuscribir(self.suscripcion)
+        _liberar_conexion()
+
+
+def _formatear(evento):
+    datos = json.dumps(evento['datos'], cls=JSONEncoder)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {datos}\n\n"
+
+
+def _flujo(suscripcion):
+    try:
+        yield 'retry: 3000\n\n'
+        limite = time.monotonic() + settings.EVENTOS_DURACION_MAXIMA
+        while True:
+            espera = min(settings.EVENTOS_LATIDO_SEGUNDOS, limite - time.monotonic())
+            try:
+                evento = suscripcion.cola.get(timeout=max(espera, 0))
+            except queue.Empty:
+                if time.monotonic() >= limite:
+                    break
+                yield ': latido\n\n'
+                continue
+            yield _formatear(evento)
+    finally:
+        desuscribir(suscripcion)
+
+
+@require_GET
+def vista_eventos(request):
+    if not _reservar_conexion():
+        # 200 con solo `retry`: EventSource no reintenta tras un 503, pero sí al cerrarse el flujo
+        conexiones_rechazadas.inc()
+        respuesta = StreamingHttpResponse(
+            iter([f'retry: {settings.EVENTOS_REINTENTO_OCUPADO_MS}\n\n']), content_type='text/event-stream'
+        )
+        respuesta['Cache-Control'] = 'no-cache'
+        return respuesta
+
+    tipos = [t for t in request.GET.get('tipos', '').split(',') if t]
+    ultimo_id = request.headers.get('Last-Event-ID') or request.GET.get('ultimo_id')
+    try:
+        suscripcion = suscribir(tipos, ultimo_id)
+    except Exception:
+        _liberar_conexion()
+        raise
+
+    # El flujo no usa la base de datos: no retener la conexión mientras dura
+    if not connection.in_atomic_block:
+        connection.close()
+
+    respuesta = StreamingHttpResponse(_Conexion(suscripcion), content_type='text/event-stream')
+    respuesta['Cache-Control'] = 'no-cache'
+    respuesta['X-Accel-Buffering'] = 'no'
+    return respuesta
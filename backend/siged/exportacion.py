@@ -0,0 +1,163 @@
+"""
+Exportación de listados grandes a CSV / XLSX con memoria constante.
+
+Cada app define una función que recibe un queryset ya filtrado y retorna
+(encabezados, filas), donde `filas` es un iterador de tuplas leído con
+values_list().iterator(): en PostgreSQL usa un cursor del lado del servidor y
+trae las filas por bloques, sin cargar el año completo en memoria.
+
+- CSV: se genera mientras se envía (StreamingHttpResponse).
+- XLSX: openpyxl en modo write_only escribe a un archivo temporal que luego se
+  envía por bloques (un .xlsx es un zip y no se puede emitir a medias).
+
+El rendimiento (filas por segundo) se registra en el log y en la métrica
+siged_exportacion_filas_total.
+"""
+import csv
+import logging
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from siged.metricas import Contador
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE = 2000
+FORMATOS = ('csv', 'xlsx')
+PARAMETRO_FORMATO = 'archivo'
+
+filas_exportadas = Contador('siged_exportacion_filas_total', 'Filas exportadas a CSV/XLSX', ('exportacion', 'formato'))
+
+
+def leer_filas(queryset, *campos):
+    """values_list() por bloques con cursor del servidor (PostgreSQL)."""
+    return queryset.values_list(*campos).iterator(chunk_size=TAMANO_BLOQUE)
+
+
+def rango_fechas(parametros):
+    """(desde, hasta) de ?fecha_desde= / ?fecha_hasta= (AAAA-MM-DD, opcionales)."""
+    rango = []
+    for nombre in ('fecha_desde', 'fecha_hasta'):
+        valor = parametros.get(nombre)
+        try:
+            fecha = parse_date(valor) if valor else None
+        except ValueError:
+            # Bien formada pero imposible (2024-02-30)
+            fecha = None
+        if valor and fecha is None:
+            raise ValidationError({nombre: 'Use el formato AAAA-MM-DD.'})
+        rango.append(fecha)
+    return tuple(rango)
+
+
+def _celda(valor):
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).replace(tzinfo=None) if timezone.is_aware(valor) else valor
+    return valor
+
+
+class Medidor:
+    """Cuenta las filas que pasan por el iterador y reporta filas/segundo al terminar."""
+
+    def __init__(self, filas, exportacion, formato):
+        self.filas = filas
+        self.exportacion = exportacion
+        self.formato = formato
+        self.cantidad = 0
+        self.segundos = 0.0
+
+    def __iter__(self):
+        inicio = time.perf_counter()
+        for fila in self.filas:
+            self.cantidad += 1
+            yield fila
+        self.segundos = time.perf_counter() - inicio
+        filas_exportadas.inc(self.cantidad, exportacion=self.exportacion, formato=self.formato)
+        logger.info('Exportación %s (%s): %d filas en %.2f s (%.0f filas/s)',
+                    self.exportacion, self.formato, self.cantidad, self.segundos, self.filas_por_segundo)
+
+    @property
+    def filas_por_segundo(self):
+        return self.cantidad / self.segundos if self.segundos else 0.0
+
+
+# ============ ESCRITORES ============
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve lo escrito en vez de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def _texto_csv(valor):
+    valor = _celda(valor)
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, (date, Decimal)):
+        return str(valor)
+    return valor
+
+
+def generar_csv(encabezados, filas):
+    """Genera el CSV por bloques de texto (con BOM para que Excel detecte UTF-8)."""
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(encabezados)
+    bloque = []
+    for fila in filas:
+        bloque.append(escritor.writerow([_texto_csv(v) for v in fila]))
+        if len(bloque) >= TAMANO_BLOQUE:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def escribir_xlsx(encabezados, filas, destino, titulo='Datos'):
+    """Escribe un .xlsx en `destino` (ruta o archivo) con openpyxl en modo write_only."""
+    try:
+        from openpyxl import Workbook
+    except ImportError:  # pragma: no cover - openpyxl es opcional
+        raise ValidationError({PARAMETRO_FORMATO: 'La exportación a XLSX requiere openpyxl instalado.'})
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(titulo[:31])
+    hoja.append(list(encabezados))
+    for fila in filas:
+        hoja.append([_celda(v) for v in fila])
+    libro.save(destino)
+
+
+# ============ RESPUESTA HTTP ============
+
+def formato_solicitado(request):
+    formato = request.query_params.get(PARAMETRO_FORMATO, 'csv')
+    if formato not in FORMATOS:
+        raise ValidationError({PARAMETRO_FORMATO: f"Formatos disponibles: {', '.join(FORMATOS)}"})
+    return formato
+
+
+def respuesta_exportacion(request, nombre, encabezados, filas):
+    """CSV en streaming o XLSX desde archivo temporal según ?archivo=csv|xlsx."""
+    formato = formato_solicitado(request)
+    filas = Medidor(filas, nombre, formato)
+    nombre_archivo = f'{nombre}_{timezone.localdate():%Y%m%d}.{formato}'
+
+    if formato == 'csv':
+        respuesta = StreamingHttpResponse(generar_csv(encabezados, filas), content_type='text/csv; charset=utf-8')
+        respuesta['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+        return respuesta
+
+    temporal = tempfile.TemporaryFile()
+    escribir_xlsx(encabezados, filas, temporal, titulo=nombre)
+    temporal.seek(0)
+    return FileResponse(
+        temporal, as_attachment=True, filename=nombre_archivo,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -0,0 +1,223 @@
+"""
+Métricas de rendimiento de la API expuestas en formato de texto de Prometheus.
+
+- MetricasMiddleware registra por ruta resuelta (view_name): cantidad de
+  peticiones, histograma de latencia, consultas SQL, tiempo SQL y bytes de
+  respuesta.
+- medir_receptor() mide la duración de los receptores de señales.
+- vista_metricas expone todo en GET /api/metrics.
+
+Los valores viven en memoria del proceso: con varios workers de gunicorn cada
+uno expone sus propios contadores (Prometheus los suma por instancia).
+Si METRICAS_TOKEN está definido, el endpoint exige `Authorization: Bearer <token>`;
+si no, solo usuarios staff pueden consultarlo.
+"""
+import functools
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+_registro = []
+_lock = threading.Lock()
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_etiquetas(nombres, valores, extra=None):
+    pares = list(zip(nombres, valores))
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def _formatear_numero(valor):
+    if isinstance(valor, float):
+        return repr(valor) if valor != int(valor) else str(int(valor))
+    return str(valor)
+
+
+class Contador:
+    """Contador monótono con etiquetas."""
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        _registro.append(self)
+
+    def inc(self, valor=1, **etiquetas):
+        clave = tuple(etiquetas.get(e, '') for e in self.etiquetas)
+        with _lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def valor(self, **etiquetas):
+        return self._valores.get(tuple(etiquetas.get(e, '') for e in self.etiquetas), 0)
+
+    def lineas(self):
+        for clave, valor in sorted(self._valores.items()):
+            yield f'{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}'
+
+
+class Histograma:
+    """Histograma acumulativo con buckets fijos."""
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        _registro.append(self)
+
+    def observar(self, valor, **etiquetas):
+        clave = tuple(etiquetas.get(e, '') for e in self.etiquetas)
+        with _lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                # [conteos por bucket..., suma, cantidad]
+                serie = self._series[clave] = [0] * len(self.buckets) + [0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+                    break
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def lineas(self):
+        for clave, serie in sorted(self._series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, serie):
+                acumulado += conteo
+                etiquetas = _formatear_etiquetas(self.etiquetas, clave, ('le', _formatear_numero(float(limite))))
+                yield f'{self.nombre}_bucket{etiquetas} {acumulado}'
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave, ('le', '+Inf'))
+            yield f'{self.nombre}_bucket{etiquetas} {serie[-1]}'
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+            yield f'{self.nombre}_sum{etiquetas} {_formatear_numero(serie[-2])}'
+            yield f'{self.nombre}_count{etiquetas} {serie[-1]}'
+
+
+def exponer():
+    """Texto de exposición de Prometheus con todas las métricas registradas."""
+    lineas = []
+    with _lock:
+        for metrica in _registro:
+            lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+            lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+            lineas.extend(metrica.lineas())
+    return '\n'.join(lineas) + '\n'
+
+
+# ============ MÉTRICAS HTTP / SQL ============
+
+peticiones = Contador(
+    'siged_http_peticiones_total', 'Peticiones atendidas por ruta', ('ruta', 'metodo', 'estado')
+)
+latencia = Histograma(
+    'siged_http_duracion_segundos', 'Latencia de las peticiones por ruta', ('ruta', 'metodo')
+)
+consultas_por_peticion = Histograma(
+    'siged_http_consultas_sql', 'Consultas SQL ejecutadas por petición', ('ruta',), BUCKETS_CONSULTAS
+)
+consultas_sql = Contador('siged_sql_consultas_total', 'Consultas SQL ejecutadas por ruta', ('ruta',))
+tiempo_sql = Contador('siged_sql_segundos_total', 'Tiempo acumulado en SQL por ruta', ('ruta',))
+bytes_respuesta = Contador('siged_http_respuesta_bytes_total', 'Bytes de respuesta por ruta', ('ruta',))
+duracion_receptores = Histograma(
+    'siged_receptor_duracion_segundos', 'Duración de los receptores de señales', ('receptor',)
+)
+
+
+class ContadorSQL:
+    """execute_wrapper que cuenta consultas y tiempo SQL de la petición actual."""
+    __slots__ = ('consultas', 'segundos')
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas += 1
+            self.segundos += time.perf_counter() - inicio
+
+
+def envolver_conexiones(pila, envoltorio):
+    """Instala `envoltorio` como execute_wrapper en todas las bases configuradas."""
+    for alias in settings.DATABASES:
+        pila.enter_context(connections[alias].execute_wrapper(envoltorio))
+
+
+def nombre_ruta(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_ruta'
+    return match.view_name
+
+
+class MetricasMiddleware:
+    """Registra latencia, consultas SQL y tamaño de respuesta de cada petición."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        contador = ContadorSQL()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            envolver_conexiones(pila, contador)
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        ruta = nombre_ruta(request)
+        peticiones.inc(ruta=ruta, metodo=request.method, estado=response.status_code)
+        latencia.observar(duracion, ruta=ruta, metodo=request.method)
+        consultas_por_peticion.observar(contador.consultas, ruta=ruta)
+        consultas_sql.inc(contador.consultas, ruta=ruta)
+        tiempo_sql.inc(contador.segundos, ruta=ruta)
+        if not response.streaming:
+            bytes_respuesta.inc(len(response.content), ruta=ruta)
+        return response
+
+
+def medir_receptor(funcion):
+    """Decorador que registra la duración de un receptor de señal."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            duracion_receptores.observar(time.perf_counter() - inicio, receptor=funcion.__name__)
+    return envoltura
+
+
+def vista_metricas(request):
+    """
+    Endpoint: GET /api/metrics
+    Exposición en formato de texto de Prometheus.
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponseForbidden('Token de métricas inválido')
+    elif not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden('Solo personal autorizado')
+
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
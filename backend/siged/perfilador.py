@@ -0,0 +1,207 @@
+"""
+Perfilador bajo demanda para peticiones de la API.
+
+Una petición se perfila cuando:
+- un usuario staff envía la cabecera `X-Perfilar: 1` (o `true`), o
+- cae dentro de la tasa de muestreo PERFILADOR_MUESTREO (0.0 = desactivado).
+
+Por cada petición perfilada se guardan en PERFILADOR_DIR dos archivos:
+- <id>.prof: volcado de cProfile (abrir con pstats, snakeviz, etc.)
+- <id>.json: ruta, duración, resumen de funciones más costosas y la línea de
+  tiempo de las consultas SQL.
+El directorio funciona como buffer circular: solo se conservan los últimos
+PERFILADOR_MAX perfiles. La respuesta incluye la cabecera `X-Perfil-Id`.
+
+Endpoints (solo staff):
+- GET /api/perfiles/                      listado
+- GET /api/perfiles/<id>/?formato=json    detalle (por defecto)
+- GET /api/perfiles/<id>/?formato=prof    descarga del volcado de cProfile
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseForbidden, JsonResponse
+
+from siged.metricas import envolver_conexiones, nombre_ruta
+
+MAX_CONSULTAS_REGISTRADAS = 5000
+MAX_LARGO_SQL = 2000
+FUNCIONES_RESUMEN = 40
+
+# cProfile no admite dos perfiladores activos a la vez en el mismo proceso
+_perfilando = threading.Lock()
+_escribiendo = threading.Lock()
+_ID_VALIDO = re.compile(r'^[\w-]+$')
+_ID_INVALIDO = re.compile(r'[^\w-]')
+
+
+def _directorio():
+    return getattr(settings, 'PERFILADOR_DIR', os.path.join(settings.BASE_DIR, 'perfiles'))
+
+
+def _maximo():
+    return getattr(settings, 'PERFILADOR_MAX', 50)
+
+
+class LineaTiempoSQL:
+    """execute_wrapper que registra inicio, duración y texto de cada consulta."""
+
+    def __init__(self, origen):
+        self.origen = origen
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.consultas) < MAX_CONSULTAS_REGISTRADAS:
+                self.consultas.append({
+                    'inicio_ms': round((inicio - self.origen) * 1000, 3),
+                    'duracion_ms': round((time.perf_counter() - inicio) * 1000, 3),
+                    'alias': context['connection'].alias,
+                    'many': many,
+                    'sql': sql[:MAX_LARGO_SQL],
+                })
+
+
+def debe_perfilar(request):
+    marcada = request.headers.get('X-Perfilar', '').strip().lower() in ('1', 'true')
+    if marcada and getattr(request, 'user', None) is not None:
+        if request.user.is_authenticated and request.user.is_staff:
+            return True
+    muestreo = getattr(settings, 'PERFILADOR_MUESTREO', 0.0)
+    return muestreo > 0 and random.random() < muestreo
+
+
+def _resumen(perfil):
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(FUNCIONES_RESUMEN)
+    return salida.getvalue()
+
+
+def _guardar(perfil_id, perfil, datos):
+    directorio = _directorio()
+    os.makedirs(directorio, exist_ok=True)
+    perfil.dump_stats(os.path.join(directorio, f'{perfil_id}.prof'))
+    with open(os.path.join(directorio, f'{perfil_id}.json'), 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=1)
+
+    # Buffer circular: los ids empiezan por la fecha, así que el orden es cronológico
+    with _escribiendo:
+        ids = sorted(n[:-5] for n in os.listdir(directorio) if n.endswith('.json'))
+        for viejo in ids[:-_maximo()]:
+            for extension in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(directorio, viejo + extension))
+                except FileNotFoundError:
+                    pass
+
+
+class PerfiladorMiddleware:
+    """Perfila con cProfile las peticiones marcadas y guarda el resultado."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not debe_perfilar(request) or not _perfilando.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            origen = time.perf_counter()
+            linea_tiempo = LineaTiempoSQL(origen)
+            perfil = cProfile.Profile()
+            with ExitStack() as pila:
+                envolver_conexiones(pila, linea_tiempo)
+                perfil.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    perfil.disable()
+            duracion = time.perf_counter() - origen
+        finally:
+            _perfilando.release()
+
+        ruta = nombre_ruta(request)
+        fecha = datetime.now(timezone.utc)
+        perfil_id = f"{fecha:%Y%m%dT%H%M%S%f}-{_ID_INVALIDO.sub('_', ruta)[:60]}"
+        _guardar(perfil_id, perfil, {
+            'id': perfil_id,
+            'fecha': fecha.isoformat(),
+            'ruta': ruta,
+            'metodo': request.method,
+            'path': request.get_full_path(),
+            'estado': response.status_code,
+            'duracion_ms': round(duracion * 1000, 3),
+            'consultas_sql': len(linea_tiempo.consultas),
+            'tiempo_sql_ms': round(sum(c['duracion_ms'] for c in linea_tiempo.consultas), 3),
+            'resumen': _resumen(perfil),
+            'linea_tiempo_sql': linea_tiempo.consultas,
+        })
+        response['X-Perfil-Id'] = perfil_id
+        return response
+
+
+# ============ ENDPOINTS (SOLO STAFF) ============
+
+def _es_staff(request):
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def vista_perfiles(request):
+    """
+    Endpoint: GET /api/perfiles/
+    Lista los perfiles guardados, del más reciente al más antiguo.
+    """
+    if not _es_staff(request):
+        return HttpResponseForbidden('Solo personal autorizado')
+
+    directorio = _directorio()
+    perfiles = []
+    if os.path.isdir(directorio):
+        for nombre in sorted(os.listdir(directorio), reverse=True):
+            if not nombre.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(directorio, nombre), encoding='utf-8') as archivo:
+                    datos = json.load(archivo)
+            except (OSError, ValueError):
+                continue
+            perfiles.append({
+                clave: datos.get(clave)
+                for clave in ('id', 'fecha', 'ruta', 'metodo', 'path', 'estado',
+                              'duracion_ms', 'consultas_sql', 'tiempo_sql_ms')
+            })
+    return JsonResponse({'perfiles': perfiles, 'maximo': _maximo()})
+
+
+def vista_perfil(request, perfil_id):
+    """
+    Endpoint: GET /api/perfiles/<id>/?formato=json|prof
+    Devuelve el detalle en JSON o descarga el volcado de cProfile.
+    """
+    if not _es_staff(request):
+        return HttpResponseForbidden('Solo personal autorizado')
+    if not _ID_VALIDO.match(perfil_id):
+        raise Http404
+
+    formato = request.GET.get('formato', 'json')
+    if formato not in ('json', 'prof'):
+        return JsonResponse({'error': "formato debe ser 'json' o 'prof'"}, status=400)
+
+    ruta = os.path.join(_directorio(), f'{perfil_id}.{formato}')
+    if not os.path.isfile(ruta):
+        raise Http404
+    return FileResponse(open(ruta, 'rb'), as_attachment=(formato == 'prof'),
+                        filename=os.path.basename(ruta))
@@ -0,0 +1,328 @@
+"""
+Presupuesto de consultas SQL por endpoint.
+
+Cada ViewSet / APIView declara, junto a su definición, un atributo
+``presupuesto_consultas`` con el número máximo de consultas que puede ejecutar
+cada acción GET. Ejemplo:
+
+    class PrendaViewSet(SafeModelViewSet):
+        presupuesto_consultas = {
+            'list': 1,
+            'retrieve': 1,
+        }
+
+Para acciones que necesitan parámetros se usa un diccionario:
+
+    'buscar_por_id': {'consultas': 2, 'params': {'q': '{pk}'}}
+
+La respuesta debe ser 200; si la acción responde otro estado a propósito
+(p. ej. 404 sin datos), se declara con 'estado': {'consultas': 1, 'estado': 404}.
+
+Las vistas basadas en función (``@api_view``) usan el decorador
+``presupuesto(...)`` con la clave ``'get'``.
+
+Las pruebas (ver ``PresupuestoConsultasMixin``) siembran N y 10N filas de cada
+tabla y verifican que la cantidad de consultas sea la misma (sin N+1) y que no
+supere el presupuesto declarado.
+"""
+import difflib
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.routers import APIRootView
+from rest_framework.views import APIView
+
+
+def presupuesto(**acciones):
+    """
+    Decorador para declarar el presupuesto de una vista creada con @api_view.
+    Uso: @presupuesto(get=3) encima de @api_view(['GET']).
+    """
+    def decorador(vista):
+        vista.cls.presupuesto_consultas = acciones
+        return vista
+    return decorador
+
+
+# ============ DESCUBRIMIENTO DE ENDPOINTS ============
+
+_GRUPO_REGEX = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+_GRUPO_RUTA = re.compile(r'<(?:\w+:)?(\w+)>')
+
+
+def _a_plantilla(patron):
+    """Convierte un patrón de URL (regex o path) en una plantilla con {kwargs}."""
+    texto = str(patron)
+    texto = texto.lstrip('^').rstrip('$')
+    texto = _GRUPO_REGEX.sub(r'{\1}', texto)
+    texto = _GRUPO_RUTA.sub(r'{\1}', texto)
+    return texto
+
+
+def _recorrer(patrones, prefijo=''):
+    for patron in patrones:
+        plantilla = prefijo + _a_plantilla(patron.pattern)
+        if isinstance(patron, URLResolver):
+            yield from _recorrer(patron.url_patterns, plantilla)
+        elif isinstance(patron, URLPattern):
+            yield plantilla, patron.callback
+
+
+def endpoints_get():
+    """
+    Retorna todos los endpoints GET de la API como tuplas
+    (ruta_plantilla, clase_vista, accion).
+    """
+    encontrados = []
+    for plantilla, vista in _recorrer(get_resolver().url_patterns):
+        if not plantilla.startswith('api/') or '{format}' in plantilla:
+            continue
+
+        cls = getattr(vista, 'cls', None)
+        if cls is None or not issubclass(cls, APIView) or issubclass(cls, APIRootView):
+            continue
+
+        acciones = getattr(vista, 'actions', None)
+        if acciones is not None:
+            accion = acciones.get('get')
+        elif 'GET' in [m.upper() for m in cls().allowed_methods]:
+            accion = 'get'
+        else:
+            accion = None
+
+        if accion:
+            encontrados.append(('/' + plantilla, cls, accion))
+    return encontrados
+
+
+def endpoints_de_app(app_label):
+    return [e for e in endpoints_get() if e[1].__module__.split('.')[0] == app_label]
+
+
+# ============ DATOS DE PRUEBA ============
+
+def sembrar(n, desde=0):
+    """
+    Crea n filas de cada entidad del negocio (clientes, proveedores, prendas,
+    ventas de contado / crédito / apartado, compras, cuotas, egresos, ingresos,
+    cuentas, tipos de movimiento) y un cierre con su trabajo y una tarea por
+    llamada. Las filas se numeran a partir de `desde` para poder sembrar varias
+    veces sin chocar con los campos únicos.
+    """
+    from apartado_credito.models import Apartado, Credito, Cuota, ESTADO_EN_PROCESO
+    from caja.models import (
+        CierreCaja, CuentaBancaria, MovimientoCaja, SaldoCuentaPorCierre, TipoMovimiento, TrabajoCierre,
+    )
+    from caja.signals import registrar_compra_en_caja, registrar_venta_en_caja
+    from compra_venta.models import Compra, CompraPrenda, Venta, VentaPrenda
+    from dominios_comunes.models import Estado, MetodoPago
+    from egreso_ingreso.models import Egreso, Ingreso
+    from prendas.models import Prenda, TipoOro, TipoPrenda
+    from tareas.models import Tarea
+    from terceros.models import Cliente, Proveedor
+
+    for estado_id, nombre in [(1, 'Finalizado'), (2, 'Pendiente'), (3, 'Cancelado'),
+                              (4, 'En Proceso'), (5, 'Caducado')]:
+        Estado.objects.get_or_create(id=estado_id, defaults={'nombre': nombre})
+    nacional, _ = TipoOro.objects.get_or_create(nombre='NACIONAL')
+    TipoOro.objects.get_or_create(nombre='ITALIANO')
+
+    CuentaBancaria.objects.get_or_create(nombre='Efectivo')
+    fecha_limite = timezone.now().date() + timedelta(days=60)
+
+    for i in range(desde, desde + n):
+        metodo = MetodoPago.objects.create(nombre=f'Metodo {i}')
+        tipo_prenda = TipoPrenda.objects.create(nombre=f'Tipo {i}')
+        CuentaBancaria.objects.create(nombre=f'Cuenta {i}', saldo_actual=Decimal('1000000.00'))
+        TipoMovimiento.objects.create(nombre=f'Movimiento {i}', tipo=TipoMovimiento.ENTRADA)
+
+        cliente = Cliente.objects.create(nombre=f'Cliente {i}', cedula=f'C{i}', telefono='300')
+        proveedor = Proveedor.objects.create(nombre=f'Proveedor {i}', telefono='300')
+        prendas = [
+            Prenda.objects.create(
+                nombre=f'Prenda {i}-{j}', tipo_prenda=tipo_prenda, tipo_oro=nacional,
+                gramos=Decimal('2.50'), existencia=100
+            )
+            for j in range(2)
+        ]
+
+        credito_venta = Credito.objects.create(
+            cantidad_cuotas=3, cuotas_pendientes=3, interes=Decimal('0'),
+            estado_id=ESTADO_EN_PROCESO, fecha_limite=fecha_limite
+        )
+        apartado = Apartado.objects.create(
+            cantidad_cuotas=2, cuotas_pendientes=2,
+            estado_id=ESTADO_EN_PROCESO, fecha_limite=fecha_limite
+        )
+        credito_compra = Credito.objects.create(
+            cantidad_cuotas=3, cuotas_pendientes=3, interes=Decimal('0'),
+            estado_id=ESTADO_EN_PROCESO, fecha_limite=fecha_limite
+        )
+
+        for extra in [{}, {'credito': credito_venta}, {'apartado': apartado}]:
+            venta = Venta.objects.create(cliente=cliente, metodo_pago=metodo, **extra)
+            for prenda in prendas:
+                VentaPrenda.objects.create(
+                    venta=venta, prenda=prenda, cantidad=1, precio_por_gramo=Decimal('200000')
+                )
+            venta.total = venta.calcular_total()
+            venta.save(update_fields=['total'])
+            venta.save()  # inicializa crédito / apartado
+            registrar_venta_en_caja(Venta, venta, created=True)
+
+        for extra in [{}, {'credito': credito_compra}]:
+            compra = Compra.objects.create(proveedor=proveedor, metodo_pago=metodo, **extra)
+            for prenda in prendas:
+                CompraPrenda.objects.create(
+                    compra=compra, prenda=prenda, cantidad=1, precio_por_gramo=Decimal('150000')
+                )
+            compra.total = compra.calcular_total()
+            compra.save(update_fields=['total'])
+            if compra.credito:
+                compra.credito.monto_total = compra.total
+                compra.credito.monto_pendiente = compra.total
+                compra.credito.save()
+            registrar_compra_en_caja(Compra, compra, created=True)
+
+        for deuda in [{'credito': credito_venta}, {'apartado': apartado}, {'credito': credito_compra}]:
+            Cuota.objects.create(
+                fecha=timezone.now().date(), monto=Decimal('1000.00'), metodo_pago=metodo, **deuda
+            )
+
+        Egreso.objects.create(descripcion=f'Egreso {i}', monto=Decimal('500.00'), metodo_pago=metodo)
+        Ingreso.objects.create(descripcion=f'Ingreso {i}', monto=Decimal('700.00'), metodo_pago=metodo)
+
+    # Un cierre por llamada que cubre todos los movimientos sembrados
+    ahora = timezone.now()
+    cierre = CierreCaja.objects.create(
+        tipo_cierre=CierreCaja.DIARIO, fecha_inicio=ahora - timedelta(days=1), fecha_fin=ahora
+    )
+    MovimientoCaja.objects.filter(cierre_caja__isnull=True).update(cierre_caja=cierre)
+    for cuenta in CuentaBancaria.objects.all():
+        SaldoCuentaPorCierre.objects.create(cierre_caja=cierre, cuenta=cuenta, saldo=cuenta.saldo_actual)
+    TrabajoCierre.objects.create(
+        tipo_cierre=cierre.tipo_cierre, fecha_inicio=cierre.fecha_inicio, fecha_fin=cierre.fecha_fin,
+        estado=TrabajoCierre.COMPLETADO, cierre=cierre,
+    )
+    Tarea.objects.create(nombre='sembrada', estado=Tarea.COMPLETADA, fecha_inicio=ahora, fecha_fin=ahora)
+
+
+# ============ MEDICIÓN ============
+
+_LITERALES = re.compile(r"'[^']*'|\b\d+(\.\d+)?\b")
+
+
+def _normalizar(sql):
+    return _LITERALES.sub('?', sql)
+
+
+def _resolver_valor(valor):
+    """
+    Resuelve los marcadores de posición de params/kwargs:
+    - '{pk}' se reemplaza por el pk del primer objeto del modelo de la vista.
+    - 'app.Modelo' se reemplaza por el pk del primer objeto de ese modelo.
+    """
+    if isinstance(valor, str) and re.fullmatch(r'\w+\.\w+', valor):
+        modelo = apps.get_model(valor)
+        return modelo.objects.order_by('pk').values_list('pk', flat=True).first()
+    return valor
+
+
+def _especificacion(cls, accion):
+    spec = getattr(cls, 'presupuesto_consultas', {}).get(accion)
+    if spec is None:
+        return None
+    if isinstance(spec, int):
+        spec = {'consultas': spec}
+    return spec
+
+
+def _construir_url(plantilla, cls, spec):
+    kwargs = {k: _resolver_valor(v) for k, v in spec.get('kwargs', {}).items()}
+    if '{pk}' in plantilla or any('{pk}' == v for v in spec.get('params', {}).values()):
+        queryset = getattr(cls, 'queryset', None)
+        if queryset is not None:
+            kwargs.setdefault('pk', queryset.model.objects.order_by('pk').values_list('pk', flat=True).first())
+    url = plantilla.format(**kwargs)
+    params = {k: (kwargs['pk'] if v == '{pk}' else _resolver_valor(v)) for k, v in spec.get('params', {}).items()}
+    return url, params
+
+
+def capturar(client, url, params=None):
+    """Ejecuta un GET y retorna (respuesta, lista de SQL ejecutado)."""
+    with CaptureQueriesContext(connection) as contexto:
+        respuesta = client.get(url, params or {})
+    return respuesta, [q['sql'] for q in contexto.captured_queries]
+
+
+def diferencia_consultas(consultas_n, consultas_10n, n):
+    """Genera un diff legible entre las consultas con N filas y con 10N filas."""
+    diff = difflib.unified_diff(
+        [_normalizar(q) for q in consultas_n],
+        [_normalizar(q) for q in consultas_10n],
+        fromfile=f'{n} filas ({len(consultas_n)} consultas)',
+        tofile=f'{n * 10} filas ({len(consultas_10n)} consultas)',
+        lineterm='',
+    )
+    return '\n'.join(diff)
+
+
+class PresupuestoConsultasMixin:
+    """
+    Mixin para TestCase que verifica el presupuesto de consultas de todos los
+    endpoints GET registrados por una app. Definir `app_label` en la subclase.
+    """
+    app_label = None
+    filas = 2
+
+    def _medir_todos(self):
+        return {
+            (plantilla, accion): (cls, *self._medir(plantilla, cls, accion))
+            for plantilla, cls, accion in endpoints_de_app(self.app_label)
+        }
+
+    def _medir(self, plantilla, cls, accion):
+        spec = _especificacion(cls, accion)
+        if spec is None:
+            return None, None, []
+        url, params = _construir_url(plantilla, cls, spec)
+        respuesta, consultas = capturar(self.client, url, params)
+        return spec, respuesta, consultas
+
+    def test_presupuesto_consultas(self):
+        endpoints = endpoints_de_app(self.app_label)
+        self.assertTrue(endpoints, f'La app {self.app_label} no expone endpoints GET')
+
+        sembrar(self.filas)
+        medicion_n = self._medir_todos()
+        sembrar(self.filas * 9, desde=self.filas)
+        medicion_10n = self._medir_todos()
+
+        for clave, (cls, spec, respuesta, consultas_n) in medicion_n.items():
+            plantilla, accion = clave
+            with self.subTest(endpoint=plantilla, accion=accion):
+                self.assertIsNotNone(
+                    spec,
+                    f"{cls.__name__} no declara presupuesto_consultas para '{accion}' ({plantilla})"
+                )
+                estado = spec.get('estado', 200)
+                for medicion in (respuesta, medicion_10n[clave][2]):
+                    self.assertEqual(medicion.status_code, estado, f'{plantilla} respondió {medicion.status_code}')
+
+                consultas_10n = medicion_10n[clave][3]
+                self.assertEqual(
+                    len(consultas_n), len(consultas_10n),
+                    f'\n{plantilla} ({accion}) no es constante en consultas (posible N+1):\n'
+                    + diferencia_consultas(consultas_n, consultas_10n, self.filas)
+                )
+                self.assertLessEqual(
+                    len(consultas_10n), spec['consultas'],
+                    f"\n{plantilla} ({accion}) supera el presupuesto de {spec['consultas']} consultas:\n"
+                    + '\n'.join(_normalizar(q) for q in consultas_10n)
+                )
@@ -0,0 +1,44 @@
+"""
+Utilidades para listados de solo lectura armados desde .values_list().
+
+Los listados grandes (ventas, movimientos de caja, prendas) pasan la mayor parte
+del tiempo instanciando serializers por fila. Las funciones `*_rapido` de cada
+app leen las columnas con values_list() y arman los dicts directamente; aquí
+están los conversores que reproducen exactamente el formato de los campos de
+DRF (se usan las mismas clases de campo, así que el contrato es el mismo).
+"""
+from rest_framework import serializers
+
+
+def _sin_nulos(conversor):
+    def convertir(valor):
+        return None if valor is None else conversor(valor)
+    return convertir
+
+
+def decimal(max_digits, decimal_places):
+    """Conversor equivalente a serializers.DecimalField(max_digits, decimal_places)."""
+    return _sin_nulos(serializers.DecimalField(max_digits=max_digits, decimal_places=decimal_places).to_representation)
+
+
+def decimal_de(modelo, campo):
+    """Conversor para el DecimalField `campo` del modelo, como lo mapea ModelSerializer."""
+    field = modelo._meta.get_field(campo)
+    return decimal(field.max_digits, field.decimal_places)
+
+
+fecha_hora = _sin_nulos(serializers.DateTimeField().to_representation)
+fecha = _sin_nulos(serializers.DateField().to_representation)
+
+
+def quitar_consultas_relacionadas(queryset):
+    """values_list() no usa select_related ni admite prefetch_related."""
+    return queryset.select_related(None).prefetch_related(None)
+
+
+def agrupar(filas, indice=0):
+    """Agrupa filas (tuplas) por la columna `indice` en un solo recorrido."""
+    grupos = {}
+    for fila in filas:
+        grupos.setdefault(fila[indice], []).append(fila)
+    return grupos
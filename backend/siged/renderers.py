@@ -0,0 +1,111 @@
+"""
+Renderer JSON rápido y modo compacto de respuestas.
+
+JSONRapidoRenderer serializa con orjson cuando está instalado y produce el
+mismo JSON que el JSONRenderer de DRF (fechas, UUID, lazy strings, etc. pasan
+por el mismo encoder), salvo los Decimal sueltos: con orjson >= 3.9 se emiten
+como número exacto (orjson.Fragment) en vez de pasar por float. Sin orjson, o
+cuando se pide indentación (API navegable), usa el renderer de DRF.
+
+Con `?formato=compacto`:
+- CompactoSerializerMixin no calcula los campos *_formateado.
+- El renderer quita los *_formateado que queden en respuestas armadas a mano
+  y convierte las listas de primer nivel en columnas:
+  {"cantidad": 2, "columnas": {"id": [1, 2], "monto": ["10.00", "5.00"]}}
+"""
+import decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+SUFIJO_FORMATEADO = '_formateado'
+_encoder_drf = JSONEncoder()
+
+if orjson is not None:
+    _OPCIONES_ORJSON = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    _Fragment = getattr(orjson, 'Fragment', None)
+else:
+    _OPCIONES_ORJSON = 0
+    _Fragment = None
+
+
+def es_compacto(request):
+    """True si la petición pidió `?formato=compacto`."""
+    if request is None:
+        return False
+    parametros = getattr(request, 'query_params', None) or getattr(request, 'GET', {})
+    return parametros.get('formato') == 'compacto'
+
+
+def _por_defecto(obj):
+    if isinstance(obj, decimal.Decimal):
+        if _Fragment is not None and obj.is_finite():
+            return _Fragment(str(obj))
+        return float(obj)
+    return _encoder_drf.default(obj)
+
+
+def sin_formateados(datos):
+    """Quita recursivamente las claves *_formateado."""
+    if isinstance(datos, dict):
+        return {
+            k: sin_formateados(v) for k, v in datos.items()
+            if not (isinstance(k, str) and k.endswith(SUFIJO_FORMATEADO))
+        }
+    if isinstance(datos, list):
+        return [sin_formateados(v) for v in datos]
+    return datos
+
+
+def a_columnas(filas):
+    """Lista de dicts -> {'cantidad': n, 'columnas': {campo: [valores]}}."""
+    if not all(isinstance(f, dict) for f in filas):
+        return filas
+    nombres = {}
+    for fila in filas:
+        for nombre in fila:
+            nombres.setdefault(nombre, None)
+    return {
+        'cantidad': len(filas),
+        'columnas': {nombre: [fila.get(nombre) for fila in filas] for nombre in nombres},
+    }
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """JSONRenderer de DRF acelerado con orjson y con soporte del modo compacto."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if data is not None and es_compacto(renderer_context.get('request')):
+            # Lo que viene de un serializer (ReturnList/ReturnDict) ya omitió los
+            # *_formateado en CompactoSerializerMixin; solo se limpian respuestas a mano
+            if getattr(data, 'serializer', None) is None:
+                data = sin_formateados(data)
+            if isinstance(data, list):
+                data = a_columnas(data)
+
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=_por_defecto, option=_OPCIONES_ORJSON)
+
+
+class CompactoSerializerMixin:
+    """
+    Omite los campos *_formateado cuando el contexto pide el modo compacto
+    (`?formato=compacto` en la petición o context={'compacto': True}).
+    """
+
+    def get_fields(self):
+        campos = super().get_fields()
+        compacto = self.context.get('compacto')
+        if compacto is None:
+            compacto = es_compacto(self.context.get('request'))
+        if compacto:
+            for nombre in [n for n in campos if n.endswith(SUFIJO_FORMATEADO)]:
+                del campos[nombre]
+        return campos
@@ -0,0 +1,212 @@
+"""
+Lecturas de reportes en la réplica de solo lectura.
+
+    @action(detail=False, methods=['get'])
+    @usar_replica
+    @cachear_respuesta(MovimientoCaja, CuentaBancaria)
+    def resumen_periodo(self, request): ...
+
+Las consultas de lectura que se hacen dentro de una vista con @usar_replica
+van al alias REPLICA_ALIAS (EnrutadorReplica); las escrituras siempre van a
+'default'. La vista se queda en el primario si:
+
+- no hay réplica configurada (DATABASES sin REPLICA_ALIAS; ver
+  DB_REPLICA_HOST en settings),
+- el cliente escribió hace menos de REPLICA_PEGAJOSA_SEGUNDOS (lee lo que
+  acaba de escribir aunque la réplica no lo tenga todavía). ReplicaMiddleware
+  marca al cliente en la caché en cada POST/PUT/PATCH/DELETE; el cliente es
+  la cookie de sesión o, sin ella, la IP,
+- el retraso de la réplica supera REPLICA_RETRASO_MAXIMO_SEGUNDOS o no se
+  puede medir (réplica caída). Se mide como mucho cada
+  REPLICA_VERIFICAR_CADA_SEGUNDOS por proceso.
+
+cachear_respuesta no guarda una respuesta leída de la réplica si alguno de
+sus modelos cambió dentro del retraso medido: la réplica podría no tener ese
+cambio y la respuesta quedaría guardada bajo el sello nuevo.
+
+Para probar en local sin dos PostgreSQL basta con un alias 'replica' que
+apunte a la misma base (o 'TEST': {'MIRROR': 'default'} en pruebas).
+Las decisiones se cuentan en siged_replica_lecturas_total.
+"""
+import contextvars
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import FileResponse, StreamingHttpResponse
+
+from siged.metricas import Contador
+
+PREFIJO = 'siged:replica:escritura:'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+lecturas = Contador(
+    'siged_replica_lecturas_total', 'Vistas de reportes por base usada y motivo', ('base', 'motivo')
+)
+
+_alias_lectura = contextvars.ContextVar('siged_alias_lectura', default=None)
+_mediciones = {}
+_lock = threading.Lock()
+
+
+# ============ ENRUTADOR ============
+
+class EnrutadorReplica:
+    """Lecturas a la réplica solo dentro de @usar_replica; escrituras y migraciones al primario."""
+
+    def db_for_read(self, model, **hints):
+        return _alias_lectura.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica y primario son la misma base
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.REPLICA_ALIAS:
+            return False
+        return None
+
+
+def alias_lectura():
+    """Alias al que van las lecturas en este momento (None = el primario)."""
+    return _alias_lectura.get()
+
+
+# ============ RETRASO ============
+
+SQL_RETRASO = (
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+def _medir_retraso(alias):
+    conexion = connections[alias]
+    if conexion.vendor != 'postgresql':
+        return 0.0
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute(SQL_RETRASO)
+            fila = cursor.fetchone()
+    except DatabaseError:
+        return float('inf')
+    # NULL: la base no está en recuperación (no es una réplica en streaming)
+    return float(fila[0] or 0)
+
+
+def retraso(alias):
+    """Segundos de retraso de la réplica (inf si no responde), medido como mucho cada REPLICA_VERIFICAR_CADA_SEGUNDOS."""
+    ahora = time.monotonic()
+    medicion = _mediciones.get(alias)
+    if medicion and ahora - medicion[0] < settings.REPLICA_VERIFICAR_CADA_SEGUNDOS:
+        return medicion[1]
+    with _lock:
+        medicion = _mediciones.get(alias)
+        if medicion and ahora - medicion[0] < settings.REPLICA_VERIFICAR_CADA_SEGUNDOS:
+            return medicion[1]
+        valor = _medir_retraso(alias)
+        _mediciones[alias] = (time.monotonic(), valor)
+    return valor
+
+
+# ============ LECTURA DE LO PROPIO ============
+
+def _cliente(request):
+    sesion = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if sesion:
+        return f's:{sesion}'
+    reenviado = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[0].strip()
+    return f'ip:{reenviado or request.META.get("REMOTE_ADDR", "")}'
+
+
+def hay_replica():
+    return settings.REPLICA_ALIAS in settings.DATABASES
+
+
+def marcar_escritura(request):
+    cache.set(PREFIJO + _cliente(request), 1, settings.REPLICA_PEGAJOSA_SEGUNDOS)
+
+
+def escribio_hace_poco(request):
+    return cache.get(PREFIJO + _cliente(request)) is not None
+
+
+class ReplicaMiddleware:
+    """Marca al cliente que escribe para que sus lecturas sigan en el primario un rato."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in METODOS_SEGUROS and hay_replica():
+            marcar_escritura(request)
+        return response
+
+
+# ============ DECORADOR ============
+
+def elegir(request):
+    """(alias o None, motivo) para una vista de reportes."""
+    if not hay_replica():
+        return None, 'sin_replica'
+    if escribio_hace_poco(request):
+        return None, 'escritura_reciente'
+    if retraso(settings.REPLICA_ALIAS) > settings.REPLICA_RETRASO_MAXIMO_SEGUNDOS:
+        return None, 'retraso'
+    return settings.REPLICA_ALIAS, 'replica'
+
+
+def _iterar_en(alias, contenido):
+    # El CSV en streaming se genera después de que la vista retorna
+    token = _alias_lectura.set(alias)
+    try:
+        yield from contenido
+    finally:
+        _alias_lectura.reset(token)
+
+
+def usar_replica(vista):
+    """
+    Decorador para vistas GET de solo lectura (acciones de ViewSet, métodos de
+    APIView o funciones con @api_view): sus lecturas van a la réplica si se puede.
+    """
+    @functools.wraps(vista)
+    def envoltura(*args, **kwargs):
+        # args = (request, ...) en funciones; (self, request, ...) en métodos
+        request = args[0] if hasattr(args[0], 'META') else args[1]
+        if request.method not in METODOS_SEGUROS:
+            return vista(*args, **kwargs)
+
+        alias, motivo = elegir(request)
+        lecturas.inc(base=alias or DEFAULT_DB_ALIAS, motivo=motivo)
+        if alias is None:
+            return vista(*args, **kwargs)
+
+        token = _alias_lectura.set(alias)
+        try:
+            response = vista(*args, **kwargs)
+        finally:
+            _alias_lectura.reset(token)
+        if isinstance(response, StreamingHttpResponse) and not isinstance(response, FileResponse):
+            response.streaming_content = _iterar_en(alias, response.streaming_content)
+        return response
+    return envoltura
+
+
+def respuesta_confiable(sellos):
+    """
+    False si se está leyendo de la réplica y algún sello (ns, siged/versiones.py)
+    es más nuevo que lo que la réplica tiene con seguridad.
+    """
+    alias = _alias_lectura.get()
+    if alias is None or not sellos:
+        return True
+    limite = time.time() - retraso(alias) - settings.REPLICA_VERIFICAR_CADA_SEGUNDOS
+    return max(sellos) / 1e9 < limite
@@ -58,9 +58,11 @@ INSTALLED_APPS = [
     'compra_venta',      
     'egreso_ingreso',
     'api_auth',  
+    'tareas',
 ]
 
 MIDDLEWARE = [
+    'siged.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -68,6 +70,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'siged.perfilador.PerfiladorMiddleware',
+    'siged.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -96,6 +100,7 @@ WSGI_APPLICATION = 'siged.wsgi.application'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 import os
+import tempfile
 
 DATABASES = {
     'default': {
@@ -110,6 +115,48 @@ DATABASES = {
     }
 }
 
+# Réplica de solo lectura para reportes (siged/replicas.py). Sin DB_REPLICA_HOST
+# todo va al primario. DB_REPLICA_* no definidas se toman de 'default'.
+REPLICA_ALIAS = 'replica'
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES[REPLICA_ALIAS] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['siged.replicas.EnrutadorReplica']
+REPLICA_RETRASO_MAXIMO_SEGUNDOS = float(os.getenv('REPLICA_RETRASO_MAXIMO_SEGUNDOS', '5'))
+REPLICA_PEGAJOSA_SEGUNDOS = int(os.getenv('REPLICA_PEGAJOSA_SEGUNDOS', '15'))
+REPLICA_VERIFICAR_CADA_SEGUNDOS = float(os.getenv('REPLICA_VERIFICAR_CADA_SEGUNDOS', '5'))
+
+
+# Cachés (ver siged/versiones.py y siged/cache_respuestas.py).
+# CACHE_BACKEND: 'file' (por defecto, compartida entre los workers de un host),
+# 'locmem' (un solo proceso) o 'redis' (varios hosts, requiere el paquete redis).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'siged_cache'))
+CACHE_URL = os.getenv('CACHE_URL', 'redis://127.0.0.1:6379/0')
+
+
+def _cache(nombre, max_entradas):
+    if CACHE_BACKEND == 'locmem':
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': nombre,
+                'OPTIONS': {'MAX_ENTRIES': max_entradas}}
+    if CACHE_BACKEND == 'redis':
+        return {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL,
+                'KEY_PREFIX': nombre}
+    return {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, nombre), 'OPTIONS': {'MAX_ENTRIES': max_entradas}}
+
+
+CACHES = {
+    'default': _cache('default', 2000),
+    'respuestas': _cache('respuestas', 5000),
+}
+CACHE_RESPUESTAS_TIMEOUT = int(os.getenv('CACHE_RESPUESTAS_TIMEOUT', str(60 * 60 * 24)))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -157,3 +204,54 @@ CORS_ALLOW_CREDENTIALS = True
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Métricas de rendimiento (GET /api/metrics). Con token definido, Prometheus
+# se autentica con `Authorization: Bearer <token>`; sin él, solo usuarios staff.
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN')
+
+# Perfilador bajo demanda: cabecera `X-Perfilar: 1` (staff) o muestreo aleatorio.
+PERFILADOR_MUESTREO = float(os.getenv('PERFILADOR_MUESTREO', '0'))
+PERFILADOR_DIR = os.getenv('PERFILADOR_DIR', os.path.join(BASE_DIR, 'perfiles'))
+PERFILADOR_MAX = int(os.getenv('PERFILADOR_MAX', '50'))
+
+# Sincronización por delta (?since=): margen de la marca y retención de lápidas
+SINCRONIZACION_MARGEN_SEGUNDOS = int(os.getenv('SINCRONIZACION_MARGEN_SEGUNDOS', '5'))
+SINCRONIZACION_RETENCION_DIAS = int(os.getenv('SINCRONIZACION_RETENCION_DIAS', '90'))
+
+# Eventos en vivo (GET /api/eventos/, SSE)
+EVENTOS_DURACION_MAXIMA = int(os.getenv('EVENTOS_DURACION_MAXIMA', '300'))
+EVENTOS_LATIDO_SEGUNDOS = int(os.getenv('EVENTOS_LATIDO_SEGUNDOS', '15'))
+EVENTOS_COLA_MAXIMA = int(os.getenv('EVENTOS_COLA_MAXIMA', '100'))
+# Cada conexión SSE ocupa un hilo de gunicorn (GUNICORN_THREADS, 16 por
+# defecto) mientras dura. Por proceso se aceptan a lo sumo
+# EVENTOS_MAXIMO_CONEXIONES (por defecto la cuarta parte de los hilos); las
+# demás reciben `retry` y el navegador reintenta pasados
+# EVENTOS_REINTENTO_OCUPADO_MS, así el resto de la API siempre tiene hilos.
+EVENTOS_MAXIMO_CONEXIONES = int(os.getenv(
+    'EVENTOS_MAXIMO_CONEXIONES', str(max(1, int(os.getenv('GUNICORN_THREADS', '16')) // 4))
+))
+EVENTOS_REINTENTO_OCUPADO_MS = int(os.getenv('EVENTOS_REINTENTO_OCUPADO_MS', '30000'))
+
+# Cierres de caja en segundo plano (caja/trabajos.py). Un trabajo EJECUTANDO
+# por más de CIERRES_TRABAJO_VENCIDO_MINUTOS se considera abandonado.
+CIERRES_EN_SEGUNDO_PLANO = os.getenv('CIERRES_EN_SEGUNDO_PLANO', '1') == '1'
+CIERRES_TRABAJO_VENCIDO_MINUTOS = int(os.getenv('CIERRES_TRABAJO_VENCIDO_MINUTOS', '10'))
+
+# Archivo de movimientos (caja/archivo.py): meses recientes que quedan en
+# caja_movimiento; los anteriores ya cerrados pasan a caja_movimiento_archivo.
+CAJA_MESES_EN_LINEA = int(os.getenv('CAJA_MESES_EN_LINEA', '12'))
+
+# Cola de tareas (tareas/cola.py, `manage.py run_worker`). TAREAS_HORA_NOCTURNA
+# es la hora (TIME_ZONE) de las tareas diarias, p. ej. la caducidad de deudas.
+TAREAS_ESPERA_SEGUNDOS = float(os.getenv('TAREAS_ESPERA_SEGUNDOS', '1'))
+TAREAS_RETRASO_REINTENTO_SEGUNDOS = int(os.getenv('TAREAS_RETRASO_REINTENTO_SEGUNDOS', '30'))
+TAREAS_VENCIDA_MINUTOS = int(os.getenv('TAREAS_VENCIDA_MINUTOS', '30'))
+TAREAS_HORA_NOCTURNA = int(os.getenv('TAREAS_HORA_NOCTURNA', '5'))
+
+REST_FRAMEWORK = {
+    # orjson si está instalado; `?formato=compacto` para respuestas sin *_formateado
+    'DEFAULT_RENDERER_CLASSES': [
+        'siged.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
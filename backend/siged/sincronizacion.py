@@ -0,0 +1,102 @@
+"""
+Sincronización por delta (`?since=<marca>`) de listados con caché local.
+
+Las tablas sincronizables heredan de dominios_comunes.ModeloSincronizable
+(columna indexada `fecha_actualizacion`). Las eliminaciones dejan una lápida
+en RegistroEliminacion; los archivados son una actualización más y vuelven en
+`cambios` con `archivado: true`.
+
+    GET /api/terceros/clientes/               -> listado completo (sin cambios)
+    GET /api/terceros/clientes/?since=<marca> ->
+        {"marca": "...", "completo": false, "cambios": [...], "eliminados": [3, 7]}
+
+El cliente guarda `marca` y la manda en la siguiente petición. La marca es la
+hora de inicio de la consulta menos SINCRONIZACION_MARGEN_SEGUNDOS, para no
+perder filas de transacciones que confirmaron después de empezar la lectura;
+una misma fila puede llegar dos veces (el cliente reemplaza por id). Si la
+marca es más vieja que la retención de lápidas, se devuelve todo con
+`completo: true` y el cliente debe reemplazar su caché.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+PARAMETRO_DESDE = 'since'
+CAMPO_ACTUALIZACION = 'fecha_actualizacion'
+
+
+def es_sincronizable(modelo):
+    return any(f.name == CAMPO_ACTUALIZACION for f in modelo._meta.concrete_fields)
+
+
+def horizonte_lapidas():
+    """Fecha desde la que se conservan las lápidas (las anteriores se purgan)."""
+    return timezone.now() - timedelta(days=settings.SINCRONIZACION_RETENCION_DIAS)
+
+
+@receiver(post_delete, dispatch_uid='siged_sincronizacion_lapidas')
+def _registrar_eliminacion(sender, instance, **kwargs):
+    if not es_sincronizable(sender):
+        return
+    from dominios_comunes.models import RegistroEliminacion
+    RegistroEliminacion.objects.create(modelo=sender._meta.label_lower, objeto_id=instance.pk)
+
+
+class SincronizacionMixin:
+    """Agrega `?since=<marca>` a la acción list de un ViewSet."""
+
+    def desde_solicitado(self):
+        """Marca recibida en `?since=` (datetime con zona) o None si no se pidió delta."""
+        valor = self.request.query_params.get(PARAMETRO_DESDE)
+        if valor is None:
+            return None
+        try:
+            desde = parse_datetime(valor.replace(' ', '+'))
+        except ValueError:
+            # Bien formada pero imposible (2024-02-30T00:00:00)
+            desde = None
+        if desde is None:
+            raise ValidationError({PARAMETRO_DESDE: 'Marca inválida; use la `marca` de la respuesta anterior.'})
+        if timezone.is_naive(desde):
+            desde = timezone.make_aware(desde, timezone.get_default_timezone())
+        return desde
+
+    def respuesta_cambios(self, queryset, desde, armar):
+        """
+        Respuesta delta: `armar(queryset)` con solo las filas cambiadas desde
+        la marca, más los ids eliminados.
+        """
+        from dominios_comunes.models import RegistroEliminacion
+
+        marca = timezone.now() - timedelta(seconds=settings.SINCRONIZACION_MARGEN_SEGUNDOS)
+        completo = desde < horizonte_lapidas()
+        if completo:
+            eliminados = []
+        else:
+            queryset = queryset.filter(**{f'{CAMPO_ACTUALIZACION}__gt': desde})
+            eliminados = list(
+                RegistroEliminacion.objects
+                .filter(modelo=queryset.model._meta.label_lower, fecha__gt=desde)
+                .values_list('objeto_id', flat=True)
+            )
+        return Response({
+            'marca': marca.isoformat(),
+            'completo': completo,
+            'cambios': armar(queryset),
+            'eliminados': eliminados,
+        })
+
+    def list(self, request, *args, **kwargs):
+        desde = self.desde_solicitado()
+        if desde is None:
+            return super().list(request, *args, **kwargs)
+        return self.respuesta_cambios(
+            self.filter_queryset(self.get_queryset()), desde,
+            lambda queryset: self.get_serializer(queryset, many=True).data,
+        )
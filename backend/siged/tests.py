@@ -0,0 +1,223 @@
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import ExitStack
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from dominios_comunes.models import MetodoPago
+
+from . import metricas
+from .presupuesto_consultas import sembrar
+from .renderers import JSONRapidoRenderer, a_columnas, es_compacto
+
+
+class MetricasTests(TestCase):
+    """MetricasMiddleware mide cada petición por ruta y /api/metrics exige token o staff."""
+    url = '/api/dominios_comunes/metodos-pago/'
+    ruta = 'metodo-pago-list'
+
+    def _valores(self, ruta, estado=200):
+        return (
+            metricas.peticiones.valor(ruta=ruta, metodo='GET', estado=estado),
+            metricas.consultas_sql.valor(ruta=ruta),
+            metricas.bytes_respuesta.valor(ruta=ruta),
+        )
+
+    def test_middleware_registra_peticion_consultas_y_bytes(self):
+        MetodoPago.objects.create(nombre='Efectivo')
+        antes = self._valores(self.ruta)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(self.url)
+        despues = self._valores(self.ruta)
+
+        self.assertEqual(respuesta.resolver_match.view_name, self.ruta)
+        self.assertEqual(
+            [b - a for a, b in zip(antes, despues)],
+            [1, len(consultas.captured_queries), len(respuesta.content)],
+        )
+        self.assertIn(f'siged_http_duracion_segundos_count{{ruta="{self.ruta}",metodo="GET"}}', metricas.exponer())
+
+        antes = metricas.peticiones.valor(ruta='sin_ruta', metodo='GET', estado=404)
+        self.client.get('/no-existe/')
+        self.assertEqual(metricas.peticiones.valor(ruta='sin_ruta', metodo='GET', estado=404), antes + 1)
+
+    def test_execute_wrapper_cuenta_consultas_y_tiempo(self):
+        contador = metricas.ContadorSQL()
+        # El savepoint queda fuera del envoltorio; la consulta que falla también cuenta
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            with ExitStack() as pila:
+                metricas.envolver_conexiones(pila, contador)
+                list(MetodoPago.objects.all())
+                MetodoPago.objects.count()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT * FROM tabla_que_no_existe')
+        self.assertEqual(contador.consultas, 3)
+        self.assertGreater(contador.segundos, 0)
+
+        # Fuera de la pila el envoltorio ya no está instalado
+        MetodoPago.objects.count()
+        self.assertEqual(contador.consultas, 3)
+
+    def test_acceso_a_metrics(self):
+        url = '/api/metrics'
+        Usuario = get_user_model()
+        staff = Usuario.objects.create_user('admin', password='clave', is_staff=True)
+        cajero = Usuario.objects.create_user('cajero', password='clave')
+
+        with override_settings(METRICAS_TOKEN=None):
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.client.force_login(cajero)
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.client.force_login(staff)
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertTrue(respuesta['Content-Type'].startswith('text/plain; version=0.0.4'))
+            self.assertIn(b'# TYPE siged_http_peticiones_total counter', respuesta.content)
+
+        with override_settings(METRICAS_TOKEN='secreto'):
+            # Con token, ser staff no basta
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+            self.client.logout()
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+
+class PerfiladorTests(TestCase):
+    """El perfilador guarda las peticiones marcadas o muestreadas en un buffer circular que solo ve el staff."""
+    url = '/api/dominios_comunes/metodos-pago/'
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        configuracion = override_settings(PERFILADOR_DIR=self.directorio, PERFILADOR_MAX=2, PERFILADOR_MUESTREO=0.0)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        Usuario = get_user_model()
+        self.staff = Usuario.objects.create_user('admin', password='clave', is_staff=True)
+        self.cajero = Usuario.objects.create_user('cajero', password='clave')
+
+    def _archivos(self):
+        return sorted(os.listdir(self.directorio))
+
+    def test_x_perfilar_solo_para_staff(self):
+        self.client.force_login(self.cajero)
+        self.assertNotIn('X-Perfil-Id', self.client.get(self.url, HTTP_X_PERFILAR='1'))
+        self.assertEqual(self._archivos(), [])
+
+        self.client.force_login(self.staff)
+        self.assertNotIn('X-Perfil-Id', self.client.get(self.url))
+        for valor in ('0', 'false', 'no'):
+            self.assertNotIn('X-Perfil-Id', self.client.get(self.url, HTTP_X_PERFILAR=valor), valor)
+        self.assertEqual(self._archivos(), [])
+        perfil_id = self.client.get(self.url, HTTP_X_PERFILAR='1')['X-Perfil-Id']
+        self.assertEqual(self._archivos(), [f'{perfil_id}.json', f'{perfil_id}.prof'])
+
+        detalle = self.client.get(f'/api/perfiles/{perfil_id}/')
+        datos = b''.join(detalle.streaming_content).decode()
+        detalle.close()
+        self.assertIn('"ruta": "metodo-pago-list"', datos)
+        self.assertIn('"linea_tiempo_sql"', datos)
+
+    def test_muestreo(self):
+        with override_settings(PERFILADOR_MUESTREO=1.0):
+            self.assertIn('X-Perfil-Id', self.client.get(self.url))
+        self.assertNotIn('X-Perfil-Id', self.client.get(self.url))
+        self.assertEqual(len(self._archivos()), 2)
+
+    def test_buffer_circular_conserva_los_ultimos(self):
+        self.client.force_login(self.staff)
+        ids = [self.client.get(self.url, HTTP_X_PERFILAR='1')['X-Perfil-Id'] for _ in range(3)]
+        self.assertEqual(self._archivos(), sorted(f'{i}.{e}' for i in ids[1:] for e in ('json', 'prof')))
+
+        datos = self.client.get('/api/perfiles/').json()
+        self.assertEqual([p['id'] for p in datos['perfiles']], ids[:0:-1])
+        self.assertEqual(datos['maximo'], 2)
+
+    def test_endpoints_solo_staff(self):
+        self.client.force_login(self.staff)
+        perfil_id = self.client.get(self.url, HTTP_X_PERFILAR='1')['X-Perfil-Id']
+        urls = ['/api/perfiles/', f'/api/perfiles/{perfil_id}/', f'/api/perfiles/{perfil_id}/?formato=prof']
+
+        for url in urls:
+            respuesta = self.client.get(url)
+            respuesta.close()
+            self.assertEqual(respuesta.status_code, 200, url)
+        self.assertEqual(self.client.get(f'/api/perfiles/{perfil_id}/?formato=txt').status_code, 400)
+        self.assertEqual(self.client.get('/api/perfiles/no-existe/').status_code, 404)
+        self.assertEqual(self.client.get('/api/perfiles/..%2Fsettings/').status_code, 404)
+
+        for usuario in (self.cajero, None):
+            if usuario:
+                self.client.force_login(usuario)
+            else:
+                self.client.logout()
+            for url in urls:
+                self.assertEqual(self.client.get(url).status_code, 403, url)
+
+
+class RendererRapidoTests(TestCase):
+    """JSONRapidoRenderer produce el mismo JSON que DRF y arma las columnas de ?formato=compacto."""
+
+    def test_mismo_json_que_drf(self):
+        datos = {
+            'fecha': date(2026, 1, 2),
+            'momento': datetime(2026, 1, 2, 10, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            'local': datetime(2026, 1, 2, 10, 30),
+            'hora': time(8, 5, 1, 500000),
+            'duracion': timedelta(hours=1, seconds=3),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'texto': gettext_lazy('Efectivo'),
+            'acentos': 'Año, señor',
+            'claves_numericas': {1: 'uno'},
+            'filas': [{'n': 1, 'nulo': None, 'activo': True}],
+        }
+        rapido, drf = JSONRapidoRenderer().render, JSONRenderer().render
+        self.assertEqual(rapido(datos), drf(datos))
+
+        # Los Decimal pueden salir como número exacto (orjson >= 3.9): mismo valor
+        montos = {'monto': Decimal('10.50'), 'filas': [{'saldo': Decimal('-0.10')}, {'saldo': Decimal('1234567.89')}]}
+        self.assertEqual(
+            json.loads(rapido(montos), parse_float=Decimal),
+            json.loads(drf(montos), parse_float=Decimal),
+        )
+
+    def test_a_columnas(self):
+        filas = [{'id': 1, 'monto': '10.00'}, {'id': 2, 'nota': 'x'}]
+        self.assertEqual(a_columnas(filas), {
+            'cantidad': 2,
+            'columnas': {'id': [1, 2], 'monto': ['10.00', None], 'nota': [None, 'x']},
+        })
+        self.assertEqual(a_columnas([]), {'cantidad': 0, 'columnas': {}})
+        self.assertEqual(a_columnas([1, 2]), [1, 2])
+
+    def test_es_compacto(self):
+        fabrica = APIRequestFactory()
+        self.assertTrue(es_compacto(Request(fabrica.get('/', {'formato': 'compacto'}))))
+        self.assertTrue(es_compacto(fabrica.get('/', {'formato': 'compacto'})))
+        self.assertFalse(es_compacto(Request(fabrica.get('/', {'formato': 'json'}))))
+        self.assertFalse(es_compacto(None))
+
+    def test_listado_compacto(self):
+        sembrar(2)
+        url = '/api/caja/cuentas/'
+        filas = self.client.get(url).json()
+        compacto = self.client.get(url, {'formato': 'compacto'}).json()
+
+        self.assertEqual(compacto['cantidad'], len(filas))
+        self.assertIn('saldo_actual_formateado', filas[0])
+        nombres = [n for n in filas[0] if not n.endswith('_formateado')]
+        self.assertEqual(list(compacto['columnas']), nombres)
+        for nombre in nombres:
+            self.assertEqual(compacto['columnas'][nombre], [f[nombre] for f in filas])
@@ -18,6 +18,10 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from api_auth.views import login_view, logout_view
+from dominios_comunes.views import BootstrapView
+from siged.eventos import vista_eventos
+from siged.metricas import vista_metricas
+from siged.perfilador import vista_perfil, vista_perfiles
 
 
 
@@ -35,7 +39,14 @@ urlpatterns = [
     path('api/egreso_ingreso/', include('egreso_ingreso.urls')),
     path('api/apartado_credito/', include('apartado_credito.urls')),
     path('api/compra_venta/', include('compra_venta.urls')),
+    path('api/bootstrap/', BootstrapView.as_view()),
 
 
     path('api/caja/', include('caja.urls')),
+    path('api/tareas/', include('tareas.urls')),
+
+    path('api/eventos/', vista_eventos),
+    path('api/metrics', vista_metricas),
+    path('api/perfiles/', vista_perfiles),
+    path('api/perfiles/<str:perfil_id>/', vista_perfil),
 ]
@@ -0,0 +1,145 @@
+"""
+Sellos de versión por tabla y GET condicional (ETag / Last-Modified).
+
+Cada modelo del que dependen respuestas validadas o en caché tiene un sello
+en la caché (`siged:version:<app.modelo>`) que se renueva en cada post_save /
+post_delete. Se renueva dos veces: al escribir y al confirmar la transacción,
+para que una lectura concurrente que vio el sello nuevo con los datos viejos no
+quede validada para siempre.
+
+Solo se conectan las señales de los modelos registrados con seguir():
+GetCondicionalMixin y cachear_respuesta lo hacen al definirse la vista, y
+DominiosComunesConfig.ready() importa el URLconf para que el registro sea el
+mismo en la web, el worker y el shell. Escribir en las demás tablas no toca la
+caché.
+
+Las escrituras que no disparan señales (queryset.update(), SQL directo) deben
+llamar a invalidar(Modelo) a mano.
+
+GetCondicionalMixin usa los sellos para responder 304 sin consultar la base
+de datos (solo la autenticación de la sesión, si la hay, toca la base). Solo
+valida con el ETag: Last-Modified tiene precisión de segundos y una escritura
+en el mismo segundo daría un 304 con datos viejos, así que If-Modified-Since
+no se evalúa.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.urls import get_resolver
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+PREFIJO = 'siged:version:'
+
+_seguidos = set()
+
+
+def _clave(modelo):
+    return PREFIJO + modelo._meta.label_lower
+
+
+def _invalidar_por_escritura(sender, **kwargs):
+    invalidar(sender)
+
+
+def seguir(*modelos):
+    """Renueva el sello de los modelos (clases o etiquetas 'app.Modelo') en cada post_save / post_delete."""
+    for modelo in modelos:
+        etiqueta = modelo.lower() if isinstance(modelo, str) else modelo._meta.label_lower
+        if etiqueta in _seguidos:
+            continue
+        _seguidos.add(etiqueta)
+        post_save.connect(_invalidar_por_escritura, sender=modelo, dispatch_uid='siged_versiones_post_save')
+        post_delete.connect(_invalidar_por_escritura, sender=modelo, dispatch_uid='siged_versiones_post_delete')
+
+
+def seguir_vistas():
+    """Importa el URLconf: las vistas registran sus modelos con seguir() al definirse."""
+    get_resolver().url_patterns
+
+
+def versiones(*modelos):
+    """Sellos actuales (enteros en nanosegundos) de los modelos, en el mismo orden."""
+    seguir(*modelos)
+    claves = [_clave(m) for m in modelos]
+    actuales = cache.get_many(claves)
+    faltantes = {c: time.time_ns() for c in claves if c not in actuales}
+    for clave, sello in faltantes.items():
+        # add() respeta el sello que otro proceso haya guardado primero
+        if not cache.add(clave, sello, None):
+            sello = cache.get(clave, sello)
+        actuales[clave] = sello
+    return [actuales[c] for c in claves]
+
+
+def _renovar(claves):
+    sello = time.time_ns()
+    cache.set_many({c: sello for c in claves}, None)
+
+
+def invalidar(*modelos):
+    """Renueva el sello de los modelos ahora y al confirmar la transacción."""
+    claves = [_clave(m) for m in modelos]
+    _renovar(claves)
+    transaction.on_commit(lambda: _renovar(claves))
+
+
+class _NoModificado(Exception):
+    def __init__(self, respuesta):
+        self.respuesta = respuesta
+
+
+class GetCondicionalMixin:
+    """
+    Agrega ETag / Last-Modified a las acciones GET indicadas y responde 304
+    cuando el cliente ya tiene la versión vigente.
+
+    - modelos_version: modelos de los que depende la respuesta
+      (por defecto, el modelo del queryset).
+    - acciones_condicionales: acciones del ViewSet que se validan.
+    """
+    modelos_version = None
+    acciones_condicionales = ('list', 'retrieve')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        queryset = getattr(cls, 'queryset', None)
+        seguir(*(cls.modelos_version or ((queryset.model,) if queryset is not None else ())))
+
+    def get_modelos_version(self):
+        return self.modelos_version or (self.queryset.model,)
+
+    def _validadores(self, request):
+        sellos = versiones(*self.get_modelos_version())
+        base = '|'.join([request.get_full_path(), request.accepted_media_type or ''] + [str(s) for s in sellos])
+        etag = quote_etag(hashlib.md5(base.encode()).hexdigest())
+        return 'W/' + etag, max(sellos) // 1_000_000_000
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validadores_get = None
+        if request.method in ('GET', 'HEAD') and getattr(self, 'action', None) in self.acciones_condicionales:
+            etag, _ = self._validadores_get = self._validadores(request)
+            # Sin last_modified: If-Modified-Since (al segundo) no alcanza para un 304
+            respuesta = get_conditional_response(request, etag=etag)
+            if respuesta is not None:
+                raise _NoModificado(respuesta)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NoModificado):
+            return Response(status=exc.respuesta.status_code)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validadores = getattr(self, '_validadores_get', None)
+        if validadores and response.status_code in (200, 304):
+            etag, ultima_modificacion = validadores
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(ultima_modificacion)
+            response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,12 @@
+# tareas/apps.py
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TareasConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tareas'
+
+    def ready(self):
+        """Registrar las tareas definidas en <app>/tareas.py"""
+        autodiscover_modules('tareas')
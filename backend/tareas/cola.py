@@ -0,0 +1,299 @@
+"""
+Cola de tareas en segundo plano guardada en la base de datos.
+
+    # apartado_credito/tareas.py
+    @tarea(hora=settings.TAREAS_HORA_NOCTURNA)
+    def caducar_deudas(): ...
+
+    @tarea(reintentos=5)
+    def recalcular(credito_id): ...
+
+    recalcular.encolar(credito.pk)                      # lo antes posible
+    recalcular.encolar(credito.pk, ejecutar_en=manana)  # programada
+
+- Encolar es un INSERT en la transacción actual: si la transacción se
+  revierte, la tarea tampoco existe (no hace falta on_commit).
+- `manage.py run_worker` toma lotes con SELECT ... FOR UPDATE SKIP LOCKED y
+  los marca EJECUTANDO en la misma transacción corta, así que varios workers
+  nunca toman la misma tarea ni se esperan entre sí. La función corre fuera
+  de esa transacción.
+- Reintentos: si la función lanza una excepción, la tarea vuelve a PENDIENTE
+  con espera exponencial (TAREAS_RETRASO_REINTENTO_SEGUNDOS * 2^(intento-1))
+  hasta agotar `reintentos`; luego queda FALLIDA con el traceback.
+- Periódicas (`cada=timedelta` o `hora=H` diaria): al terminar cada
+  ejecución se programa la siguiente. La clave 'periodica:<nombre>' impide
+  que haya dos pendientes a la vez aunque arranquen varios workers.
+- Una tarea EJECUTANDO por más de TAREAS_VENCIDA_MINUTOS (worker muerto)
+  vuelve a PENDIENTE.
+- Latencia de la cola: fecha_inicio - ejecutar_despues; estadisticas() la
+  resume (GET /api/tareas/tareas/resumen/).
+
+Los módulos `<app>/tareas.py` se importan al iniciar Django (TareasConfig),
+así que las tareas quedan registradas tanto en la web como en el worker.
+"""
+import functools
+import os
+import socket
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Tarea
+
+_registro = {}
+
+
+class TareaNoRegistrada(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Definicion:
+    nombre: str
+    funcion: object
+    reintentos: int = 3
+    prioridad: int = 0
+    cada: timedelta = None
+    hora: int = None
+
+    @property
+    def periodica(self):
+        return self.cada is not None or self.hora is not None
+
+    @property
+    def clave_periodica(self):
+        return f'periodica:{self.nombre}'
+
+    def siguiente(self, desde):
+        """Próxima ejecución de una periódica después de `desde`."""
+        if self.cada is not None:
+            return desde + self.cada
+        proxima = timezone.localtime(desde).replace(hour=self.hora, minute=0, second=0, microsecond=0)
+        return proxima if proxima > desde else proxima + timedelta(days=1)
+
+
+# ============ REGISTRO ============
+
+def tarea(funcion=None, *, nombre=None, reintentos=3, prioridad=0, cada=None, hora=None):
+    """
+    Registra la función como tarea. Queda con `.encolar(*args, **kwargs)`
+    y se puede seguir llamando directamente.
+    """
+    def registrar(funcion):
+        definicion = Definicion(
+            nombre=nombre or f'{funcion.__module__.split(".")[0]}.{funcion.__name__}',
+            funcion=funcion, reintentos=reintentos, prioridad=prioridad, cada=cada, hora=hora,
+        )
+        _registro[definicion.nombre] = definicion
+        funcion.tarea = definicion
+        funcion.encolar = functools.partial(encolar, definicion.nombre)
+        return funcion
+    return registrar(funcion) if funcion is not None else registrar
+
+
+def definicion(nombre):
+    try:
+        return _registro[nombre]
+    except KeyError:
+        raise TareaNoRegistrada(f'No hay una tarea registrada como {nombre!r}') from None
+
+
+def registradas():
+    return dict(_registro)
+
+
+# ============ ENCOLAR ============
+
+def encolar(nombre, *args, ejecutar_en=None, prioridad=None, clave='', **kwargs):
+    """
+    Crea la tarea en la transacción actual. Con `clave`, retorna None si ya
+    hay una tarea activa (pendiente o ejecutando) con la misma clave.
+    """
+    tipo = definicion(nombre)
+    datos = dict(
+        nombre=nombre,
+        argumentos={'args': list(args), 'kwargs': kwargs},
+        prioridad=tipo.prioridad if prioridad is None else prioridad,
+        ejecutar_despues=ejecutar_en or timezone.now(),
+        clave=clave,
+    )
+    if not clave:
+        return Tarea.objects.create(**datos)
+    try:
+        with transaction.atomic():
+            return Tarea.objects.create(**datos)
+    except IntegrityError:
+        return None
+
+
+def programar_periodicas():
+    """Asegura una ejecución pendiente de cada tarea periódica. Retorna las creadas."""
+    ahora = timezone.now()
+    creadas = []
+    for tipo in _registro.values():
+        if not tipo.periodica:
+            continue
+        primera = ahora if tipo.hora is None else tipo.siguiente(ahora)
+        if encolar(tipo.nombre, ejecutar_en=primera, clave=tipo.clave_periodica):
+            creadas.append(tipo.nombre)
+    return creadas
+
+
+# ============ WORKER ============
+
+def nombre_trabajador():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def tomar(cantidad=1, trabajador=''):
+    """
+    Marca como EJECUTANDO hasta `cantidad` tareas vencidas y las retorna.
+    SKIP LOCKED: las filas que otro worker está tomando se saltan sin esperar.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Tarea.objects.select_for_update(skip_locked=True)
+            .filter(estado=Tarea.PENDIENTE, ejecutar_despues__lte=ahora)
+            .order_by('prioridad', 'ejecutar_despues', 'id')
+            .values_list('id', flat=True)[:cantidad]
+        )
+        if not ids:
+            return []
+        Tarea.objects.filter(id__in=ids).update(
+            estado=Tarea.EJECUTANDO, fecha_inicio=ahora, intentos=F('intentos') + 1, trabajador=trabajador,
+        )
+    return list(Tarea.objects.filter(id__in=ids).order_by('prioridad', 'ejecutar_despues', 'id'))
+
+
+def rescatar_vencidas():
+    """Devuelve a PENDIENTE las tareas de workers que murieron a mitad de ejecución."""
+    limite = timezone.now() - timedelta(minutes=settings.TAREAS_VENCIDA_MINUTOS)
+    return Tarea.objects.filter(estado=Tarea.EJECUTANDO, fecha_inicio__lt=limite).update(
+        estado=Tarea.PENDIENTE, ejecutar_despues=timezone.now(),
+    )
+
+
+def liberar(tareas):
+    """Devuelve a PENDIENTE tareas tomadas que no se alcanzaron a ejecutar."""
+    return Tarea.objects.filter(pk__in=[t.pk for t in tareas], estado=Tarea.EJECUTANDO).update(
+        estado=Tarea.PENDIENTE, intentos=F('intentos') - 1, trabajador='',
+    )
+
+
+def _terminar(tarea, tipo, **campos):
+    # Filtrar por intentos: si la tarea fue rescatada y retomada por otro
+    # worker, este ya no es dueño del resultado
+    with transaction.atomic():
+        actualizadas = Tarea.objects.filter(
+            pk=tarea.pk, estado=Tarea.EJECUTANDO, intentos=tarea.intentos,
+        ).update(**campos)
+        if actualizadas and tipo is not None and tipo.periodica and campos['estado'] != Tarea.PENDIENTE:
+            encolar(tipo.nombre, ejecutar_en=tipo.siguiente(timezone.now()), clave=tipo.clave_periodica)
+
+
+def ejecutar(tarea):
+    """Corre una tarea ya tomada y guarda el resultado. Retorna True si terminó bien."""
+    tipo = _registro.get(tarea.nombre)
+    try:
+        if tipo is None:
+            raise TareaNoRegistrada(f'No hay una tarea registrada como {tarea.nombre!r}')
+        tipo.funcion(*tarea.argumentos.get('args', []), **tarea.argumentos.get('kwargs', {}))
+    except Exception:
+        error = traceback.format_exc()
+        if tipo is not None and tarea.intentos <= tipo.reintentos:
+            retraso = settings.TAREAS_RETRASO_REINTENTO_SEGUNDOS * 2 ** (tarea.intentos - 1)
+            _terminar(tarea, tipo, estado=Tarea.PENDIENTE, error=error,
+                      ejecutar_despues=timezone.now() + timedelta(seconds=retraso))
+        else:
+            _terminar(tarea, tipo, estado=Tarea.FALLIDA, error=error, fecha_fin=timezone.now())
+        return False
+    _terminar(tarea, tipo, estado=Tarea.COMPLETADA, error='', fecha_fin=timezone.now())
+    return True
+
+
+# ============ ESTADÍSTICAS ============
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return None
+    return ordenados[min(int(len(ordenados) * p), len(ordenados) - 1)]
+
+
+def estadisticas(desde=None):
+    """
+    Tareas por estado, la pendiente más atrasada y la latencia (segundos entre
+    la hora programada y el inicio) de las tareas iniciadas desde `desde`
+    (por defecto, la última hora). Tres consultas.
+    """
+    ahora = timezone.now()
+    desde = desde or ahora - timedelta(hours=1)
+    por_estado = dict(Tarea.objects.order_by().values_list('estado').annotate(total=Count('id')))
+    mas_antigua = (
+        Tarea.objects.filter(estado=Tarea.PENDIENTE, ejecutar_despues__lte=ahora)
+        .order_by('ejecutar_despues').values_list('ejecutar_despues', flat=True).first()
+    )
+    latencias = sorted(
+        max((inicio - programada).total_seconds(), 0.0)
+        for programada, inicio in Tarea.objects.filter(fecha_inicio__gte=desde)
+        .values_list('ejecutar_despues', 'fecha_inicio')
+    )
+    return {
+        'por_estado': {codigo: por_estado.get(codigo, 0) for codigo, _ in Tarea.ESTADO_CHOICES},
+        'atraso_pendientes': (ahora - mas_antigua).total_seconds() if mas_antigua else 0.0,
+        'latencia': {
+            'desde': desde,
+            'cantidad': len(latencias),
+            'promedio': sum(latencias) / len(latencias) if latencias else None,
+            'p50': _percentil(latencias, 0.5),
+            'p95': _percentil(latencias, 0.95),
+            'maxima': latencias[-1] if latencias else None,
+        },
+    }
+
+
+def trabajar(trabajador=None, lote=10, espera=None, una_vez=False, detener=lambda: False, informar=print):
+    """
+    Bucle del worker: toma lotes y los ejecuta; si la cola está vacía espera
+    `espera` segundos. Con `una_vez` procesa lo vencido y retorna.
+    Retorna (completadas, fallidas).
+    """
+    from django.db import close_old_connections
+
+    trabajador = trabajador or nombre_trabajador()
+    espera = settings.TAREAS_ESPERA_SEGUNDOS if espera is None else espera
+    completadas = fallidas = 0
+    programar_periodicas()
+    ultimo_rescate = 0.0
+
+    while not detener():
+        # Una conexión caída (reinicio de Postgres) no debe tumbar el worker
+        close_old_connections()
+        if time.monotonic() - ultimo_rescate > 60:
+            rescatar_vencidas()
+            ultimo_rescate = time.monotonic()
+
+        tareas = tomar(lote, trabajador)
+        for i, pendiente in enumerate(tareas):
+            if detener():
+                liberar(tareas[i:])
+                break
+            inicio = time.monotonic()
+            ok = ejecutar(pendiente)
+            completadas, fallidas = completadas + ok, fallidas + (not ok)
+            informar(
+                f"{'✅' if ok else '❌'} {pendiente.nombre} #{pendiente.pk} (intento {pendiente.intentos}): "
+                f"latencia {pendiente.latencia:.3f}s, duración {time.monotonic() - inicio:.3f}s"
+            )
+
+        if una_vez and not tareas:
+            break
+        if not tareas:
+            time.sleep(espera)
+    return completadas, fallidas
@@ -0,0 +1,49 @@
+# tareas/management/commands/run_worker.py
+import signal
+
+from django.core.management.base import BaseCommand
+
+from tareas import cola
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta las tareas en segundo plano de la cola (tareas/cola.py). Se pueden '
+        'correr varios workers a la vez: cada uno toma tareas con FOR UPDATE SKIP LOCKED.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=10,
+                            help='Tareas que toma por consulta (default: 10)')
+        parser.add_argument('--espera', type=float, default=None,
+                            help='Segundos de espera con la cola vacía (default: TAREAS_ESPERA_SEGUNDOS)')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Procesa las tareas vencidas y termina (p. ej. desde cron)')
+
+    def handle(self, *args, **options):
+        detenido = []
+
+        def detener(signum, frame):
+            # Termina la tarea en curso y sale; las demás del lote vuelven a la cola
+            self.stdout.write(self.style.WARNING('⚠️ Señal recibida, terminando la tarea en curso...'))
+            detenido.append(signum)
+
+        signal.signal(signal.SIGTERM, detener)
+        signal.signal(signal.SIGINT, detener)
+
+        trabajador = cola.nombre_trabajador()
+        registradas = cola.registradas()
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Worker {trabajador}: {len(registradas)} tareas registradas '
+            f'({sum(t.periodica for t in registradas.values())} periódicas)'
+        ))
+
+        completadas, fallidas = cola.trabajar(
+            trabajador=trabajador,
+            lote=options['lote'],
+            espera=options['espera'],
+            una_vez=options['una_vez'],
+            detener=lambda: bool(detenido),
+            informar=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ Completadas: {completadas}, fallidas: {fallidas}'))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('argumentos', models.JSONField(blank=True, default=dict)),
+                ('prioridad', models.SmallIntegerField(default=0, help_text='Menor valor se ejecuta primero')),
+                ('clave', models.CharField(blank=True, default='', help_text='Si no está vacía, solo puede haber una tarea activa con esta clave', max_length=100)),
+                ('estado', models.CharField(choices=[('P', 'Pendiente'), ('E', 'Ejecutando'), ('C', 'Completada'), ('F', 'Fallida')], default='P', max_length=1)),
+                ('ejecutar_despues', models.DateTimeField(default=django.utils.timezone.now)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('trabajador', models.CharField(blank=True, default='', max_length=100)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'db_table': 'tareas_tarea',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'prioridad', 'ejecutar_despues'], name='tarea_cola_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('estado__in', ['P', 'E']), models.Q(('clave', ''), _negated=True)), fields=('clave',), name='tarea_clave_activa_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# tareas/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class Tarea(models.Model):
+    """
+    Trabajo en la cola de tareas en segundo plano (ver tareas/cola.py).
+    Lo ejecuta `manage.py run_worker`; `nombre` es el de una función
+    registrada con @tarea.
+    """
+    PENDIENTE = 'P'
+    EJECUTANDO = 'E'
+    COMPLETADA = 'C'
+    FALLIDA = 'F'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EJECUTANDO, 'Ejecutando'),
+        (COMPLETADA, 'Completada'),
+        (FALLIDA, 'Fallida'),
+    ]
+    ACTIVAS = (PENDIENTE, EJECUTANDO)
+
+    nombre = models.CharField(max_length=100)
+    argumentos = models.JSONField(default=dict, blank=True)
+    prioridad = models.SmallIntegerField(default=0, help_text='Menor valor se ejecuta primero')
+    clave = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        help_text='Si no está vacía, solo puede haber una tarea activa con esta clave'
+    )
+
+    estado = models.CharField(max_length=1, choices=ESTADO_CHOICES, default=PENDIENTE)
+    ejecutar_despues = models.DateTimeField(default=timezone.now)
+    intentos = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    trabajador = models.CharField(max_length=100, blank=True, default='')
+
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'tareas_tarea'
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            # Lo que consulta el worker en cada vuelta
+            models.Index(fields=['estado', 'prioridad', 'ejecutar_despues'], name='tarea_cola_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['clave'],
+                condition=models.Q(estado__in=['P', 'E']) & ~models.Q(clave=''),
+                name='tarea_clave_activa_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} #{self.pk} ({self.get_estado_display()})"
+
+    @property
+    def latencia(self):
+        """Segundos entre la hora programada y el inicio de la ejecución."""
+        if self.fecha_inicio is None:
+            return None
+        return max((self.fecha_inicio - self.ejecutar_despues).total_seconds(), 0.0)
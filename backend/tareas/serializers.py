@@ -0,0 +1,32 @@
+# tareas/serializers.py
+from rest_framework import serializers
+from .models import Tarea
+
+
+class TareaSerializer(serializers.ModelSerializer):
+    """
+    Serializer para las tareas en segundo plano
+    """
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    latencia = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = Tarea
+        fields = [
+            'id',
+            'nombre',
+            'argumentos',
+            'prioridad',
+            'clave',
+            'estado',
+            'estado_display',
+            'ejecutar_despues',
+            'intentos',
+            'error',
+            'trabajador',
+            'fecha_creacion',
+            'fecha_inicio',
+            'fecha_fin',
+            'latencia',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from siged.presupuesto_consultas import PresupuestoConsultasMixin
+
+from . import cola
+from .models import Tarea
+
+llamadas = []
+
+
+@cola.tarea(nombre='pruebas.anotar', reintentos=1)
+def anotar(valor, falla=False):
+    llamadas.append(valor)
+    if falla:
+        raise ValueError(valor)
+
+
+@cola.tarea(nombre='pruebas.periodica', cada=timedelta(hours=1))
+def periodica():
+    llamadas.append('periodica')
+
+
+class PresupuestoConsultasTareasTests(PresupuestoConsultasMixin, TestCase):
+    """Ningún endpoint GET de tareas debe crecer en consultas con el número de filas."""
+    app_label = 'tareas'
+
+
+@override_settings(TAREAS_RETRASO_REINTENTO_SEGUNDOS=0)
+class ColaTareasTests(TestCase):
+    """El worker toma, reintenta y reprograma tareas guardadas en la base."""
+
+    def setUp(self):
+        llamadas.clear()
+
+    def test_ejecucion_reintentos_y_periodicas(self):
+        futura = anotar.encolar('despues', ejecutar_en=timezone.now() + timedelta(hours=1))
+        anotar.encolar('ahora')
+        fallida = anotar.encolar('falla', falla=True)
+        urgente = cola.encolar('pruebas.anotar', 'primero', prioridad=-1)
+
+        tomadas = cola.tomar(10, 'prueba')
+        self.assertEqual(tomadas[0].pk, urgente.pk)
+        self.assertNotIn(futura.pk, [t.pk for t in tomadas])
+        self.assertEqual(cola.tomar(10, 'otro'), [])
+        for tarea in tomadas:
+            cola.ejecutar(tarea)
+        self.assertEqual(llamadas, ['primero', 'ahora', 'falla'])
+
+        # Un reintento (reintentos=1) y luego queda fallida con el traceback
+        fallida.refresh_from_db()
+        self.assertEqual((fallida.estado, fallida.intentos), (Tarea.PENDIENTE, 1))
+        [reintento] = cola.tomar(10, 'prueba')
+        self.assertFalse(cola.ejecutar(reintento))
+        fallida.refresh_from_db()
+        self.assertEqual(fallida.estado, Tarea.FALLIDA)
+        self.assertIn('ValueError: falla', fallida.error)
+        self.assertEqual(Tarea.objects.get(pk=futura.pk).estado, Tarea.PENDIENTE)
+
+        # Periódica: una sola pendiente por clave y la siguiente se programa al terminar
+        self.assertIn('pruebas.periodica', cola.programar_periodicas())
+        self.assertEqual(cola.programar_periodicas(), [])
+        Tarea.objects.exclude(nombre__startswith='pruebas.').delete()
+        [tarea] = cola.tomar(10, 'prueba')
+        self.assertEqual(tarea.nombre, 'pruebas.periodica')
+        self.assertTrue(cola.ejecutar(tarea))
+        siguiente = Tarea.objects.get(nombre='pruebas.periodica', estado=Tarea.PENDIENTE)
+        self.assertGreater(siguiente.ejecutar_despues, timezone.now() + timedelta(minutes=59))
+
+        resumen = self.client.get('/api/tareas/tareas/resumen/').json()
+        self.assertEqual(resumen['por_estado'][Tarea.FALLIDA], 1)
+        self.assertEqual(resumen['latencia']['cantidad'], 4)
+
+    def test_rescate_y_liberacion(self):
+        tarea = anotar.encolar('x')
+        [tomada] = cola.tomar(1, 'muerto')
+        Tarea.objects.filter(pk=tarea.pk).update(fecha_inicio=timezone.now() - timedelta(days=1))
+        self.assertEqual(cola.rescatar_vencidas(), 1)
+
+        [tomada] = cola.tomar(1, 'nuevo')
+        self.assertEqual(tomada.intentos, 2)
+        cola.liberar([tomada])
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), (Tarea.PENDIENTE, 1))
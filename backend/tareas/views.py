@@ -0,0 +1,41 @@
+# tareas/views.py
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .cola import estadisticas
+from .models import Tarea
+from .serializers import TareaSerializer
+
+
+class TareaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Consulta de la cola de tareas en segundo plano (las ejecuta `manage.py run_worker`)
+    
+    Filtros: ?estado=P|E|C|F, ?nombre=apartado_credito.caducar_deudas
+    """
+    queryset = Tarea.objects.all()
+    serializer_class = TareaSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+        'resumen': 3,
+    }
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        estado = self.request.query_params.get('estado')
+        nombre = self.request.query_params.get('nombre')
+        if estado:
+            queryset = queryset.filter(estado=estado)
+        if nombre:
+            queryset = queryset.filter(nombre=nombre)
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """
+        Endpoint: GET /api/tareas/tareas/resumen/
+        Tareas por estado, atraso de la cola y latencia de la última hora (segundos)
+        """
+        return Response(estadisticas())
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('terceros', '0003_cliente_archivado_proveedor_archivado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
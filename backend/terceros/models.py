@@ -4,8 +4,10 @@ from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
+
+from dominios_comunes.models import ModeloSincronizable
 # Create your models here.
-class Proveedor(models.Model):
+class Proveedor(ModeloSincronizable):
     nombre = models.CharField(max_length=200, unique=True)
     direccion = models.CharField(max_length=300, blank=True, null=True)
     telefono = models.CharField(max_length=20, blank=True, null=True)
@@ -25,7 +27,7 @@ class Proveedor(models.Model):
         verbose_name = "Proveedor"
         verbose_name_plural = "Proveedores"
 
-class Cliente(models.Model):
+class Cliente(ModeloSincronizable):
     nombre = models.CharField(max_length=200, unique=True)
     direccion = models.CharField(max_length=300, blank=True, null=True)
     telefono = models.CharField(max_length=20, blank=True, null=True)
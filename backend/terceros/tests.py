@@ -1,3 +1,46 @@
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from siged.presupuesto_consultas import PresupuestoConsultasMixin
+
+from .models import Cliente
+
+
+class PresupuestoConsultasTercerosTests(PresupuestoConsultasMixin, TestCase):
+    """Ningún endpoint GET de terceros debe crecer en consultas con el número de filas."""
+    app_label = 'terceros'
+
+
+class SincronizacionClientesTests(TestCase):
+    """?since= devuelve solo los cambios y las eliminaciones desde la marca anterior."""
+    url = '/api/terceros/clientes/'
+
+    def test_delta_con_cambios_y_eliminados(self):
+        viejo = Cliente.objects.create(nombre='Viejo', cedula='1')
+        borrado = Cliente.objects.create(nombre='Borrado', cedula='2')
+        hace_un_rato = timezone.now() - timedelta(minutes=1)
+        Cliente.objects.filter(pk__in=[viejo.pk, borrado.pk]).update(fecha_actualizacion=hace_un_rato)
+
+        marca = self.client.get(self.url, {'since': hace_un_rato.isoformat()}).json()['marca']
+        nuevo = Cliente.objects.create(nombre='Nuevo', cedula='3')
+        borrado_id = borrado.pk
+        borrado.delete()
+
+        with self.assertNumQueries(2):
+            delta = self.client.get(self.url, {'since': hace_un_rato.isoformat()}).json()
+        self.assertFalse(delta['completo'])
+        self.assertEqual([c['id'] for c in delta['cambios']], [nuevo.pk])
+        self.assertEqual(delta['eliminados'], [borrado_id])
+        self.assertTrue(marca)
 
-# Create your tests here.
+    def test_marca_vencida_o_invalida(self):
+        Cliente.objects.create(nombre='Uno', cedula='1')
+        completo = self.client.get(self.url, {'since': '2000-01-01T00:00:00+00:00'}).json()
+        self.assertTrue(completo['completo'])
+        self.assertEqual(len(completo['cambios']), 1)
+        self.assertEqual(self.client.get(self.url, {'since': 'ayer'}).status_code, 400)
+        imposible = self.client.get(self.url, {'since': '2024-02-30T00:00:00'})
+        self.assertEqual(imposible.status_code, 400)
+        self.assertIn('since', imposible.json())
@@ -1,17 +1,24 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from siged.campos import CamposDispersosMixin
+from siged.sincronizacion import SincronizacionMixin
 from .models import Proveedor, Cliente
 from .serializers import ProveedorSerializer, ClienteSerializer
 
 
-class ProveedorViewSet(viewsets.ModelViewSet):
+class ProveedorViewSet(CamposDispersosMixin, SincronizacionMixin, viewsets.ModelViewSet):
     """
     Vista que permite realizar operaciones CRUD sobre los proveedores.
     Soporta actualizaciones parciales mediante el método PATCH.
     """
     queryset = Proveedor.objects.all()
     serializer_class = ProveedorSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+        'buscar_por_nombre': {'consultas': 2, 'params': {'nombre': 'Proveedor'}},
+    }
 
     def get_queryset(self):
         """
@@ -80,13 +87,19 @@ class ProveedorViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
 
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(CamposDispersosMixin, SincronizacionMixin, viewsets.ModelViewSet):
     """
     Vista que permite realizar operaciones CRUD sobre los clientes.
     Soporta actualizaciones parciales mediante el método PATCH.
     """
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
+    presupuesto_consultas = {
+        'list': 1,
+        'retrieve': 1,
+        'buscar_por_cedula': {'consultas': 1, 'params': {'cedula': 'C0'}},
+        'buscar_por_nombre': {'consultas': 2, 'params': {'nombre': 'Cliente'}},
+    }
 
     def get_queryset(self):
         # 🔹 Para acciones que requieren el objeto específico, devolver TODOS
@@ -1,6 +1,7 @@
 "use client";
 import { useState, useEffect, useRef } from "react";
 import { FaEye, FaMoneyBillWave, FaChevronLeft, FaChevronRight, FaSpinner } from "react-icons/fa";
+import { suscribirEventos } from "../config/eventos";
 
 // ⚠️ IMPORTANTE: Ajusta esta función según tu configuración
 const apiUrl = (path) => `https://siged-production.up.railway.app/api${path}`;
@@ -24,6 +25,7 @@ const Caja = () => {
   // Fechas para cerrar caja
   const [fechaInicio, setFechaInicio] = useState(new Date().toISOString().split("T")[0]);
   const [fechaFin, setFechaFin] = useState("");
+  const [progresoCierre, setProgresoCierre] = useState(null); // { etapa, progreso } mientras corre el cierre
 
   // Modal de detalles
   const [modalDetalle, setModalDetalle] = useState(null);
@@ -39,6 +41,31 @@ const Caja = () => {
     cargarDatosActual(); // ✅ Cargar caja actual por defecto
   }, []);
 
+  // =============================================
+  // EVENTOS EN VIVO (movimientos y saldos sin recargar)
+  // =============================================
+  useEffect(() => {
+    if (cajaSeleccionada !== "actual") return undefined;
+    return suscribirEventos({
+      movimiento_caja: (movimiento) => {
+        if (movimiento.cuota_info) {
+          cargarDatosActual(); // Una cuota también cambia las deudas
+          return;
+        }
+        setDatosActual((prev) => prev && !prev.movimientos.some((m) => m.id === movimiento.id)
+          ? { ...prev, movimientos: [movimiento, ...prev.movimientos] }
+          : prev);
+      },
+      saldo_cuenta: (cuenta) => {
+        setDatosActual((prev) => prev && {
+          ...prev,
+          cuentas: prev.cuentas.map((c) => (c.id === cuenta.id ? cuenta : c)),
+        });
+      },
+      resincronizar: () => cargarDatosActual(),
+    });
+  }, [cajaSeleccionada]);
+
   const cargarCierres = async () => {
     try {
       const res = await fetch(apiUrl("/caja/cierres/"));
@@ -297,11 +324,28 @@ const Caja = () => {
         throw new Error(error.error || "Error al cerrar caja");
       }
 
+      // El cierre corre en segundo plano: consultar el trabajo hasta que termine
+      let trabajo = (await res.json()).trabajo;
+      setProgresoCierre(trabajo);
+      while (trabajo.estado === "P" || trabajo.estado === "E") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const resTrabajo = await fetch(apiUrl(`/caja/cierres-trabajos/${trabajo.id}/`));
+        if (!resTrabajo.ok) throw new Error("Error al consultar el cierre");
+        trabajo = await resTrabajo.json();
+        setProgresoCierre(trabajo);
+      }
+
+      if (trabajo.estado === "F") {
+        throw new Error(trabajo.error || "Error al cerrar caja");
+      }
+
       alert("✅ Caja cerrada exitosamente");
       window.location.reload();
 
     } catch (err) {
       alert(`❌ Error: ${err.message}`);
+    } finally {
+      setProgresoCierre(null);
     }
   };
 
@@ -559,9 +603,17 @@ const Caja = () => {
                   </div>
                   <button
                     onClick={handleCerrarCaja}
-                    className="mt-6 bg-red-600 hover:bg-red-700 text-white px-6 py-2 rounded-lg font-medium transition"
+                    disabled={progresoCierre !== null}
+                    className="mt-6 bg-red-600 hover:bg-red-700 disabled:bg-red-300 text-white px-6 py-2 rounded-lg font-medium transition flex items-center gap-2"
                   >
-                    Cerrar Caja
+                    {progresoCierre ? (
+                      <>
+                        <FaSpinner className="animate-spin" />
+                        Cerrando... {progresoCierre.progreso}%
+                      </>
+                    ) : (
+                      "Cerrar Caja"
+                    )}
                   </button>
                 </div>
               </div>
@@ -47,19 +47,11 @@ const CompraForm = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [provRes, metRes, preRes] = await Promise.all([
-          fetch(apiUrl("terceros/proveedores/")),
-          fetch(apiUrl("dominios_comunes/metodos-pago/")),
-          fetch(apiUrl("prendas/prendas/")),
-        ]);
-        const [prov, met, pre] = await Promise.all([
-          provRes.json(),
-          metRes.json(),
-          preRes.json(),
-        ]);
-        setProveedores(prov);
-        setMetodosPago(met);
-        setPrendas(pre);
+        const res = await fetch(apiUrl("bootstrap/?incluir=proveedores,metodos_pago,prendas"));
+        const datos = await res.json();
+        setProveedores(datos.proveedores.datos);
+        setMetodosPago(datos.metodos_pago.datos);
+        setPrendas(datos.prendas.datos);
       } catch (error) {
         console.error("Error cargando datos:", error);
       }
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import { apiUrl } from "../config/api";
+import { suscribirEventos } from "../config/eventos";
 import {
   BarChart,
   Bar,
@@ -40,8 +41,26 @@ export default function Inicio() {
 
   useEffect(() => {
     cargarDatos();
+    // El resumen se vuelve a pedir solo cuando el backend avisa que cambió
+    return suscribirEventos({
+      dashboard: () => cargarDashboard(),
+      resincronizar: () => cargarDatos(),
+    });
   }, []);
 
+  const cargarDashboard = async () => {
+    const resDashboard = await fetch(apiUrl("/compra_venta/dashboard/resumen/"));
+    const dataDashboard = await resDashboard.json();
+
+    setStockTotal(dataDashboard.stock_total || 0);
+    setApartadoTotal(dataDashboard.apartado_total || 0);
+    setPromediosOro({
+      nacional: dataDashboard.promedio_oro_nacional || 0,
+      italiano: dataDashboard.promedio_oro_italiano || 0,
+    });
+    setVentasVsCompras(dataDashboard.ventas_vs_compras || []);
+  };
+
   const cargarDatos = async () => {
     setLoading(true);
     try {
@@ -62,16 +81,7 @@ export default function Inicio() {
       setDatosGrafico(cierresProcesados);
 
       // 2. Cargar estadísticas optimizadas del dashboard
-      const resDashboard = await fetch(apiUrl("/compra_venta/dashboard/resumen/"));
-      const dataDashboard = await resDashboard.json();
-
-      setStockTotal(dataDashboard.stock_total || 0);
-      setApartadoTotal(dataDashboard.apartado_total || 0);
-      setPromediosOro({
-        nacional: dataDashboard.promedio_oro_nacional || 0,
-        italiano: dataDashboard.promedio_oro_italiano || 0,
-      });
-      setVentasVsCompras(dataDashboard.ventas_vs_compras || []);
+      await cargarDashboard();
 
       // 3. Cargar Deudas por Cobrar (Clientes)
       const resDeudasCobrar = await fetch(apiUrl("/apartado_credito/deudas-por-cobrar-optimizado/"));
@@ -97,25 +97,26 @@ const VentaForm = () => {
   // CARGAR DATOS INICIALES
   // ==============================================
   useEffect(() => {
-    fetchClientes();
-    fetchPrendas();
-    fetchMetodosPago();
+    fetchDatosIniciales();
   }, []);
 
-  const fetchClientes = async () => {
-    const res = await axios.get(apiUrl("/terceros/clientes/"));
-    setClientes(res.data);
+  // Clientes, prendas y métodos de pago en una sola petición
+  const fetchDatosIniciales = async () => {
+    const res = await axios.get(apiUrl("/bootstrap/"), {
+      params: { incluir: "clientes,prendas,metodos_pago" },
+    });
+    setClientes(res.data.clientes.datos);
+    setPrendasDisponibles(res.data.prendas.datos);
+    setMetodosPago(res.data.metodos_pago.datos);
   };
 
-  const fetchPrendas = async () => {
-    const res = await axios.get(apiUrl("/prendas/prendas/"));
-    const data = Array.isArray(res.data) ? res.data : res.data.results;
+  const setPrendasDisponibles = (data) => {
     setPrendas(data.filter(p => !p.archivado && p.existencia > 0));
   };
 
-  const fetchMetodosPago = async () => {
-    const res = await axios.get(apiUrl("/dominios_comunes/metodos-pago/"));
-    setMetodosPago(res.data);
+  const fetchPrendas = async () => {
+    const res = await axios.get(apiUrl("/prendas/prendas/"));
+    setPrendasDisponibles(Array.isArray(res.data) ? res.data : res.data.results);
   };
 
   // ==============================================
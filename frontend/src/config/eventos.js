@@ -0,0 +1,15 @@
+// Suscripción a los eventos en vivo del backend (GET /api/eventos/, SSE)
+import { apiUrl } from "./api";
+
+// manejadores: { tipo_evento: (datos) => {...} }. Retorna la función para cerrar la conexión.
+// EventSource reconecta solo y retoma desde el último evento recibido.
+export const suscribirEventos = (manejadores) => {
+  const tipos = Object.keys(manejadores).filter((t) => t !== "resincronizar");
+  const fuente = new EventSource(apiUrl(`/eventos/?tipos=${tipos.join(",")}`));
+
+  Object.entries(manejadores).forEach(([tipo, manejar]) => {
+    fuente.addEventListener(tipo, (evento) => manejar(JSON.parse(evento.data)));
+  });
+
+  return () => fuente.close();
+};
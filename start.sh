@@ -6,8 +6,33 @@ cd backend
 # Apply database migrations
 python3 manage.py migrate
 
+# Retomar los cierres de caja que quedaron a medias con el reinicio
+python3 manage.py reanudar_cierres
+
 # Collect static files
 python3 manage.py collectstatic --noinput
 
-# Start Gunicorn server
-gunicorn siged.wsgi:application --bind 0.0.0.0:$PORT
+# Worker de la cola de tareas (tareas/cola.py): tareas encoladas y periódicas.
+# Corre junto a gunicorn en el mismo contenedor; si se despliega como servicio
+# aparte (Procfile `worker: python manage.py run_worker`), usar RUN_WORKER=0 aquí.
+if [ "${RUN_WORKER:-1}" = "1" ]; then
+    python3 manage.py run_worker &
+    WORKER_PID=$!
+fi
+
+# Start Gunicorn server. Cada conexión SSE de /api/eventos/ ocupa un hilo mientras
+# dura; por proceso se aceptan a lo sumo EVENTOS_MAXIMO_CONEXIONES (por defecto
+# GUNICORN_THREADS / 4) para que el resto de la API siempre tenga hilos libres.
+gunicorn siged.wsgi:application --bind 0.0.0.0:$PORT --worker-class gthread --threads ${GUNICORN_THREADS:-16} &
+GUNICORN_PID=$!
+
+# SIGTERM del contenedor a los dos procesos (el worker termina la tarea en curso)
+trap 'kill -TERM $GUNICORN_PID $WORKER_PID 2>/dev/null' TERM INT
+
+# Si cualquiera de los dos termina, se detiene el otro y sale el contenedor para
+# que la plataforma lo reinicie (un worker caído no debe pasar desapercibido)
+wait -n
+ESTADO=$?
+kill -TERM $GUNICORN_PID $WORKER_PID 2>/dev/null
+wait
+exit $ESTADO